@@ -35,7 +35,16 @@ class GeeArticleConfig:
     gee_retry_max_attempts: int
     # Chunks processados em paralelo por imagem (buf+pt sempre concorrentes por chunk).
     # Chamadas GEE em vôo = workers * 2. workers=1 → comportamento serial original.
+    # No motor "batched": requisições (lote de compostos x chunk) em vôo.
     workers: int
+    # "batched": vários compostos por reduceRegions + cache local; "per_image": um getInfo por imagem/chunk.
+    extraction_engine: str
+    # Compostos por requisição no motor batched (0 = auto pelo limite de features).
+    weeks_per_request: int
+    # Limite de features por getInfo (GEE aborta coleções acima de 5000 elementos).
+    max_features_per_request: int
+    # Cache (composto x chunk) em data/_article/_caches/gee/biomass.sqlite.
+    cache_enabled: bool
 
 
 @dataclass
@@ -111,6 +120,10 @@ def load_article_config() -> ArticlePipelineConfig:
         pause_between_chunks_s=float(gee_raw.get("pause_between_chunks_s", 0.5)),
         gee_retry_max_attempts=int(gee_raw.get("gee_retry_max_attempts", 3)),
         workers=max(1, int(gee_raw.get("workers", 2))),
+        extraction_engine=str(gee_raw.get("extraction_engine", "batched")).strip().lower(),
+        weeks_per_request=max(0, int(gee_raw.get("weeks_per_request", 0))),
+        max_features_per_request=max(2, int(gee_raw.get("max_features_per_request", 5000))),
+        cache_enabled=bool(gee_raw.get("cache_enabled", True)),
     )
 
     eda_raw = raw.get("eda", {})
@@ -6,9 +6,10 @@
 #   1. Extrair série semanal (MOD13Q1 por padrão) na base canônica, por
 #      (cidade_norm, gee_site_key): buffer centrado em (lat_foco, lon_foco)
 #      e amostra no ponto do foco.
-#   2. merge_asof (backward) por (cidade_norm, gee_site_key) para alinhar
-#      ts_hour ao composto semanal.
-#   3. ffill por grupo (cidade_norm, gee_site_key).
+#   2. Lookup backward por (cidade_norm, gee_site_key) para alinhar ts_hour
+#      ao composto semanal (equivalente ao merge_asof; um searchsorted para
+#      todas as linhas, base horária lida em record batches).
+#   3. ffill por grupo (cidade_norm, gee_site_key), contínuo entre batches.
 #   4. Propagar colunas para outras bases via merge em
 #      (cidade_norm, gee_site_key, ts_hour).
 #
@@ -22,9 +23,10 @@ import logging
 import re
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -34,7 +36,9 @@ _project_root = Path(__file__).resolve().parents[2]
 if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
-from src.article.config import ArticlePipelineConfig, load_article_config
+from src.article.config import ArticlePipelineConfig, GeeArticleConfig, load_article_config
+from src.article.gee_tile_cache import GeeTileCache, chunk_key, points_hash
+from src.article.gee_tile_cache import default_path as gee_cache_default_path
 from src.article.pipeline_state import (
     GEE_MANIFEST_NAME,
     gee_mark_year_complete,
@@ -70,11 +74,7 @@ def _normalize_join_keys(df: pd.DataFrame, key_cols: List[str], ts_col: str) ->
     return out
 
 
-def compute_gee_site_key(df: pd.DataFrame) -> pd.Series:
-    """
-    Chave estável por foco: FOCO_ID quando válido; senão lat/lon do foco
-    arredondados (5 casas).
-    """
+def _site_key_rows(df: pd.DataFrame) -> pd.Series:
     lat = pd.to_numeric(df["lat_foco"], errors="coerce")
     lon = pd.to_numeric(df["lon_foco"], errors="coerce")
     coord_key = lat.round(5).astype(str) + "_" + lon.round(5).astype(str)
@@ -87,6 +87,24 @@ def compute_gee_site_key(df: pd.DataFrame) -> pd.Series:
     return np.where(valid, "foco_" + fid, coord_key)
 
 
+def compute_gee_site_key(df: pd.DataFrame) -> pd.Series:
+    """
+    Chave estável por foco: FOCO_ID quando válido; senão lat/lon do foco
+    arredondados (5 casas).
+
+    As strings são montadas uma vez por combinação distinta de
+    (FOCO_ID, lat_foco, lon_foco) — cada foco se repete em todas as horas.
+    """
+    cols = [c for c in (FOCO_ID_COL, "lat_foco", "lon_foco") if c in df.columns]
+    codes = df.groupby(cols, dropna=False, sort=False).ngroup().to_numpy()
+    _, first = np.unique(codes, return_index=True)
+    keys = np.asarray(_site_key_rows(df.iloc[first]), dtype=object)
+    out = keys[np.searchsorted(codes[first], codes)] if len(df) else keys
+    if FOCO_ID_COL not in df.columns:
+        return pd.Series(out, index=df.index)
+    return out
+
+
 def ensure_gee_site_key(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy()
     out[SITE_KEY_COL] = compute_gee_site_key(out)
@@ -195,12 +213,17 @@ def extract_weekly_biomass_gee(
     cfg: ArticlePipelineConfig,
     log: logging.Logger,
     ee_mod: Any,
+    cache: Optional[GeeTileCache] = None,
 ) -> Optional[pd.DataFrame]:
     """
     Extrai série semanal NDVI/EVI (buffer + ponto) para cada site.
 
     sites_df: colunas gee_site_key, cidade_norm, lat_foco, lon_foco (linhas únicas).
     Retorna DataFrame longo: cidade_norm, gee_site_key, composite_start, NDVI_buffer, ...
+
+    Motor (article_pipeline.gee.extraction_engine): "batched" (default) usa
+    _extract_weekly_batched com o cache local (cache=None abre o default se
+    cache_enabled); "per_image" é o caminho original, um getInfo por imagem/chunk.
     """
     if sites_df is None or len(sites_df) == 0:
         log.warning("Nenhum site para extracao GEE no ano %d.", year)
@@ -252,6 +275,23 @@ def extract_weekly_biomass_gee(
         .sort("system:time_start")
     )
 
+    if gcfg.extraction_engine == "batched":
+        own_cache = cache is None and gcfg.cache_enabled
+        if own_cache:
+            cache = GeeTileCache(gee_cache_default_path(cfg.output_root))
+        try:
+            weekly, stats = _extract_weekly_batched(sites_df, year, gcfg, log, ee, col, cache)
+        finally:
+            if own_cache:
+                cache.close()
+        log.info("  GEE ano %d: %s", year, stats.summary())
+        return weekly
+    if gcfg.extraction_engine != "per_image":
+        raise ValueError(
+            f"article_pipeline.gee.extraction_engine invalido: {gcfg.extraction_engine!r} "
+            f"(opcoes: {EXTRACTION_ENGINES})"
+        )
+
     n_images = call_gee_with_retry(
         log, lambda: col.size().getInfo(), max_attempts=ra, base_delay=5.0, max_delay=120.0
     )
@@ -424,8 +464,360 @@ def _extract_chunk(
 
 
 # ---------------------------------------------------------------------------
-# Alinhamento semanal → horário via merge_asof + ffill
+# Motor em lote — vários compostos por reduceRegions + cache (composto x chunk)
 # ---------------------------------------------------------------------------
+EXTRACTION_ENGINES = ("batched", "per_image")
+
+
+@dataclass
+class GeeBatchStats:
+    requests: int = 0
+    cached_keys: int = 0
+    fetched_keys: int = 0
+    failed_keys: int = 0
+    split_retries: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requisicoes | chaves (composto x chunk): cache={self.cached_keys} "
+            f"buscadas={self.fetched_keys} falhas={self.failed_keys} | "
+            f"lotes divididos={self.split_retries} | {self.seconds:.1f}s"
+        )
+
+
+def _chunk_feature_collection(chunk: List[Dict], ee: Any, buffer_m: float) -> Any:
+    """Buffer e ponto de cada site na mesma coleção (_i = posição no chunk, _k = b/p)."""
+    feats: List[Any] = []
+    for i, rec in enumerate(chunk):
+        pt = ee.Geometry.Point([float(rec["lon_foco"]), float(rec["lat_foco"])])
+        feats.append(ee.Feature(pt.buffer(buffer_m), {"_i": i, "_k": "b"}))
+        feats.append(ee.Feature(pt, {"_i": i, "_k": "p"}))
+    return ee.FeatureCollection(feats)
+
+
+def _batched_request(
+    ee: Any, col: Any, fc: Any, times: List[int], bands: List[str], scale_m: int, tile_scale: int,
+) -> Optional[Dict]:
+    """Um getInfo: reduceRegions do chunk em cada composto de `times`, features marcadas com _t."""
+    sub = col.filter(ee.Filter.inList("system:time_start", list(times)))
+    reducer = ee.Reducer.mean()
+
+    def _per_image(img: Any) -> Any:
+        img = ee.Image(img)
+        t = img.get("system:time_start")
+        red = _mod13_prepare_image(img, ee, bands).reduceRegions(
+            collection=fc, reducer=reducer, scale=scale_m, tileScale=tile_scale,
+        )
+        return red.map(lambda f: f.set("_t", t))
+
+    return ee.FeatureCollection(sub.map(_per_image)).flatten().getInfo()
+
+
+def _parse_batched(
+    info: Optional[Dict], times: List[int], n_sites: int, bands: List[str],
+) -> Dict[int, List[List[Optional[float]]]]:
+    """time_start -> matriz (site, [{b}_buffer..., {b}_point...]); compostos sem feature ficam de fora."""
+    out = {int(t): [[None] * (2 * len(bands)) for _ in range(n_sites)] for t in times}
+    seen = set()
+    for feat in (info or {}).get("features", []):
+        props = feat.get("properties") or {}
+        t, i, k = props.get("_t"), props.get("_i"), props.get("_k")
+        if t is None or i is None or int(t) not in out or not 0 <= int(i) < n_sites:
+            continue
+        off = 0 if k == "b" else len(bands)
+        row = out[int(t)][int(i)]
+        for j, b in enumerate(bands):
+            v = props.get(b)
+            row[off + j] = None if v is None else float(v)
+        seen.add(int(t))
+    return {t: m for t, m in out.items() if t in seen}
+
+
+def _extract_weekly_batched(
+    sites_df: pd.DataFrame,
+    year: int,
+    gcfg: GeeArticleConfig,
+    log: logging.Logger,
+    ee: Any,
+    col: Any,
+    cache: Optional[GeeTileCache] = None,
+) -> Tuple[Optional[pd.DataFrame], GeeBatchStats]:
+    """
+    Mesmo resultado de extract_weekly_biomass_gee, com requisições por (lote de compostos, chunk).
+
+    - Datas dos compostos: um aggregate_array (uma requisição).
+    - Sites ordenados por gee_site_key antes do chunking: chunks (e o hash
+      dos pontos) estáveis entre execuções.
+    - Chaves (composto, chunk) já no cache não são pedidas; as ausentes são
+      agrupadas por chunk em lotes de até weeks_per_request compostos (auto:
+      max_features_per_request // (2 * sites no chunk)).
+    - Lote que falha após as tentativas é dividido ao meio e reenviado (cobre
+      limite de payload); lote de um composto que falha fica ausente no
+      cache e é buscado no próximo run.
+    """
+    t_start = time.perf_counter()
+    stats = GeeBatchStats()
+    ra = gcfg.gee_retry_max_attempts
+    bands = list(gcfg.bands)
+    buffer_m = gcfg.buffer_radius_km * 1000.0
+    tile_scale = max(1, gcfg.tile_scale)
+    workers = max(1, gcfg.workers)
+    pause_s = max(0.0, gcfg.pause_between_chunks_s) if workers == 1 else 0.0
+
+    times = call_gee_with_retry(
+        log, lambda: col.aggregate_array("system:time_start").getInfo(),
+        max_attempts=ra, base_delay=5.0, max_delay=120.0,
+    )
+    stats.requests += 1
+    if times is None:
+        log.error("Falha ao listar compostos da colecao GEE (ano %d).", year)
+        return None, stats
+    times = sorted({int(t) for t in times})
+    if not times:
+        log.warning("Colecao GEE vazia para o ano %d apos filterDate/filterBounds.", year)
+        return None, stats
+
+    sites = sites_df.sort_values(["gee_site_key", "cidade_norm"], kind="stable").to_dict("records")
+    chunks = _chunked(sites, max(1, gcfg.sites_chunk_size))
+    hashes = [
+        points_hash([(str(r["gee_site_key"]), r["lat_foco"], r["lon_foco"]) for r in c]) for c in chunks
+    ]
+    keys = {
+        (t, ci): chunk_key(gcfg.image_collection, bands, t, buffer_m, gcfg.scale_m, hashes[ci])
+        for t in times
+        for ci in range(len(chunks))
+    }
+    cached = cache.get_many(keys.values()) if cache is not None else {}
+    have: Dict[Tuple[int, int], List[List[Optional[float]]]] = {
+        tc: cached[k] for tc, k in keys.items() if k in cached
+    }
+    stats.cached_keys = len(have)
+
+    batches: List[Tuple[int, List[int]]] = []
+    for ci, chunk in enumerate(chunks):
+        todo = [t for t in times if (t, ci) not in have]
+        per_req = gcfg.weeks_per_request or max(1, gcfg.max_features_per_request // (2 * len(chunk)))
+        batches.extend((ci, todo[a:a + per_req]) for a in range(0, len(todo), per_req))
+
+    log.info(
+        "  GEE ano %d: %d compostos x %d chunks (%d sites) | cache=%d/%d | %d requisicoes (workers=%d).",
+        year, len(times), len(chunks), len(sites), len(have), len(keys), len(batches), workers,
+    )
+
+    fcs: Dict[int, Any] = {}
+
+    def _run(ci: int, ts: List[int]) -> Optional[Dict]:
+        info = call_gee_with_retry(
+            log, lambda: _batched_request(ee, col, fcs[ci], ts, bands, gcfg.scale_m, tile_scale),
+            max_attempts=ra,
+        )
+        if pause_s > 0:
+            time.sleep(pause_s)
+        return info
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gee-batch") as pool:
+        pending: Dict[Any, Tuple[int, List[int]]] = {}
+
+        def _submit(ci: int, ts: List[int]) -> None:
+            if ci not in fcs:
+                fcs[ci] = _chunk_feature_collection(chunks[ci], ee, buffer_m)
+            pending[pool.submit(_run, ci, ts)] = (ci, ts)
+
+        for ci, ts in batches:
+            _submit(ci, ts)
+        n_done = 0
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                ci, ts = pending.pop(fut)
+                stats.requests += 1
+                n_done += 1
+                try:
+                    info = fut.result()
+                except Exception as exc:
+                    log.warning("Requisicao GEE falhou (chunk %d, %d compostos): %s", ci, len(ts), exc)
+                    info = None
+                got = _parse_batched(info, ts, len(chunks[ci]), bands) if info is not None else {}
+                if cache is not None and got:
+                    # SQLite só na thread principal
+                    cache.put_many((keys[(t, ci)], gcfg.image_collection, t, m) for t, m in got.items())
+                have.update({(t, ci): m for t, m in got.items()})
+                stats.fetched_keys += len(got)
+                lost = [t for t in ts if t not in got]
+                if lost and info is None and len(lost) > 1:
+                    stats.split_retries += 1
+                    mid = len(lost) // 2
+                    _submit(ci, lost[:mid])
+                    _submit(ci, lost[mid:])
+                elif lost:
+                    stats.failed_keys += len(lost)
+                    log.warning(
+                        "reduceRegions sem resultado (chunk %d, %d compostos); fica para o proximo run.",
+                        ci, len(lost),
+                    )
+                if n_done % 25 == 0:
+                    log.info("  GEE ano %d: %d requisicoes concluidas, %d pendentes.", year, n_done, len(pending))
+
+    rows: List[Dict[str, Any]] = []
+    for t in times:
+        composite_start = pd.to_datetime(t, unit="ms")
+        for ci, chunk in enumerate(chunks):
+            m = have.get((t, ci))
+            if m is None:
+                continue
+            for rec, vals in zip(chunk, m):
+                row: Dict[str, Any] = {
+                    "cidade_norm": rec["cidade_norm"],
+                    "gee_site_key": str(rec["gee_site_key"]),
+                    "composite_start": composite_start,
+                }
+                for j, b in enumerate(bands):
+                    row[f"{b}_buffer"] = vals[j]
+                    row[f"{b}_point"] = vals[len(bands) + j]
+                rows.append(row)
+
+    stats.seconds = time.perf_counter() - t_start
+    if not rows:
+        return None, stats
+    return pd.DataFrame(rows), stats
+
+
+# ---------------------------------------------------------------------------
+# Alinhamento semanal → horário (lookup backward em lote + ffill)
+# ---------------------------------------------------------------------------
+ALIGN_BATCH_ROWS = 500_000
+
+
+def _ts_ns(values: Any) -> np.ndarray:
+    """Timestamps como int64 em ns (NaT -> int64 mínimo; filtrar com notna antes)."""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values)
+    return np.asarray(values, dtype="datetime64[ns]").astype(np.int64)
+
+
+class WeeklyBiomassIndex:
+    """
+    Compostos semanais ordenados por (grupo, composite_start) para lookup backward em lote.
+
+    Grupo = (station_col, site_key_col). Os instantes viram postos no conjunto
+    ordenado de composite_start; a chave código_grupo * (n_postos + 1) + posto é
+    monotônica por grupo, então um único searchsorted dá, para cada linha
+    horária, o último composto com composite_start <= ts_hour do mesmo grupo
+    (mesmo resultado do merge_asof backward por grupo).
+    Composite_start repetido no grupo: vale a última linha (drop_duplicates keep="last").
+    """
+
+    def __init__(
+        self,
+        df_weekly: pd.DataFrame,
+        biomass_cols: List[str],
+        station_col: str = "cidade_norm",
+        site_key_col: str = SITE_KEY_COL,
+    ):
+        self.biomass_cols = list(biomass_cols)
+        st = df_weekly[station_col].astype("string")
+        sk = df_weekly[site_key_col].astype("string")
+        ts = pd.to_datetime(df_weekly["composite_start"])
+        ok = (st.notna() & sk.notna() & ts.notna()).to_numpy()
+
+        codes, self.groups = pd.MultiIndex.from_arrays([st[ok], sk[ok]]).factorize()
+        t = _ts_ns(ts[ok])
+        self.ts_grid = np.unique(t)
+        self.span = np.int64(len(self.ts_grid) + 1)
+        key = codes.astype(np.int64) * self.span + np.searchsorted(self.ts_grid, t, side="right")
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        last = np.r_[key[1:] != key[:-1], True] if len(key) else np.zeros(0, dtype=bool)
+        take = order[last]
+        self.key = key[last]
+        self.code = codes[take].astype(np.int64)
+
+        self.values = np.full((len(take), len(self.biomass_cols)), np.nan, dtype=np.float64)
+        for j, c in enumerate(self.biomass_cols):
+            if c in df_weekly.columns:
+                self.values[:, j] = np.asarray(df_weekly[c].to_numpy()[ok][take], dtype=np.float64)
+        self._values_pad = np.vstack([self.values, np.full((1, len(self.biomass_cols)), np.nan)])
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.groups)
+
+    def group_codes(self, station: pd.Series, site_key: pd.Series) -> np.ndarray:
+        """Código do grupo de cada linha (-1 sem composto semanal ou chave nula)."""
+        # Pares (cidade, site) fatorados como inteiros; só os pares distintos
+        # passam pelo índice de strings dos grupos semanais.
+        st_codes, st_uniq = pd.factorize(station.astype("string"))
+        sk_codes, sk_uniq = pd.factorize(site_key.astype("string"))
+        pair = st_codes.astype(np.int64) * (len(sk_uniq) + 1) + sk_codes
+        pair_codes, pairs = pd.factorize(pair)
+        st_i, sk_i = np.divmod(pairs, len(sk_uniq) + 1)
+        ok = (st_i >= 0) & (sk_i < len(sk_uniq))  # código -1 (chave nula) em qualquer lado
+        mapped = np.full(len(pairs), -1, dtype=np.int64)
+        if ok.any():
+            mi = pd.MultiIndex.from_arrays([st_uniq.take(st_i[ok]), sk_uniq.take(sk_i[ok])])
+            mapped[ok] = self.groups.get_indexer(mi)
+        return mapped[pair_codes] if len(pair_codes) else np.zeros(0, dtype=np.int64)
+
+    def lookup(self, codes: np.ndarray, ts: pd.Series) -> np.ndarray:
+        """Matriz (linhas, biomass_cols) do composto vigente em ts; NaN sem composto anterior."""
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts)
+        if len(self.key) == 0:
+            return np.full((len(codes), len(self.biomass_cols)), np.nan, dtype=np.float64)
+        # NaT vira int64 mínimo -> posto 0 (antes de qualquer composto); código -1 -> chave negativa.
+        rank = np.searchsorted(self.ts_grid, _ts_ns(ts), side="right")
+        pos = np.searchsorted(self.key, codes * self.span + rank, side="right") - 1
+        ok = (codes >= 0) & (pos >= 0) & ts.notna().to_numpy()
+        ok &= self.code[np.maximum(pos, 0)] == codes
+        # Última linha de _values_pad é NaN: uma única cópia indexada, sem máscara por coluna.
+        return self._values_pad[np.where(ok, pos, len(self.key))]
+
+    def align(
+        self,
+        df: pd.DataFrame,
+        station_col: str = "cidade_norm",
+        site_key_col: str = SITE_KEY_COL,
+        ts_col: str = "ts_hour",
+        carry: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        Anexa biomass_cols a df (ordem original) com ffill por grupo.
+
+        carry: matriz (n_groups, n_cols) com o último valor não nulo de cada
+        grupo em lotes anteriores do mesmo arquivo; atualizada in-place.
+        """
+        df = df.drop(columns=[c for c in self.biomass_cols if c in df.columns])
+        for col in (station_col, site_key_col):
+            df[col] = df[col].astype("string")
+        # Chave nula não formava grupo no groupby do caminho antigo: linha descartada.
+        keep = (df[station_col].notna() & df[site_key_col].notna()).to_numpy()
+        if not keep.all():
+            df = df.loc[keep]
+        df = df.reset_index(drop=True)
+
+        codes = self.group_codes(df[station_col], df[site_key_col])
+        vals = self.lookup(codes, df[ts_col])
+        if len(df) and self.biomass_cols:
+            filled = pd.DataFrame(vals).groupby(codes, sort=False).ffill().to_numpy(dtype=np.float64, copy=True)
+            if carry is not None:
+                grouped = codes >= 0
+                gap = np.isnan(filled) & grouped[:, None]
+                if gap.any():
+                    r, c = np.nonzero(gap)
+                    filled[r, c] = carry[codes[r], c]
+                tail = pd.DataFrame(filled[grouped]).groupby(codes[grouped], sort=False).last()
+                t_idx = tail.index.to_numpy()
+                for j in range(len(self.biomass_cols)):
+                    t_col = tail[j].to_numpy(dtype=np.float64)
+                    ok = ~np.isnan(t_col)
+                    carry[t_idx[ok], j] = t_col[ok]
+            vals = filled
+        for j, c in enumerate(self.biomass_cols):
+            df[c] = vals[:, j]
+        return df
+
+
 def align_weekly_to_hourly(
     df_hourly: pd.DataFrame,
     df_weekly: pd.DataFrame,
@@ -437,53 +829,83 @@ def align_weekly_to_hourly(
     """
     Alinha valores semanais de biomassa às linhas horárias.
 
-    merge_asof backward por (station_col, site_key_col). Com `by=`, o pandas exige
-    que a coluna `on` seja monotonicamente crescente no left inteiro; com vários
-    sites isso falha. Aplicamos merge_asof por grupo e restauramos a ordem original.
+    Equivale a merge_asof backward por (station_col, site_key_col) seguido de
+    ffill por grupo na ordem original, num único searchsorted para todas as
+    linhas (WeeklyBiomassIndex) em vez de um merge_asof por grupo.
     """
-    df = df_hourly.copy()
-    for c in biomass_cols:
-        if c in df.columns:
-            df = df.drop(columns=[c])
-
-    df["_ts"] = pd.to_datetime(df[ts_col])
-    df["_align_order"] = np.arange(len(df), dtype=np.int64)
-
-    weekly = df_weekly.copy()
-    weekly["_ts"] = pd.to_datetime(weekly["composite_start"])
-
-    for col in (station_col, site_key_col):
-        df[col] = df[col].astype("string")
-        weekly[col] = weekly[col].astype("string")
-
-    merge_cols = [station_col, site_key_col, "_ts"] + biomass_cols
-    weekly_sub = weekly[[c for c in merge_cols if c in weekly.columns]]
-
-    parts: List[pd.DataFrame] = []
-    for (_cid, _sk), g_left in df.groupby([station_col, site_key_col], sort=False):
-        g_left = g_left.sort_values("_ts")
-        mask = (weekly_sub[station_col] == _cid) & (weekly_sub[site_key_col] == _sk)
-        g_right = weekly_sub.loc[mask]
-        if g_right.empty:
-            g_out = g_left.copy()
-            for col in biomass_cols:
-                g_out[col] = np.nan
-            parts.append(g_out)
-            continue
-        g_right = g_right.sort_values("_ts")
-        right_take = ["_ts"] + [c for c in biomass_cols if c in g_right.columns]
-        g_right_m = g_right[right_take].drop_duplicates(subset=["_ts"], keep="last")
-        m = pd.merge_asof(g_left, g_right_m, on="_ts", direction="backward")
-        parts.append(m)
+    index = WeeklyBiomassIndex(df_weekly, biomass_cols, station_col, site_key_col)
+    return index.align(df_hourly, station_col, site_key_col, ts_col)
 
-    merged = pd.concat(parts, axis=0).sort_values("_align_order")
-    merged = merged.drop(columns=["_align_order"])
 
-    for col in biomass_cols:
-        merged[col] = merged.groupby([station_col, site_key_col], sort=False)[col].ffill()
+def _aligned_schema(base, index: WeeklyBiomassIndex, station_col: str, site_key_col: str):
+    """
+    Schema da saída de align_weekly_to_hourly_file: o do parquet de origem
+    (sem as colunas de biomassa antigas), chaves como string, gee_site_key e
+    biomassa float64 no fim. Fixado antes do primeiro lote: inferido do
+    lote, uma coluna toda nula nele viraria Arrow null.
+    """
+    import pyarrow as pa
 
-    merged.drop(columns=["_ts"], inplace=True)
-    return merged
+    fields = []
+    for f in base:
+        if f.name in index.biomass_cols:
+            continue
+        if f.name in (station_col, site_key_col):
+            f = pa.field(f.name, pa.string())
+        fields.append(f)
+    if site_key_col not in base.names:
+        fields.append(pa.field(site_key_col, pa.string()))
+    fields += [pa.field(c, pa.float64()) for c in index.biomass_cols]
+    meta = {k: v for k, v in (base.metadata or {}).items() if k != b"pandas"}
+    return pa.schema(fields, metadata=meta or None)
+
+
+def align_weekly_to_hourly_file(
+    src_parquet: Path,
+    index: WeeklyBiomassIndex,
+    dest_parquet: Path,
+    station_col: str = "cidade_norm",
+    site_key_col: str = SITE_KEY_COL,
+    ts_col: str = "ts_hour",
+    batch_rows: int = ALIGN_BATCH_ROWS,
+) -> int:
+    """
+    Versão streaming de align_weekly_to_hourly para um parquet de ano.
+
+    Lê em record batches, recalcula gee_site_key e alinha cada lote com o
+    ffill continuando entre lotes (carry por grupo); grava em tmp + replace
+    (dest pode ser o próprio src). Retorna o número de linhas escritas.
+    """
+    import pyarrow as pa
+
+    pf = pq.ParquetFile(src_parquet)
+    schema = _aligned_schema(pf.schema_arrow, index, station_col, site_key_col)
+    carry = np.full((index.n_groups, len(index.biomass_cols)), np.nan, dtype=np.float64)
+    tmp = dest_parquet.with_name(f"{dest_parquet.name}.tmp")
+    writer = None
+    n_rows = 0
+    try:
+        for batch in pf.iter_batches(batch_size=batch_rows):
+            df = batch.to_pandas()
+            df[site_key_col] = compute_gee_site_key(df)
+            df = index.align(df, station_col, site_key_col, ts_col, carry=carry)
+            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, schema)
+            writer.write_table(table)
+            n_rows += len(df)
+            del df, table
+        if writer is None:
+            pq.write_table(schema.empty_table(), tmp)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+    tmp.replace(dest_parquet)
+    return n_rows
 
 
 # ---------------------------------------------------------------------------
@@ -694,12 +1116,14 @@ def run_gee_pipeline(
             continue
 
         canon_path = canonical_dir / PARQUET_TEMPLATE.format(year=year)
-        df_canon = pd.read_parquet(canon_path)
-        df_canon = ensure_gee_site_key(df_canon)
-
-        sites = df_canon.drop_duplicates(subset=["cidade_norm", SITE_KEY_COL])[
+        # Só as colunas dos sites; a base horária é alinhada em streaming abaixo.
+        site_cols = [c for c in ("cidade_norm", "lat_foco", "lon_foco", FOCO_ID_COL)
+                     if c in pq.read_schema(canon_path).names]
+        sites = ensure_gee_site_key(pd.read_parquet(canon_path, columns=site_cols))
+        sites = sites.drop_duplicates(subset=["cidade_norm", SITE_KEY_COL])[
             [SITE_KEY_COL, "cidade_norm", "lat_foco", "lon_foco"]
         ]
+        df_canon = None
 
         if ee_mod is None:
             weekly = None
@@ -707,15 +1131,17 @@ def run_gee_pipeline(
             weekly = extract_weekly_biomass_gee(sites, year, acfg, log, ee_mod)
 
         if weekly is not None and len(weekly) > 0:
-            df_canon = align_weekly_to_hourly(
-                df_canon,
-                weekly,
-                biomass_cols,
-                station_col="cidade_norm",
-                site_key_col=SITE_KEY_COL,
+            t0 = time.perf_counter()
+            index = WeeklyBiomassIndex(weekly, biomass_cols, station_col="cidade_norm", site_key_col=SITE_KEY_COL)
+            n_rows = align_weekly_to_hourly_file(canon_path, index, canon_path)
+            log.info(
+                "  Canonica atualizada com biomassa: %s (%d linhas, %d grupos semanais, %.1fs)",
+                canon_path.name, n_rows, index.n_groups, time.perf_counter() - t0,
+            )
+            # Propagação só precisa das chaves + biomassa.
+            df_canon = pd.read_parquet(
+                canon_path, columns=["cidade_norm", SITE_KEY_COL, "ts_hour"] + biomass_cols,
             )
-            _write_parquet_atomic(df_canon, canon_path)
-            log.info("  Canonica atualizada com biomassa: %s", canon_path.name)
 
             for key, folder in other_scenarios.items():
                 target_dir = acfg.output_root / "0_datasets_with_coords" / folder
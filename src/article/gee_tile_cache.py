@@ -0,0 +1,97 @@
+# src/article/gee_tile_cache.py
+# =============================================================================
+# Cache local (SQLite) dos resultados de reduceRegions da biomassa GEE.
+#
+# Uma linha por (composto semanal x chunk de sites). Chave (blake2b) de:
+#   coleção, bandas, system:time_start do composto, raio do buffer, escala
+#   e hash dos pontos do chunk (gee_site_key + lat/lon, na ordem do chunk).
+# tileScale e paralelismo não entram: não mudam o valor extraído.
+#
+# Valor: JSON com a matriz do chunk (uma linha por site, colunas
+# {banda}_buffer..., {banda}_point...; null = sem pixel válido).
+# Re-run paga só as chaves ausentes (falhas de rede/quota da rodada anterior,
+# compostos novos, sites novos).
+#
+# Arquivo: data/_article/_caches/gee/biomass.sqlite
+# =============================================================================
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_SQL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_results (
+    key TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    time_start INTEGER NOT NULL,
+    n_sites INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+"""
+
+
+def default_path(output_root: Path) -> Path:
+    p = Path(output_root) / "_caches" / "gee"
+    p.mkdir(parents=True, exist_ok=True)
+    return p / "biomass.sqlite"
+
+
+def points_hash(sites: Sequence[Tuple[str, float, float]]) -> str:
+    """Hash dos (gee_site_key, lat, lon) do chunk, na ordem (coordenadas em 6 casas)."""
+    h = hashlib.blake2b(digest_size=16)
+    for sk, lat, lon in sites:
+        h.update(f"{sk}|{float(lat):.6f}|{float(lon):.6f};".encode())
+    return h.hexdigest()
+
+
+def chunk_key(collection: str, bands: Sequence[str], time_start: int,
+              buffer_m: float, scale_m: int, pts_hash: str) -> str:
+    payload = json.dumps(
+        [collection, list(bands), int(time_start), float(buffer_m), int(scale_m), pts_hash],
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class GeeTileCache:
+    """Store (composto x chunk) -> matriz de valores. Usar só na thread principal."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[List[Optional[float]]]]:
+        keys = list(keys)
+        out: Dict[str, List[List[Optional[float]]]] = {}
+        for i in range(0, len(keys), _SQL_BATCH):
+            part = keys[i:i + _SQL_BATCH]
+            q = f"SELECT key, payload FROM chunk_results WHERE key IN ({','.join('?' * len(part))})"
+            for k, payload in self.conn.execute(q, part):
+                out[k] = json.loads(payload)
+        return out
+
+    def put_many(self, items: Iterable[Tuple[str, str, int, List[List[Optional[float]]]]]) -> int:
+        """items: (key, collection, time_start, matriz). Retorna o número de linhas gravadas."""
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = [(k, col, int(t), len(m), json.dumps(m, separators=(",", ":")), now) for k, col, t, m in items]
+        if rows:
+            self.conn.executemany("INSERT OR REPLACE INTO chunk_results VALUES (?,?,?,?,?,?)", rows)
+            self.conn.commit()
+        return len(rows)
+
+    def count(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM chunk_results").fetchone()[0])
+
+    def close(self) -> None:
+        self.conn.close()
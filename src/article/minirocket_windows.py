@@ -0,0 +1,124 @@
+# src/article/minirocket_windows.py
+# =============================================================================
+# MOTOR DE JANELAS DO MINIROCKET (views com stride, sem cubo denso)
+#
+# A janela da linha i e vals[i-L:i] (exclusiva da propria linha), transposta
+# para (C, L), e so e valida quando:
+#   - i esta a pelo menos L posicoes do inicio do bloco da sua cidade; e
+#   - nenhuma das L linhas anteriores tem NaN em qualquer canal.
+#
+# Em vez de alocar (n, C, L) float32 para todas as linhas, o motor:
+#   1. calcula a validade de forma vetorizada (soma acumulada de NaNs por
+#      linha + fronteiras de cidade);
+#   2. expoe todas as janelas como uma view sem copia (sliding_window_view);
+#   3. materializa apenas as janelas validas, em chunks, quando o consumidor
+#      (fit global ou transform) pede.
+#
+# Pressupoe df_agg ordenado por (cidade_norm, _ts), como sai de
+# ArticleTemporalFusion._aggregate_series.
+# =============================================================================
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class MiniRocketWindows:
+    """Janelas (C, L) por cidade sobre um bloco contiguo (n, C) float32."""
+
+    def __init__(self, vals: np.ndarray, cities: np.ndarray, L: int) -> None:
+        if vals.ndim != 2:
+            raise ValueError(f"vals deve ser 2D (n, C); recebido shape={vals.shape}")
+        if len(cities) != len(vals):
+            raise ValueError("cities e vals devem ter o mesmo numero de linhas")
+        self.L = int(L)
+        self.vals = np.ascontiguousarray(vals, dtype=np.float32)
+        self.n, self.C = self.vals.shape
+        self.valid_idx = self._compute_valid_idx(cities)
+
+    @classmethod
+    def from_frame(
+        cls, df_agg: pd.DataFrame, cols: List[str], L: int
+    ) -> "MiniRocketWindows":
+        return cls(
+            df_agg[cols].to_numpy(dtype=np.float32),
+            df_agg["cidade_norm"].to_numpy(),
+            L,
+        )
+
+    # ------------------------------------------------------------------
+    # Validade
+    # ------------------------------------------------------------------
+    def _compute_valid_idx(self, cities: np.ndarray) -> np.ndarray:
+        n, L = self.n, self.L
+        if n <= L or L <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Posicao local de cada linha dentro do bloco da sua cidade.
+        boundary = np.empty(n, dtype=bool)
+        boundary[0] = True
+        boundary[1:] = cities[1:] != cities[:-1]
+        starts = np.flatnonzero(boundary)
+        block_len = np.diff(np.append(starts, n))
+        local_idx = np.arange(n, dtype=np.int64) - np.repeat(starts, block_len)
+
+        # NaNs na janela [i-L, i) via prefixo acumulado.
+        row_nan = np.isnan(self.vals).any(axis=1)
+        csum = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(row_nan, out=csum[1:])
+
+        cand = np.flatnonzero(local_idx >= L)
+        nan_in_window = csum[cand] - csum[cand - L]
+        return cand[nan_in_window == 0]
+
+    @property
+    def n_valid(self) -> int:
+        return int(len(self.valid_idx))
+
+    def valid_mask(self) -> np.ndarray:
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.valid_idx] = True
+        return mask
+
+    # ------------------------------------------------------------------
+    # Materializacao
+    # ------------------------------------------------------------------
+    def _view(self) -> np.ndarray:
+        """View (n-L+1, C, L) sem copia; view[k] == vals[k:k+L].T."""
+        return np.lib.stride_tricks.sliding_window_view(self.vals, self.L, axis=0)
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        """Materializa as janelas validas nas posicoes dadas (indices em valid_idx)."""
+        if self.n_valid == 0:
+            return np.empty((0, self.C, self.L), dtype=np.float32)
+        rows = self.valid_idx[np.asarray(positions, dtype=np.int64)]
+        return np.ascontiguousarray(self._view()[rows - self.L])
+
+    def iter_chunks(
+        self, chunk_size: int
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Itera (linhas, X_chunk) em ordem, copiando so `chunk_size` janelas por vez."""
+        if self.n_valid == 0:
+            return
+        view = self._view()
+        step = max(1, int(chunk_size))
+        for start in range(0, self.n_valid, step):
+            rows = self.valid_idx[start:start + step]
+            yield rows, np.ascontiguousarray(view[rows - self.L])
+
+    def sample(
+        self, max_n: int, rng: np.random.Generator
+    ) -> Optional[np.ndarray]:
+        """Subamostra sem reposicao ate `max_n` janelas validas.
+
+        Consome o rng exatamente como a subamostragem anterior sobre
+        X_valid, preservando a reprodutibilidade do fit global.
+        """
+        n = self.n_valid
+        if n == 0:
+            return None
+        if n <= max_n:
+            return self.take(np.arange(n))
+        return self.take(rng.choice(n, size=max_n, replace=False))
@@ -0,0 +1,211 @@
+# src/article/sarimax_checkpoint.py
+# =============================================================================
+# CHECKPOINT POR (CIDADE, BLOCO) DO SARIMAX ROLLING (sarimax_exog)
+#
+# Cada bloco de refit [start, end) de cada cidade vira uma linha num arquivo
+# Arrow IPC (stream) append-only assim que termina — ok, falha ou skip. Se o
+# processo morrer, um restart, um re-run com --years ou o fallback serial
+# leem o checkpoint e pulam os pares (cidade, bloco) ja resolvidos.
+#
+# Layout (por cenario/ano):
+#   {output_dir}/sarimax_exog/_checkpoint/{ano}/meta.json
+#   {output_dir}/sarimax_exog/_checkpoint/{ano}/seg_{pid}_{uuid}.arrows
+#
+# Cada processo (pai ou worker do pool) escreve no proprio segmento, entao
+# nao ha escrita concorrente no mesmo arquivo. O worker fecha o segmento
+# (EOS) ao fim de cada tarefa (cidade); o pai, ao fim do ano. So uma queda
+# no meio de um write deixa segmento truncado, lido ate o ultimo batch
+# completo.
+#
+# meta.json guarda o fingerprint (versao do formato, order, seasonal_order,
+# H, W, endog, exog, fonte); qualquer mudanca invalida o checkpoint do ano
+# automaticamente.
+#
+# Com warm start, cada bloco tambem grava o estado da cadeia ao fim dele
+# (params do ultimo ajuste ok + blocos desde a ultima otimizacao): o resume
+# retoma a cadeia dali e produz as mesmas previsoes de uma execucao sem
+# interrupcao.
+# =============================================================================
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+CHECKPOINT_SUBDIR = "_checkpoint"
+CHECKPOINT_VERSION = 2
+
+# Status de um bloco (coluna "status").
+BLOCK_OK = 0
+BLOCK_FAIL = 1
+BLOCK_SKIPPED = 2
+
+# Falhas que se repetem com os mesmos dados e parametros; as demais
+# (MemoryError sob o guardrail, worker morto...) sao refeitas no resume.
+DETERMINISTIC_FAIL_TYPES = frozenset({"LinAlgError"})
+
+# (end, status, fail_type, preds, params, since_fit) por bloco; preds vazio
+# quando nao ha forecast; params/since_fit = cadeia do warm start apos o bloco
+# (params vazio antes do primeiro ajuste ok).
+BlockRecord = Tuple[int, int, str, np.ndarray, np.ndarray, int]
+
+
+def reusable(record: BlockRecord) -> bool:
+    """Bloco do checkpoint vale como final: ok, skip ou falha deterministica."""
+    _end, status, fail_type, *_ = record
+    return status != BLOCK_FAIL or fail_type in DETERMINISTIC_FAIL_TYPES
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("city", pa.string()),
+        ("start", pa.int64()),
+        ("end", pa.int64()),
+        ("status", pa.int8()),
+        ("fail_type", pa.string()),
+        ("preds", pa.list_(pa.float64())),
+        ("params", pa.list_(pa.float64())),
+        ("since_fit", pa.int32()),
+    ])
+
+
+class SarimaxCheckpoint:
+    """Checkpoint de um ano: valida o fingerprint, le blocos prontos e expoe o diretorio."""
+
+    def __init__(
+        self,
+        method_dir: Path,
+        year: int,
+        params: Dict[str, Any],
+        log=None,
+    ) -> None:
+        self.dir = Path(method_dir) / CHECKPOINT_SUBDIR / str(year)
+        self.params = params
+        self.log = log
+        self._validate()
+
+    def _validate(self) -> None:
+        meta_path = self.dir / "meta.json"
+        fingerprint = json.dumps({"version": CHECKPOINT_VERSION, **self.params},
+                                 sort_keys=True, default=str)
+        if meta_path.exists():
+            try:
+                current = json.loads(meta_path.read_text(encoding="utf-8")).get("fingerprint")
+            except Exception:
+                current = None
+            if current == fingerprint:
+                return
+            if self.log is not None:
+                self.log.warning(
+                    f"[sarimax_exog checkpoint] parametros mudaram; invalidando {self.dir}"
+                )
+            shutil.rmtree(self.dir, ignore_errors=True)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(
+            json.dumps({"fingerprint": fingerprint, "params": self.params},
+                       indent=2, default=str),
+            encoding="utf-8",
+        )
+
+    def load(self) -> Dict[str, Dict[int, BlockRecord]]:
+        """{cidade: {start: BlockRecord}} de todos os segmentos."""
+        import pyarrow as pa
+
+        done: Dict[str, Dict[int, BlockRecord]] = {}
+        for seg in sorted(self.dir.glob("seg_*.arrows")):
+            try:
+                with pa.OSFile(str(seg), "rb") as f:
+                    reader = pa.ipc.open_stream(f)
+                    while True:
+                        try:
+                            batch = reader.read_next_batch()
+                        except StopIteration:
+                            break
+                        cols = batch.to_pydict()
+                        for city, start, end, status, ft, preds, params, since in zip(
+                            cols["city"], cols["start"], cols["end"],
+                            cols["status"], cols["fail_type"], cols["preds"],
+                            cols["params"], cols["since_fit"],
+                        ):
+                            done.setdefault(city, {})[int(start)] = (
+                                int(end), int(status), ft or "",
+                                np.asarray(preds or [], dtype=np.float64),
+                                np.asarray(params or [], dtype=np.float64),
+                                int(since or 0),
+                            )
+            except Exception as exc:
+                # Segmento truncado: mantem o que foi lido ate o erro.
+                if self.log is not None:
+                    self.log.debug(f"[sarimax_exog checkpoint] {seg.name}: {exc}")
+        return done
+
+    def n_blocks(self, done: Dict[str, Dict[int, BlockRecord]]) -> int:
+        return sum(len(v) for v in done.values())
+
+
+# ============================================================================
+# Escrita (um segmento por processo; chamado de dentro do worker)
+# ============================================================================
+_WRITERS: Dict[str, Tuple[Any, Any]] = {}
+
+
+def append_block(
+    ckpt_dir: Optional[str],
+    city: str,
+    start: int,
+    end: int,
+    status: int,
+    fail_type: str = "",
+    preds: Optional[np.ndarray] = None,
+    params: Optional[np.ndarray] = None,
+    since_fit: int = 0,
+) -> None:
+    """Grava um bloco resolvido no segmento deste processo (no-op sem checkpoint).
+
+    `params`/`since_fit`: estado da cadeia do warm start ao fim do bloco.
+    """
+    if not ckpt_dir:
+        return
+    import pyarrow as pa
+
+    entry = _WRITERS.get(ckpt_dir)
+    if entry is None:
+        path = Path(ckpt_dir) / f"seg_{os.getpid()}_{uuid.uuid4().hex[:8]}.arrows"
+        sink = open(path, "wb", buffering=0)
+        writer = pa.ipc.new_stream(sink, _schema())
+        entry = (sink, writer)
+        _WRITERS[ckpt_dir] = entry
+    _sink, writer = entry
+    values = [] if preds is None else np.asarray(preds, dtype=np.float64).tolist()
+    chain = [] if params is None else np.asarray(params, dtype=np.float64).tolist()
+    batch = pa.record_batch(
+        [
+            pa.array([city], pa.string()),
+            pa.array([int(start)], pa.int64()),
+            pa.array([int(end)], pa.int64()),
+            pa.array([int(status)], pa.int8()),
+            pa.array([fail_type], pa.string()),
+            pa.array([values], pa.list_(pa.float64())),
+            pa.array([chain], pa.list_(pa.float64())),
+            pa.array([int(since_fit)], pa.int32()),
+        ],
+        schema=_schema(),
+    )
+    writer.write_batch(batch)
+
+
+def close_writers() -> None:
+    """Fecha os segmentos abertos por este processo (grava o EOS do stream)."""
+    for sink, writer in list(_WRITERS.values()):
+        try:
+            writer.close()
+        finally:
+            sink.close()
+    _WRITERS.clear()
@@ -0,0 +1,137 @@
+# src/article/sarimax_shm.py
+# =============================================================================
+# PAYLOADS DO SARIMAX EM MEMORIA COMPARTILHADA (sarimax_exog)
+#
+# Em vez de um DataFrame mascarado por cidade (O(cidades x linhas)) e de
+# pickles de arrays a cada submit, a serie agregada do ano e disposta UMA vez
+# como bloco contiguo ordenado por cidade:
+#
+#   data[n, 1 + n_exog]  float64   (coluna 0 = endog, demais = exog)
+#   out[n]               float64   (previsoes, preenchidas in-place)
+#   offsets/lengths por cidade     (tabela no processo pai)
+#
+# Ambos vivem em multiprocessing.shared_memory. O worker recebe apenas o
+# descritor (nomes dos segmentos, shape, offset, length), anexa os segmentos
+# (cache por processo) e escreve as previsoes direto em out[offset:offset+len].
+# O pai devolve a ordem original com uma unica permutacao inversa no fim.
+# =============================================================================
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ShmDescriptor:
+    """O que o worker precisa para enxergar os buffers compartilhados."""
+
+    data_name: str
+    out_name: str
+    n_rows: int
+    n_cols: int
+
+
+class CityBlockLayout:
+    """Bloco (cidade-ordenado) + buffer de saida em shared memory, com tabela de offsets."""
+
+    def __init__(self, df_agg: pd.DataFrame, endog_col: str, exog_cols: List[str]) -> None:
+        codes, uniques = pd.factorize(df_agg["cidade_norm"], sort=False)
+        n = len(df_agg)
+        self.cities = np.asarray(uniques, dtype=object)
+        self.lengths = np.bincount(codes, minlength=len(uniques)).astype(np.int64)
+        self.offsets = np.zeros(len(uniques), dtype=np.int64)
+        np.cumsum(self.lengths[:-1], out=self.offsets[1:])
+
+        # Permutacao estavel so quando df_agg nao chega agrupado por cidade.
+        # (codigos do factorize seguem a ordem de aparicao: agrupado <=> nao-decrescente).
+        if n > 1 and np.any(codes[1:] < codes[:-1]):
+            self.order: Optional[np.ndarray] = np.argsort(codes, kind="stable")
+        else:
+            self.order = None
+
+        cols = [endog_col] + list(exog_cols)
+        n_cols = len(cols)
+        self._data_shm = shared_memory.SharedMemory(create=True, size=max(1, n * n_cols * 8))
+        self._out_shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8))
+        self.data = np.ndarray((n, n_cols), dtype=np.float64, buffer=self._data_shm.buf)
+        self.out = np.ndarray((n,), dtype=np.float64, buffer=self._out_shm.buf)
+        for j, c in enumerate(cols):
+            col = df_agg[c].to_numpy(dtype=np.float64)
+            self.data[:, j] = col if self.order is None else col[self.order]
+        self.out.fill(np.nan)
+
+        self.descriptor = ShmDescriptor(
+            self._data_shm.name, self._out_shm.name, n, n_cols
+        )
+
+    def city_slices(self) -> List[Tuple[str, int, int]]:
+        """[(cidade, offset, length)] na ordem de aparicao em df_agg."""
+        return [
+            (c, int(o), int(l))
+            for c, o, l in zip(self.cities, self.offsets, self.lengths)
+        ]
+
+    def reset_out(self) -> None:
+        self.out.fill(np.nan)
+
+    def to_frame_order(self, arr: np.ndarray) -> np.ndarray:
+        """Leva um vetor no layout cidade-ordenado de volta a ordem de df_agg."""
+        if self.order is None:
+            return arr.copy()
+        res = np.empty_like(arr)
+        res[self.order] = arr
+        return res
+
+    def close(self) -> None:
+        """Libera e remove os segmentos (chamar no pai, depois do pool)."""
+        self.data = self.out = None  # type: ignore[assignment]
+        for shm in (self._data_shm, self._out_shm):
+            try:
+                shm.close()
+            except BufferError:
+                # Ainda ha views vivas; o mmap e liberado quando forem coletadas.
+                pass
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ============================================================================
+# Lado do worker (anexa uma vez por processo)
+# ============================================================================
+_ATTACHED: Dict[str, Tuple[shared_memory.SharedMemory, shared_memory.SharedMemory, np.ndarray, np.ndarray]] = {}
+
+
+def attach(desc: ShmDescriptor) -> Tuple[np.ndarray, np.ndarray]:
+    """(data, out) como views sobre os segmentos do pai."""
+    entry = _ATTACHED.get(desc.data_name)
+    if entry is None:
+        # Um ano novo troca os segmentos; solta os anexos antigos deste processo.
+        detach_all()
+        data_shm = shared_memory.SharedMemory(name=desc.data_name)
+        out_shm = shared_memory.SharedMemory(name=desc.out_name)
+        # Workers do pool compartilham o resource_tracker do pai (dono dos
+        # segmentos), entao o registro extra do attach e inocuo e nao ha unlink aqui.
+        data = np.ndarray((desc.n_rows, desc.n_cols), dtype=np.float64, buffer=data_shm.buf)
+        out = np.ndarray((desc.n_rows,), dtype=np.float64, buffer=out_shm.buf)
+        entry = (data_shm, out_shm, data, out)
+        _ATTACHED[desc.data_name] = entry
+    return entry[2], entry[3]
+
+
+def detach_all() -> None:
+    entries = list(_ATTACHED.values())
+    _ATTACHED.clear()
+    while entries:
+        data_shm, out_shm, _data, _out = entries.pop()
+        del _data, _out
+        for shm in (data_shm, out_shm):
+            try:
+                shm.close()
+            except Exception:
+                pass
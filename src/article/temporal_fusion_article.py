@@ -46,6 +46,22 @@ from src.feature_engineering_temporal import (  # noqa: E402
     COL_PRESSAO,
     TSF_FAIL_DETAIL_LOG_CAP,
 )
+from src.article.minirocket_windows import MiniRocketWindows  # noqa: E402
+from src.article.sarimax_checkpoint import (  # noqa: E402
+    SarimaxCheckpoint,
+    close_writers as _close_sarimax_writers,
+)
+from src.article.sarimax_shm import (  # noqa: E402
+    CityBlockLayout,
+    ShmDescriptor,
+    attach as attach_city_block,
+)
+from src.tsf_ewma_state import (  # noqa: E402
+    carry_fingerprint,
+    ewma_lags_with_carry,
+    resolve_incoming_carry,
+    state_path,
+)
 
 # ---------------------------------------------------------------------------
 # Registro estendido de variaveis do artigo (inclui biomassa GEE).
@@ -106,18 +122,83 @@ def _sarimax_city_worker(
     H: int,
     W: int,
     min_train: int,
-) -> Tuple[np.ndarray, int, int, int, dict]:
-    """SARIMAX rolling forecast para uma cidade. Roda em processo filho."""
+    city: Optional[str] = None,
+    ckpt_dir: Optional[str] = None,
+    done_blocks: Optional[Dict[int, Any]] = None,
+    warm_start: bool = False,
+    refit_every: int = 1,
+) -> Tuple[np.ndarray, int, int, int, dict, list]:
+    """SARIMAX rolling forecast para uma cidade. Roda em processo filho.
+
+    Com `ckpt_dir`, cada bloco resolvido e gravado no checkpoint do ano;
+    blocos presentes em `done_blocks` ({start: BlockRecord}) sao
+    reaproveitados sem refit, exceto falhas transitorias (ver
+    sarimax_checkpoint.reusable), que sao refeitas.
+
+    Com `warm_start`, cada refit parte dos parametros do bloco anterior da
+    mesma cidade (as janelas se sobrepoem em W - H horas). `refit_every` > 1
+    so reotimiza a cada N blocos; nos intermediarios os parametros ficam
+    fixos e o filtro de Kalman e apenas reaplicado a nova janela. No resume,
+    a cadeia (params + posicao no ciclo de refit) e retomada do registro do
+    ultimo bloco reaproveitado; depois do primeiro bloco recalculado os
+    seguintes nao sao mais reaproveitados, pois dependem da cadeia.
+
+    Retorna tambem `block_stats`: [(start, modo, iteracoes, segundos)] por
+    bloco calculado, com modo em {"cold", "warm", "filter"}.
+    """
     import warnings as _w
     from statsmodels.tsa.statespace.sarimax import SARIMAX as _SARIMAX
+    from src.article.sarimax_checkpoint import (
+        BLOCK_FAIL, BLOCK_OK, BLOCK_SKIPPED, append_block, reusable,
+    )
 
     n = len(z_endog)
     preds = np.full(n, np.nan)
     ok = fail = skipped = 0
     fail_types: dict = {}
+    block_stats: list = []
+    done_blocks = done_blocks or {}
+    refit_every = max(1, int(refit_every))
+
+    def _model(endog, exog):
+        return _SARIMAX(
+            endog,
+            exog=exog,
+            order=order,
+            seasonal_order=seasonal_order,
+            trend="n",
+            enforce_stationarity=False,
+            enforce_invertibility=False,
+        )
+
+    # Params do ultimo ajuste bem-sucedido (warm start) e blocos desde a
+    # ultima otimizacao: e isso que o checkpoint grava por bloco.
+    prev_params: Optional[np.ndarray] = None
+    since_fit = 0
+    # Com warm start so o prefixo de blocos prontos e reaproveitavel.
+    reuse = True
 
     for start in range(0, n, H):
         end = min(start + H, n)
+
+        prev = done_blocks.get(start)
+        if prev is not None and prev[0] == end and reuse and reusable(prev):
+            _end, status, ftype, prev_preds, chain_params, chain_since = prev
+            if warm_start:
+                prev_params = chain_params if chain_params.size else None
+                since_fit = chain_since
+            if status == BLOCK_OK:
+                preds[start:end] = prev_preds
+                ok += 1
+            elif status == BLOCK_FAIL:
+                fail += 1
+                fail_types[ftype] = fail_types.get(ftype, 0) + 1
+            else:
+                skipped += 1
+            continue
+        if warm_start:
+            reuse = False
+
         train_start = max(0, start - W)
 
         tr_endog = z_endog[train_start:start]
@@ -129,32 +210,84 @@ def _sarimax_city_worker(
 
         if len(tr_endog_c) < min_train:
             skipped += 1
+            append_block(ckpt_dir, city, start, end, BLOCK_SKIPPED,
+                         params=prev_params, since_fit=since_fit)
             continue
 
         exog_future = np.tile(tr_exog_c[-1:, :], (end - start, 1))
 
+        t0 = time.perf_counter()
         try:
-            model = _SARIMAX(
-                tr_endog_c,
-                exog=tr_exog_c,
-                order=order,
-                seasonal_order=seasonal_order,
-                trend="n",
-                enforce_stationarity=False,
-                enforce_invertibility=False,
-            )
             with _w.catch_warnings():
                 _w.simplefilter("ignore")
-                res = model.fit(maxiter=80, disp=False)
+                if warm_start and prev_params is not None and since_fit < refit_every:
+                    # Parametros fixos: so o filtro sobre a nova janela
+                    # (o mesmo que results.apply; sem covariancia, que o
+                    # forecast nao usa).
+                    res = _model(tr_endog_c, tr_exog_c).smooth(prev_params, cov_type="none")
+                    mode, iters = "filter", 0
+                    since_fit += 1
+                else:
+                    model = _model(tr_endog_c, tr_exog_c)
+                    res = None
+                    mode = "cold"
+                    if warm_start and prev_params is not None:
+                        try:
+                            res = model.fit(
+                                start_params=prev_params, maxiter=80, disp=False,
+                            )
+                            mode = "warm"
+                        except Exception:
+                            res = None
+                    if res is None:
+                        res = model.fit(maxiter=80, disp=False)
+                    iters = int((res.mle_retvals or {}).get("iterations", -1))
+                    since_fit = 1
             fc = res.forecast(steps=end - start, exog=exog_future)
             preds[start:end] = fc
             ok += 1
+            if warm_start:
+                prev_params = np.array(res.params, dtype=np.float64)
+            block_stats.append((start, mode, iters, time.perf_counter() - t0))
+            append_block(ckpt_dir, city, start, end, BLOCK_OK, preds=preds[start:end],
+                         params=prev_params, since_fit=since_fit)
         except Exception as exc:
             fail += 1
             key = exc.__class__.__name__
             fail_types[key] = fail_types.get(key, 0) + 1
-
-    return preds, ok, fail, skipped, fail_types
+            append_block(ckpt_dir, city, start, end, BLOCK_FAIL, fail_type=key,
+                         params=prev_params, since_fit=since_fit)
+
+    return preds, ok, fail, skipped, fail_types, block_stats
+
+
+def _sarimax_shm_city_worker(
+    desc: ShmDescriptor,
+    city: str,
+    offset: int,
+    length: int,
+    worker_args: tuple,
+    ckpt_dir: Optional[str],
+    done_blocks: Optional[Dict[int, Any]],
+    warm_kwargs: Dict[str, Any],
+) -> Tuple[int, int, int, dict, list]:
+    """Versao shared-memory: le a fatia da cidade e escreve as previsoes in-place.
+
+    O segmento de checkpoint aberto pela tarefa e fechado (com EOS) ao fim
+    dela: o worker do pool sobrevive a tarefa e pode receber a proxima com
+    outro `ckpt_dir`.
+    """
+    data, out = attach_city_block(desc)
+    block = data[offset:offset + length]
+    try:
+        preds, ok, fail, skipped, fail_types, block_stats = _sarimax_city_worker(
+            block[:, 0], block[:, 1:], *worker_args,
+            city, ckpt_dir, done_blocks, **warm_kwargs,
+        )
+    finally:
+        _close_sarimax_writers()
+    out[offset:offset + length] = preds
+    return ok, fail, skipped, fail_types, block_stats
 
 
 # Dependencias opcionais
@@ -337,19 +470,30 @@ class ArticleTemporalFusion:
         except Exception:
             pass
 
-    def _discover_years(self) -> List[Tuple[int, Path]]:
-        files = sorted(self.input_dir.glob("inmet_bdq_*_cerrado.parquet"))
-        out: List[Tuple[int, Path]] = []
-        for f in files:
+    def _all_year_files(self) -> Dict[int, Path]:
+        """Todos os anos do cenario, ignorando --years (cadeia de estado EWMA)."""
+        out: Dict[int, Path] = {}
+        for f in sorted(self.input_dir.glob("inmet_bdq_*_cerrado.parquet")):
             try:
-                y = int(f.stem.split("_")[2])
-                if self.filter_years and y not in self.filter_years:
-                    continue
-                out.append((y, f))
+                out[int(f.stem.split("_")[2])] = f
             except Exception:
                 pass
         return out
 
+    def _source_fingerprint(self, year: int) -> Dict[str, Any]:
+        """Tamanho/mtime do parquet de entrada (invalida checkpoints se a fonte mudar)."""
+        src = self._all_year_files().get(year)
+        if src is None or not src.exists():
+            return {}
+        st = src.stat()
+        return {"name": src.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def _discover_years(self) -> List[Tuple[int, Path]]:
+        return [
+            (y, f) for y, f in self._all_year_files().items()
+            if not self.filter_years or y in self.filter_years
+        ]
+
     @staticmethod
     def _parse_ts(df: pd.DataFrame) -> pd.DataFrame:
         df = df.copy()
@@ -388,45 +532,52 @@ class ArticleTemporalFusion:
     # ==================================================================
     # Metodo 1 — EWMA + Lags (vetorizado, meteo + biomassa)
     # ==================================================================
-    def _generate_ewma_lags(self, df_agg: pd.DataFrame) -> pd.DataFrame:
+    def _ewma_lags_config(self) -> Tuple[List[Tuple[str, str, List[int]]], Dict[str, float]]:
+        """(slug, coluna, lags) configurados para meteo + biomassa, e alphas."""
         cfg = self.fcfg["ewma_lags"]
         meteo_vars = cfg.get("meteo_vars", METEO_SLUGS)
         biomass_vars = cfg.get("biomass_vars", BIOMASS_SLUGS)
-        meteo_lags = cfg.get("meteo_lags_h", [1, 24, 168])
-        biomass_lags = cfg.get("biomass_lags_h", [168, 336])
+        meteo_lags = [int(l) for l in cfg.get("meteo_lags_h", [1, 24, 168])]
+        biomass_lags = [int(l) for l in cfg.get("biomass_lags_h", [168, 336])]
         alphas = cfg.get("alphas", {"a01": 0.1, "a03": 0.3, "a08": 0.8}) or {}
-
-        result = df_agg[["cidade_norm", "_ts"]].copy()
-
-        active_meteo = self._active_slugs(df_agg, meteo_vars)
-        active_biomass = self._active_slugs(df_agg, biomass_vars)
-        all_targets: List[Tuple[str, str, List[int]]] = []
-        for slug, col in active_meteo.items():
-            all_targets.append((slug, col, list(meteo_lags)))
-        for slug, col in active_biomass.items():
-            all_targets.append((slug, col, list(biomass_lags)))
-
+        targets: List[Tuple[str, str, List[int]]] = []
+        for slug in meteo_vars:
+            if slug in ARTICLE_VARS_ALL:
+                targets.append((slug, ARTICLE_VARS_ALL[slug], meteo_lags))
+        for slug in biomass_vars:
+            if slug in ARTICLE_VARS_ALL:
+                targets.append((slug, ARTICLE_VARS_ALL[slug], biomass_lags))
+        return targets, dict(alphas)
+
+    def _generate_ewma_lags(self, df_agg: pd.DataFrame, year: int) -> pd.DataFrame:
+        targets, alphas = self._ewma_lags_config()
+
+        def active_targets(df: pd.DataFrame) -> List[Tuple[str, str, List[int]]]:
+            return [t for t in targets if t[1] in df.columns]
+
+        all_targets = active_targets(df_agg)
         if not all_targets:
             self.log.warning("[ewma_lags] nenhuma variavel ativa encontrada.")
-            return result
-
-        n_added = 0
-        for slug, col, lags in all_targets:
-            series = df_agg.groupby("cidade_norm", sort=False)[col]
-            for aname, alpha in alphas.items():
-                colname = f"tsf_ewma_{slug}_{aname}"
-                result[colname] = series.transform(
-                    lambda x, a=alpha: x.ewm(alpha=a, adjust=False).mean()
-                ).values
-                n_added += 1
-            for lag_h in lags:
-                colname = f"tsf_lag_{slug}_{int(lag_h)}h"
-                result[colname] = series.transform(lambda x, lh=lag_h: x.shift(lh)).values
-                n_added += 1
+            return df_agg[["cidade_norm", "_ts"]].copy()
+
+        # Retoma EWMA e cauda de lags do fim do ano anterior (sidecar por ano).
+        fingerprint = carry_fingerprint(targets, alphas)
+        state_dir = self.output_dir / "ewma_lags"
+        year_files = self._all_year_files()
+        carry = resolve_incoming_carry(
+            year, year_files, state_dir, fingerprint,
+            self._prepare_df_agg, active_targets, alphas, log=self.log,
+        )
+        result, new_carry = ewma_lags_with_carry(
+            df_agg, all_targets, alphas, carry, year, fingerprint, source=year_files.get(year)
+        )
+        new_carry.save(state_path(state_dir, year))
 
+        n_added = len(result.columns) - 2
+        slugs = [slug for slug, _, _ in all_targets]
         self.log.info(
-            f"[ewma_lags] {n_added} features geradas "
-            f"(meteo={list(active_meteo.keys())}, biomassa={list(active_biomass.keys())})"
+            f"[ewma_lags] {n_added} features geradas ({slugs}) | "
+            f"carry={'ano ' + str(carry.year) if carry is not None else 'nenhum'}"
         )
         return result
 
@@ -467,12 +618,15 @@ class ArticleTemporalFusion:
         seasonal_order = tuple(cfg.get("seasonal_order", [1, 1, 1, 24]))
         H = int(cfg.get("refit_hours", 336))
         W = int(cfg.get("window_hours", 720))
+        warm_start = bool(cfg.get("warm_start", False))
+        refit_every = max(1, int(cfg.get("refit_every_blocks", 1)))
         n_workers = self._sarimax_workers
 
         self.log.info(
             f"[sarimax_exog {year}] endog={endog_slug} exog={exog_slug_list} "
             f"order={order} seasonal={seasonal_order} H={H}h W={W}h "
-            f"workers={n_workers}"
+            f"workers={n_workers} warm_start={warm_start} "
+            f"refit_every_blocks={refit_every}"
         )
 
         self._reset_fail_budget()
@@ -483,29 +637,88 @@ class ArticleTemporalFusion:
         result[pred_col] = np.nan
         result[resid_col] = np.nan
 
-        cities = df_agg["cidade_norm"].unique()
         n_exog = len(exog_cols)
         min_train = max(seasonal_order[3] * 2, order[0] + order[2]) + order[1] + n_exog + 10
 
-        # --- preparar payloads por cidade (arrays numpy, pickle-safe) ---
-        city_data: List[dict] = []
-        for city in cities:
-            mask = df_agg["cidade_norm"] == city
-            city_df = df_agg.loc[mask]
-            city_data.append({
-                "city": city,
-                "idx": city_df.index.to_numpy(),
-                "z_endog": city_df[endog_col].to_numpy(dtype=float),
-                "z_exog": city_df[exog_cols].to_numpy(dtype=float),
-            })
-
         worker_args = (order, seasonal_order, H, W, min_train)
+        warm_kwargs = {"warm_start": warm_start, "refit_every": refit_every}
+
+        # Checkpoint (cidade, bloco) do ano; invalida sozinho se os parametros mudarem.
+        ckpt = SarimaxCheckpoint(
+            self.output_dir / "sarimax_exog",
+            year,
+            {
+                "order": list(order),
+                "seasonal_order": list(seasonal_order),
+                "H": H,
+                "W": W,
+                "endog": endog_col,
+                "exog": exog_cols,
+                "maxiter": 80,
+                "warm_start": warm_start,
+                "refit_every_blocks": refit_every,
+                "source": self._source_fingerprint(year),
+            },
+            log=self.log,
+        )
+        ckpt_done = ckpt.load()
+        if ckpt_done:
+            self.log.info(
+                f"[sarimax_exog {year}] checkpoint: {ckpt.n_blocks(ckpt_done)} blocos "
+                f"de {len(ckpt_done)} cidades ja resolvidos; serao reaproveitados."
+            )
+
+        # --- layout cidade-ordenado em shared memory (uma passada, sem mascara por cidade) ---
+        layout = CityBlockLayout(df_agg, endog_col, exog_cols)
+        try:
+            ok, fail, skipped, fail_types, block_stats = self._run_sarimax_cities(
+                layout, year, worker_args, warm_kwargs, ckpt, ckpt_done,
+            )
+            preds = layout.to_frame_order(layout.out)
+            result[pred_col] = preds
+            result[resid_col] = df_agg[endog_col].to_numpy(dtype=float) - preds
+        finally:
+            layout.close()
+            # Fecha o segmento de checkpoint do processo pai (serial), gravando o EOS.
+            _close_sarimax_writers()
+
+        pct_finite = float(np.isfinite(result[pred_col].to_numpy()).mean() * 100)
+        breakdown = ""
+        if fail > 0:
+            breakdown = " | fail_types: " + ", ".join(
+                f"{k}:{v}" for k, v in fail_types.most_common()
+            )
+        self.log.info(
+            f"[sarimax_exog {year}] ok={ok} fail={fail} skipped={skipped} "
+            f"pct_finite={pct_finite:.1f}%{breakdown}"
+        )
+        self._report_sarimax_block_stats(block_stats, year)
+        return result
+
+    def _run_sarimax_cities(
+        self,
+        layout: CityBlockLayout,
+        year: int,
+        worker_args: tuple,
+        warm_kwargs: Dict[str, Any],
+        ckpt: SarimaxCheckpoint,
+        ckpt_done: Dict[str, Any],
+    ) -> Tuple[int, int, int, Counter, List[tuple]]:
+        """Roda o rolling SARIMAX por cidade (pool com guardrail ou serial).
+
+        As previsoes vao direto para `layout.out`; retorna os contadores e
+        as estatisticas por bloco.
+        """
+        n_workers = self._sarimax_workers
+        ckpt_dir = str(ckpt.dir)
+        city_slices = layout.city_slices()
 
         ok = fail = skipped = 0
         fail_types: Counter = Counter()
+        block_stats: List[tuple] = []
 
         # --- decidir modo de execucao ---
-        use_parallel = n_workers > 1 and len(city_data) > 1
+        use_parallel = n_workers > 1 and len(city_slices) > 1
 
         if use_parallel:
             mem_pct = self._get_mem_used_pct()
@@ -519,7 +732,7 @@ class ArticleTemporalFusion:
         if use_parallel:
             self.log.info(
                 f"[sarimax_exog {year}] modo PARALELO "
-                f"({n_workers} workers, {len(city_data)} cidades)"
+                f"({n_workers} workers, {len(city_slices)} cidades)"
             )
             try:
                 from concurrent.futures import (
@@ -529,10 +742,10 @@ class ArticleTemporalFusion:
                 )
 
                 with ProcessPoolExecutor(max_workers=n_workers) as pool:
-                    pending: Dict[Any, dict] = {}
-                    queue = list(city_data)
+                    pending: Dict[Any, tuple] = {}
+                    queue = list(city_slices)
                     pbar = tqdm(
-                        total=len(city_data),
+                        total=len(city_slices),
                         desc=f"sarimax_exog {year}",
                         leave=False,
                     )
@@ -550,16 +763,21 @@ class ArticleTemporalFusion:
                             )
                             inflight_limit = new_limit
 
-                        # Submeter ate preencher workers livres
+                        # Submeter ate preencher workers livres (so descritores)
                         while queue and len(pending) < inflight_limit:
-                            cd = queue.pop(0)
+                            city, offset, length = queue.pop(0)
                             fut = pool.submit(
-                                _sarimax_city_worker,
-                                cd["z_endog"],
-                                cd["z_exog"],
-                                *worker_args,
+                                _sarimax_shm_city_worker,
+                                layout.descriptor,
+                                city,
+                                offset,
+                                length,
+                                worker_args,
+                                ckpt_dir,
+                                ckpt_done.get(city),
+                                warm_kwargs,
                             )
-                            pending[fut] = cd
+                            pending[fut] = (city, offset, length)
 
                         if not pending:
                             break
@@ -571,22 +789,18 @@ class ArticleTemporalFusion:
                             continue
 
                         for fut in done:
-                            cd = pending.pop(fut)
+                            city, _offset, _length = pending.pop(fut)
                             try:
-                                preds, c_ok, c_fail, c_skip, c_ft = fut.result()
-                                idx_arr = cd["idx"]
-                                result.loc[idx_arr, pred_col] = preds
-                                result.loc[idx_arr, resid_col] = (
-                                    cd["z_endog"] - preds
-                                )
+                                c_ok, c_fail, c_skip, c_ft, c_bs = fut.result()
                                 ok += c_ok
                                 fail += c_fail
                                 skipped += c_skip
                                 fail_types.update(c_ft)
+                                block_stats.extend((city,) + b for b in c_bs)
                             except Exception as exc:
                                 self.log.error(
                                     f"[sarimax_exog] worker crash "
-                                    f"city={cd['city']}: "
+                                    f"city={city}: "
                                     f"{exc.__class__.__name__}: {exc}"
                                 )
                             pbar.update(1)
@@ -598,76 +812,58 @@ class ArticleTemporalFusion:
                     f"[sarimax_exog] pool falhou "
                     f"({exc.__class__.__name__}: {exc}); fallback serial."
                 )
-                result[pred_col] = np.nan
-                result[resid_col] = np.nan
+                layout.reset_out()
                 ok = fail = skipped = 0
                 fail_types = Counter()
+                block_stats = []
                 use_parallel = False
+                # Blocos concluidos pelos workers antes da falha nao sao refeitos.
+                ckpt_done = ckpt.load()
 
         if not use_parallel:
             if n_workers > 1:
                 self.log.info(
                     f"[sarimax_exog {year}] modo SERIAL (fallback)"
                 )
-            for cd in tqdm(city_data, desc=f"sarimax_exog {year}", leave=False):
-                preds, c_ok, c_fail, c_skip, c_ft = _sarimax_city_worker(
-                    cd["z_endog"], cd["z_exog"], *worker_args,
+            for city, offset, length in tqdm(
+                city_slices, desc=f"sarimax_exog {year}", leave=False
+            ):
+                block = layout.data[offset:offset + length]
+                preds, c_ok, c_fail, c_skip, c_ft, c_bs = _sarimax_city_worker(
+                    block[:, 0], block[:, 1:], *worker_args,
+                    city, ckpt_dir, ckpt_done.get(city),
+                    **warm_kwargs,
                 )
-                result.loc[cd["idx"], pred_col] = preds
-                result.loc[cd["idx"], resid_col] = cd["z_endog"] - preds
+                layout.out[offset:offset + length] = preds
                 ok += c_ok
                 fail += c_fail
                 skipped += c_skip
                 fail_types.update(c_ft)
+                block_stats.extend((city,) + b for b in c_bs)
 
-        pct_finite = float(np.isfinite(result[pred_col].to_numpy()).mean() * 100)
-        breakdown = ""
-        if fail > 0:
-            breakdown = " | fail_types: " + ", ".join(
-                f"{k}:{v}" for k, v in fail_types.most_common()
-            )
-        self.log.info(
-            f"[sarimax_exog {year}] ok={ok} fail={fail} skipped={skipped} "
-            f"pct_finite={pct_finite:.1f}%{breakdown}"
+        return ok, fail, skipped, fail_types, block_stats
+
+    def _report_sarimax_block_stats(self, block_stats: List[tuple], year: int) -> None:
+        """Loga iteracoes/tempo por modo de bloco e grava o detalhe em CSV."""
+        if not block_stats:
+            return
+        stats = pd.DataFrame(
+            block_stats, columns=["cidade_norm", "start", "mode", "iterations", "seconds"]
         )
-        return result
+        for mode, grp in stats.groupby("mode", sort=False):
+            fitted = grp["iterations"] >= 0
+            self.log.info(
+                f"[sarimax_exog {year}] blocos_{mode}={len(grp)} "
+                f"iter_media={grp.loc[fitted, 'iterations'].mean():.1f} "
+                f"s/bloco={grp['seconds'].mean():.3f} s_total={grp['seconds'].sum():.1f}"
+            )
+        out = self.output_dir / "sarimax_exog" / "_block_stats" / f"sarimax_blocks_{year}.csv"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        stats.to_csv(out, index=False)
 
     # ==================================================================
     # Metodo 3 — MiniRocket multicanal
     # ==================================================================
-    def _build_windows(
-        self, df_agg: pd.DataFrame, cols: List[str], L: int
-    ) -> Tuple[np.ndarray, np.ndarray]:
-        n = len(df_agg)
-        C = len(cols)
-        X = np.full((n, C, L), np.nan, dtype=np.float32)
-        valid = np.zeros(n, dtype=bool)
-
-        cities = df_agg["cidade_norm"].to_numpy()
-        vals = df_agg[cols].to_numpy(dtype=np.float32)
-
-        city_starts: Dict[Any, int] = {}
-        prev = object()
-        for i in range(n):
-            c = cities[i]
-            if c != prev:
-                city_starts[c] = i
-                prev = c
-
-        for i in range(n):
-            c = cities[i]
-            cs = city_starts[c]
-            local_idx = i - cs
-            if local_idx < L:
-                continue
-            window = vals[i - L:i]
-            if np.any(np.isnan(window)):
-                continue
-            X[i] = window.T
-            valid[i] = True
-
-        return X, valid
-
     def _prepare_df_agg(self, src_path: Path) -> pd.DataFrame:
         df_raw = pd.read_parquet(src_path)
         df = self._parse_ts(df_raw)
@@ -696,16 +892,6 @@ class ArticleTemporalFusion:
             return None
         return list(active.values())
 
-    @staticmethod
-    def _minirocket_subsample_windows(
-        X: np.ndarray, max_n: int, rng: np.random.Generator
-    ) -> np.ndarray:
-        n = len(X)
-        if n <= max_n:
-            return X
-        idx = rng.choice(n, size=max_n, replace=False)
-        return np.ascontiguousarray(X[idx])
-
     def _minirocket_fit_global(
         self, train_year_files: List[Tuple[int, Path]]
     ) -> None:
@@ -742,15 +928,11 @@ class ArticleTemporalFusion:
                 f"canais={cols_for_window}"
             )
             self._log_memory(f"minirocket fit global {year} pre-janelas")
-            X_3d, valid = self._build_windows(df_agg, cols_for_window, L)
+            windows = MiniRocketWindows.from_frame(df_agg, cols_for_window, L)
             del df_agg
             gc.collect()
 
-            X_valid = X_3d[valid]
-            del X_3d
-            gc.collect()
-
-            n_valid = int(len(X_valid))
+            n_valid = windows.n_valid
             self.log.info(
                 f"[minirocket fit global {year}] {n_valid} janelas validas "
                 f"(cap {max_per_year}/ano)"
@@ -758,10 +940,8 @@ class ArticleTemporalFusion:
             if n_valid == 0:
                 continue
 
-            X_sub = self._minirocket_subsample_windows(
-                X_valid, max_per_year, rng
-            )
-            del X_valid
+            X_sub = windows.sample(max_per_year, rng)
+            del windows
             gc.collect()
             chunks.append(X_sub)
             del X_sub
@@ -822,17 +1002,13 @@ class ArticleTemporalFusion:
             f"[minirocket {year}] construindo janelas L={L} transform-only"
         )
         self._log_memory(f"minirocket {year} pre-janelas")
-        X_3d, valid = self._build_windows(df_agg, cols_for_window, L)
-        n_valid = int(valid.sum())
-        self.log.info(f"[minirocket {year}] {n_valid}/{len(valid)} janelas validas")
+        windows = MiniRocketWindows.from_frame(df_agg, cols_for_window, L)
+        n_valid = windows.n_valid
+        self.log.info(f"[minirocket {year}] {n_valid}/{windows.n} janelas validas")
 
         if n_valid == 0:
             return pd.DataFrame()
 
-        X_valid = X_3d[valid]
-        del X_3d
-        gc.collect()
-
         if self._minirocket_model is None:
             self.log.warning(
                 "[minirocket] modelo ausente (fit global nao executado ou falhou); "
@@ -842,10 +1018,8 @@ class ArticleTemporalFusion:
 
         self._log_memory(f"minirocket {year} pre-transform")
         mr = self._minirocket_model
-        valid_idx = np.flatnonzero(valid)
-        n_windows = int(X_valid.shape[0])
 
-        probe = mr.transform(np.ascontiguousarray(X_valid[:1]))
+        probe = mr.transform(windows.take(np.arange(1)))
         n_feat = int(probe.shape[1])
         del probe
         gc.collect()
@@ -863,19 +1037,16 @@ class ArticleTemporalFusion:
         feat_j = result.columns.get_indexer(feat_cols)
         chunk_sz = self._minirocket_transform_chunk
         rng_tr = np.random.default_rng(int(cfg.get("random_state", 42)))
-        for start in range(0, n_windows, chunk_sz):
-            end = min(start + chunk_sz, n_windows)
-            X_chunk = np.ascontiguousarray(X_valid[start:end])
+        for rows, X_chunk in windows.iter_chunks(chunk_sz):
             X_chunk += _minirocket_jitter_f32(X_chunk.shape, 1e-5, rng_tr)
             transformed = mr.transform(X_chunk)
             out_f32 = np.asarray(transformed, dtype=np.float32)
             del transformed, X_chunk
-            rows = valid_idx[start:end]
             result.iloc[rows, feat_j] = out_f32
             del out_f32
             gc.collect()
 
-        del X_valid
+        del windows
         gc.collect()
 
         self.log.info(f"[minirocket {year}] {n_feat} embeddings gerados")
@@ -889,7 +1060,7 @@ class ArticleTemporalFusion:
         self, method: str, df_agg: pd.DataFrame, year: int, is_train: bool
     ) -> pd.DataFrame:
         if method == "ewma_lags":
-            return self._generate_ewma_lags(df_agg)
+            return self._generate_ewma_lags(df_agg, year)
         if method == "sarimax_exog":
             return self._generate_sarimax_exog(df_agg, year)
         if method == "minirocket":
@@ -979,9 +1150,9 @@ class ArticleTemporalFusion:
                 )
                 continue
 
-            df_out = self._merge_back(df, feat)
+            df_out = utils.sort_for_parquet_stats(self._merge_back(df, feat))
             utils.ensure_dir(out_path.parent)
-            df_out.to_parquet(out_path, index=False)
+            df_out.to_parquet(out_path, index=False, row_group_size=utils.PARQUET_ROW_GROUP_ROWS)
             self.log.info(
                 f"[SAVED] {method}/{out_path.name} | {len(df_out)} linhas "
                 f"| metodo {elapsed:.1f}s"
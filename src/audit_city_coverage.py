@@ -1,14 +1,15 @@
 # src/audit_city_coverage.py
 # =============================================================================
 # AUDITORIA DE COBERTURA DE CIDADES: BDQUEIMADAS × INMET (por ano e bioma)
-# - Lê data/consolidated/BDQUEIMADAS/bdq_targets_{YYYY}_{biome}.csv
-# - Lê data/consolidated/INMET/inmet_{YYYY}_{biome}.csv
+# - Lê data/consolidated/BDQUEIMADAS/bdq_targets_{YYYY}_{biome}.parquet (ou .csv legado)
+# - Lê data/consolidated/INMET/inmet_{YYYY}_{biome}.parquet (ou .csv legado)
+#   só a coluna de cidade (projeção no Parquet, usecols no CSV)
 # - Normaliza nomes de cidades e calcula interseção/partições por ano
 # Saídas:
 #   1) data/dictionarys/city_coverage_summary_{biome}.csv
 #   2) data/dictionarys/city_coverage_details/{biome}/year_{YYYY}_{biome}.md
 #   3) data/dictionarys/city_coverage_details/{biome}/year_{YYYY}_{biome}.csv
-# Depende de: pandas, utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key)
+# Depende de: pandas, utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key), consolidated_store.py
 # =============================================================================
 from __future__ import annotations
 
@@ -26,6 +27,7 @@ from utils import (
     ensure_dir,
     normalize_key,
 )
+from consolidated_store import read_any, resolve_year_file
 
 # -----------------------------------------------------------------------------
 # [SEÇÃO 1] PATHS, DISCOVERY E PADRÕES
@@ -43,13 +45,13 @@ def _details_dir(biome: str) -> Path:
     root = _dict_root()
     return ensure_dir(Path(root) / "city_coverage_details" / biome.lower())
 
-_INMET_RE = re.compile(r"^inmet_(\d{4})_(?P<biome>[a-z0-9_]+)\.csv$", flags=re.IGNORECASE)
-_BDQ_RE   = re.compile(r"^bdq_targets_(\d{4})_(?P<biome>[a-z0-9_]+)\.csv$", flags=re.IGNORECASE)
+_INMET_RE = re.compile(r"^inmet_(\d{4})_(?P<biome>[a-z0-9_]+)\.(?:csv|parquet)$", flags=re.IGNORECASE)
+_BDQ_RE   = re.compile(r"^bdq_targets_(\d{4})_(?P<biome>[a-z0-9_]+)\.(?:csv|parquet)$", flags=re.IGNORECASE)
 
 def _list_inmet_years_for_biome(biome: str) -> List[int]:
     root = _inmet_consolidated_dir()
     years: List[int] = []
-    for p in root.glob(f"inmet_*_{biome}.csv"):
+    for p in root.glob(f"inmet_*_{biome}.*"):
         m = _INMET_RE.match(p.name)
         if m:
             years.append(int(m.group(1)))
@@ -58,7 +60,7 @@ def _list_inmet_years_for_biome(biome: str) -> List[int]:
 def _list_bdq_years_for_biome(biome: str) -> List[int]:
     root = _bdq_consolidated_dir()
     years: List[int] = []
-    for p in root.glob(f"bdq_targets_*_{biome}.csv"):
+    for p in root.glob(f"bdq_targets_*_{biome}.*"):
         m = _BDQ_RE.match(p.name)
         if m and (m.group("biome").lower() == biome.lower()):
             years.append(int(m.group(1)))
@@ -73,11 +75,11 @@ def _read_inmet_cities(year: int, biome: str, encoding: str = "utf-8") -> Tuple[
       - DataFrame com colunas ['source','year','city_raw','city_norm','count']
       - Contador city_raw para referência (pode ilustrar variantes)
     """
-    path = _inmet_consolidated_dir() / f"inmet_{year}_{biome}.csv"
-    if not path.exists():
-        raise FileNotFoundError(f"INMET não encontrado: {path}")
+    path = resolve_year_file(_inmet_consolidated_dir(), f"inmet_{year}_{biome}")
+    if path is None:
+        raise FileNotFoundError(f"INMET não encontrado: {_inmet_consolidated_dir() / f'inmet_{year}_{biome}.parquet'}")
 
-    df = pd.read_csv(path, dtype=str, encoding=encoding, usecols=["CIDADE"])
+    df = read_any(path, columns=["CIDADE"], categories=False, encoding=encoding)
     df["city_raw"] = df["CIDADE"].astype(str)
     df["city_norm"] = df["city_raw"].map(normalize_key)
 
@@ -97,12 +99,12 @@ def _read_bdq_cities(year: int, biome: str, encoding: str = "utf-8") -> Tuple[pd
       - DataFrame com colunas ['source','year','city_raw','city_norm','count']
       - Contador city_raw
     """
-    path = _bdq_consolidated_dir() / f"bdq_targets_{year}_{biome}.csv"
-    if not path.exists():
-        raise FileNotFoundError(f"BDQ não encontrado: {path}")
+    path = resolve_year_file(_bdq_consolidated_dir(), f"bdq_targets_{year}_{biome}")
+    if path is None:
+        raise FileNotFoundError(f"BDQ não encontrado: {_bdq_consolidated_dir() / f'bdq_targets_{year}_{biome}.parquet'}")
 
     usecols = ["MUNICIPIO"]
-    df = pd.read_csv(path, dtype=str, encoding=encoding, usecols=usecols)
+    df = read_any(path, columns=usecols, categories=False, encoding=encoding)
     df["city_raw"] = df["MUNICIPIO"].astype(str)
     df["city_norm"] = df["city_raw"].map(normalize_key)
 
@@ -1,7 +1,7 @@
-"""Compara contagens de linhas entre CSV INMET consolidado e parquets em modeling.
+"""Compara contagens de linhas entre o INMET consolidado e parquets em modeling.
 
 Fontes:
-    data/consolidated/INMET/inmet_{ANO}_cerrado.csv (principal)
+    data/consolidated/INMET/inmet_{ANO}_cerrado.parquet (store tipado) ou .csv
     ou inmet_bdq_{ANO}_cerrado.csv (fallback legado)
     data/modeling/<base>/inmet_bdq_{ANO}_cerrado.parquet
 
@@ -42,7 +42,7 @@ if str(_project_root) not in sys.path:
 from src.dedupe_base_datasets import DEFAULT_MODELING_BASES
 from src.utils import get_logger, loadConfig
 
-_RE_CSV_SHORT = re.compile(r"^inmet_(\d{4})_cerrado\.csv$", re.I)
+_RE_CSV_SHORT = re.compile(r"^inmet_(\d{4})_cerrado\.(?:csv|parquet)$", re.I)
 _RE_CSV_BDQ = re.compile(r"^inmet_bdq_(\d{4})_cerrado\.csv$", re.I)
 _RE_PARQUET = re.compile(r"^inmet_bdq_(\d{4})_cerrado\.parquet$", re.I)
 
@@ -61,10 +61,11 @@ def _year_from_parquet_path(path: Path) -> Optional[int]:
 
 
 def _resolve_consolidated_csv(inmet_dir: Path, year: int) -> tuple[Optional[Path], Optional[str]]:
-    """Preferencia: inmet_{year}_cerrado.csv; senao inmet_bdq_{year}_cerrado.csv."""
-    short_p = inmet_dir / f"inmet_{year}_cerrado.csv"
-    if short_p.is_file():
-        return short_p, short_p.name
+    """Preferencia: inmet_{year}_cerrado.parquet/.csv; senao inmet_bdq_{year}_cerrado.csv."""
+    for suffix in (".parquet", ".csv"):
+        short_p = inmet_dir / f"inmet_{year}_cerrado{suffix}"
+        if short_p.is_file():
+            return short_p, short_p.name
     bdq_p = inmet_dir / f"inmet_bdq_{year}_cerrado.csv"
     if bdq_p.is_file():
         return bdq_p, bdq_p.name
@@ -85,7 +86,7 @@ def _parquet_num_rows(path: Path) -> int:
 
 def _collect_years(inmet_dir: Path, modeling_root: Path, bases: List[str]) -> List[int]:
     years: Set[int] = set()
-    for p in sorted(inmet_dir.glob("inmet_*_cerrado.csv")):
+    for p in sorted(inmet_dir.glob("inmet_*_cerrado.*")):
         y = _year_from_csv_path(p)
         if y is not None:
             years.add(y)
@@ -112,7 +113,10 @@ def _parity_row(
     if csv_path is not None:
         row["inmet_csv_file"] = csv_name
         try:
-            row["inmet_csv_rows"] = _count_csv_data_rows(csv_path)
+            if csv_path.suffix.lower() == ".parquet":
+                row["inmet_csv_rows"] = _parquet_num_rows(csv_path)
+            else:
+                row["inmet_csv_rows"] = _count_csv_data_rows(csv_path)
         except OSError as e:
             row["inmet_csv_rows"] = None
             row["inmet_note"] = f"read_error: {e}"
@@ -201,7 +205,7 @@ def run(bases: Optional[List[str]] = None) -> Path:
     modeling_root = Path(cfg["paths"]["data"]["modeling"])
 
     paths_note = (
-        f"- Consolidated CSV: `{inmet_dir}` / `inmet_<ANO>_cerrado.csv` "
+        f"- Consolidated INMET: `{inmet_dir}` / `inmet_<ANO>_cerrado.parquet` (ou `.csv`) "
         f"(ou `inmet_bdq_<ANO>_cerrado.csv`)\n"
         f"- Modeling root: `{modeling_root}` / `<base>/inmet_bdq_*_cerrado.parquet`"
     )
@@ -9,10 +9,11 @@
 # Opção legado (--legacy-manual-merge):
 #   - Cruza exportador_* manual em raw/BDQUEIMADAS com o processado (fluxo antigo).
 #
-# Saídas:
-#   - data/consolidated/BDQUEIMADAS/bdq_targets_{YYYY}[_<bioma>].csv        (por ano)
-#   - data/consolidated/BDQUEIMADAS/bdq_targets_all_years[_<bioma>].csv     (multi-anos)
-# Dep.: utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key)
+# Saídas (--format parquet|csv|both; default parquet = store tipado, ver consolidated_store.py):
+#   - data/consolidated/BDQUEIMADAS/bdq_targets_{YYYY}[_<bioma>].parquet    (por ano)
+#   - data/consolidated/BDQUEIMADAS/bdq_targets_all_years[_<bioma>].parquet (multi-anos)
+#   RISCO_FOGO/FRP em float64; PAIS/ESTADO/MUNICIPIO como dictionary; .csv opcional.
+# Dep.: utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key), consolidated_store.py
 # =============================================================================
 from __future__ import annotations
 
@@ -33,6 +34,7 @@ from utils import (
     normalize_key,
     unzip_all_in_dir,
 )
+from consolidated_store import OUTPUT_FORMATS, read_any, wants_parquet, write_outputs
 
 # =============================================================================
 # CONFIG/LOG
@@ -504,11 +506,17 @@ def build_output(merged: pd.DataFrame) -> pd.DataFrame:
     out = out.sort_values(["DATAHORA", "ESTADO", "MUNICIPIO"], kind="stable").reset_index(drop=True)
     return out
 
-def write_output(df: pd.DataFrame, path: Path, encoding: str = "utf-8") -> Path:
+def _output_path(name: str, output_format: str) -> Path:
+    """Caminho principal da saída: .parquet (store) ou .csv (formato csv)."""
+    suffix = ".parquet" if wants_parquet(output_format) else ".csv"
+    return (OUT_DIR / name).with_suffix(suffix)
+
+def write_output(df: pd.DataFrame, path: Path, encoding: str = "utf-8", output_format: str = "parquet") -> Path:
     ensure_dir(path.parent)
-    df.to_csv(path, index=False, encoding=encoding)
-    log.info(f"[WRITE] {path} (linhas: {len(df):,})")
-    return path
+    paths = write_outputs(df, path, output_format, encoding=encoding)
+    for p in paths:
+        log.info(f"[WRITE] {p} (linhas: {len(df):,})")
+    return paths[0]
 
 # =============================================================================
 # PIPELINE POR ANO
@@ -521,6 +529,7 @@ def _consolidate_year_legacy_manual_merge(
     validation: bool,
     biome: Optional[str],
     encoding: str,
+    output_format: str = "parquet",
 ) -> Optional[Path]:
     """Fluxo antigo: exportador manual em raw/BDQUEIMADAS × CSV COIDS."""
     manual_files = [p for (y, p) in list_manual_year_files(RAW_BDQ_DIR) if y == year]
@@ -552,7 +561,7 @@ def _consolidate_year_legacy_manual_merge(
     log.info(f"[{year}] UNMATCHED                    = {unmatched_rows:,}")
 
     out_df = build_output(merged)
-    return write_output(out_df, out_path, encoding=encoding)
+    return write_output(out_df, out_path, encoding=encoding, output_format=output_format)
 
 
 def consolidate_year(
@@ -562,6 +571,7 @@ def consolidate_year(
     biome: Optional[str] = None,
     encoding: str = "utf-8",
     legacy_manual_merge: bool = False,
+    output_format: str = "parquet",
 ) -> Optional[Path]:
     proc_file = resolve_processed_focos_csv(year, PROC_BDQ_DIR)
     if not proc_file:
@@ -572,14 +582,14 @@ def consolidate_year(
         return None
 
     out_name = _resolve_output_filename([year], biome, prefix="bdq_targets")
-    out_path = OUT_DIR / out_name
+    out_path = _output_path(out_name, output_format)
     if out_path.exists() and not overwrite:
         log.info(f"[{year}] [SKIP] {out_path.name} já existe. Use --overwrite para refazer.")
         return out_path
 
     if legacy_manual_merge:
         return _consolidate_year_legacy_manual_merge(
-            year, proc_file, out_path, overwrite, validation, biome, encoding
+            year, proc_file, out_path, overwrite, validation, biome, encoding, output_format
         )
 
     log.info(f"[{year}] Fonte: COIDS apenas → {proc_file}")
@@ -592,7 +602,7 @@ def consolidate_year(
     log.info(f"[{year}] linhas saída = {len(merged):,} | id_bdq ausente = {na_id:,}")
 
     out_df = build_output(merged)
-    return write_output(out_df, out_path, encoding=encoding)
+    return write_output(out_df, out_path, encoding=encoding, output_format=output_format)
 
 # =============================================================================
 # ORQUESTRAÇÃO (MÚLTIPLOS ANOS) + ALL_YEARS
@@ -606,6 +616,7 @@ def run(
     encoding: str = "utf-8",
     legacy_manual_merge: bool = False,
     auto_extract_from_zips: bool = True,
+    output_format: str = "parquet",
 ) -> Optional[Path]:
     # Modo legado também precisa dos CSV COIDS em processed/
     maybe_extract_zips_from_raw(auto_extract_from_zips)
@@ -632,6 +643,7 @@ def run(
                 biome=biome,
                 encoding=encoding,
                 legacy_manual_merge=legacy_manual_merge,
+                output_format=output_format,
             )
             if p:
                 outs.append(p)
@@ -644,16 +656,16 @@ def run(
     # Se houver mais de um ano, gerar um all_years (ou intervalo Y1_YN)
     if len(outs) > 1:
         final_name = output_filename or _resolve_output_filename(years, biome, prefix="bdq_targets")
-        final_path = OUT_DIR / final_name
+        final_path = _output_path(final_name, output_format)
 
         if final_path.exists() and not overwrite:
             log.info(f"[ALL] [SKIP] {final_path.name} já existe.")
             return final_path
 
-        frames = [pd.read_csv(p, encoding=encoding, low_memory=False) for p in outs]
+        frames = [read_any(p, categories=False, encoding=encoding) for p in outs]
         all_df = pd.concat(frames, ignore_index=True)
         all_df.sort_values(["DATAHORA", "ESTADO", "MUNICIPIO"], kind="stable", inplace=True)
-        all_df.to_csv(final_path, index=False, encoding=encoding)
+        final_path = write_outputs(all_df, final_path, output_format, encoding=encoding)[0]
         log.info(f"[ALL] [DONE] {final_path} (linhas: {len(all_df):,})")
         return final_path
 
@@ -686,6 +698,8 @@ if __name__ == "__main__":
         help="Usa exportador_* em raw/BDQUEIMADAS cruzado com COIDS (fluxo antigo). "
         "Sem esta flag, só lê focos_br_ref_* em data/processed/ID_BDQUEIMADAS.",
     )
+    p.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="parquet",
+                   help="Formato de saída: parquet (tipado, default), csv (legado) ou both.")
     p.add_argument(
         "--no-auto-extract",
         action="store_true",
@@ -703,4 +717,5 @@ if __name__ == "__main__":
         encoding=args.encoding,
         legacy_manual_merge=args.legacy_manual_merge,
         auto_extract_from_zips=not args.no_auto_extract,
+        output_format=args.output_format,
     )
@@ -0,0 +1 @@
+# src/benchmarks/ — benchmarks sinteticos (sem dados reais) dos kernels de ETL/fusao.
@@ -0,0 +1,27 @@
+"""Helpers compartilhados pelos benchmarks sinteticos de src/benchmarks/."""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+@contextmanager
+def timed(results: Dict[str, float], key: str) -> Iterator[None]:
+    """Acumula o tempo de parede do bloco em results[key] (segundos)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[key] = results.get(key, 0.0) + (time.perf_counter() - t0)
+
+
+def format_report(title: str, timings: Dict[str, float], baseline: str) -> str:
+    """Tabela texto com tempos e speedup relativo a `baseline`."""
+    base = timings.get(baseline, 0.0)
+    lines: List[str] = [title, "-" * len(title)]
+    width = max(len(k) for k in timings) if timings else 0
+    for key, sec in timings.items():
+        speedup = f"{base / sec:6.1f}x" if sec > 0 and base > 0 else "   n/a"
+        lines.append(f"{key.ljust(width)}  {sec:9.3f}s  {speedup}")
+    return "\n".join(lines)
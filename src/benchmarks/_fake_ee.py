@@ -0,0 +1,324 @@
+"""Modulo `ee` falso para testar a extracao de biomassa GEE offline.
+
+Cobre o subconjunto da API usado por src/article/gee_biomass.py (motores
+per_image e batched): ImageCollection (filterDate, filterBounds, sort, size,
+toList, aggregate_array, filter + Filter.inList, map), Image (select, neq,
+And, multiply, updateMask, get, reduceRegions), Geometry (Point, buffer,
+Rectangle), Feature (set), FeatureCollection (map, flatten, getInfo),
+Reducer.mean.
+
+Os valores saem de SyntheticRaster: bandas MOD13Q1 sinteticas (NDVI/EVI
+escalados por 10000, fill -3000 em "nuvens") como funcao de (lon, lat, data).
+reduceRegions amostra o buffer numa grade de pontos dentro do disco.
+
+Cada getInfo() conta uma requisicao (FakeEE.requests / .elements), com
+latencia artificial opcional, limite de elementos por getInfo (como o GEE) e
+falha injetavel por composto (fail_time_starts) para testar retomada.
+
+Uso:
+    ee = FakeEE(SyntheticRaster(), years=[2022], latency_s=0.05)
+    extract_weekly_biomass_gee(sites, 2022, cfg, log, ee)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+COLLECTION_ID = "MODIS/061/MOD13Q1"
+_FILL = -3000.0
+_M_PER_DEG = 111_320.0
+_DAY_MS = 86_400_000
+
+
+class SyntheticRaster:
+    """Bandas MOD13Q1 sinteticas: valor bruto (x10000) com fill -3000 em celulas 'nubladas'."""
+
+    def __init__(self, bands: Sequence[str] = ("NDVI", "EVI"), cloud_frac: float = 0.1):
+        self.bands = list(bands)
+        self.cloud_frac = float(cloud_frac)
+
+    def _clouded(self, lon: np.ndarray, lat: np.ndarray, t_ms: int) -> np.ndarray:
+        a = np.floor(lon * 4.0)
+        b = np.floor(lat * 4.0)
+        h = np.sin(a * 12.9898 + b * 78.233 + (t_ms // _DAY_MS) * 0.1372) * 43758.5453
+        return (h - np.floor(h)) < self.cloud_frac
+
+    def band(self, name: str, t_ms: int) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+        doy = (pd.Timestamp(t_ms, unit="ms").dayofyear - 1) / 365.0
+
+        def _fn(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+            ndvi = (0.55 + 0.25 * np.sin(0.7 * lon + 2 * np.pi * doy) * np.cos(0.5 * lat)
+                    + 0.05 * np.sin(3.1 * lon * lat))
+            v = ndvi if name == "NDVI" else 0.65 * ndvi - 0.03 + 0.02 * np.cos(lat + lon)
+            raw = np.round(v * 10000.0)
+            return np.where(self._clouded(lon, lat, t_ms), _FILL, raw)
+
+        return _fn
+
+
+def _unwrap(v: Any) -> Any:
+    return v.value if isinstance(v, _Computed) else v
+
+
+class _Computed:
+    def __init__(self, ee: "FakeEE", value: Any):
+        self._ee = ee
+        self.value = value
+
+    def getInfo(self) -> Any:
+        self._ee._request(1)
+        return self.value
+
+
+class _Geometry:
+    def __init__(self, lon: float = float("nan"), lat: float = float("nan"), radius_m: float = 0.0):
+        self.lon = float(lon)
+        self.lat = float(lat)
+        self.radius_m = float(radius_m)
+
+    def buffer(self, distance_m: float) -> "_Geometry":
+        return _Geometry(self.lon, self.lat, distance_m)
+
+
+class _GeometryNS:
+    @staticmethod
+    def Point(coords: Sequence[float]) -> _Geometry:
+        return _Geometry(coords[0], coords[1])
+
+    @staticmethod
+    def Rectangle(coords: Sequence[float]) -> _Geometry:
+        return _Geometry()
+
+
+class _Feature:
+    def __init__(self, geom: _Geometry, props: Optional[Dict[str, Any]] = None):
+        self.geom = geom
+        self.props = dict(props or {})
+
+    def set(self, key: str, value: Any) -> "_Feature":
+        return _Feature(self.geom, {**self.props, key: _unwrap(value)})
+
+
+class _Reducer:
+    @staticmethod
+    def mean() -> str:
+        return "mean"
+
+
+class _InList:
+    def __init__(self, prop: str, values: Iterable[Any]):
+        self.prop = prop
+        self.values = set(values)
+
+    def __call__(self, img: "_Image") -> bool:
+        return img.props.get(self.prop) in self.values
+
+
+class _FilterNS:
+    @staticmethod
+    def inList(prop: str, values: Iterable[Any]) -> _InList:
+        return _InList(prop, values)
+
+
+class _FeatureCollection:
+    def __init__(self, ee: "FakeEE", items: Any):
+        self._ee = ee
+        if isinstance(items, _FeatureCollection):
+            items = items.items
+        self.items: List[Any] = list(items)
+
+    def map(self, fn: Callable[[_Feature], _Feature]) -> "_FeatureCollection":
+        return _FeatureCollection(self._ee, [fn(f) for f in self.items])
+
+    def flatten(self) -> "_FeatureCollection":
+        out: List[_Feature] = []
+        for it in self.items:
+            out.extend(it.items if isinstance(it, _FeatureCollection) else [it])
+        return _FeatureCollection(self._ee, out)
+
+    def getInfo(self) -> Dict[str, Any]:
+        feats = self.flatten().items
+        fail = self._ee.fail_time_starts
+        if fail and any(f.props.get("_t") in fail for f in feats):
+            self._ee._request(len(feats))
+            raise RuntimeError("Computation timed out (falha injetada)")
+        self._ee._request(len(feats))
+        return {
+            "type": "FeatureCollection",
+            "features": [{"type": "Feature", "geometry": None, "properties": dict(f.props)} for f in feats],
+        }
+
+
+class _Image:
+    def __init__(self, ee: "FakeEE", bands: Dict[str, Callable], props: Dict[str, Any]):
+        self._ee = ee
+        self.bands = bands
+        self.props = props
+
+    def _with(self, bands: Dict[str, Callable]) -> "_Image":
+        return _Image(self._ee, bands, self.props)
+
+    def select(self, names: Any) -> "_Image":
+        names = [names] if isinstance(names, str) else list(names)
+        return self._with({n: self.bands[n] for n in names})
+
+    def _first(self) -> Callable:
+        return next(iter(self.bands.values()))
+
+    def neq(self, value: float) -> "_Image":
+        fn = self._first()
+        return self._with({"mask": lambda lon, lat: (fn(lon, lat) != value).astype(np.float64)})
+
+    def And(self, other: "_Image") -> "_Image":
+        a, b = self._first(), other._first()
+        return self._with({"mask": lambda lon, lat: ((a(lon, lat) != 0) & (b(lon, lat) != 0)).astype(np.float64)})
+
+    def multiply(self, k: float) -> "_Image":
+        return self._with({n: (lambda fn: lambda lon, lat: fn(lon, lat) * k)(fn) for n, fn in self.bands.items()})
+
+    def updateMask(self, mask: "_Image") -> "_Image":
+        m = mask._first()
+
+        def _masked(fn: Callable) -> Callable:
+            return lambda lon, lat: np.where(m(lon, lat) != 0, fn(lon, lat), np.nan)
+
+        return self._with({n: _masked(fn) for n, fn in self.bands.items()})
+
+    def get(self, prop: str) -> _Computed:
+        return _Computed(self._ee, self.props.get(prop))
+
+    def reduceRegions(self, collection: _FeatureCollection, reducer: Any = None,
+                      scale: float = 250, tileScale: int = 1) -> _FeatureCollection:
+        feats = collection.flatten().items
+        if not feats:
+            return _FeatureCollection(self._ee, [])
+        lon = np.array([f.geom.lon for f in feats])
+        lat = np.array([f.geom.lat for f in feats])
+        rad = np.array([f.geom.radius_m for f in feats])
+        # Ponto: 1 amostra; buffer: grade k x k dentro do disco.
+        k = self._ee.buffer_samples
+        g = np.linspace(-1.0, 1.0, k)
+        gx, gy = np.meshgrid(g, g)
+        disk = (gx ** 2 + gy ** 2) <= 1.0
+        ox, oy = gx[disk], gy[disk]
+        n_s = np.where(rad > 0, ox.size, 1)
+        starts = np.r_[0, np.cumsum(n_s)[:-1]]
+        idx = np.repeat(np.arange(len(feats)), n_s)
+        pos = np.arange(idx.size) - starts[idx]
+        is_buf = rad[idx] > 0
+        dlat = np.where(is_buf, oy[np.minimum(pos, ox.size - 1)] * rad[idx] / _M_PER_DEG, 0.0)
+        dlon = np.where(is_buf, ox[np.minimum(pos, ox.size - 1)] * rad[idx]
+                        / (_M_PER_DEG * np.cos(np.radians(lat[idx]))), 0.0)
+        s_lon, s_lat = lon[idx] + dlon, lat[idx] + dlat
+        out = [dict(f.props) for f in feats]
+        for name, fn in self.bands.items():
+            v = fn(s_lon, s_lat)
+            ok = ~np.isnan(v)
+            tot = np.bincount(idx, weights=np.where(ok, v, 0.0), minlength=len(feats))
+            cnt = np.bincount(idx, weights=ok.astype(np.float64), minlength=len(feats))
+            for i in range(len(feats)):
+                out[i][name] = float(tot[i] / cnt[i]) if cnt[i] > 0 else None
+        return _FeatureCollection(self._ee, [_Feature(f.geom, p) for f, p in zip(feats, out)])
+
+
+class _List:
+    def __init__(self, items: List[Any]):
+        self.items = items
+
+    def get(self, i: int) -> Any:
+        return self.items[int(i)]
+
+
+class _ImageCollection:
+    def __init__(self, ee: "FakeEE", images: List[_Image]):
+        self._ee = ee
+        self.images = images
+
+    def filterDate(self, start: str, end: str) -> "_ImageCollection":
+        a = pd.Timestamp(start).value // 1_000_000
+        b = pd.Timestamp(end).value // 1_000_000
+        return _ImageCollection(self._ee, [i for i in self.images if a <= i.props["system:time_start"] < b])
+
+    def filterBounds(self, geom: Any) -> "_ImageCollection":
+        return self
+
+    def sort(self, prop: str) -> "_ImageCollection":
+        return _ImageCollection(self._ee, sorted(self.images, key=lambda i: i.props[prop]))
+
+    def filter(self, flt: _InList) -> "_ImageCollection":
+        return _ImageCollection(self._ee, [i for i in self.images if flt(i)])
+
+    def size(self) -> _Computed:
+        return _Computed(self._ee, len(self.images))
+
+    def toList(self, n: int) -> _List:
+        return _List(self.images[: int(n)])
+
+    def aggregate_array(self, prop: str) -> _Computed:
+        return _Computed(self._ee, [i.props[prop] for i in self.images])
+
+    def map(self, fn: Callable[[_Image], Any]) -> _FeatureCollection:
+        return _FeatureCollection(self._ee, [fn(i) for i in self.images])
+
+
+class FakeEE:
+    """Substituto do modulo `ee` (passar como ee_mod). Compostos de 16 dias de MOD13Q1 por ano."""
+
+    def __init__(
+        self,
+        raster: Optional[SyntheticRaster] = None,
+        years: Iterable[int] = (2022,),
+        *,
+        period_days: int = 16,
+        latency_s: float = 0.0,
+        per_element_s: float = 0.0,
+        max_elements: int = 5000,
+        buffer_samples: int = 7,
+    ):
+        self.raster = raster or SyntheticRaster()
+        self.latency_s = float(latency_s)
+        self.per_element_s = float(per_element_s)
+        self.max_elements = int(max_elements)
+        self.buffer_samples = int(buffer_samples)
+        self.fail_time_starts: set = set()
+        self.requests = 0
+        self.elements = 0
+        self._lock = threading.Lock()
+
+        images: List[_Image] = []
+        for y in sorted(set(years)):
+            for d in pd.date_range(f"{y}-01-01", f"{y}-12-31", freq=f"{period_days}D"):
+                t = int(d.value // 1_000_000)
+                bands = {b: self.raster.band(b, t) for b in self.raster.bands}
+                images.append(_Image(self, bands, {"system:time_start": t}))
+        self._collections = {COLLECTION_ID: images}
+
+        fake = self
+        self.Geometry = _GeometryNS
+        self.Reducer = _Reducer
+        self.Filter = _FilterNS
+        self.Feature = _Feature
+        self.FeatureCollection = lambda items: _FeatureCollection(fake, items)
+        self.ImageCollection = lambda cid: _ImageCollection(fake, list(fake._collections[cid]))
+        self.Image = lambda x: x
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.elements = 0
+
+    def _request(self, n_elements: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.elements += int(n_elements)
+        if n_elements > self.max_elements:
+            raise RuntimeError(
+                f"Collection query aborted after accumulating over {self.max_elements} elements."
+            )
+        wait_s = self.latency_s + self.per_element_s * n_elements
+        if wait_s > 0:
+            time.sleep(wait_s)
@@ -0,0 +1,125 @@
+"""Benchmark + paridade: filtro/downsampling por chunk de load_split_batched.
+
+Gera RecordBatches sinteticos (features float32 com ~1% NaN, alvo raro com
+alguns NaN/valores invalidos, ANO) e compara, chunk a chunk:
+    legacy - batch.to_pandas() inteiro + dropna + to_numeric(ANO) +
+             _coerce_binary_target + _downsample_keep_all_pos;
+    arrow  - _chunk_keep_rows (mascara via pyarrow.compute, so alvo/ano
+             convertidos) + _downsample_positions + _materialize_rows
+             (to_pandas apenas das linhas mantidas).
+
+Paridade: DataFrame final por chunk identico (mesmas linhas, mesma ordem,
+mesmos dtypes), com o mesmo esquema de seed (seed + ano + chunk_idx).
+
+Uso:
+    python -m src.benchmarks.bench_arrow_downsample
+    python -m src.benchmarks.bench_arrow_downsample --rows 8000000 --features 120
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.train_runner import (  # noqa: E402
+    _chunk_keep_rows,
+    _coerce_binary_target,
+    _downsample_keep_all_pos,
+    _downsample_positions,
+    _materialize_rows,
+)
+
+TARGET = "HAS_FOCO"
+YEAR = "ANO"
+
+
+def make_batches(n_rows: int, n_feat: int, batch_rows: int, seed: int) -> List[pa.RecordBatch]:
+    rng = np.random.default_rng(seed)
+    out: List[pa.RecordBatch] = []
+    for start in range(0, n_rows, batch_rows):
+        n = min(batch_rows, n_rows - start)
+        cols: Dict[str, np.ndarray] = {}
+        for j in range(n_feat):
+            v = rng.normal(size=n).astype(np.float32)
+            v[rng.random(n) < 0.01 / n_feat * 4] = np.nan
+            cols[f"f{j:03d}"] = v
+        y = (rng.random(n) < 0.004).astype(np.float64)
+        y[rng.random(n) < 0.0005] = np.nan
+        y[rng.random(n) < 0.0005] = 2.0
+        cols[TARGET] = y
+        cols[YEAR] = np.full(n, 2015, dtype=np.int64)
+        out.append(pa.RecordBatch.from_pydict(cols))
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--features", type=int, default=60)
+    p.add_argument("--batch-rows", type=int, default=500_000)
+    p.add_argument("--neg-pos-ratio", type=int, default=200)
+    p.add_argument("--min-neg-keep", type=int, default=50_000)
+    p.add_argument("--budget", type=int, default=8_000_000)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    batches = make_batches(args.rows, args.features, args.batch_rows, args.seed)
+    features = [f"f{j:03d}" for j in range(args.features)]
+    timings: Dict[str, float] = {}
+    kept_legacy = kept_arrow = 0
+    converted_legacy = converted_arrow = 0
+
+    for chunk_idx, batch in enumerate(batches, start=1):
+        seed = args.seed + 2015 + chunk_idx
+
+        with timed(timings, "legacy (to_pandas + dropna + sample)"):
+            df = batch.to_pandas(split_blocks=True)
+            converted_legacy += len(df)
+            df.dropna(subset=features + [TARGET, YEAR], inplace=True)
+            df[YEAR] = pd.to_numeric(df[YEAR], errors="coerce")
+            df.dropna(subset=[YEAR], inplace=True)
+            df[YEAR] = df[YEAR].astype("int32")
+            _coerce_binary_target(df, TARGET)
+            ref = _downsample_keep_all_pos(
+                df, TARGET, max(0, args.budget - kept_legacy),
+                args.neg_pos_ratio, args.min_neg_keep, seed,
+            )
+            ref = ref[features + [TARGET, YEAR]]
+            kept_legacy += len(ref)
+
+        with timed(timings, "arrow (mascara + posicoes + take)"):
+            rows, y, yr = _chunk_keep_rows(batch, features, TARGET, YEAR)
+            keep = _downsample_positions(
+                y, max(0, args.budget - kept_arrow),
+                args.neg_pos_ratio, args.min_neg_keep, seed,
+            )
+            got = _materialize_rows(batch, rows[keep], features, y[keep], yr[keep], TARGET, YEAR)
+            converted_arrow += len(got)
+            kept_arrow += len(got)
+
+        try:
+            pd.testing.assert_frame_equal(ref, got)
+        except AssertionError as e:
+            raise SystemExit(f"PARIDADE FALHOU: chunk {chunk_idx}: {e}")
+
+    print(f"linhas={args.rows} feats={args.features} batch_rows={args.batch_rows} "
+          f"neg_pos_ratio={args.neg_pos_ratio}")
+    print(format_report("load_split_batched filtro + downsampling", timings,
+                        "legacy (to_pandas + dropna + sample)"))
+    print(f"linhas convertidas para pandas: legacy={converted_legacy:,} arrow={converted_arrow:,} "
+          f"(mantidas={kept_arrow:,})")
+    print("paridade: OK (DataFrames por chunk identicos)")
+
+
+if __name__ == "__main__":
+    main()
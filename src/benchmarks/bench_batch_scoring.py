@@ -0,0 +1,107 @@
+"""Benchmark + paridade: inferencia dos modelos salvos, antiga vs em lote.
+
+Treina alguns RF/XGB pequenos sobre dados sinteticos, grava como o
+save_artifacts (joblib compress=1) e pontua um X_test grande com:
+    serial - um run por vez: joblib.load + predict_proba no X inteiro
+             (caminho antigo do model_eval_viz.evaluate_run);
+    lote   - batch_scoring.score_models: runs em paralelo dentro do
+             orcamento de threads, X em blocos de linhas, buffer pre-alocado.
+
+Paridade: scores identicos por run. O ganho depende dos cores fisicos; em
+maquina de 1 core sobra so o efeito dos blocos (pico de RAM menor).
+
+Uso:
+    python -m src.benchmarks.bench_batch_scoring
+    python -m src.benchmarks.bench_batch_scoring --rows 3000000 --runs 8 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.ml import _batch_scoring as batch_scoring  # noqa: E402
+
+
+def _fit_models(n_runs: int, X: pd.DataFrame, y: pd.Series, seed: int) -> list:
+    from sklearn.ensemble import RandomForestClassifier
+
+    try:
+        from xgboost import XGBClassifier
+    except Exception:
+        XGBClassifier = None  # type: ignore
+
+    models = []
+    for i in range(n_runs):
+        if XGBClassifier is not None and i % 2 == 1:
+            models.append(XGBClassifier(n_estimators=80, max_depth=6, tree_method="hist",
+                                        random_state=seed + i, n_jobs=1, verbosity=0))
+        else:
+            models.append(RandomForestClassifier(n_estimators=40, max_depth=12,
+                                                 random_state=seed + i, n_jobs=1))
+        models[-1].fit(X, y)
+    return models
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=1_000_000, help="linhas do X_test")
+    p.add_argument("--train-rows", type=int, default=50_000)
+    p.add_argument("--features", type=int, default=30)
+    p.add_argument("--runs", type=int, default=4)
+    p.add_argument("--workers", type=int, default=0, help="0 = cpu_thread_budget")
+    p.add_argument("--block-rows", type=int, default=batch_scoring.DEFAULT_BLOCK_ROWS)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    cols = [f"f{i:03d}" for i in range(args.features)]
+
+    def make(n: int):
+        X = pd.DataFrame(rng.normal(size=(n, args.features)).astype(np.float32), columns=cols)
+        y = pd.Series((X["f000"] + 0.5 * X["f001"] + rng.normal(size=n) > 2.5).astype(np.int8))
+        return X, y
+
+    X_tr, y_tr = make(args.train_rows)
+    X_te, _ = make(args.rows)
+    models = _fit_models(args.runs, X_tr, y_tr, args.seed)
+
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_scoring_") as tmp:
+        paths = {}
+        for i, m in enumerate(models):
+            paths[f"run{i:02d}_{type(m).__name__}"] = Path(tmp) / f"model_{i:02d}.joblib"
+            joblib.dump(m, paths[f"run{i:02d}_{type(m).__name__}"], compress=1)
+        del models
+
+        ref: Dict[str, np.ndarray] = {}
+        with timed(timings, "serial (load + predict_proba no X inteiro)"):
+            for key, path in paths.items():
+                ref[key] = batch_scoring.score_block(joblib.load(path), X_te)
+        with timed(timings, "lote (runs paralelos, blocos de linhas)"):
+            got = batch_scoring.score_models(paths, X_te, block_rows=args.block_rows,
+                                             workers=args.workers or None)
+
+    bad = [k for k in paths if not np.allclose(ref[k], got[k].scores, rtol=0, atol=1e-7)]
+    if bad:
+        raise SystemExit(f"PARIDADE FALHOU: {bad}")
+
+    print(f"linhas={args.rows} feats={args.features} runs={args.runs} "
+          f"workers={batch_scoring.recommend_workers(args.runs, args.workers or None)} bloco={args.block_rows}")
+    print(format_report("Inferencia dos modelos salvos", timings, "serial (load + predict_proba no X inteiro)"))
+    print("paridade: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Benchmark + paridade: ETL INMET x BDQueimadas em CSV de texto vs store Parquet tipado.
+
+Gera consolidados sinteticos de varios anos (INMET horario por cidade com
+medidas em decimal ',' e sentinelas; focos BDQ com DATAHORA/FRP) e roda o
+ETL ponta a ponta em dois fluxos, cada um num processo novo (pico de RSS
+medido por fluxo):
+    csv     - caminho antigo: build_dataset lendo/gravando CSV como texto
+              (dtype=str), all_years por concat de CSVs, e a leitura do
+              modeling_build_datasets (read_csv decimal=',');
+    parquet - consolidated_store: conversao dos consolidados para Parquet
+              tipado (contada contra este fluxo), build_hourly_dataset
+              (ts_hour int32, chaves dictionary) e read_parquet.
+Tambem mede uma leitura com projecao (3 colunas) em cada formato.
+
+Paridade: a base anual lida pelo modeling e a mesma nos dois fluxos (mesmas
+linhas e colunas; numeros iguais; texto igual; RISCO_FOGO/FRP, antes texto
+com '.', comparados como numero). Texto nulo continua nulo no store (nao
+vira "None"/"nan"), inclusive em coluna toda nula no primeiro row group.
+
+Uso:
+    python -m src.benchmarks.bench_consolidated_store
+    python -m src.benchmarks.bench_consolidated_store --years 4 --cities 80
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+for _p in (_project_root, _project_root / "src"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from src.benchmarks._common import format_report  # noqa: E402
+
+BIOME = "cerrado"
+FIRST_YEAR = 2015
+MEASURES = [
+    "PRECIPITACAO TOTAL, HORARIO (mm)",
+    "PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)",
+    "PRESSAO ATMOSFERICA MAX.NA HORA ANT. (AUT) (mB)",
+    "PRESSAO ATMOSFERICA MIN. NA HORA ANT. (AUT) (mB)",
+    "RADIACAO GLOBAL (KJ/m²)",
+    "TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)",
+    "TEMPERATURA DO PONTO DE ORVALHO (°C)",
+    "TEMPERATURA MAXIMA NA HORA ANT. (AUT) (°C)",
+    "TEMPERATURA MINIMA NA HORA ANT. (AUT) (°C)",
+    "UMIDADE RELATIVA DO AR, HORARIA (%)",
+    "VENTO, DIRECAO HORARIA (gr) (° (gr))",
+    "VENTO, RAJADA MAXIMA (m/s)",
+    "VENTO, VELOCIDADE HORARIA (m/s)",
+]
+PROJECTION = ["ts_hour", "cidade_norm", "HAS_FOCO"]
+
+
+# -----------------------------------------------------------------------------
+# Dados sinteticos
+# -----------------------------------------------------------------------------
+def _comma(values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    txt = pd.Series(np.round(values, 1)).astype(str).str.replace(".", ",", regex=False).to_numpy(dtype=object)
+    u = rng.random(values.size)
+    txt[u < 0.02] = "-9999"
+    txt[(u >= 0.02) & (u < 0.05)] = ""
+    return txt
+
+
+def write_synthetic(root: Path, n_years: int, n_cities: int, n_fires: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    cities = [f"São José do Rio {i:03d}" for i in range(n_cities)]
+    lat = rng.uniform(-23, -3, n_cities).round(4)
+    lon = rng.uniform(-59, -42, n_cities).round(4)
+    (root / "INMET").mkdir(parents=True)
+    (root / "BDQUEIMADAS").mkdir(parents=True)
+    for y in range(FIRST_YEAR, FIRST_YEAR + n_years):
+        hours = pd.date_range(f"{y}-01-01", f"{y}-12-31 23:00", freq="h")
+        c = np.repeat(np.arange(n_cities), len(hours))
+        h = np.tile(np.arange(len(hours)), n_cities)
+        inmet = {
+            "DATA (YYYY-MM-DD)": hours.strftime("%Y-%m-%d").to_numpy(dtype=object)[h],
+            "HORA (UTC)": hours.strftime("%H00 UTC").to_numpy(dtype=object)[h],
+        }
+        for j, m in enumerate(MEASURES):
+            inmet[m] = _comma(rng.normal(20 + 10 * j, 5, c.size), rng)
+        inmet["CIDADE"] = np.array(cities, dtype=object)[c]
+        for name, coord in (("LATITUDE", lat), ("LONGITUDE", lon)):
+            inmet[name] = pd.Series(coord[c]).astype(str).str.replace(".", ",", regex=False).to_numpy(dtype=object)
+        inmet["ANO"] = y
+        pd.DataFrame(inmet).to_csv(root / "INMET" / f"inmet_{y}_{BIOME}.csv", index=False)
+
+        fc = rng.integers(0, n_cities, n_fires)
+        secs = rng.integers(0, len(hours) * 3600, n_fires)
+        dt = pd.Timestamp(f"{y}-01-01") + pd.to_timedelta(np.sort(secs), unit="s")
+        bdq = pd.DataFrame({
+            "DATAHORA": dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "PAIS": "Brasil",
+            "ESTADO": np.array(["GOIÁS", "MATO GROSSO", "TOCANTINS"], dtype=object)[fc % 3],
+            "MUNICIPIO": np.array([s.upper() for s in cities], dtype=object)[fc],
+            "RISCO_FOGO": rng.random(n_fires).round(2),
+            "FRP": rng.gamma(2.0, 15.0, n_fires).round(1),
+            "ID_BDQ": np.arange(n_fires) + y * 10_000_000,
+            "FOCO_ID": [f"f{v:012x}" for v in rng.integers(0, 2**47, n_fires)],
+        })
+        bdq.to_csv(root / "BDQUEIMADAS" / f"bdq_targets_{y}_{BIOME}.csv", index=False)
+
+
+# -----------------------------------------------------------------------------
+# Caminho antigo (texto), copia de build_dataset antes do store
+# -----------------------------------------------------------------------------
+def _legacy_fuse_year(src: Path, out_dir: Path, year: int) -> Path:
+    import build_dataset as bd
+    from utils import normalize_key_series
+
+    inmet = pd.read_csv(src / "INMET" / f"inmet_{year}_{BIOME}.csv", dtype=str)
+    inmet["cidade_norm"] = normalize_key_series(inmet["CIDADE"])
+    date_col, hour_col = bd._detect_inmet_schema(inmet)
+    inmet["ts_hour"] = bd._build_ts_hour_inmet(inmet, date_col, hour_col)
+
+    usecols = ["DATAHORA", "MUNICIPIO", "RISCO_FOGO", "FRP", "FOCO_ID"]
+    df = pd.read_csv(src / "BDQUEIMADAS" / f"bdq_targets_{year}_{BIOME}.csv", dtype=str, usecols=usecols)
+    df = df.dropna(subset=["DATAHORA", "MUNICIPIO"]).copy()
+    df["municipio_norm"] = normalize_key_series(df["MUNICIPIO"])
+    df["ts_hour"] = pd.to_datetime(df["DATAHORA"], errors="coerce").dt.strftime("%Y-%m-%d %H:00:00")
+    df["_FRP_num"] = pd.to_numeric(df["FRP"], errors="coerce").fillna(float("-inf"))
+    idx = df.groupby(["municipio_norm", "ts_hour"])["_FRP_num"].idxmax()
+    bdq = df.loc[idx, ["municipio_norm", "ts_hour", "RISCO_FOGO", "FRP", "FOCO_ID"]].reset_index(drop=True)
+
+    merged = inmet.merge(bdq, left_on=["cidade_norm", "ts_hour"], right_on=["municipio_norm", "ts_hour"],
+                         how="left", suffixes=("", "_bdq"))
+    merged["HAS_FOCO"] = merged["FOCO_ID"].notna().astype("int64")
+    merged = merged.drop(columns=["municipio_norm"], errors="ignore")
+    merged = merged.sort_values([date_col, hour_col, "CIDADE"], kind="stable")
+    out = out_dir / f"inmet_bdq_{year}_{BIOME}.csv"
+    merged.to_csv(out, index=False)
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Fluxos (um processo cada)
+# -----------------------------------------------------------------------------
+def _maxrss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _work_logger(name: str, log_dir: Path) -> logging.Logger:
+    log = logging.getLogger(name)
+    if not log.handlers:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log.setLevel(logging.INFO)
+        fh = logging.FileHandler(log_dir / f"{name}.log", encoding="utf-8")
+        fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        log.addHandler(fh)
+    return log
+
+
+def _run_flow(flow: str, work: Path, years: List[int], result: Path) -> None:
+    import build_dataset as bd
+    import consolidated_store as cs
+
+    base = _maxrss_mb()
+    t: Dict[str, float] = {}
+    out_dir = work / "dataset"
+    out_dir.mkdir()
+    if flow == "csv":
+        t0 = time.perf_counter()
+        written = [_legacy_fuse_year(work, out_dir, y) for y in years]
+        frames = [pd.read_csv(p, dtype=str) for p in written]
+        pd.concat(frames, ignore_index=True).to_csv(out_dir / f"inmet_bdq_all_years_{BIOME}.csv", index=False)
+        del frames
+        t["build"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for p in written:
+            pd.read_csv(p, sep=",", decimal=",", encoding="utf-8", low_memory=False)
+        t["modeling_read"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for p in written:
+            pd.read_csv(p, sep=",", decimal=",", usecols=PROJECTION)
+        t["projection"] = time.perf_counter() - t0
+    else:
+        t0 = time.perf_counter()
+        for src in sorted((work / "INMET").glob("*.csv")) + sorted((work / "BDQUEIMADAS").glob("*.csv")):
+            cs.csv_to_parquet(src, src.with_suffix(".parquet"))
+            src.unlink()
+        t["consolidate"] = time.perf_counter() - t0
+        bd._inmet_consolidated_dir = lambda: work / "INMET"
+        bd._bdq_consolidated_dir = lambda: work / "BDQUEIMADAS"
+        bd._dataset_dir = lambda: out_dir
+        # Log do build vai para o temp dir, nao para o logs/ do repo.
+        bd.get_logger = lambda name, **_: _work_logger(name, work / "logs")
+        t0 = time.perf_counter()
+        _, written, _ = bd.build_hourly_dataset(years=years, biome=BIOME, overwrite=True)
+        t["build"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for p in written:
+            cs.read_parquet(p)
+        t["modeling_read"] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for p in written:
+            cs.read_parquet(p, columns=PROJECTION, ts="hours")
+        t["projection"] = time.perf_counter() - t0
+    mb = sum(f.stat().st_size for f in out_dir.iterdir()) / 1e6
+    result.write_text(json.dumps({"timings": t, "peak_mb": _maxrss_mb() - base, "out_mb": mb}))
+
+
+def _spawn(target, *args) -> None:
+    # ru_maxrss sobrevive a fork+exec: tudo que aloca muito (inclusive gerar os
+    # dados) roda em filho, para o pico herdado do pai ficar pequeno.
+    ctx = mp.get_context("spawn")
+    proc = ctx.Process(target=target, args=args)
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        raise SystemExit(f"{target.__name__} falhou (exit {proc.exitcode})")
+
+
+def _same(a: pd.Series, b: pd.Series) -> bool:
+    if pd.api.types.is_numeric_dtype(a) or pd.api.types.is_numeric_dtype(b):
+        na = pd.to_numeric(a.astype(object).astype("string").str.replace(",", ".", regex=False), errors="coerce")
+        nb = pd.to_numeric(b.astype(object).astype("string").str.replace(",", ".", regex=False), errors="coerce")
+        return np.allclose(na.to_numpy(dtype=float, na_value=np.nan), nb.to_numpy(dtype=float, na_value=np.nan),
+                           rtol=0, atol=1e-9, equal_nan=True)
+    return a.astype(object).astype("string").fillna("<NA>").equals(b.astype(object).astype("string").fillna("<NA>"))
+
+
+def check_text_nulls(tmp: Path) -> None:
+    from consolidated_store import read_parquet, write_parquet
+
+    df = pd.DataFrame({
+        "DATA (YYYY-MM-DD)": [None, None, "2020-01-01"],
+        "FOCO_ID": [None, None, "x"],
+        "MUNICIPIO": [None, None, "a"],
+    })
+    got = read_parquet(write_parquet(df, tmp / "nulls.parquet", row_group_size=2))
+    for c in df.columns:
+        if got[c].isna().tolist() != [True, True, False] or got[c].iloc[2] != df[c].iloc[2]:
+            raise SystemExit(f"NULOS: {c} lido como {got[c].tolist()}")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--years", type=int, default=3)
+    p.add_argument("--cities", type=int, default=40)
+    p.add_argument("--fires", type=int, default=40_000, help="focos BDQ por ano")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    from consolidated_store import read_parquet
+
+    years = list(range(FIRST_YEAR, FIRST_YEAR + args.years))
+    with tempfile.TemporaryDirectory(prefix="bench_consolidated_store_") as tmp:
+        tmp = Path(tmp)
+        _spawn(write_synthetic, tmp / "src", args.years, args.cities, args.fires, args.seed)
+        src_mb = sum(f.stat().st_size for f in (tmp / "src").rglob("*.csv")) / 1e6
+        results = {}
+        for flow in ("csv", "parquet"):
+            shutil.copytree(tmp / "src", tmp / flow)
+            _spawn(_run_flow, flow, tmp / flow, years, tmp / f"{flow}.json")
+            results[flow] = json.loads((tmp / f"{flow}.json").read_text())
+
+        n_rows = 0
+        for y in years:
+            ref = pd.read_csv(tmp / "csv" / "dataset" / f"inmet_bdq_{y}_{BIOME}.csv",
+                              sep=",", decimal=",", encoding="utf-8", low_memory=False)
+            got = read_parquet(tmp / "parquet" / "dataset" / f"inmet_bdq_{y}_{BIOME}.parquet")
+            if list(ref.columns) != list(got.columns) or len(ref) != len(got):
+                raise SystemExit(f"PARIDADE FALHOU ({y}): colunas/linhas diferentes")
+            bad = [c for c in ref.columns if not _same(ref[c].reset_index(drop=True), got[c].reset_index(drop=True))]
+            if bad:
+                raise SystemExit(f"PARIDADE FALHOU ({y}): {bad}")
+            n_rows += len(ref)
+        check_text_nulls(tmp)
+
+    stages = ("consolidate", "build", "modeling_read", "projection")
+    print(f"anos={args.years} cidades={args.cities} focos/ano={args.fires} linhas={n_rows:,} "
+          f"consolidados CSV={src_mb:.0f} MB")
+    for flow, r in results.items():
+        parts = " ".join(f"{s}={r['timings'].get(s, 0.0):.2f}s" for s in stages)
+        print(f"  {flow:<8} {parts} | pico RSS +{r['peak_mb']:.0f} MB | data/dataset={r['out_mb']:.0f} MB")
+    total = {f"{flow} (ponta a ponta)": sum(r["timings"].get(s, 0.0) for s in stages[:3])
+             for flow, r in results.items()}
+    print(format_report("ETL INMET x BDQ: CSV vs store Parquet", total, "csv (ponta a ponta)"))
+    print(format_report("Leitura com projecao (3 colunas)",
+                        {f"{flow} (projecao)": r["timings"]["projection"] for flow, r in results.items()},
+                        "csv (projecao)"))
+    print("paridade/nulos: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark + paridade: contador `dias_sem_chuva` (loop por cidade vs kernel vetorizado).
+
+Gera dois anos sinteticos consecutivos (N cidades x 8760 h, chuva esparsa e
+alguns NaN) e compara:
+    legacy - loop Python por valor dentro de cada grupo de cidade, com
+             DataFrame por cidade + concat + join (implementacao anterior de
+             PhysicsFeatureEngineer._calculate_features_for_chunk);
+    kernel - compute_dias_sem_chuva / dry_hours_kernel.
+
+A paridade e bit-a-bit (float32) em ambos os anos, incluindo o carry
+(memory_state) do primeiro para o segundo ano.
+
+Uso:
+    python -m src.benchmarks.bench_dry_hours
+    python -m src.benchmarks.bench_dry_hours --cities 500 --hours 2000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.feature_engineering_physics import (  # noqa: E402
+    COL_PRECIP,
+    RAIN_THRESHOLD,
+    compute_dias_sem_chuva,
+)
+
+
+def _legacy_dias_sem_chuva(df: pd.DataFrame, memory_state: dict) -> Tuple[pd.Series, dict]:
+    """Copia fiel do loop anterior (referencia de paridade)."""
+    results = []
+    for cidade, group in df.groupby('cidade_norm'):
+        initial_dry = 0
+        if cidade in memory_state:
+            initial_dry = memory_state[cidade]['last_dry']
+        vals = group[COL_PRECIP].values
+        dry_days = np.zeros(len(vals), dtype=np.float32)
+        current_counter = initial_dry
+        for i in range(len(vals)):
+            if vals[i] < RAIN_THRESHOLD:
+                current_counter += 1
+            else:
+                current_counter = 0
+            dry_days[i] = current_counter
+        memory_state[cidade] = {'last_dry': current_counter}
+        results.append(pd.DataFrame({'dias_sem_chuva': dry_days / 24.0}, index=group.index))
+    out = df[[]].join(pd.concat(results))
+    return out['dias_sem_chuva'], memory_state
+
+
+def make_synthetic_year(n_cities: int, hours: int, year: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + year)
+    n = n_cities * hours
+    precip = np.where(rng.random(n) < 0.03, rng.gamma(1.2, 3.0, n), 0.0)
+    precip[rng.random(n) < 0.002] = np.nan
+    return pd.DataFrame({
+        'cidade_norm': np.repeat([f"cidade_{i:05d}" for i in range(n_cities)], hours),
+        'ts_hour': np.tile(pd.date_range(f"{year}-01-01", periods=hours, freq="h"), n_cities),
+        COL_PRECIP: precip,
+    })
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=int, default=5000)
+    p.add_argument("--hours", type=int, default=8760)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    years = [make_synthetic_year(args.cities, args.hours, y, args.seed) for y in (2020, 2021)]
+    timings: Dict[str, float] = {}
+
+    legacy_out = []
+    legacy_state: dict = {}
+    with timed(timings, "legacy (loop por cidade)"):
+        for df in years:
+            s, legacy_state = _legacy_dias_sem_chuva(df, legacy_state)
+            legacy_out.append(s.to_numpy())
+
+    kernel_out = []
+    kernel_state: dict = {}
+    with timed(timings, "kernel (vetorizado)"):
+        for df in years:
+            arr, year_state = compute_dias_sem_chuva(df, kernel_state)
+            kernel_state.update(year_state)
+            kernel_out.append(arr)
+
+    for ref, got in zip(legacy_out, kernel_out):
+        if ref.dtype != got.dtype or not np.array_equal(ref, got, equal_nan=True):
+            raise SystemExit("PARIDADE FALHOU: dias_sem_chuva difere do loop legado")
+    if legacy_state != kernel_state:
+        raise SystemExit("PARIDADE FALHOU: carry entre anos (memory_state) difere")
+
+    print(f"cidades={args.cities} horas/ano={args.hours} anos=2 linhas={sum(map(len, years))}")
+    print(format_report("dias_sem_chuva", timings, "legacy (loop por cidade)"))
+    print("paridade: OK (bit-a-bit, incluindo carry)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark + paridade: ewma_lags (groupby-lambda do pandas vs kernel fundido).
+
+Gera um df_agg sintetico (N cidades x H horas, 4 variaveis com NaN) e compara:
+    pandas - groupby("cidade_norm")[col].transform(lambda x: x.ewm(...).mean())
+             e .shift(lag), uma iteracao de grupos por alpha e por lag (como
+             era _generate_ewma_lags);
+    fused  - ewma_lags_with_carry: uma passada no tempo para todas as
+             variaveis x alphas + gathers de lag num bloco float32.
+
+Paridade: o bloco float32 deve ser exatamente o resultado do pandas
+convertido para float32 (a conta interna e float64, identica a do pandas).
+
+Uso:
+    python -m src.benchmarks.bench_ewma_lags
+    python -m src.benchmarks.bench_ewma_lags --cities 1000 --hours 8760
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.tsf_ewma_state import carry_fingerprint, ewma_lags_with_carry  # noqa: E402
+
+ALPHAS = {"a01": 0.1, "a03": 0.3, "a08": 0.8}
+LAGS = [1, 24, 168]
+
+
+def _pandas_ewma_lags(
+    df_agg: pd.DataFrame, targets: List[Tuple[str, str, List[int]]]
+) -> pd.DataFrame:
+    """Implementacao de referencia (groupby-transform por alpha e por lag)."""
+    result = df_agg[["cidade_norm", "_ts"]].copy()
+    for slug, col, lags in targets:
+        series = df_agg.groupby("cidade_norm", sort=False)[col]
+        for aname, alpha in ALPHAS.items():
+            result[f"tsf_ewma_{slug}_{aname}"] = series.transform(
+                lambda x, a=alpha: x.ewm(alpha=a, adjust=False).mean()
+            ).values
+        for lag_h in lags:
+            result[f"tsf_lag_{slug}_{int(lag_h)}h"] = series.transform(
+                lambda x, lh=lag_h: x.shift(lh)
+            ).values
+    return result
+
+
+def make_synthetic_agg(n_cities: int, hours: int, seed: int) -> Tuple[pd.DataFrame, list]:
+    rng = np.random.default_rng(seed)
+    n = n_cities * hours
+    df = pd.DataFrame({
+        "cidade_norm": np.repeat([f"cidade_{i:05d}" for i in range(n_cities)], hours),
+        "_ts": np.tile(pd.date_range("2020-01-01", periods=hours, freq="h"), n_cities),
+    })
+    targets = []
+    for slug in ("precip", "temp", "umid", "rad"):
+        v = rng.gamma(2.0, 5.0, n)
+        v[rng.random(n) < 0.01] = np.nan
+        df[slug] = v
+        targets.append((slug, slug, list(LAGS)))
+    return df, targets
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=int, default=500)
+    p.add_argument("--hours", type=int, default=8760)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    df_agg, targets = make_synthetic_agg(args.cities, args.hours, args.seed)
+    fp = carry_fingerprint(targets, ALPHAS)
+    timings: Dict[str, float] = {}
+
+    with timed(timings, "pandas (groupby-lambda)"):
+        ref = _pandas_ewma_lags(df_agg, targets)
+    with timed(timings, "fused (1 passada, float32)"):
+        got, _ = ewma_lags_with_carry(df_agg, targets, ALPHAS, None, 2020, fp)
+
+    feat_cols = [c for c in ref.columns if c.startswith("tsf_")]
+    if list(got.columns) != list(ref.columns):
+        raise SystemExit("PARIDADE FALHOU: colunas/ordem diferem")
+    for c in feat_cols:
+        expected = ref[c].to_numpy().astype(np.float32)
+        if not np.array_equal(got[c].to_numpy(), expected, equal_nan=True):
+            raise SystemExit(f"PARIDADE FALHOU: {c}")
+
+    print(f"linhas={len(df_agg)} cidades={args.cities} features={len(feat_cols)}")
+    print(format_report("ewma_lags", timings, "pandas (groupby-lambda)"))
+    print("paridade: OK (float32 exato vs pandas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark + paridade: alinhamento semanal -> horario da biomassa GEE.
+
+Gera uma base horaria sintetica de um ano (cidades x sites x horas, ordem
+de arquivo por ts_hour) e compostos semanais de 16 dias com NaN esparso,
+e compara:
+    por grupo - caminho antigo de align_weekly_to_hourly: mascara booleana
+                sobre todos os compostos + merge_asof por (cidade, site);
+    lote      - align_weekly_to_hourly (WeeklyBiomassIndex: um searchsorted
+                para todas as linhas + ffill por grupo);
+    streaming - align_weekly_to_hourly_file em record batches (ffill
+                continuo entre batches), lendo/gravando parquet.
+
+Paridade: mesmas colunas de biomassa linha a linha nos tres caminhos. No
+streaming, uma coluna de texto nula em todo o primeiro batch e preenchida
+depois tem de passar intacta (schema fixado antes do primeiro batch).
+
+Uso:
+    python -m src.benchmarks.bench_gee_align
+    python -m src.benchmarks.bench_gee_align --cities 300 --sites 4 --hours 8760
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+
+COLS = ["NDVI_buffer", "EVI_buffer", "NDVI_point", "EVI_point"]
+
+
+def _align_per_group(df_hourly: pd.DataFrame, df_weekly: pd.DataFrame, biomass_cols: List[str],
+                     station_col: str = "cidade_norm", site_key_col: str = "gee_site_key",
+                     ts_col: str = "ts_hour") -> pd.DataFrame:
+    """Copia do align_weekly_to_hourly antigo (referencia)."""
+    df = df_hourly.drop(columns=[c for c in biomass_cols if c in df_hourly.columns])
+    df["_ts"] = pd.to_datetime(df[ts_col])
+    df["_align_order"] = np.arange(len(df), dtype=np.int64)
+    weekly = df_weekly.copy()
+    weekly["_ts"] = pd.to_datetime(weekly["composite_start"])
+    for col in (station_col, site_key_col):
+        df[col] = df[col].astype("string")
+        weekly[col] = weekly[col].astype("string")
+    weekly_sub = weekly[[station_col, site_key_col, "_ts"] + biomass_cols]
+    parts = []
+    for (_cid, _sk), g_left in df.groupby([station_col, site_key_col], sort=False):
+        g_left = g_left.sort_values("_ts")
+        mask = (weekly_sub[station_col] == _cid) & (weekly_sub[site_key_col] == _sk)
+        g_right = weekly_sub.loc[mask]
+        if g_right.empty:
+            g_out = g_left.copy()
+            for col in biomass_cols:
+                g_out[col] = np.nan
+            parts.append(g_out)
+            continue
+        g_right = g_right.sort_values("_ts")
+        g_right_m = g_right[["_ts"] + biomass_cols].drop_duplicates(subset=["_ts"], keep="last")
+        parts.append(pd.merge_asof(g_left, g_right_m, on="_ts", direction="backward"))
+    merged = pd.concat(parts, axis=0).sort_values("_align_order").drop(columns=["_align_order"])
+    for col in biomass_cols:
+        merged[col] = merged.groupby([station_col, site_key_col], sort=False)[col].ffill()
+    return merged.drop(columns=["_ts"])
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=int, default=150)
+    p.add_argument("--sites", type=int, default=3, help="sites (focos) por cidade")
+    p.add_argument("--hours", type=int, default=2000, help="horas do ano por site")
+    p.add_argument("--no-weekly-frac", type=float, default=0.05, help="fracao de sites sem composto")
+    p.add_argument("--batch-rows", type=int, default=200_000)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    from src.article.gee_biomass import WeeklyBiomassIndex, align_weekly_to_hourly, align_weekly_to_hourly_file
+
+    rng = np.random.default_rng(args.seed)
+    n_groups = args.cities * args.sites
+    city = np.repeat([f"cidade_{i:04d}" for i in range(args.cities)], args.sites)
+    site = np.array([f"foco_{i:06d}" for i in range(n_groups)])
+    hours = pd.date_range("2022-01-01 00:00", periods=args.hours, freq="h")
+    g = np.tile(np.arange(n_groups), args.hours)
+    h = np.repeat(np.arange(args.hours), n_groups)
+    hourly = pd.DataFrame({
+        "cidade_norm": city[g],
+        "gee_site_key": site[g],
+        "ts_hour": hours[h],
+        "temp": rng.normal(25, 5, g.size).astype(np.float32),
+    })
+
+    # Primeiro composto em 03/01: as primeiras horas do ano ficam sem composto (NaN).
+    starts = pd.date_range("2022-01-03", hours[-1], freq="16D")
+    has_weekly = rng.random(n_groups) >= args.no_weekly_frac
+    wg = np.repeat(np.flatnonzero(has_weekly), len(starts))
+    ws = np.tile(np.arange(len(starts)), int(has_weekly.sum()))
+    weekly = pd.DataFrame({"cidade_norm": city[wg], "gee_site_key": site[wg], "composite_start": starts[ws]})
+    for c in COLS:
+        v = rng.random(wg.size)
+        v[rng.random(wg.size) < 0.1] = np.nan  # composto com nuvem -> ffill
+        weekly[c] = v
+
+    timings: Dict[str, float] = {}
+    with timed(timings, "por grupo (mascara + merge_asof)"):
+        ref = _align_per_group(hourly, weekly, COLS)
+    with timed(timings, "lote (searchsorted + ffill)"):
+        got = align_weekly_to_hourly(hourly, weekly, COLS)
+    with tempfile.TemporaryDirectory(prefix="bench_gee_align_") as tmp:
+        src = Path(tmp) / "inmet_bdq_2022_cerrado.parquet"
+        late = np.arange(g.size) >= min(args.batch_rows, g.size - 1)
+        nota = np.where(late, "x", None)
+        hourly.drop(columns=["gee_site_key"]).assign(
+            FOCO_ID=[s.removeprefix("foco_") for s in site[g]], lat_foco=0.0, lon_foco=0.0, nota=nota,
+        ).to_parquet(src, index=False)
+        with timed(timings, "streaming (record batches, parquet)"):
+            index = WeeklyBiomassIndex(weekly, COLS)
+            align_weekly_to_hourly_file(src, index, src, batch_rows=args.batch_rows)
+        streamed = pd.read_parquet(src, columns=COLS + ["nota"])
+    if not np.array_equal(streamed["nota"].notna().to_numpy(), late):
+        raise SystemExit("STREAMING: coluna nula no primeiro batch nao passou intacta")
+
+    for name, out in (("lote", got), ("streaming", streamed)):
+        a = ref[COLS].to_numpy(dtype=np.float64)
+        b = out[COLS].to_numpy(dtype=np.float64)
+        if a.shape != b.shape or not np.array_equal(a, b, equal_nan=True):
+            raise SystemExit(f"PARIDADE FALHOU ({name}): {int((~np.isclose(a, b, equal_nan=True)).sum())} valores")
+
+    print(f"linhas={len(hourly):,} grupos={n_groups} compostos={len(weekly):,} "
+          f"nan_final={int(np.isnan(got[COLS].to_numpy()).sum()):,}")
+    print(format_report("GEE biomassa: semanal -> horario", timings, "por grupo (mascara + merge_asof)"))
+    print("paridade: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark + checagens: extracao semanal de biomassa GEE, per_image vs batched.
+
+Roda extract_weekly_biomass_gee contra o `ee` falso de _fake_ee (MOD13Q1
+sintetico, latencia por requisicao + custo por feature, limite de 5000
+elementos por getInfo) e compara:
+    per_image - caminho original: size + time_start por imagem + dois
+                reduceRegions (buffer, ponto) por imagem x chunk;
+    batched   - um aggregate_array + um reduceRegions por (lote de
+                compostos x chunk), resultados no cache SQLite.
+
+Checagens (falham com SystemExit):
+    - mesmos valores (site, composto) nos dois motores;
+    - nenhum getInfo acima do limite de elementos;
+    - segunda rodada batched: so a requisicao das datas (tudo no cache);
+    - retomada: compostos com falha injetada ficam fora do cache e o run
+      seguinte busca apenas essas chaves.
+
+Uso:
+    python -m src.benchmarks.bench_gee_extract
+    python -m src.benchmarks.bench_gee_extract --sites 2000 --latency 0.3 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.benchmarks._fake_ee import COLLECTION_ID, FakeEE  # noqa: E402
+
+YEAR = 2022
+
+
+def _values(df: pd.DataFrame, cols) -> pd.DataFrame:
+    out = df.assign(composite_start=pd.to_datetime(df["composite_start"]))
+    out[cols] = out[cols].astype(np.float64)
+    return out.sort_values(["gee_site_key", "composite_start"]).reset_index(drop=True)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sites", type=int, default=1200)
+    p.add_argument("--chunk", type=int, default=400, help="sites_chunk_size")
+    p.add_argument("--latency", type=float, default=0.1, help="segundos por getInfo no ee falso")
+    p.add_argument("--per-element", type=float, default=2e-5, help="segundos por feature no ee falso")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    from src.article.config import load_article_config
+    from src.article.gee_biomass import extract_weekly_biomass_gee
+    from src.article.gee_tile_cache import GeeTileCache
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    log = logging.getLogger("bench_gee_extract")
+
+    rng = np.random.default_rng(args.seed)
+    sites = pd.DataFrame({
+        "gee_site_key": [f"{i:07d}" for i in rng.permutation(args.sites)],
+        "cidade_norm": [f"cidade_{i % 150:03d}" for i in range(args.sites)],
+        "lat_foco": rng.uniform(-23.0, -3.0, args.sites).round(5),
+        "lon_foco": rng.uniform(-59.0, -42.0, args.sites).round(5),
+    })
+
+    acfg = load_article_config()
+    gcfg = replace(
+        acfg.gee, image_collection=COLLECTION_ID, sites_chunk_size=args.chunk, workers=args.workers,
+        weeks_per_request=0, max_features_per_request=5000, pause_between_chunks_s=0.0,
+    )
+    cols = [f"{b}_{k}" for k in ("buffer", "point") for b in gcfg.bands]
+    ee = FakeEE(years=[YEAR], latency_s=args.latency, per_element_s=args.per_element)
+
+    timings: Dict[str, float] = {}
+    requests: Dict[str, int] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_gee_extract_") as tmp:
+        tmp = Path(tmp)
+        cfg_old = replace(acfg, gee=replace(gcfg, extraction_engine="per_image"))
+        cfg_new = replace(acfg, gee=replace(gcfg, extraction_engine="batched"), output_root=tmp)
+
+        ee.reset_counters()
+        with timed(timings, "per_image"):
+            ref = extract_weekly_biomass_gee(sites, YEAR, cfg_old, log, ee)
+        requests["per_image"] = ee.requests
+
+        cache = GeeTileCache(tmp / "biomass.sqlite")
+        ee.reset_counters()
+        with timed(timings, "batched (cache vazio)"):
+            got = extract_weekly_biomass_gee(sites, YEAR, cfg_new, log, ee, cache=cache)
+        requests["batched (cache vazio)"] = ee.requests
+        n_keys = cache.count()
+
+        ee.reset_counters()
+        with timed(timings, "batched (cache cheio)"):
+            again = extract_weekly_biomass_gee(sites, YEAR, cfg_new, log, ee, cache=cache)
+        requests["batched (cache cheio)"] = ee.requests
+        cache.close()
+        if requests["batched (cache cheio)"] != 1:
+            raise SystemExit(f"SEGUNDA RODADA FEZ {requests['batched (cache cheio)']} requisicoes (esperado 1)")
+
+        if ref is None or got is None or again is None:
+            raise SystemExit("EXTRACAO VAZIA")
+        a, b, c = _values(ref, cols), _values(got, cols), _values(again, cols)
+        for name, other in (("batched", b), ("batched/cache", c)):
+            same_keys = a[["gee_site_key", "composite_start"]].equals(other[["gee_site_key", "composite_start"]])
+            if not same_keys or not np.allclose(a[cols].to_numpy(), other[cols].to_numpy(),
+                                                rtol=0, atol=1e-9, equal_nan=True):
+                raise SystemExit(f"PARIDADE FALHOU ({name})")
+
+        # Retomada: dois compostos falham na 1a rodada (sem retry), o run seguinte busca so eles.
+        times = sorted(pd.to_datetime(ref["composite_start"]).unique())
+        failing = {int(pd.Timestamp(t).value // 1_000_000) for t in times[3:5]}
+        cfg_ra1 = replace(cfg_new, gee=replace(cfg_new.gee, gee_retry_max_attempts=1))
+        cache = GeeTileCache(tmp / "resume.sqlite")
+        ee.fail_time_starts = failing
+        quiet = logging.getLogger("bench_gee_extract.falhas")
+        quiet.propagate = False
+        quiet.addHandler(logging.NullHandler())
+        partial = extract_weekly_biomass_gee(sites, YEAR, cfg_ra1, quiet, ee, cache=cache)
+        ee.fail_time_starts = set()
+        n_chunks = -(-args.sites // args.chunk)
+        expect_missing = len(failing) * n_chunks
+        if cache.count() != n_keys - expect_missing or partial is None:
+            raise SystemExit(f"RETOMADA: cache com {cache.count()} chaves, esperado {n_keys - expect_missing}")
+        ee.reset_counters()
+        resumed = extract_weekly_biomass_gee(sites, YEAR, cfg_ra1, log, ee, cache=cache)
+        resumed_requests = ee.requests
+        n_after = cache.count()
+        cache.close()
+        if n_after != n_keys or resumed is None or not np.allclose(
+            _values(resumed, cols)[cols].to_numpy(), a[cols].to_numpy(), rtol=0, atol=1e-9, equal_nan=True,
+        ):
+            raise SystemExit(f"RETOMADA FALHOU: {n_after}/{n_keys} chaves apos o re-run")
+
+    print(f"sites={args.sites} chunk={args.chunk} compostos={len(times)} chaves={n_keys} "
+          f"latencia={args.latency}s workers={args.workers}")
+    print("requisicoes: " + " | ".join(f"{k}={v}" for k, v in requests.items())
+          + f" | retomada={resumed_requests} ({expect_missing} chaves)")
+    print(format_report("GEE biomassa: extracao semanal", timings, "per_image"))
+    print("paridade/cache/retomada: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Benchmark + paridade: GridSearch serial vs (candidato, fold) sobre memmap.
+
+Gera um X float32 sintetico (alvo raro) e roda o mesmo ModelOptimizer com:
+    serial - GridSearchCV n_jobs=1 (caminho antigo dos trainers RF/XGB);
+    memmap - parallel_folds=True: X gravado uma vez em .npy, pool de
+             processos recebendo so (params, intervalos de linhas).
+
+Paridade: mesmo best_params e mesmo best_score (media dos folds). Tambem
+roda folds sobrepostos duas vezes num unico worker com
+ChunkedStandardScaler(copy=False) + LogisticRegression: a repeticao deve dar
+o mesmo score bit a bit (o scaler nao pode reescrever o X do worker) e
+proximo do serial (layout C vs F muda o ultimo digito do lbfgs).
+O ganho depende dos cores fisicos; em maquina de 1 core o memmap so paga
+o overhead do pool.
+
+Uso:
+    python -m src.benchmarks.bench_gs_parallel
+    python -m src.benchmarks.bench_gs_parallel --rows 400000 --workers 6 --model xgb
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.ml._parallel_search import FoldTask, SharedXy, run_fold_tasks, run_fold_tasks_serial  # noqa: E402
+from src.ml.core import ModelOptimizer  # noqa: E402
+from src.ml.scaling import ChunkedStandardScaler  # noqa: E402
+
+
+def make_estimator(model: str):
+    if model == "xgb":
+        from xgboost import XGBClassifier
+
+        est = XGBClassifier(n_estimators=100, tree_method="hist", random_state=42, n_jobs=1, verbosity=0)
+        grid = {"max_depth": [3, 6], "learning_rate": [0.05, 0.1], "subsample": [0.8, 1.0]}
+    else:
+        from sklearn.ensemble import RandomForestClassifier
+
+        est = RandomForestClassifier(n_estimators=60, random_state=42, n_jobs=1)
+        grid = {"max_depth": [8, 16], "min_samples_leaf": [1, 3], "n_estimators": [40, 60]}
+    return est, grid
+
+
+def check_scaler_isolation(X: np.ndarray, y: np.ndarray) -> None:
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    pipe = Pipeline([("scaler", ChunkedStandardScaler(chunk_rows=5_000, copy=False)),
+                     ("model", LogisticRegression(max_iter=200))])
+    n = len(y)
+    q = n // 4
+    # Folds com treinos sobrepostos; repetidos para o mesmo worker rodar cada
+    # um depois de outro que ja transformou as mesmas linhas.
+    ranges = [((0, 2 * q), (2 * q, 3 * q)), ((q, 3 * q), (3 * q, n)), ((0, 3 * q), (3 * q, n))]
+    tasks = [FoldTask(cand=0, fold=k, params={}, train=tr, test=te)
+             for k, (tr, te) in enumerate(ranges * 2)]
+    ref = {r.fold: r.score for r in run_fold_tasks_serial(pipe, tasks, X, y, "average_precision")}
+    shared = SharedXy(X, y)
+    try:
+        got = {r.fold: r.score for r in run_fold_tasks(pipe, tasks, shared, "average_precision", n_workers=1)}
+    finally:
+        shared.close()
+    k_rep = len(ranges)
+    bad = {k: (got[k], got[k + k_rep]) for k in range(k_rep) if got[k] != got[k + k_rep]}
+    if bad:
+        raise SystemExit(f"SCALER IN-PLACE: mesma tarefa com scores diferentes no worker: {bad}")
+    far = {k: (ref[k], got[k]) for k in ref if not np.isclose(ref[k], got[k], rtol=1e-5, atol=0)}
+    if far:
+        raise SystemExit(f"SCALER: scores do worker longe do serial: {far}")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=50_000)
+    p.add_argument("--features", type=int, default=40)
+    p.add_argument("--cv", type=int, default=3)
+    p.add_argument("--workers", type=int, default=0, help="0 = recommend_n_jobs")
+    p.add_argument("--model", choices=("rf", "xgb"), default="rf")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    X = pd.DataFrame(
+        rng.normal(size=(args.rows, args.features)).astype(np.float32),
+        columns=[f"f{i:03d}" for i in range(args.features)],
+    )
+    y = pd.Series((X.iloc[:, 0] + 0.5 * X.iloc[:, 1] + rng.normal(size=args.rows) > 2.5).astype(np.int8))
+
+    log = logging.getLogger("bench_gs_parallel")
+    if args.workers > 0:
+        os.environ["TRAIN_RUNNER_GS_WORKERS"] = str(args.workers)
+    # Sem fold cache: a segunda busca leria os fits da primeira.
+    os.environ["TRAIN_RUNNER_FOLD_CACHE"] = "0"
+
+    timings: Dict[str, float] = {}
+    metas = {}
+    for key, parallel in (("serial (GridSearchCV n_jobs=1)", False), ("memmap (candidato x fold)", True)):
+        est, grid = make_estimator(args.model)
+        opt = ModelOptimizer(est, grid, log, seed=args.seed)
+        with timed(timings, key):
+            opt.optimize(X, y, cv_splits=args.cv, use_scaler=False, n_jobs=1, verbose=0,
+                         refit=False, parallel_folds=parallel)
+        metas[key] = opt.last_search_meta
+
+    ref, got = metas.values()
+    if ref["best_params"] != got["best_params"] or not np.isclose(ref["best_score"], got["best_score"]):
+        raise SystemExit(
+            f"PARIDADE FALHOU: serial={ref['best_params']}/{ref['best_score']} "
+            f"memmap={got['best_params']}/{got['best_score']}"
+        )
+
+    check_scaler_isolation(X.to_numpy(copy=True), y.to_numpy(copy=True))
+
+    print(f"linhas={args.rows} feats={args.features} cv={args.cv} modelo={args.model} "
+          f"executor={got['executor']} workers={got['n_jobs']}")
+    print(format_report("GridSearch (candidato, fold)", timings, "serial (GridSearchCV n_jobs=1)"))
+    print(f"paridade/isolamento do scaler: OK (best_params={got['best_params']} best_score={got['best_score']:.6f})")
+
+
+if __name__ == "__main__":
+    main()
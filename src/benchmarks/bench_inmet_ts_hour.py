@@ -0,0 +1,102 @@
+"""Benchmark + paridade: ts_hour/cidade_norm de build_dataset._read_inmet_year.
+
+Gera um CSV INMET sintetico em memoria (strings, como o read_csv(dtype=str)),
+misturando os formatos de hora '0100 UTC', 'HH:MM', 'HH' e 'H' (mais lixo e
+NaN), e compara:
+    legacy - df.apply(_build_ts_from_inmet_row, axis=1) + CIDADE.map(normalize_key);
+    vetor  - _build_ts_hour_inmet (str.extract + lookup) + normalize_key_series
+             (normalize_key uma vez por cidade distinta).
+
+Paridade: ts_hour e cidade_norm identicos, valor a valor.
+
+Uso:
+    python -m src.benchmarks.bench_inmet_ts_hour
+    python -m src.benchmarks.bench_inmet_ts_hour --rows 2000000 --cities 600
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+for _p in (_project_root, _project_root / "src"):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from build_dataset import (  # noqa: E402
+    DATE_COL_NEW,
+    DATE_COL_OLD,
+    HOUR_COL_NEW,
+    HOUR_COL_OLD,
+    _build_ts_from_inmet_row,
+    _build_ts_hour_inmet,
+)
+from utils import normalize_key, normalize_key_series  # noqa: E402
+
+_HOUR_FORMATS = (
+    lambda h: f"{h:02d}00 UTC",
+    lambda h: f"{h:02d}:00",
+    lambda h: f"{h:02d}",
+    lambda h: f"{h}",
+)
+
+
+def make_synthetic_inmet(n_rows: int, n_cities: int, new_schema: bool, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    hours = rng.integers(0, 24, n_rows)
+    fmt = rng.integers(0, len(_HOUR_FORMATS), n_rows)
+    hour_txt = np.array([_HOUR_FORMATS[f](h) for f, h in zip(fmt, hours)], dtype=object)
+    hour_txt[rng.random(n_rows) < 0.001] = np.nan
+    hour_txt[rng.random(n_rows) < 0.001] = "??"
+    days = pd.date_range("2020-01-01", periods=366, freq="D")
+    date_fmt = "%Y/%m/%d" if new_schema else "%Y-%m-%d"
+    date_txt = days.strftime(date_fmt).to_numpy(dtype=object)[rng.integers(0, len(days), n_rows)]
+    city_names = np.array(
+        [f"São João d'Oeste {i}" if i % 3 == 0 else f"CIDADE-{i:04d}" for i in range(n_cities)],
+        dtype=object,
+    )
+    date_col, hour_col = (DATE_COL_NEW, HOUR_COL_NEW) if new_schema else (DATE_COL_OLD, HOUR_COL_OLD)
+    return pd.DataFrame({
+        date_col: date_txt,
+        hour_col: hour_txt,
+        "CIDADE": city_names[rng.integers(0, n_cities, n_rows)],
+    }).astype(str).where(lambda d: d != "nan")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=200_000)
+    p.add_argument("--cities", type=int, default=400)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    timings: Dict[str, float] = {}
+    for new_schema in (False, True):
+        df = make_synthetic_inmet(args.rows, args.cities, new_schema, args.seed)
+        date_col, hour_col = (DATE_COL_NEW, HOUR_COL_NEW) if new_schema else (DATE_COL_OLD, HOUR_COL_OLD)
+
+        with timed(timings, "legacy (apply por linha + map)"):
+            ref_ts = df.apply(lambda r: _build_ts_from_inmet_row(r, date_col, hour_col), axis=1)
+            ref_city = df["CIDADE"].map(normalize_key)
+        with timed(timings, "vetorizado (+ memo por cidade)"):
+            got_ts = _build_ts_hour_inmet(df, date_col, hour_col)
+            got_city = normalize_key_series(df["CIDADE"])
+
+        if not ref_ts.astype(object).equals(got_ts.astype(object)):
+            raise SystemExit(f"PARIDADE FALHOU: ts_hour ({date_col}/{hour_col})")
+        if not ref_city.astype(object).equals(got_city.astype(object)):
+            raise SystemExit("PARIDADE FALHOU: cidade_norm")
+
+    print(f"linhas={args.rows} x 2 esquemas cidades={args.cities}")
+    print(format_report("inmet ts_hour + cidade_norm", timings, "legacy (apply por linha + map)"))
+    print("paridade: OK (ts_hour e cidade_norm identicos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark + paridade: metricas sklearn (uma chamada por metrica) vs SortedScores.
+
+Gera scores sinteticos (alvo raro, scores com empates) e compara:
+    sklearn - confusion_matrix + roc_auc_score + average_precision_score +
+              roc_curve + precision_recall_curve, e uma confusion_matrix por
+              threshold da grade (o que a varredura custaria antes);
+    engine  - SortedScores: um argsort, curvas/AUCs/varredura derivadas.
+
+Paridade: mesmas AUCs, mesmos pontos de curva e mesma contagem tp/fp em
+todos os thresholds da grade.
+
+Uso:
+    python -m src.benchmarks.bench_metric_engine
+    python -m src.benchmarks.bench_metric_engine --rows 5000000 --grid 201
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.ml._metric_engine import SortedScores  # noqa: E402
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--pos-rate", type=float, default=0.02)
+    p.add_argument("--grid", type=int, default=101, help="thresholds avaliados pelo caminho sklearn")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    from sklearn.metrics import (
+        average_precision_score,
+        confusion_matrix,
+        precision_recall_curve,
+        roc_auc_score,
+        roc_curve,
+    )
+
+    rng = np.random.default_rng(args.seed)
+    y = (rng.random(args.rows) < args.pos_rate).astype(np.int8)
+    # Scores com 4 casas: muitos empates, como proba de modelos em arvore.
+    s = np.round(np.clip(0.3 * y + rng.beta(2, 8, size=args.rows), 0.0, 1.0), 4)
+    grid = np.linspace(0.0, 1.0, args.grid)
+
+    timings: Dict[str, float] = {}
+    ref: Dict[str, object] = {}
+    got: Dict[str, object] = {}
+    with timed(timings, "sklearn (uma passada por metrica/threshold)"):
+        ref["roc_auc"] = roc_auc_score(y, s)
+        ref["pr_auc"] = average_precision_score(y, s)
+        ref["roc"] = roc_curve(y, s)
+        ref["pr"] = precision_recall_curve(y, s)
+        ref["cm"] = np.array([confusion_matrix(y, (s >= t).astype(np.int8), labels=[0, 1]).ravel() for t in grid])
+    with timed(timings, "engine (SortedScores)"):
+        eng = SortedScores(y, s)
+        got["roc_auc"] = eng.roc_auc()
+        got["pr_auc"] = eng.average_precision()
+        got["roc"] = eng.roc_curve()
+        got["pr"] = eng.precision_recall_curve()
+        sw = eng.sweep(grid)
+        got["cm"] = sw[["tn", "fp", "fn", "tp"]].to_numpy()
+        summary = eng.sweep_summary(n_days=365.25)
+
+    bad = [k for k in ("roc_auc", "pr_auc") if not np.isclose(ref[k], got[k])]
+    bad += [k for k in ("roc", "pr") if not all(np.allclose(a, b) for a, b in zip(ref[k], got[k]))]
+    if not np.array_equal(ref["cm"], got["cm"]):
+        bad.append("cm")
+    if bad:
+        raise SystemExit(f"PARIDADE FALHOU: {bad}")
+
+    print(f"linhas={args.rows} positivos={int(y.sum())} thresholds_grade={args.grid}")
+    print(format_report("Metricas + varredura de thresholds", timings, "sklearn (uma passada por metrica/threshold)"))
+    best = summary["best_f1"]
+    print(f"paridade: OK (roc_auc={got['roc_auc']:.6f} pr_auc={got['pr_auc']:.6f} "
+          f"best_f1={best['f1']:.4f} @thr={best['threshold']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
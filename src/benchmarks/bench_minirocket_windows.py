@@ -0,0 +1,130 @@
+"""Benchmark: construtor de janelas do MiniRocket (loop legado vs views com stride).
+
+Gera um ano sintetico multi-cidade (horario, com NaNs em blocos) e compara:
+    legacy  - loop Python por linha + cubo denso (n, C, L), como era
+              ArticleTemporalFusion._build_windows;
+    strided - MiniRocketWindows (validade vetorizada + chunks sob demanda).
+
+Tambem confere que as janelas validas e seu conteudo sao identicos.
+
+Uso:
+    python -m src.benchmarks.bench_minirocket_windows
+    python -m src.benchmarks.bench_minirocket_windows --cities 300 --window 168
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.article.minirocket_windows import MiniRocketWindows  # noqa: E402
+from src.benchmarks._common import format_report, timed  # noqa: E402
+
+
+def _legacy_build_windows(
+    df_agg: pd.DataFrame, cols: List[str], L: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Copia fiel do construtor anterior (referencia de paridade)."""
+    n = len(df_agg)
+    C = len(cols)
+    X = np.full((n, C, L), np.nan, dtype=np.float32)
+    valid = np.zeros(n, dtype=bool)
+
+    cities = df_agg["cidade_norm"].to_numpy()
+    vals = df_agg[cols].to_numpy(dtype=np.float32)
+
+    city_starts: Dict[Any, int] = {}
+    prev = object()
+    for i in range(n):
+        c = cities[i]
+        if c != prev:
+            city_starts[c] = i
+            prev = c
+
+    for i in range(n):
+        c = cities[i]
+        cs = city_starts[c]
+        local_idx = i - cs
+        if local_idx < L:
+            continue
+        window = vals[i - L:i]
+        if np.any(np.isnan(window)):
+            continue
+        X[i] = window.T
+        valid[i] = True
+
+    return X, valid
+
+
+def make_synthetic_year(
+    n_cities: int, hours: int, n_channels: int, nan_rate: float, seed: int
+) -> Tuple[pd.DataFrame, List[str]]:
+    """df_agg sintetico ordenado por (cidade_norm, _ts) com lacunas de NaN."""
+    rng = np.random.default_rng(seed)
+    cols = [f"ch{c}" for c in range(n_channels)]
+    n = n_cities * hours
+    vals = rng.standard_normal((n, n_channels)).astype(np.float32)
+    # Lacunas curtas (falhas de estacao) em linhas aleatorias.
+    gaps = rng.random(n) < nan_rate
+    vals[gaps, rng.integers(0, n_channels, size=int(gaps.sum()))] = np.nan
+    df = pd.DataFrame(vals, columns=cols)
+    df.insert(0, "cidade_norm", np.repeat([f"cidade_{i:04d}" for i in range(n_cities)], hours))
+    df.insert(1, "_ts", np.tile(pd.date_range("2020-01-01", periods=hours, freq="h"), n_cities))
+    return df, cols
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=int, default=60)
+    p.add_argument("--hours", type=int, default=8760)
+    p.add_argument("--channels", type=int, default=5)
+    p.add_argument("--window", type=int, default=168)
+    p.add_argument("--nan-rate", type=float, default=0.0005)
+    p.add_argument("--chunk", type=int, default=10_000)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    df, cols = make_synthetic_year(args.cities, args.hours, args.channels, args.nan_rate, args.seed)
+    L = args.window
+    timings: Dict[str, float] = {}
+
+    with timed(timings, "legacy (loop + cubo denso)"):
+        X_legacy, valid_legacy = _legacy_build_windows(df, cols, L)
+        X_legacy_valid = X_legacy[valid_legacy]
+    dense_gib = X_legacy.nbytes / 1024 ** 3
+    del X_legacy
+
+    with timed(timings, "strided (vetorizado + chunks)"):
+        windows = MiniRocketWindows.from_frame(df, cols, L)
+        checksum = 0.0
+        for _rows, X_chunk in windows.iter_chunks(args.chunk):
+            checksum += float(X_chunk[:, :, -1].sum())
+
+    if not np.array_equal(windows.valid_mask(), valid_legacy):
+        raise SystemExit("PARIDADE FALHOU: mascaras de validade diferem")
+    offset = 0
+    for _rows, X_chunk in windows.iter_chunks(args.chunk):
+        ref = X_legacy_valid[offset:offset + len(X_chunk)]
+        if not np.array_equal(X_chunk, ref):
+            raise SystemExit("PARIDADE FALHOU: conteudo das janelas difere")
+        offset += len(X_chunk)
+
+    chunk_gib = min(args.chunk, windows.n_valid) * len(cols) * L * 4 / 1024 ** 3
+    print(f"linhas={len(df)} cidades={args.cities} C={len(cols)} L={L} "
+          f"validas={windows.n_valid}")
+    print(f"pico de janelas: legacy={dense_gib:.2f} GiB (cubo denso) | "
+          f"strided={chunk_gib:.3f} GiB (1 chunk)")
+    print(format_report("minirocket windows", timings, "legacy (loop + cubo denso)"))
+    print("paridade: OK")
+
+
+if __name__ == "__main__":
+    main()
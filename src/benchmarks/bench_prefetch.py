@@ -0,0 +1,127 @@
+"""Benchmark + checagens: prefetch_ordered (src/ml/_prefetch.py) vs leitura sequencial.
+
+Fontes sinteticas: cada uma gera N chunks de `--chunk-mb` MB com um custo
+de "decodificacao" (sleep, como o iter_batches que libera o GIL); o
+consumidor tambem gasta um tempo por chunk. Compara:
+    sequencial - um gerador por vez na thread principal;
+    prefetch   - prefetch_ordered com `--workers` threads e orcamento.
+
+Checagens (falham com SystemExit):
+    - chunks identicos e na mesma ordem nos dois caminhos;
+    - pico em voo <= orcamento + um chunk, inclusive com consumidor lento
+      e orcamento menor que um unico arquivo (o arquivo da vez tambem
+      respeita o orcamento);
+    - excecao de um produtor reaparece no ponto em que o sequencial a
+      levantaria, depois dos chunks ja produzidos.
+
+Uso:
+    python -m src.benchmarks.bench_prefetch
+    python -m src.benchmarks.bench_prefetch --sources 6 --chunks 40 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.ml._prefetch import prefetch_ordered  # noqa: E402
+
+MB = 1_000_000
+
+
+def _chunks(src: int, n_chunks: int, chunk_bytes: int, decode_s: float, fail_at: int = -1) -> Iterator[np.ndarray]:
+    for k in range(n_chunks):
+        if k == fail_at:
+            raise RuntimeError(f"fonte {src}: falha no chunk {k}")
+        time.sleep(decode_s)
+        yield np.full(chunk_bytes, (src * 31 + k) % 251, dtype=np.uint8)
+
+
+def _run(sources: List[int], open_iter, consume_s: float, workers: int, budget: int,
+         stats: Dict[str, int]) -> List[tuple]:
+    seen = []
+    for src, chunks in prefetch_ordered(sources, open_iter, workers=workers, budget_bytes=budget,
+                                        nbytes=lambda c: c.nbytes, stats=stats):
+        for chunk in chunks:
+            time.sleep(consume_s)
+            seen.append((src, int(chunk[0]), chunk.nbytes))
+    return seen
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sources", type=int, default=4)
+    p.add_argument("--chunks", type=int, default=20, help="chunks por fonte")
+    p.add_argument("--chunk-mb", type=float, default=1.0)
+    p.add_argument("--decode", type=float, default=0.01, help="segundos por chunk no produtor")
+    p.add_argument("--consume", type=float, default=0.005, help="segundos por chunk no consumidor")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--budget-mb", type=float, default=8.0)
+    args = p.parse_args()
+
+    chunk_bytes = int(args.chunk_mb * MB)
+    sources = list(range(args.sources))
+
+    def open_iter(src: int) -> Iterator[np.ndarray]:
+        return _chunks(src, args.chunks, chunk_bytes, args.decode)
+
+    timings: Dict[str, float] = {}
+    stats: Dict[str, int] = {}
+    with timed(timings, "sequencial"):
+        ref = _run(sources, open_iter, args.consume, 1, 0, {})
+    with timed(timings, f"prefetch ({args.workers} threads)"):
+        got = _run(sources, open_iter, args.consume, args.workers, int(args.budget_mb * MB), stats)
+    if got != ref:
+        raise SystemExit("PARIDADE FALHOU: chunks diferentes/ordem diferente")
+    if stats["peak_inflight_bytes"] > int(args.budget_mb * MB) + chunk_bytes:
+        raise SystemExit(f"ORCAMENTO ESTOURADO: pico {stats['peak_inflight_bytes']:,} bytes")
+
+    # Consumidor lento + orcamento de 2 chunks, menor que qualquer arquivo:
+    # o produtor do arquivo da vez nao pode enfileirar o arquivo inteiro.
+    tight = 2 * chunk_bytes
+    slow: Dict[str, int] = {}
+    small = _run(sources[:3], lambda s: _chunks(s, 50, chunk_bytes, 0.0), 0.002, 3, tight, slow)
+    if len(small) != 150:
+        raise SystemExit(f"ORCAMENTO APERTADO: {len(small)} chunks consumidos (esperado 150)")
+    if slow["peak_inflight_bytes"] > tight + chunk_bytes:
+        raise SystemExit(f"ORCAMENTO APERTADO ESTOURADO: pico {slow['peak_inflight_bytes']:,} bytes "
+                         f"(limite {tight + chunk_bytes:,})")
+
+    # Falha no meio da fonte 1: mesmos chunks antes da excecao nos dois caminhos.
+    def failing(src: int) -> Iterator[np.ndarray]:
+        return _chunks(src, args.chunks, chunk_bytes, 0.0, fail_at=5 if src == 1 else -1)
+
+    outcomes = []
+    for workers in (1, args.workers):
+        seen: List[tuple] = []
+        try:
+            for src, chunks in prefetch_ordered(sources, failing, workers=workers,
+                                                budget_bytes=int(args.budget_mb * MB), nbytes=lambda c: c.nbytes):
+                for chunk in chunks:
+                    seen.append((src, int(chunk[0])))
+        except RuntimeError as exc:
+            outcomes.append((seen, str(exc)))
+        else:
+            raise SystemExit("FALHA NAO PROPAGADA")
+    if outcomes[0] != outcomes[1]:
+        raise SystemExit("FALHA EM PONTO DIFERENTE DO SEQUENCIAL")
+
+    print(f"fontes={args.sources} chunks={args.chunks} chunk={args.chunk_mb} MB workers={args.workers} "
+          f"orcamento={args.budget_mb} MB")
+    print(f"pico em voo: {stats['peak_inflight_bytes'] / MB:.1f} MB | orcamento apertado "
+          f"({tight / MB:.0f} MB): {slow['peak_inflight_bytes'] / MB:.1f} MB")
+    print(format_report("prefetch_ordered: leitura por fonte", timings, "sequencial"))
+    print("paridade/orcamento/falhas: OK")
+
+
+if __name__ == "__main__":
+    main()
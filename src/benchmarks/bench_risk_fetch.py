@@ -0,0 +1,198 @@
+"""Benchmark + checagens: download das grades de risco, serial vs cache concorrente.
+
+Sobe um servidor HTTP falso do INPE (127.0.0.1, porta livre) servindo
+NetCDFs diarios sinteticos de um diretorio temporario, com latencia
+artificial por requisicao e suporte a Range, e compara:
+    serial - caminho antigo do RiskMerger.download_day: requests.get dia a
+             dia, gravando direto no arquivo final;
+    cache  - RiskGridFetcher: dias faltantes em paralelo para o cache
+             content-addressed (manifesto SQLite).
+
+Checagens (falham com SystemExit):
+    - objetos do cache com o mesmo sha256 dos arquivos servidos;
+    - segunda rodada nao baixa nada (dias ja presentes);
+    - retomada: .part com metade do arquivo e completado via Range (206);
+    - dia inexistente no servidor conta como ausente, sem excecao;
+    - RiskMerger.extract com --cube (NPZ recortado no Cerrado) == extracao
+      dos NetCDFs globais.
+
+Uso:
+    python -m src.benchmarks.bench_risk_fetch
+    python -m src.benchmarks.bench_risk_fetch --days 120 --latency 0.2 --workers 16
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.benchmarks.bench_risk_merge import _write_grids  # noqa: E402
+
+
+@contextmanager
+def fake_inpe_server(root: Path, latency: float = 0.0):
+    """Serve root/<basename> para qualquer caminho; Range 'bytes=N-' -> 206. Devolve o url_template."""
+    hits: Dict[str, int] = {"get": 0, "range": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # silencioso
+            pass
+
+        def do_GET(self):
+            hits["get"] += 1
+            if latency:
+                time.sleep(latency)
+            fp = root / Path(self.path).name
+            if not fp.is_file():
+                self.send_error(404)
+                return
+            data = fp.read_bytes()
+            m = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+            if m:
+                start = int(m.group(1))
+                if start >= len(data):
+                    self.send_error(416)
+                    return
+                hits["range"] += 1
+                body = data[start:]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+            else:
+                body = data
+                self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    th = threading.Thread(target=srv.serve_forever, daemon=True)
+    th.start()
+    try:
+        port = srv.server_address[1]
+        yield (f"http://127.0.0.1:{port}/queimadas/risco_fogo/{{year}}/"
+               "INPE_FireRiskModel_2.2_FireRisk_{date_str}.nc"), hits
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _serial(dates, url_template: str, dest: Path) -> None:
+    import requests
+
+    for d in dates:
+        ts = pd.Timestamp(d)
+        url = url_template.format(year=ts.year, date_str=ts.strftime("%Y%m%d"))
+        r = requests.get(url, stream=True, timeout=60)
+        if r.status_code == 200:
+            with open(dest / Path(url).name, "wb") as f:
+                for chunk in r.iter_content(chunk_size=8192):
+                    f.write(chunk)
+
+
+def _sha(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--days", type=int, default=40)
+    p.add_argument("--latency", type=float, default=0.1, help="segundos por requisicao no servidor falso")
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--stations", type=int, default=300)
+    p.add_argument("--res", type=float, default=0.25, help="resolucao da grade 'global' sintetica (graus)")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    from src.merge_risco_validation import RiskMerger
+    from src.risco_fogo_cache import RiskGridCache, RiskGridFetcher, build_year_cube, day_filename
+
+    rng = np.random.default_rng(args.seed)
+    # Grade maior que o Cerrado (America do Sul), para o recorte do cubo fazer diferenca.
+    lat = np.round(np.arange(-56.0, 13.0 + 1e-9, args.res), 4)[::-1]
+    lon = np.round(np.arange(-82.0, -34.0 + 1e-9, args.res), 4)
+    dates = pd.date_range("2021-01-01", periods=args.days, freq="D")
+
+    timings: Dict[str, float] = {}
+    extract_t: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_risk_fetch_") as tmp:
+        tmp = Path(tmp)
+        served = tmp / "served"
+        served.mkdir()
+        _write_grids(served, dates, lat, lon, rng)
+        missing_day = dates[-1] + pd.Timedelta(days=1)  # nao existe no servidor
+
+        with fake_inpe_server(served, latency=args.latency) as (url_template, hits):
+            (tmp / "serial").mkdir()
+            with timed(timings, "serial (requests.get dia a dia)"):
+                _serial(dates, url_template, tmp / "serial")
+
+            raw = tmp / "raw"
+            raw.mkdir()
+            cache = RiskGridCache(raw / "_cache")
+            fetcher = RiskGridFetcher(cache, url_template=url_template, workers=args.workers)
+
+            # Retomada: metade do primeiro dia ja esta no .part (download interrompido).
+            first = served / day_filename(dates[0])
+            data = first.read_bytes()
+            cache.partial_path(dates[0]).write_bytes(data[: len(data) // 2])
+
+            with timed(timings, f"cache ({args.workers} workers)"):
+                rep = fetcher.fetch(list(dates) + [missing_day])
+            print(f"1a rodada: {rep.summary()}")
+            if rep.downloaded != args.days or rep.missing != 1 or rep.failed:
+                raise SystemExit(f"FETCH FALHOU: {rep}")
+            if rep.resumed != 1 or hits["range"] != 1:
+                raise SystemExit(f"RETOMADA FALHOU: resumed={rep.resumed} range={hits['range']}")
+            bad = [d for d in dates if _sha(cache.path_for(d)) != _sha(served / day_filename(d))]
+            if bad:
+                raise SystemExit(f"CONTEUDO DIFERENTE no cache: {bad[:5]}")
+
+            n_get = hits["get"]
+            rep2 = fetcher.fetch(dates)
+            print(f"2a rodada: {rep2.summary()}")
+            if rep2.cached != args.days or hits["get"] != n_get:
+                raise SystemExit(f"SEGUNDA RODADA BAIXOU DE NOVO: {rep2}")
+            cache.close()
+
+        # Cubo Cerrado vs NetCDF global (RiskMerger sem rede, lendo o cache acima).
+        st_lat = rng.uniform(-23.0, -3.0, args.stations)
+        st_lon = rng.uniform(-59.0, -42.0, args.stations)
+        day_list = [pd.Timestamp(d) for d in dates]
+        nc = RiskMerger(nc_raw_path=raw, fetch=False)
+        with timed(extract_t, "extract: NetCDF global"):
+            ref = nc.extract(day_list, st_lat, st_lon)
+        cube = RiskMerger(nc_raw_path=raw, fetch=False, use_cube=True)
+        with timed(extract_t, "extract: cubo Cerrado (gera NPZ)"):
+            got = cube.extract(day_list, st_lat, st_lon)
+        with timed(extract_t, "extract: cubo Cerrado (NPZ pronto)"):
+            got2 = cube.extract(day_list, st_lat, st_lon)
+        if not (np.array_equal(ref, got, equal_nan=True) and np.array_equal(ref, got2, equal_nan=True)):
+            raise SystemExit("PARIDADE FALHOU: cubo != NetCDF")
+        cube_mb = build_year_cube(cube.cache, dates[0].year).stat().st_size / 1e6
+        nc_mb = sum(f.stat().st_size for f in served.iterdir()) / 1e6
+
+    print(f"dias={args.days} grade={lat.size}x{lon.size} latencia={args.latency}s "
+          f"| NetCDFs={nc_mb:.1f} MB cubo={cube_mb:.1f} MB")
+    print(format_report("Risco de fogo: download das grades", timings, "serial (requests.get dia a dia)"))
+    print(format_report("Risco de fogo: extracao (estacoes x dias)", extract_t, "extract: NetCDF global"))
+    print("cache/retomada/cubo: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark + paridade: RiskMerger por dia (mascara + sel por ponto) vs extracao em lote.
+
+Grava NetCDFs diarios sinteticos (mesmo nome/layout dos do INPE:
+INPE_FireRiskModel_2.2_FireRisk_YYYYMMDD.nc, variavel unica, dims
+time/lat/lon) num diretorio temporario e um DataFrame de estacoes x horas,
+e compara:
+    por dia - caminho antigo do RiskMerger.run: mascara booleana por dia,
+              open + sel(method="nearest", tolerance) por ponto, df.loc;
+    lote    - RiskMerger.extract (indice estacao -> celula uma vez por
+              grade, leitura pontual por arquivo) + gather por (dia, estacao).
+
+Paridade: mesma coluna RISCO_FOGO_NOVO (estacoes dentro da tolerancia) e
+mesma celula que sel(method="nearest") para alvos exatamente no meio de
+duas celulas (empate -> maior coordenada), em grade crescente e decrescente.
+Nao acessa a rede: download_day usa os arquivos locais.
+
+Uso:
+    python -m src.benchmarks.bench_risk_merge
+    python -m src.benchmarks.bench_risk_merge --days 365 --stations 600
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+
+
+def _write_grids(root: Path, dates, lat: np.ndarray, lon: np.ndarray, rng) -> None:
+    import xarray as xr
+
+    for d in dates:
+        risk = rng.random((1, lat.size, lon.size)).astype(np.float32)
+        ds = xr.Dataset(
+            {"rf": (("time", "lat", "lon"), risk)},
+            coords={"time": [pd.Timestamp(d)], "lat": lat, "lon": lon},
+        )
+        ds.to_netcdf(root / f"INPE_FireRiskModel_2.2_FireRisk_{pd.Timestamp(d):%Y%m%d}.nc")
+
+
+def _per_day(df: pd.DataFrame, merger) -> np.ndarray:
+    import xarray as xr
+
+    out = pd.Series(np.nan, index=df.index)
+    for ts in sorted(df["dt_ref"].unique()):
+        ts = pd.Timestamp(ts)
+        mask_day = df["dt_ref"] == ts
+        pts = df.loc[mask_day, ["LATITUDE", "LONGITUDE"]]
+        ds = xr.open_dataset(merger.download_day(ts))
+        try:
+            vals = ds["rf"].isel(time=0).sel(
+                lat=xr.DataArray(pts["LATITUDE"].values, dims="points"),
+                lon=xr.DataArray(pts["LONGITUDE"].values, dims="points"),
+                method="nearest",
+                tolerance=merger.tolerance,
+            ).values.ravel()
+            out.loc[mask_day] = vals
+        except KeyError:
+            pass  # algum ponto fora da tolerancia: o caminho antigo perdia o dia todo
+        finally:
+            ds.close()
+    return out.to_numpy(dtype=np.float32)
+
+
+def check_ties(lat: np.ndarray, res: float) -> None:
+    import xarray as xr
+
+    from src.merge_risco_validation import nearest_index
+
+    mids = (lat[:-1] + lat[1:]) / 2.0  # equidistantes das duas celulas vizinhas
+    for grid in (lat, lat[::-1]):
+        da = xr.DataArray(np.arange(grid.size), coords={"lat": grid}, dims="lat")
+        ref = da.sel(lat=xr.DataArray(mids, dims="points"), method="nearest").values
+        got, ok = nearest_index(grid, mids, res)
+        if not ok.all() or not np.array_equal(ref, got):
+            raise SystemExit(f"EMPATE FALHOU: {int((ref != got).sum())} de {mids.size} alvos em outra celula")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--days", type=int, default=60)
+    p.add_argument("--stations", type=int, default=200)
+    p.add_argument("--hours", type=int, default=24, help="linhas por estacao por dia")
+    p.add_argument("--res", type=float, default=0.25, help="resolucao da grade sintetica (graus)")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    from src.merge_risco_validation import RiskMerger
+
+    rng = np.random.default_rng(args.seed)
+    lat = np.round(np.arange(-24.0, -2.0 + 1e-9, args.res), 4)[::-1]  # decrescente como em muitas grades
+    lon = np.round(np.arange(-60.0, -41.0 + 1e-9, args.res), 4)
+    dates = pd.date_range("2020-01-01", periods=args.days, freq="D")
+    # Estacoes no centro das celulas (+ ruido pequeno): todas dentro da tolerancia.
+    st_lat = rng.choice(lat, args.stations) + rng.uniform(-0.02, 0.02, args.stations)
+    st_lon = rng.choice(lon, args.stations) + rng.uniform(-0.02, 0.02, args.stations)
+    n = args.days * args.stations * args.hours
+    day_idx = np.repeat(np.arange(args.days), args.stations * args.hours)
+    st_idx = np.tile(np.repeat(np.arange(args.stations), args.hours), args.days)
+    df = pd.DataFrame({
+        "dt_ref": dates[day_idx],
+        "LATITUDE": st_lat[st_idx],
+        "LONGITUDE": st_lon[st_idx],
+    }).sample(frac=1.0, random_state=args.seed).reset_index(drop=True)
+
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_risk_") as tmp:
+        _write_grids(Path(tmp), dates, lat, lon, rng)
+        merger = RiskMerger(nc_raw_path=Path(tmp))
+
+        with timed(timings, "por dia (mascara + sel por ponto)"):
+            ref = _per_day(df, merger)
+        with timed(timings, "lote (indice + gather)"):
+            day_code, unique_dates = pd.factorize(df["dt_ref"], sort=True)
+            st_code, stations = pd.factorize(
+                pd.MultiIndex.from_arrays([df["LATITUDE"].to_numpy(), df["LONGITUDE"].to_numpy()])
+            )
+            grid = merger.extract(
+                [pd.Timestamp(d) for d in unique_dates],
+                np.asarray(stations.get_level_values(0), dtype=np.float64),
+                np.asarray(stations.get_level_values(1), dtype=np.float64),
+            )
+            got = grid[day_code, st_code]
+
+    if not np.allclose(ref, got, equal_nan=True):
+        raise SystemExit(f"PARIDADE FALHOU: {int((~np.isclose(ref, got, equal_nan=True)).sum())} linhas diferentes")
+    check_ties(lat, args.res)
+
+    print(f"dias={args.days} estacoes={args.stations} linhas={n:,} grade={lat.size}x{lon.size}")
+    print(format_report("RiskMerger: extracao do risco", timings, "por dia (mascara + sel por ponto)"))
+    print("paridade/empates: OK")
+
+
+if __name__ == "__main__":
+    main()
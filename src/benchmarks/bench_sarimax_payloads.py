@@ -0,0 +1,163 @@
+"""Benchmark + paridade: preparo dos payloads por cidade do sarimax_exog.
+
+Gera um df_agg sintetico (N cidades x H horas, endog + 4 exogenas) e compara:
+    legacy - mascara booleana sobre df_agg inteiro por cidade (O(cidades x
+             linhas)) + pickle dos arrays de cada cidade (o que ia para cada
+             submit) + scatter result.loc[idx, col] por cidade na volta;
+    shm    - CityBlockLayout: factorize + layout cidade-ordenado em
+             shared_memory, pickle apenas dos descritores (offset, length) e
+             uma unica permutacao inversa na volta.
+
+Paridade: a fatia (endog, exog) de cada cidade e o vetor final na ordem de
+df_agg sao identicos nos dois caminhos (df_agg embaralhado de proposito).
+Checkpoint: um pool de 1 worker roda as cidades de dois anos (ckpt_dir
+diferentes) em sequencia; com o pool ainda vivo, todo segmento .arrows tem
+de terminar no EOS e conter todos os blocos.
+
+Uso:
+    python -m src.benchmarks.bench_sarimax_payloads
+    python -m src.benchmarks.bench_sarimax_payloads --cities 2000 --hours 8760
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.article.sarimax_checkpoint import SarimaxCheckpoint  # noqa: E402
+from src.article.sarimax_shm import CityBlockLayout  # noqa: E402
+
+ENDOG = "umid"
+EXOG = ["temp", "rad", "precip", "ndvi"]
+
+# Marcador de fim de stream do Arrow IPC (continuacao + tamanho 0).
+_ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def make_synthetic_agg(n_cities: int, hours: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = n_cities * hours
+    df = pd.DataFrame({
+        "cidade_norm": np.repeat([f"cidade_{i:05d}" for i in range(n_cities)], hours),
+        "_ts": np.tile(pd.date_range("2020-01-01", periods=hours, freq="h"), n_cities),
+    })
+    for c in [ENDOG] + EXOG:
+        v = rng.normal(50, 10, n)
+        v[rng.random(n) < 0.01] = np.nan
+        df[c] = v
+    # Embaralha para exercitar a permutacao do layout.
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def check_checkpoint_segments(seed: int) -> int:
+    from concurrent.futures import ProcessPoolExecutor
+
+    from src.article.temporal_fusion_article import _sarimax_shm_city_worker
+
+    hours, H = 240, 48
+    worker_args = ((1, 0, 0), (0, 0, 0, 0), H, 96, 24)
+    warm_kwargs = {"warm_start": False, "refit_every": 1}
+    layout = CityBlockLayout(make_synthetic_agg(3, hours, seed), ENDOG, EXOG)
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_sarimax_ckpt_") as tmp, \
+                ProcessPoolExecutor(max_workers=1) as pool:
+            ckpts = [SarimaxCheckpoint(Path(tmp), year, {"year": year}) for year in (2020, 2021)]
+            for ckpt in ckpts:
+                futs = [pool.submit(_sarimax_shm_city_worker, layout.descriptor, c, o, l,
+                                    worker_args, str(ckpt.dir), None, warm_kwargs)
+                        for c, o, l in layout.city_slices()]
+                for fut in futs:
+                    fut.result()
+            # Pool ainda vivo: o worker nao pode estar segurando segmento aberto.
+            n_seg = 0
+            for ckpt in ckpts:
+                for seg in ckpt.dir.glob("seg_*.arrows"):
+                    n_seg += 1
+                    if not seg.read_bytes().endswith(_ARROW_EOS):
+                        raise SystemExit(f"CHECKPOINT: {ckpt.dir.name}/{seg.name} sem EOS apos a tarefa")
+                n_blocks = ckpt.n_blocks(ckpt.load())
+                if n_blocks != 3 * (hours // H):
+                    raise SystemExit(f"CHECKPOINT: {ckpt.dir.name} com {n_blocks} blocos")
+    finally:
+        layout.close()
+    return n_seg
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=int, default=1000)
+    p.add_argument("--hours", type=int, default=8760)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    df_agg = make_synthetic_agg(args.cities, args.hours, args.seed)
+    timings: Dict[str, float] = {}
+
+    with timed(timings, "legacy (mascara + pickle + scatter)"):
+        city_data: List[dict] = []
+        for city in df_agg["cidade_norm"].unique():
+            mask = df_agg["cidade_norm"] == city
+            city_df = df_agg.loc[mask]
+            city_data.append({
+                "city": city,
+                "idx": city_df.index.to_numpy(),
+                "z_endog": city_df[ENDOG].to_numpy(dtype=float),
+                "z_exog": city_df[EXOG].to_numpy(dtype=float),
+            })
+        legacy_bytes = sum(
+            len(pickle.dumps((cd["z_endog"], cd["z_exog"]), protocol=pickle.HIGHEST_PROTOCOL))
+            for cd in city_data
+        )
+        legacy_out = pd.Series(np.nan, index=df_agg.index)
+        for cd in city_data:
+            legacy_out.loc[cd["idx"]] = cd["z_endog"] * 0.5
+
+    with timed(timings, "shm (layout + descritores)"):
+        layout = CityBlockLayout(df_agg, ENDOG, EXOG)
+        slices = layout.city_slices()
+        shm_bytes = sum(
+            len(pickle.dumps((layout.descriptor, c, o, l), protocol=pickle.HIGHEST_PROTOCOL))
+            for c, o, l in slices
+        )
+        for _c, o, l in slices:
+            layout.out[o:o + l] = layout.data[o:o + l, 0] * 0.5
+        shm_out = layout.to_frame_order(layout.out)
+
+    block = None
+    try:
+        by_city = {cd["city"]: cd for cd in city_data}
+        for c, o, l in slices:
+            cd = by_city[c]
+            block = layout.data[o:o + l]
+            if not (
+                np.array_equal(block[:, 0], cd["z_endog"], equal_nan=True)
+                and np.array_equal(block[:, 1:], cd["z_exog"], equal_nan=True)
+            ):
+                raise SystemExit(f"PARIDADE FALHOU: payload da cidade {c}")
+        if not np.array_equal(shm_out, legacy_out.to_numpy(), equal_nan=True):
+            raise SystemExit("PARIDADE FALHOU: vetor de saida na ordem de df_agg")
+    finally:
+        block = None  # solta a view antes de fechar o segmento
+        layout.close()
+
+    print(f"linhas={len(df_agg)} cidades={args.cities} exog={len(EXOG)}")
+    print(format_report("sarimax_exog payloads", timings, "legacy (mascara + pickle + scatter)"))
+    print(f"bytes pickled por ano: legacy={legacy_bytes / 1e6:.1f} MB  shm={shm_bytes / 1e6:.3f} MB")
+    n_seg = check_checkpoint_segments(args.seed)
+    print("paridade: OK (fatias por cidade e saida identicas)")
+    print(f"checkpoint: OK ({n_seg} segmentos fechados com EOS pelo worker)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Benchmark: SARIMAX rolling por cidade (fit frio vs warm start vs warm + filtro).
+
+Gera series horarias sinteticas (N cidades, ciclo diario + ruido, 2 exogenas)
+e roda _sarimax_city_worker em tres modos:
+    cold   - cada bloco de refit otimiza a partir dos valores iniciais padrao
+             (comportamento original);
+    warm   - cada refit parte dos parametros do bloco anterior da cidade;
+    filter - warm start + reotimizacao a cada `--refit-every` blocos; nos
+             intermediarios so o filtro de Kalman e reaplicado.
+
+Nao ha paridade exata (o otimizador converge para pontos levemente
+diferentes); o relatorio mostra iteracoes/tempo por bloco e o RMSE de cada
+modo contra a serie observada, alem da diferenca maxima para o modo cold.
+
+Resume (falha com SystemExit): no modo filter, retomar do checkpoint com so
+os primeiros blocos prontos (no meio do ciclo de refit, com um buraco
+depois, ou com o ultimo bloco pronto gravado como falha transitoria) da as
+mesmas previsoes, bit a bit, da execucao sem interrupcao.
+
+Uso:
+    python -m src.benchmarks.bench_sarimax_warm
+    python -m src.benchmarks.bench_sarimax_warm --cities 4 --days 120 --refit-every 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.benchmarks._common import format_report, timed  # noqa: E402
+from src.article.sarimax_checkpoint import BLOCK_FAIL, SarimaxCheckpoint, close_writers  # noqa: E402
+from src.article.temporal_fusion_article import _sarimax_city_worker  # noqa: E402
+
+ORDER = (2, 1, 2)
+SEASONAL_ORDER = (1, 1, 1, 24)
+H = 336
+W = 720
+
+
+def make_synthetic_cities(n_cities: int, hours: int, seed: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    out = []
+    for _ in range(n_cities):
+        exog = rng.normal(size=(hours, 2))
+        endog = (
+            60 + 15 * np.sin(2 * np.pi * t / 24 + rng.uniform(0, np.pi))
+            + 2.0 * exog[:, 0] - 1.0 * exog[:, 1] + rng.normal(0, 3, hours)
+        )
+        endog[rng.random(hours) < 0.01] = np.nan
+        out.append((endog, exog))
+    return out
+
+
+def check_resume(endog: np.ndarray, exog: np.ndarray, min_train: int, refit_every: int) -> int:
+    kw = {"warm_start": True, "refit_every": refit_every}
+    with tempfile.TemporaryDirectory(prefix="bench_sarimax_resume_") as tmp:
+        ckpt = SarimaxCheckpoint(Path(tmp), 2022, {"bench": "resume"})
+        full = _sarimax_city_worker(endog, exog, ORDER, SEASONAL_ORDER, H, W, min_train,
+                                    "c", str(ckpt.dir), None, **kw)[0]
+        close_writers()
+        blocks = ckpt.load()["c"]
+    starts = sorted(blocks)
+    cut = min(len(starts) - 2, refit_every + 1)  # parada no meio de um ciclo
+    cases = {
+        "prefixo": {s: blocks[s] for s in starts[:cut]},
+        "buraco": {s: blocks[s] for s in starts[:cut] + starts[cut + 1:]},
+    }
+    # Falha transitoria gravada (ex.: MemoryError sob o guardrail): refeita no resume.
+    last = starts[cut - 1]
+    end, _status, _ft, _preds, params, since = blocks[last]
+    cases["falha transitoria"] = {**cases["prefixo"],
+                                  last: (end, BLOCK_FAIL, "MemoryError", np.empty(0), params, since)}
+    for name, done in cases.items():
+        got = _sarimax_city_worker(endog, exog, ORDER, SEASONAL_ORDER, H, W, min_train,
+                                   "c", None, done, **kw)[0]
+        if not np.array_equal(got, full, equal_nan=True):
+            n_bad = int((~np.isclose(got, full, rtol=0, atol=0, equal_nan=True)).sum())
+            raise SystemExit(f"RESUME ({name}): {n_bad} horas com previsao diferente da execucao sem interrupcao")
+    return cut
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cities", type=int, default=2)
+    p.add_argument("--days", type=int, default=90)
+    p.add_argument("--refit-every", type=int, default=3)
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args()
+
+    cities = make_synthetic_cities(args.cities, args.days * 24, args.seed)
+    min_train = max(SEASONAL_ORDER[3] * 2, ORDER[0] + ORDER[2]) + ORDER[1] + 2 + 10
+    modes = {
+        "cold": {},
+        "warm": {"warm_start": True},
+        "filter": {"warm_start": True, "refit_every": args.refit_every},
+    }
+
+    timings: Dict[str, float] = {}
+    preds: Dict[str, List[np.ndarray]] = {}
+    stats: Dict[str, list] = {}
+    for name, kw in modes.items():
+        preds[name], stats[name] = [], []
+        with timed(timings, name):
+            for endog, exog in cities:
+                out = _sarimax_city_worker(
+                    endog, exog, ORDER, SEASONAL_ORDER, H, W, min_train, **kw
+                )
+                preds[name].append(out[0])
+                stats[name].extend(out[5])
+
+    print(f"cidades={args.cities} horas={args.days * 24} H={H} W={W} "
+          f"order={ORDER} seasonal={SEASONAL_ORDER}")
+    print(format_report("sarimax_exog rolling", timings, "cold"))
+    for name in modes:
+        bs = stats[name]
+        iters = [b[2] for b in bs if b[1] != "filter"]
+        n_filter = sum(1 for b in bs if b[1] == "filter")
+        pred = np.concatenate(preds[name])
+        obs = np.concatenate([c[0] for c in cities])
+        m = np.isfinite(pred) & np.isfinite(obs)
+        rmse = float(np.sqrt(np.mean((pred[m] - obs[m]) ** 2)))
+        ref = np.concatenate(preds["cold"])
+        both = np.isfinite(pred) & np.isfinite(ref)
+        diff = float(np.max(np.abs(pred[both] - ref[both]))) if both.any() else float("nan")
+        print(
+            f"  {name:>6}: blocos={len(bs)} otimizados={len(iters)} filtro={n_filter} "
+            f"iter_media={np.mean(iters) if iters else 0:.1f} "
+            f"s/bloco={np.mean([b[3] for b in bs]):.3f} "
+            f"rmse={rmse:.3f} max|d_cold|={diff:.3f}"
+        )
+
+    cut = check_resume(*cities[0], min_train, args.refit_every)
+    print(f"resume (filter, {cut} blocos do checkpoint): OK, previsoes identicas")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,15 @@
 # =============================================================================
 # DATASET HORA-A-HORA: INMET (bioma) × BDQUEIMADAS (targets)
 # Une, por município normalizado + hora, as séries do INMET (clima) e BDQ (focos).
-# Saídas:
-#   - data/dataset/inmet_bdq_{YYYY}_{biome}.csv (ano a ano, a partir de 2003)
-#   - data/dataset/inmet_bdq_all_years_{biome}.csv (consolidado final)
-# Depende de: pandas, utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key)
+# Entradas: consolidated/INMET e consolidated/BDQUEIMADAS em Parquet tipado
+# (consolidated_store.py); CSVs legados continuam aceitos.
+# Saídas (--format parquet|csv|both; default parquet):
+#   - data/dataset/inmet_bdq_{YYYY}_{biome}.parquet (ano a ano, a partir de 2003)
+#   - data/dataset/inmet_bdq_all_years_{biome}.parquet (consolidado final)
+#   ts_hour sai como int32 (horas desde 1970) e as chaves de cidade como
+#   dictionary; o CSV opcional mantém ts_hour em texto e decimal ','.
+# Depende de: pandas, numpy, utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key_series),
+#             consolidated_store.py
 # =============================================================================
 from __future__ import annotations
 
@@ -13,6 +18,7 @@ from pathlib import Path
 from typing import Iterable, List, Optional, Tuple
 import re
 
+import numpy as np
 import pandas as pd
 
 from utils import (
@@ -20,7 +26,15 @@ from utils import (
     get_logger,
     get_path,
     ensure_dir,
-    normalize_key,
+    normalize_key_series,
+)
+from consolidated_store import (
+    OUTPUT_FORMATS,
+    hours_from_text,
+    read_any,
+    resolve_year_file,
+    wants_parquet,
+    write_outputs,
 )
 
 # -----------------------------------------------------------------------------
@@ -38,13 +52,13 @@ def _dataset_dir() -> Path:
     # data/dataset
     return ensure_dir(get_path("paths", "data", "dataset"))
 
-_INMET_RE = re.compile(r"^inmet_(\d{4})_(?P<biome>[a-z0-9_]+)\.csv$", flags=re.IGNORECASE)
-_BDQ_RE   = re.compile(r"^bdq_targets_(\d{4})_(?P<biome>[a-z0-9_]+)\.csv$", flags=re.IGNORECASE)
+_INMET_RE = re.compile(r"^inmet_(\d{4})_(?P<biome>[a-z0-9_]+)\.(?:csv|parquet)$", flags=re.IGNORECASE)
+_BDQ_RE   = re.compile(r"^bdq_targets_(\d{4})_(?P<biome>[a-z0-9_]+)\.(?:csv|parquet)$", flags=re.IGNORECASE)
 
 def _list_inmet_years_for_biome(biome: str) -> List[int]:
     root = _inmet_consolidated_dir()
     years: List[int] = []
-    for p in root.glob(f"inmet_*_{biome}.csv"):
+    for p in root.glob(f"inmet_*_{biome}.*"):
         m = _INMET_RE.match(p.name)
         if m:
             years.append(int(m.group(1)))
@@ -53,7 +67,7 @@ def _list_inmet_years_for_biome(biome: str) -> List[int]:
 def _list_bdq_years_for_biome(biome: str) -> List[int]:
     root = _bdq_consolidated_dir()
     years: List[int] = []
-    for p in root.glob(f"bdq_targets_*_{biome}.csv"):
+    for p in root.glob(f"bdq_targets_*_{biome}.*"):
         m = _BDQ_RE.match(p.name)
         if m and (m.group("biome").lower() == biome.lower()):
             years.append(int(m.group(1)))
@@ -137,37 +151,55 @@ def _build_ts_from_inmet_row(row: pd.Series, date_col: str, hour_col: str) -> st
     hh = _parse_hour_to_hh(h)
     return f"{d} {hh:02d}:00:00"
 
-def _build_ts_from_bdq(series: pd.Series) -> pd.Series:
+def _as_str_like_row(values: pd.Series) -> pd.Series:
+    """str(v) elemento a elemento (NaN -> 'nan', None -> 'None'), como no caminho por linha."""
+    out = values.astype(object)
+    na = out.isna().to_numpy()
+    if na.any():
+        out = out.copy()
+        out[na] = [str(v) for v in out[na]]
+    return out.astype(str)
+
+_HH_LABELS = np.array([f"{h:02d}" for h in range(24)], dtype=object)
+
+def _build_ts_hour_inmet(df: pd.DataFrame, date_col: str, hour_col: str) -> pd.Series:
     """
-    BDQ:
-      - DATAHORA -> 'YYYY-MM-DD HH:MM:SS'
-    Retorna coluna 'ts_hour' formatada 'YYYY-MM-DD HH:00:00'.
+    Versão vetorizada de `_build_ts_from_inmet_row` aplicada a todas as linhas
+    (mesmas regras de `_parse_hour_to_hh`, mesma saída 'YYYY-MM-DD HH:00:00').
+    As duas regex são ancoradas em '^', então str.extract (search) == re.match.
     """
-    ts = pd.to_datetime(series["DATAHORA"], errors="coerce", utc=False)
-    return ts.dt.strftime("%Y-%m-%d %H:00:00")
+    d = _as_str_like_row(df[date_col]).str.strip()
+    h = _as_str_like_row(df[hour_col]).str.strip()
+
+    hh = h.str.extract(_HH_0100_RE, expand=False)
+    hh = hh.fillna(h.str.extract(_HH_PREFIX_RE, expand=False))
+    hh_int = hh.fillna("0").astype("int64").clip(0, 23).to_numpy()
+
+    return d + " " + _HH_LABELS[hh_int] + ":00:00"
 
 # -----------------------------------------------------------------------------
 # [SEÇÃO 3] LEITURA POR ANO
 # -----------------------------------------------------------------------------
 def _read_inmet_year(year: int, biome: str, encoding: str = "utf-8") -> pd.DataFrame:
     """
-    Lê INMET para um ano/bioma como strings (sem converter decimais),
-    normaliza 'CIDADE' e cria 'ts_hour' robusto a ambos esquemas (antigo e 2019+).
+    Lê INMET para um ano/bioma já tipado (Parquet do store ou CSV legado),
+    normaliza 'CIDADE' e cria 'ts_hour' (horas inteiras) robusto a ambos
+    esquemas (antigo e 2019+).
     """
-    path = _inmet_consolidated_dir() / f"inmet_{year}_{biome}.csv"
-    if not path.exists():
-        raise FileNotFoundError(f"INMET não encontrado: {path}")
+    path = resolve_year_file(_inmet_consolidated_dir(), f"inmet_{year}_{biome}")
+    if path is None:
+        raise FileNotFoundError(f"INMET não encontrado: {_inmet_consolidated_dir() / f'inmet_{year}_{biome}.parquet'}")
 
-    df = pd.read_csv(path, dtype=str, encoding=encoding)
+    df = read_any(path, encoding=encoding)
     if "CIDADE" not in df.columns:
         raise KeyError(f"Coluna 'CIDADE' ausente em {path.name}. Colunas: {list(df.columns)}")
 
     # cidade normalizada
-    df["cidade_norm"] = df["CIDADE"].map(normalize_key)
+    df["cidade_norm"] = normalize_key_series(df["CIDADE"])
 
     # detectar schema de data/hora e construir ts_hour
     date_col, hour_col = _detect_inmet_schema(df)
-    df["ts_hour"] = df.apply(lambda r: _build_ts_from_inmet_row(r, date_col, hour_col), axis=1)
+    df["ts_hour"] = hours_from_text(_build_ts_hour_inmet(df, date_col, hour_col), fmt="%Y-%m-%d %H:%M:%S")
 
     # guarda quais colunas de data/hora serão úteis para ordenação posterior
     df.attrs["date_col"] = date_col
@@ -176,20 +208,20 @@ def _read_inmet_year(year: int, biome: str, encoding: str = "utf-8") -> pd.DataF
 
 def _read_bdq_year_reduced(year: int, biome: str, encoding: str = "utf-8") -> pd.DataFrame:
     """
-    Lê BDQ targets do ano/bioma, reduz para uma linha por (municipio_norm, ts_hour)
-    escolhendo o foco de maior FRP. Mantém:
+    Lê BDQ targets do ano/bioma (só as colunas usadas), reduz para uma linha
+    por (municipio_norm, ts_hour) escolhendo o foco de maior FRP. Mantém:
       ['municipio_norm','ts_hour','RISCO_FOGO','FRP','FOCO_ID'].
     """
-    path = _bdq_consolidated_dir() / f"bdq_targets_{year}_{biome}.csv"
-    if not path.exists():
-        raise FileNotFoundError(f"BDQ não encontrado: {path}")
+    path = resolve_year_file(_bdq_consolidated_dir(), f"bdq_targets_{year}_{biome}")
+    if path is None:
+        raise FileNotFoundError(f"BDQ não encontrado: {_bdq_consolidated_dir() / f'bdq_targets_{year}_{biome}.parquet'}")
 
     usecols = ["DATAHORA", "MUNICIPIO", "RISCO_FOGO", "FRP", "FOCO_ID"]
-    df = pd.read_csv(path, dtype=str, encoding=encoding, usecols=usecols)
+    df = read_any(path, columns=usecols, encoding=encoding)
 
     df = df.dropna(subset=["DATAHORA", "MUNICIPIO"]).copy()
-    df["municipio_norm"] = df["MUNICIPIO"].map(normalize_key)
-    df["ts_hour"] = _build_ts_from_bdq(df)
+    df["municipio_norm"] = normalize_key_series(df["MUNICIPIO"])
+    df["ts_hour"] = hours_from_text(df["DATAHORA"])
 
     frp_num = pd.to_numeric(df["FRP"], errors="coerce")
     df["_FRP_num"] = frp_num.fillna(float("-inf"))
@@ -201,11 +233,18 @@ def _read_bdq_year_reduced(year: int, biome: str, encoding: str = "utf-8") -> pd
 # -----------------------------------------------------------------------------
 # [SEÇÃO 4] FUSÃO E ESCRITA
 # -----------------------------------------------------------------------------
-def _fuse_inmet_bdq_year(year: int, biome: str, out_dir: Path, encoding: str = "utf-8") -> Path:
+def _fuse_inmet_bdq_year(
+    year: int,
+    biome: str,
+    out_dir: Path,
+    encoding: str = "utf-8",
+    output_format: str = "parquet",
+) -> Path:
     """
     Une um ano de INMET (filtrado por bioma) com BDQ targets:
       - join por (cidade_norm == municipio_norm) + ts_hour
       - adiciona HAS_FOCO (0/1), RISCO_FOGO, FRP, FOCO_ID
+    Retorna o caminho principal (.parquet, ou .csv com output_format="csv").
     """
     inmet = _read_inmet_year(year, biome, encoding=encoding)
     bdq   = _read_bdq_year_reduced(year, biome, encoding=encoding)
@@ -227,9 +266,8 @@ def _fuse_inmet_bdq_year(year: int, biome: str, out_dir: Path, encoding: str = "
     if date_col and hour_col and date_col in merged.columns and hour_col in merged.columns:
         merged = merged.sort_values([date_col, hour_col, "CIDADE"], kind="stable")
 
-    out_path = out_dir / f"inmet_bdq_{year}_{biome}.csv"
-    merged.to_csv(out_path, index=False, encoding=encoding)
-    return out_path
+    paths = write_outputs(merged, out_dir / f"inmet_bdq_{year}_{biome}", output_format, encoding=encoding)
+    return paths[0]
 
 # -----------------------------------------------------------------------------
 # [SEÇÃO 5] PIPELINE PRINCIPAL
@@ -239,12 +277,13 @@ def build_hourly_dataset(
     biome: str = "cerrado",
     overwrite: bool = False,
     encoding: str = "utf-8",
+    output_format: str = "parquet",
 ) -> Tuple[List[int], List[Path], Optional[Path]]:
     """
     Constrói dataset hora-a-hora INMET×BDQ:
       - Descobre anos comuns (>= 2003) entre INMET_{biome} e BDQ_{biome}.
-      - Gera CSV por ano em data/dataset/.
-      - Ao final, concatena todos em inmet_bdq_all_years_{biome}.csv.
+      - Gera Parquet tipado (e/ou CSV, conforme output_format) por ano em data/dataset/.
+      - Ao final, concatena todos em inmet_bdq_all_years_{biome}.
     Retorna: (anos_processados, [paths_por_ano], path_consolidado)
     """
     log = get_logger("dataset.build", kind="dataset", per_run_file=True)
@@ -269,24 +308,25 @@ def build_hourly_dataset(
         )
 
     out_dir = _dataset_dir()
+    suffix = ".parquet" if wants_parquet(output_format) else ".csv"
     written: List[Path] = []
     for y in years_to_run:
-        out_y = out_dir / f"inmet_bdq_{y}_{biome}.csv"
+        out_y = out_dir / f"inmet_bdq_{y}_{biome}{suffix}"
         if out_y.exists() and not overwrite:
             log.info(f"[SKIP] {out_y.name} já existe.")
             written.append(out_y)
             continue
 
         log.info(f"[YEAR] {y} × {biome} ...")
-        path = _fuse_inmet_bdq_year(y, biome, out_dir, encoding=encoding)
+        path = _fuse_inmet_bdq_year(y, biome, out_dir, encoding=encoding, output_format=output_format)
         log.info(f"[WRITE] {path}")
         written.append(path)
 
-    final_path = out_dir / f"inmet_bdq_all_years_{biome}.csv"
+    final_path = out_dir / f"inmet_bdq_all_years_{biome}{suffix}"
     if (not final_path.exists()) or overwrite:
-        frames = [pd.read_csv(p, dtype=str, encoding=encoding) for p in written]
+        frames = [read_any(p, ts="hours", encoding=encoding) for p in written]
         all_df = pd.concat(frames, ignore_index=True)
-        all_df.to_csv(final_path, index=False, encoding=encoding)
+        final_path = write_outputs(all_df, final_path, output_format, encoding=encoding)[0]
         log.info(f"[WRITE] {final_path}")
     else:
         log.info(f"[SKIP] {final_path.name} já existe.")
@@ -306,6 +346,8 @@ if __name__ == "__main__":
     p.add_argument("--years", nargs="*", type=int, default=None, help="Lista de anos (ex.: --years 2003 2004).")
     p.add_argument("--overwrite", action="store_true", help="Sobrescreve saídas existentes.")
     p.add_argument("--encoding", type=str, default="utf-8", help="Encoding de I/O (default: utf-8).")
+    p.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="parquet",
+                   help="Saída: parquet (tipado, default), csv (legado) ou both.")
     args = p.parse_args()
 
     log = get_logger("dataset.build", kind="dataset", per_run_file=True)
@@ -315,6 +357,7 @@ if __name__ == "__main__":
             biome=args.biome,
             overwrite=args.overwrite,
             encoding=args.encoding,
+            output_format=args.output_format,
         )
         log.info(f"[DONE] anos={yrs}  arquivos_por_ano={len(per_year)}  final={final}")
     except Exception as e:
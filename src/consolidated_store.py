@@ -0,0 +1,336 @@
+# src/consolidated_store.py
+# =============================================================================
+# STORE COLUNAR DOS CONSOLIDADOS (INMET, BDQUEIMADAS, INMET x BDQ)
+# Parquet tipado, um arquivo por ano, no lugar dos CSVs de texto entre etapas:
+#   - medidas em float64 (aceita decimal ',' e '.'), inteiros sem NaN em int64;
+#   - chaves de cidade/municipio/UF como dictionary (category no pandas,
+#     categorias em ordem lexica: sort_values igual ao da string);
+#   - ts_hour em int32 = horas desde 1970-01-01 (metadado ts_hour_unit);
+#   - data/hora originais e IDs continuam texto.
+# Leitura com projecao (columns=...) e ts_hour decodificado sob demanda
+# ("text" = 'YYYY-MM-DD HH:00:00', como nos CSVs; "datetime"; "hours").
+# CSV continua como saida opcional (export_csv), com decimal ',' como os
+# consolidados antigos; read_any le os dois formatos (CSVs legados).
+#
+# Dep.: pandas, numpy, pyarrow
+# =============================================================================
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+OUTPUT_FORMATS = ("parquet", "csv", "both")
+
+TS_COL = "ts_hour"
+TS_UNIT_KEY = b"ts_hour_unit"
+TS_UNIT = b"hours_since_epoch"
+TS_TEXT_FORMAT = "%Y-%m-%d %H:00:00"
+
+# Chaves de junção/agrupamento: poucas categorias, milhoes de linhas.
+KEY_COLS = frozenset({"CIDADE", "cidade_norm", "MUNICIPIO", "municipio_norm", "ESTADO", "PAIS"})
+
+# Texto mesmo quando parece numero (datas/horas do INMET, IDs de foco).
+TEXT_COLS = frozenset({
+    "DATA (YYYY-MM-DD)", "HORA (UTC)", "Data", "Hora UTC", "DATAHORA", "FOCO_ID", "ID_BDQ",
+})
+
+ROW_GROUP_ROWS = 250_000
+_NS_PER_HOUR = 3_600_000_000_000
+
+
+# -----------------------------------------------------------------------------
+# [SECAO 1] CAMINHOS
+# -----------------------------------------------------------------------------
+def resolve_year_file(directory: Path, stem: str) -> Optional[Path]:
+    """{stem}.parquet se existir, senao {stem}.csv (legado); None se nenhum."""
+    for suffix in (".parquet", ".csv"):
+        p = Path(directory) / f"{stem}{suffix}"
+        if p.exists():
+            return p
+    return None
+
+
+def wants_parquet(output_format: str) -> bool:
+    _check_format(output_format)
+    return output_format in ("parquet", "both")
+
+
+def wants_csv(output_format: str) -> bool:
+    _check_format(output_format)
+    return output_format in ("csv", "both")
+
+
+def _check_format(output_format: str) -> None:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format deve ser um de {OUTPUT_FORMATS}; recebido {output_format!r}.")
+
+
+# -----------------------------------------------------------------------------
+# [SECAO 2] TS_HOUR INTEIRO
+# -----------------------------------------------------------------------------
+def hours_from_text(values: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    """
+    Texto de data/hora -> Int32 (horas desde a epoch, truncado na hora).
+    Converte cada valor distinto uma vez (um ano tem <= 8784 horas);
+    invalidos/NaN -> <NA>, como pd.to_datetime(errors='coerce').
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Index(uniques, dtype=object), errors="coerce", format=fmt)
+    table = hours_from_datetime(pd.Series(parsed)).to_numpy(dtype=np.float64, na_value=np.nan)
+    out = np.full(len(values), np.nan)
+    ok = codes >= 0
+    out[ok] = table[codes[ok]]
+    return pd.Series(pd.array(out, dtype="Int32"), index=values.index, name=values.name)
+
+
+def hours_from_datetime(values: pd.Series) -> pd.Series:
+    ts = pd.to_datetime(values, errors="coerce")
+    na = ts.isna().to_numpy()
+    ns = ts.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    h = np.floor_divide(ns, _NS_PER_HOUR)
+    return pd.Series(pd.arrays.IntegerArray(h.astype(np.int32), na), index=values.index, name=values.name)
+
+
+def hours_to_text(hours: pd.Series) -> pd.Series:
+    """Int32 de horas -> 'YYYY-MM-DD HH:00:00' (formatando cada hora distinta uma vez)."""
+    codes, uniques = pd.factorize(hours)
+    labels = (pd.to_datetime(np.asarray(uniques, dtype=np.int64) * _NS_PER_HOUR)
+              .strftime(TS_TEXT_FORMAT).to_numpy(dtype=object))
+    out = np.full(len(hours), np.nan, dtype=object)
+    ok = codes >= 0
+    out[ok] = labels[codes[ok]]
+    return pd.Series(out, index=hours.index, name=hours.name, dtype="str")
+
+
+def hours_to_datetime(hours: pd.Series) -> pd.Series:
+    return pd.to_datetime(hours.astype("Int64"), unit="h")
+
+
+# -----------------------------------------------------------------------------
+# [SECAO 3] TIPAGEM
+# -----------------------------------------------------------------------------
+def _parse_numeric(values: pd.Series) -> Optional[pd.Series]:
+    """Texto -> int64/float64 se TODO valor nao vazio for numero (decimal ',' ou '.'); senao None."""
+    # medidas horarias repetem muito: converte so os valores unicos
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    txt = pd.Series(uniques, dtype="string").str.strip()
+    txt = txt.mask(txt.eq(""))
+    num = pd.to_numeric(txt.str.replace(",", ".", regex=False), errors="coerce")
+    if bool((num.isna() & txt.notna()).any()):
+        return None
+    if not (codes < 0).any() and not num.isna().any() and not bool(txt.str.contains(r"[.,eE]", regex=True).any()):
+        return pd.Series(num.astype("int64").to_numpy()[codes], index=values.index)
+    vals = np.append(num.to_numpy(dtype="float64", na_value=np.nan), np.nan)[codes]
+    return pd.Series(vals, index=values.index, dtype="float64")
+
+
+def typed_frame(
+    df: pd.DataFrame,
+    key_cols: Iterable[str] = KEY_COLS,
+    text_cols: Iterable[str] = TEXT_COLS,
+) -> pd.DataFrame:
+    """
+    Tipos do store para um DataFrame de texto (read_csv(dtype=str)) ou ja
+    parcialmente tipado: chaves -> category, ts_hour -> Int32, texto ->
+    string (NaN/None continuam nulos), demais colunas de texto -> numero
+    quando todas convertem. Colunas ja numericas/categoricas ficam como estao.
+    """
+    key_cols, text_cols = set(key_cols), set(text_cols)
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if c == TS_COL:
+            if pd.api.types.is_integer_dtype(s):
+                out[c] = s.astype("Int32")
+            elif pd.api.types.is_datetime64_any_dtype(s):
+                out[c] = hours_from_datetime(s)
+            else:
+                out[c] = hours_from_text(s)
+        elif c in key_cols:
+            out[c] = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+        elif c in text_cols:
+            out[c] = s.astype("string")
+        elif pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+            out[c] = s
+        else:
+            parsed = _parse_numeric(s)
+            out[c] = s.astype("string") if parsed is None else parsed
+    return pd.DataFrame(out, index=df.index, copy=False)
+
+
+def _sorted_categories(df: pd.DataFrame) -> pd.DataFrame:
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            cats = s.cat.categories
+            if not cats.is_monotonic_increasing:
+                df[c] = s.cat.reorder_categories(cats.sort_values())
+    return df
+
+
+# -----------------------------------------------------------------------------
+# [SECAO 4] ESCRITA
+# -----------------------------------------------------------------------------
+def _arrow_type(name: str, dtype) -> pa.DataType:
+    if name == TS_COL:
+        return pa.int32()
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pa.dictionary(pa.int32(), pa.string())
+    if pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    if pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    if pd.api.types.is_float_dtype(dtype):
+        return pa.float64()
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return pa.timestamp("ns")
+    return pa.string()
+
+
+def store_schema(typed: pd.DataFrame) -> pa.Schema:
+    """
+    Schema Arrow explicito de um frame ja tipado (sem metadado pandas, com a
+    unidade de ts_hour). Nao infere de um frame vazio: no pandas 2.x coluna
+    object vazia vira Arrow null e o primeiro chunk com valor falha.
+    """
+    fields = [pa.field(str(c), _arrow_type(str(c), typed[c].dtype)) for c in typed.columns]
+    meta = {TS_UNIT_KEY: TS_UNIT} if TS_COL in typed.columns else None
+    return pa.schema(fields, metadata=meta)
+
+
+def _chunk_table(chunk: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Um chunk tipado -> Table no schema do store (cast coluna a coluna)."""
+    arrays = [pa.array(chunk[f.name], from_pandas=True).cast(f.type) for f in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(df: pd.DataFrame, path: Path, row_group_size: int = ROW_GROUP_ROWS) -> Path:
+    """
+    Grava o DataFrame tipado em `path` (tmp + replace: nunca deixa arquivo
+    truncado). Converte para Arrow um row group por vez: o pico de memoria
+    fica no frame tipado + um row group, nao em uma copia Arrow inteira.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    typed = typed_frame(df)
+    schema = store_schema(typed)
+    with pq.ParquetWriter(tmp, schema, compression="snappy") as writer:
+        for start in range(0, max(len(typed), 1), row_group_size):
+            chunk = typed.iloc[start:start + row_group_size]
+            writer.write_table(_chunk_table(chunk, schema))
+    os.replace(tmp, path)
+    return path
+
+
+def export_csv(df: pd.DataFrame, path: Path, encoding: str = "utf-8") -> Path:
+    """Saida CSV opcional: ts_hour em texto e decimal ',' (formato dos consolidados antigos)."""
+    path = Path(path)
+    out = df
+    if TS_COL in df.columns and pd.api.types.is_integer_dtype(df[TS_COL]):
+        out = df.assign(**{TS_COL: hours_to_text(df[TS_COL].astype("Int32"))})
+    tmp = path.with_name(path.name + ".tmp")
+    out.to_csv(tmp, index=False, encoding=encoding, decimal=",")
+    os.replace(tmp, path)
+    return path
+
+
+def csv_to_parquet(
+    csv_path: Path,
+    parquet_path: Path,
+    encoding: str = "utf-8",
+    row_group_size: int = ROW_GROUP_ROWS,
+) -> int:
+    """Converte um CSV consolidado (lido como texto) para o store. Retorna o numero de linhas."""
+    df = pd.read_csv(csv_path, dtype=str, encoding=encoding, low_memory=False)
+    write_parquet(df, parquet_path, row_group_size=row_group_size)
+    return len(df)
+
+
+def write_outputs(
+    df: pd.DataFrame,
+    stem_path: Path,
+    output_format: str = "parquet",
+    encoding: str = "utf-8",
+    row_group_size: int = ROW_GROUP_ROWS,
+) -> List[Path]:
+    """Grava {stem}.parquet e/ou {stem}.csv conforme output_format. Retorna os caminhos."""
+    stem_path = Path(stem_path).with_suffix("")
+    paths: List[Path] = []
+    if wants_parquet(output_format):
+        paths.append(write_parquet(df, stem_path.with_suffix(".parquet"), row_group_size=row_group_size))
+    if wants_csv(output_format):
+        paths.append(export_csv(df, stem_path.with_suffix(".csv"), encoding=encoding))
+    return paths
+
+
+# -----------------------------------------------------------------------------
+# [SECAO 5] LEITURA
+# -----------------------------------------------------------------------------
+def _decode_ts(df: pd.DataFrame, ts: str) -> pd.DataFrame:
+    if TS_COL not in df.columns or not pd.api.types.is_integer_dtype(df[TS_COL]):
+        return df
+    h = df[TS_COL].astype("Int32")
+    if ts == "text":
+        df[TS_COL] = hours_to_text(h)
+    elif ts == "datetime":
+        df[TS_COL] = hours_to_datetime(h)
+    elif ts == "hours":
+        df[TS_COL] = h
+    else:
+        raise ValueError(f"ts deve ser 'text', 'datetime' ou 'hours'; recebido {ts!r}.")
+    return df
+
+
+def read_parquet(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    ts: str = "text",
+    categories: bool = True,
+) -> pd.DataFrame:
+    """
+    Le um arquivo do store. columns: projecao (colunas ausentes sao ignoradas);
+    categories=False devolve as chaves como texto.
+    """
+    if columns is not None:
+        names = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in names]
+    table = pq.read_table(path, columns=columns)
+    # self_destruct: libera cada coluna Arrow assim que vira pandas (sem pico 2x)
+    df = table.to_pandas(types_mapper={pa.int32(): pd.Int32Dtype()}.get, split_blocks=True, self_destruct=True)
+    del table
+    df = _sorted_categories(df)
+    if not categories:
+        for c in df.columns:
+            if isinstance(df[c].dtype, pd.CategoricalDtype):
+                df[c] = df[c].astype("str")
+    return _decode_ts(df, ts)
+
+
+def read_any(
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    ts: str = "text",
+    categories: bool = True,
+    encoding: str = "utf-8",
+) -> pd.DataFrame:
+    """read_parquet para .parquet; CSV legado lido como texto e tipado do mesmo jeito."""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        return read_parquet(path, columns=columns, ts=ts, categories=categories)
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda c: c in wanted  # noqa: E731
+    df = typed_frame(pd.read_csv(path, dtype=str, encoding=encoding, usecols=usecols, low_memory=False))
+    if not categories:
+        for c in df.columns:
+            if isinstance(df[c].dtype, pd.CategoricalDtype):
+                df[c] = df[c].astype("str")
+    return _decode_ts(df, ts)
@@ -4,7 +4,7 @@
 # =============================================================================
 # Objetivo:
 # - Analisar, por ano e por coluna de feature, a presença de dados faltantes nos
-#   arquivos consolidados inmet_bdq_{ANO}_cerrado.csv.
+#   arquivos consolidados inmet_bdq_{ANO}_cerrado (.parquet do store ou .csv legado).
 # - Considerar como faltante:
 #     * NaN / null
 #     * strings vazias (após strip)
@@ -25,6 +25,7 @@ from typing import Dict, List
 import pandas as pd
 
 from utils import loadConfig, get_logger, get_path, ensure_dir
+from consolidated_store import read_parquet as read_store_parquet
 
 
 # -----------------------------------------------------------------------------
@@ -58,7 +59,8 @@ DATASET_EDA_DIR: Path = ensure_dir(DATA_EDA_DIR / "dataset")
 log = get_logger("eda.missing_dataset", kind="eda", per_run_file=True)
 
 # Padrão dos arquivos ano a ano
-FILENAME_PATTERN = "inmet_bdq_*_cerrado.csv"
+FILENAME_PATTERN = "inmet_bdq_*_cerrado.*"
+DATASET_SUFFIXES = (".parquet", ".csv")  # ordem = prioridade
 
 # Códigos especiais tratados como faltantes
 MISSING_CODES = {-999, -9999}
@@ -149,13 +151,17 @@ class DatasetMissingAnalyzer:
                     if 1900 <= y <= 2100:
                         year = y
                         break
-            if year is not None:
+            if year is None or fp.suffix.lower() not in DATASET_SUFFIXES:
+                continue
+            # Parquet do store tem prioridade sobre o CSV legado do mesmo ano.
+            prev = mapping.get(year)
+            if prev is None or DATASET_SUFFIXES.index(fp.suffix.lower()) < DATASET_SUFFIXES.index(prev.suffix.lower()):
                 mapping[year] = fp
 
         mapping = dict(sorted(mapping.items()))
         if not mapping:
             raise FileNotFoundError(
-                f"Nenhum CSV encontrado em {self.dataset_dir} com padrao {self.file_pattern}"
+                f"Nenhuma base anual (.parquet/.csv) em {self.dataset_dir} com padrao {self.file_pattern}"
             )
 
         log.info(f"[DISCOVER] {len(mapping)} arquivos anuais detectados.")
@@ -200,17 +206,20 @@ class DatasetMissingAnalyzer:
     # ------------------------------
     # Leitura
     # ------------------------------
-    def read_year_csv(self, fp: Path) -> pd.DataFrame:
+    def read_year_file(self, fp: Path) -> pd.DataFrame:
         """
-        Le CSV consolidado e aplica harmonizacao de nomes.
+        Le a base consolidada (Parquet do store ou CSV legado) e aplica harmonizacao de nomes.
         """
-        df = pd.read_csv(
-            fp,
-            sep=",",
-            decimal=",",
-            encoding="utf-8",
-            low_memory=False,
-        )
+        if fp.suffix.lower() == ".parquet":
+            df = read_store_parquet(fp, categories=False)
+        else:
+            df = pd.read_csv(
+                fp,
+                sep=",",
+                decimal=",",
+                encoding="utf-8",
+                low_memory=False,
+            )
         df = self.harmonize_columns(df)
         return df
 
@@ -502,7 +511,7 @@ class DatasetMissingAnalyzer:
 
         for year, fp in year_files.items():
             log.info(f"[YEAR] {year} - lendo {fp.name}")
-            df = self.read_year_csv(fp)
+            df = self.read_year_file(fp)
 
             feature_df, summary = self.compute_feature_breakdown_for_year(df, year)
 
@@ -533,7 +542,7 @@ def main() -> None:
 
     parser = argparse.ArgumentParser(
         description=(
-            "Auditoria de dados faltantes nos CSVs inmet_bdq_{ANO}_cerrado.\n"
+            "Auditoria de dados faltantes nas bases inmet_bdq_{ANO}_cerrado (.parquet ou .csv).\n"
             "Gera, para cada ano, um CSV com missing por coluna de feature e "
             "um README explicativo em data/eda/dataset/{ANO}."
         )
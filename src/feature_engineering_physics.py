@@ -9,6 +9,7 @@
 # 3. Distribui as novas features para todas as bases (A..F) via Merge.
 # =============================================================================
 
+import argparse
 import sys
 import gc
 from pathlib import Path
@@ -46,11 +47,269 @@ SCENARIO_FOLDERS = {
     "base_F": "base_F_full_original"
 }
 
+KEY_COLS = ['cidade_norm', 'ts_hour']
+FEATURE_COLS = [
+    'precip_ewma', 'dias_sem_chuva',
+    'risco_temp_max', 'risco_umid_critica', 'risco_umid_alerta',
+    'fator_propagacao',
+]
+
+# Linhas por record batch ao enriquecer as bases alvo (pico de RAM ~ 1 batch).
+DEFAULT_BATCH_ROWS = 500_000
+
+# Guardrail de memoria do modo --workers (% de RAM usada), mesmos
+# thresholds de src/article/temporal_fusion_article.py.
+_MEM_PRESSURE_PCT = 90         # reduz concorrencia para 1 ano por vez
+_MEM_SERIAL_FALLBACK_PCT = 94  # nem tenta paralelo; vai direto serial
+_MEM_RECOVER_PCT = 85          # restaura paralelismo apos estabilizacao
+
+
+def _get_mem_used_pct() -> float:
+    """Retorna % de RAM usada (0.0 se psutil indisponivel)."""
+    try:
+        import psutil
+        return psutil.virtual_memory().percent
+    except Exception:
+        return 0.0
+
+
+# Limiar de chuva (INPE usa algo como < 1mm ou < 2mm para considerar "seco")
+RAIN_THRESHOLD = 1.0
+
+
+def dry_hours_kernel(
+    precip: np.ndarray,
+    group_starts: np.ndarray,
+    initial_dry: np.ndarray,
+    threshold: float = RAIN_THRESHOLD,
+):
+    """Contador de horas consecutivas secas com reset, vetorizado por grupos contiguos.
+
+    Equivalente ao loop `counter = counter + 1 if v < threshold else 0`, rodado
+    separadamente em cada grupo [group_starts[g], group_starts[g+1]) e
+    iniciado em initial_dry[g] (carry do ano anterior). NaN conta como chuva
+    (reseta), igual a comparacao `v < threshold` do loop original.
+
+    Retorna (contador por linha em int64, contador final por grupo).
+    """
+    precip = np.asarray(precip)
+    n = len(precip)
+    group_starts = np.asarray(group_starts, dtype=np.int64)
+    initial_dry = np.asarray(initial_dry, dtype=np.int64)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), initial_dry.copy()
+
+    pos = np.arange(n, dtype=np.int64)
+    dry = precip < threshold
+
+    # Ultimo reset (chuva) visto ate cada linha; o inicio de cada grupo conta
+    # como um reset virtual em start-1, o que isola os grupos entre si.
+    marker = np.where(dry, -1, pos)
+    marker[group_starts] = np.maximum(marker[group_starts], group_starts - 1)
+    last_reset = np.maximum.accumulate(marker)
+    counter = pos - last_reset
+
+    # Linhas sem chuva desde o inicio do grupo herdam o carry.
+    group_len = np.diff(np.append(group_starts, n))
+    row_start = np.repeat(group_starts, group_len)
+    no_reset = last_reset < row_start
+    counter[no_reset] += np.repeat(initial_dry, group_len)[no_reset]
+
+    group_end = group_starts + group_len - 1
+    final = np.where(group_len > 0, counter[np.maximum(group_end, 0)], initial_dry)
+    return counter, final
+
+
+def compute_dias_sem_chuva(df: pd.DataFrame, memory_state: dict):
+    """Calcula `dias_sem_chuva` (float32) para um df ordenado por (cidade_norm, ts_hour).
+
+    `memory_state` e o carry entre anos ({cidade: {'last_dry': horas}}); nao e
+    alterado. Retorna (array alinhado as linhas de df, novo estado apenas
+    com as cidades deste df). Linhas sem cidade ficam NaN.
+    """
+    cities = df['cidade_norm']
+    has_city = cities.notna().to_numpy()
+    out = np.full(len(df), np.nan, dtype=np.float32)
+    if not has_city.any():
+        return out, {}
+
+    city_vals = cities.to_numpy()[has_city]
+    precip = df[COL_PRECIP].to_numpy(dtype=np.float64)[has_city]
+
+    boundary = np.empty(len(city_vals), dtype=bool)
+    boundary[0] = True
+    boundary[1:] = city_vals[1:] != city_vals[:-1]
+    group_starts = np.flatnonzero(boundary)
+    group_names = city_vals[group_starts]
+    initial = np.array(
+        [memory_state.get(c, {}).get('last_dry', 0) for c in group_names],
+        dtype=np.int64,
+    )
+
+    counter, final = dry_hours_kernel(precip, group_starts, initial)
+    out[has_city] = counter.astype(np.float32) / 24.0
+    new_state = {c: {'last_dry': int(v)} for c, v in zip(group_names, final)}
+    return out, new_state
+
+
+class FeatureKeyIndex:
+    """Indice hash (cidade_norm, ts_hour) -> linha das features fisicas de um ano.
+
+    Construido uma unica vez por ano e reutilizado para todas as bases alvo:
+    cada alvo so resolve suas chaves (get_indexer) e recolhe as features por
+    take posicional, sem re-ordenar nem re-mergear o df de features.
+    Mantem a semantica do antigo drop_duplicates(keep='first') + merge left.
+    """
+
+    def __init__(self, df_features: pd.DataFrame):
+        keyed = df_features.drop_duplicates(subset=KEY_COLS, keep='first')
+        self.index = pd.MultiIndex.from_frame(keyed[KEY_COLS])
+        self.columns = [c for c in keyed.columns if c not in KEY_COLS]
+        self.values = {c: keyed[c].to_numpy() for c in self.columns}
+
+    def positions(self, keys: pd.DataFrame) -> np.ndarray:
+        """Linha das features para cada chave alvo (-1 quando ausente)."""
+        return self.index.get_indexer(pd.MultiIndex.from_frame(keys[KEY_COLS]))
+
+    def output_dtypes(self, pos: np.ndarray) -> dict:
+        """Dtypes finais por coluna; ints viram float64 se faltar alguma chave (como no merge)."""
+        missing = bool((pos < 0).any())
+        out = {}
+        for c, v in self.values.items():
+            if missing and v.dtype.kind in 'iub':
+                out[c] = np.dtype('float64')
+            else:
+                out[c] = v.dtype
+        return out
+
+    def take(self, pos: np.ndarray, dtypes: dict) -> dict:
+        """Colunas de features alinhadas a `pos` (NaN onde pos == -1)."""
+        miss = pos < 0
+        safe = np.where(miss, 0, pos)
+        out = {}
+        for c, v in self.values.items():
+            if len(v):
+                col = v[safe].astype(dtypes[c], copy=False)
+            else:
+                col = np.empty(len(pos), dtype=dtypes[c])
+            if miss.any():
+                col[miss] = np.nan
+            out[c] = col
+        return out
+
+
+def _enriched_schema(base, feature_cols: list, dtypes: dict):
+    """Schema da saida: o do parquet alvo + features (dtypes do indice).
+
+    Fixado antes do primeiro batch: inferido do batch, uma coluna toda nula
+    nas primeiras linhas (FOCO_ID em horas sem foco) viraria Arrow null e o
+    primeiro batch com valor falharia.
+    """
+    import pyarrow as pa
+
+    feats = {c: pa.field(c, pa.from_numpy_dtype(dtypes[c])) for c in feature_cols}
+    fields = [feats.pop(f.name, f) for f in base]
+    meta = {k: v for k, v in (base.metadata or {}).items() if k != b'pandas'}
+    return pa.schema(fields + list(feats.values()), metadata=meta or None)
+
+
+def enrich_parquet_streaming(
+    index: FeatureKeyIndex,
+    input_parquet: Path,
+    output_parquet: Path,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> int:
+    """Left-join streaming: base alvo em record batches + features por take posicional.
+
+    Le primeiro so as colunas-chave do alvo (para resolver posicoes e fixar os
+    dtypes do arquivo inteiro), depois grava batch a batch. Retorna o numero
+    de linhas escritas.
+
+    A saida mantem a ordem do alvo, em row groups de
+    utils.PARQUET_ROW_GROUP_ROWS: ANO e constante no arquivo do ano, entao
+    todo row group ja tem um unico ano para a poda por estatisticas do
+    train_runner, mesmo numa base legada (cidade, depois tempo). O pico de
+    memoria fica em um batch, sem ler o arquivo inteiro para reordenar.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(input_parquet)
+    keys = pf.read(columns=KEY_COLS).to_pandas()
+    pos = index.positions(keys)
+    del keys
+    dtypes = index.output_dtypes(pos)
+    schema = _enriched_schema(pf.schema_arrow, index.columns, dtypes)
+
+    tmp_path = output_parquet.with_suffix(output_parquet.suffix + ".tmp")
+    writer = None
+    offset = 0
+    try:
+        for batch in pf.iter_batches(batch_size=batch_rows):
+            df_batch = batch.to_pandas()
+            n = len(df_batch)
+            feats = index.take(pos[offset:offset + n], dtypes)
+            for c in index.columns:
+                df_batch[c] = feats[c]
+            table = pa.Table.from_pandas(df_batch, schema=schema, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table, row_group_size=utils.PARQUET_ROW_GROUP_ROWS)
+            offset += n
+            del df_batch, feats, table
+        if writer is None:
+            # Alvo vazio: grava so o schema.
+            pq.write_table(schema.empty_table(), tmp_path)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+    tmp_path.replace(output_parquet)
+    return offset
+
+
+def year_carry_summary(base_e_file: Path) -> dict:
+    """Primeira passada barata: efeito de um ano sobre o carry de cada cidade.
+
+    Le so (cidade_norm, ts_hour, precip) da Base E e roda o kernel com carry
+    zero. Retorna {cidade: (horas_secas_finais, ano_todo_seco)}; se o ano foi
+    todo seco, o carry de saida soma o carry de entrada.
+    """
+    df = pd.read_parquet(base_e_file, columns=['cidade_norm', 'ts_hour', COL_PRECIP])
+    df = df.sort_values(['cidade_norm', 'ts_hour'])
+    _, state = compute_dias_sem_chuva(df, {})
+    sizes = df.groupby('cidade_norm').size()
+    return {
+        c: (v['last_dry'], v['last_dry'] == int(sizes[c]))
+        for c, v in state.items()
+    }
+
+
+def compose_carry(memory_state: dict, summary: dict) -> dict:
+    """Aplica o resumo de um ano ao carry de entrada (equivale a rodar o ano)."""
+    out = dict(memory_state)
+    for cidade, (last_dry, all_dry) in summary.items():
+        prev = memory_state.get(cidade, {}).get('last_dry', 0) if all_dry else 0
+        out[cidade] = {'last_dry': last_dry + prev}
+    return out
+
+
+def _physics_year_worker(year: int, initial_state: dict, batch_rows: int):
+    """Processa um ano em processo filho a partir do carry pre-computado."""
+    eng = PhysicsFeatureEngineer(batch_rows=batch_rows)
+    eng.memory_state = initial_state
+    return year, eng._process_year(year)
+
+
 class PhysicsFeatureEngineer:
-    def __init__(self):
+    def __init__(self, batch_rows: int = DEFAULT_BATCH_ROWS):
         self.cfg = utils.loadConfig()
         self.log = utils.get_logger("feature_eng.physics")
         self.modeling_dir = Path(self.cfg['paths']['data']['modeling'])
+        self.batch_rows = max(1, int(batch_rows))
         
         # Estado de memória entre anos (para dias sem chuva não zerarem em 01/Jan)
         # Formato: {cidade: {'last_days_dry': int, 'last_pse': float}}
@@ -91,63 +350,13 @@ class PhysicsFeatureEngineer:
         # --- 2. DIAS SEM CHUVA (Lógica Vetorizada + Memória Anual) ---
         self.log.info(f"[{year}] Calculando Dias Sem Chuva (com memória)...")
         
-        # Define limiar de chuva (INPE usa algo como < 1mm ou < 2mm para considerar "seco")
-        RAIN_THRESHOLD = 1.0 
-        
-        # Cria booleano: 1 se Choveu, 0 se Seco
-        df['is_rain'] = (df[COL_PRECIP] >= RAIN_THRESHOLD).astype(int)
-        
-        # Logica vetorizada para contador reiniciavel:
-        # Cria grupos a cada chuva. 
-        # Cumsum reinicia a cada chuva.
-        
-        results = []
-        # Infelizmente para memória entre anos, iterar cidades é mais seguro que vetorizar tudo
-        # Mas vamos otimizar fazendo apenas operações vetorizadas DENTRO de cada cidade
-        
-        for cidade, group in tqdm(df.groupby('cidade_norm'), desc=f"Processando Cidades ({year})", leave=False):
-            # Recupera estado anterior
-            initial_dry = 0
-            if cidade in self.memory_state:
-                initial_dry = self.memory_state[cidade]['last_dry']
-            
-            rain_mask = group[COL_PRECIP] >= RAIN_THRESHOLD
-            
-            # Identifica mudanças de estado (Chuva -> Seco ou Seco -> Chuva)
-            # Mas queremos "Dias Consecutivos Secos".
-            # Truque do Cumsum:
-            # 1. Marca onde choveu (True)
-            # 2. Faz soma cumulativa da chuva. Cada período seco terá o mesmo ID.
-            # 3. Agrupa por esse ID e faz cumcount (contagem sequencial).
-            
-            # Ajuste para carregar o saldo do ano anterior:
-            # Se a primeira linha é seca, ela deve somar ao initial_dry.
-            # Se chover, zera.
-            
-            # Vamos iterar numpy puro que é muito rápido para 8760 horas
-            vals = group[COL_PRECIP].values
-            dry_days = np.zeros(len(vals), dtype=np.float32)
-            
-            current_counter = initial_dry
-            
-            for i in range(len(vals)):
-                # Como é horário, vamos dividir por 24 para ter "dias" ou manter em "horas sem chuva"?
-                # O INPE fala em DIAS. Vamos manter contador de HORAS e dividir por 24 na feature final.
-                if vals[i] < RAIN_THRESHOLD:
-                    current_counter += 1 # Soma 1 hora
-                else:
-                    current_counter = 0
-                dry_days[i] = current_counter
-            
-            # Salva estado para proximo ano
-            self.memory_state[cidade] = {'last_dry': current_counter}
-            
-            # Atribui de volta (usando indice original para garantir alinhamento)
-            group_res = pd.DataFrame({'dias_sem_chuva': dry_days / 24.0}, index=group.index)
-            results.append(group_res)
-
-        df_dry = pd.concat(results)
-        df = df.join(df_dry) # Join pelo índice
+        # Contador reiniciavel (horas secas consecutivas) sobre os blocos
+        # contiguos de cada cidade, retomando o carry do ano anterior.
+        dias_sem_chuva, year_state = compute_dias_sem_chuva(df, self.memory_state)
+        df['dias_sem_chuva'] = dias_sem_chuva
+
+        # Salva estado para proximo ano
+        self.memory_state.update(year_state)
 
         # --- 3. LIMIARES DE RISCO (Tabelas 2.2 e 2.3) ---
         # Temperatura > 30 é critico
@@ -163,109 +372,199 @@ class PhysicsFeatureEngineer:
         df['fator_propagacao'] = (df[COL_VENTO] * df[COL_TEMP]) / (df[COL_UMID] + 1.0)
         
         # Seleciona apenas colunas chaves e novas features para merge
-        cols_to_keep = [
-            'cidade_norm', 'ts_hour', 
-            'precip_ewma', 'dias_sem_chuva', 
-            'risco_temp_max', 'risco_umid_critica', 'risco_umid_alerta', 
-            'fator_propagacao'
-        ]
-        
+        cols_to_keep = KEY_COLS + FEATURE_COLS
+
         return df[cols_to_keep]
 
-    def run(self):
-        # Descobre anos disponíveis na Base E (nossa fonte de verdade física)
-        base_e_path = self.modeling_dir / self.cfg['modeling_scenarios']['base_E']
-        files = sorted(base_e_path.glob("inmet_bdq_*_cerrado.parquet"))
-        
-        if not files:
-            self.log.error("Nenhum arquivo encontrado na Base E para gerar features!")
-            return
+    def _base_e_path(self) -> Path:
+        return self.modeling_dir / self.cfg['modeling_scenarios']['base_E']
 
+    def _discover_years(self) -> list:
+        # Descobre anos disponíveis na Base E (nossa fonte de verdade física)
+        files = sorted(self._base_e_path().glob("inmet_bdq_*_cerrado.parquet"))
         years = []
         for f in files:
             try:
                 y = int(f.stem.split('_')[2])
                 years.append(y)
             except: pass
-        
-        years = sorted(years)
-        self.log.info(f"Anos detectados para processamento: {years}")
+        return sorted(years)
+
+    def _process_year(self, year: int) -> bool:
+        """Calcula as features de um ano e distribui para todas as bases.
+
+        Usa (e atualiza) self.memory_state como carry de entrada do ano.
+        Retorna False se a Base E do ano nao pode ser lida.
+        """
+        # 1. Carrega BASE E (Fonte)
+        src_file = self._base_e_path() / f"inmet_bdq_{year}_cerrado.parquet"
+        try:
+            df_base_e = pd.read_parquet(src_file)
+        except Exception as e:
+            self.log.error(f"Erro lendo Base E ({year}): {e}")
+            return False
+
+        # 2. Calcula Features Físicas (Cria df_features com chaves e novas cols)
+        df_features = self._calculate_features_for_chunk(df_base_e, year)
+
+        # Limpa RAM da base E completa
+        del df_base_e
+        gc.collect()
 
-        # Loop Ano a Ano (Respeitando Memória RAM e Continuidade)
-        for year in tqdm(years, desc="Processando Anos"):
-            
-            # 1. Carrega BASE E (Fonte)
-            src_file = base_e_path / f"inmet_bdq_{year}_cerrado.parquet"
+        # Indice (cidade_norm, ts_hour) construido uma vez para as seis bases.
+        # Dedup em keep='first': features fisicas sao per-hora-per-cidade, nao
+        # per-foco; sem isso, linhas multi-foco virariam produto cartesiano.
+        feature_index = FeatureKeyIndex(df_features)
+        del df_features
+        gc.collect()
+
+        # 3. Distribui para TODAS as bases (A, B, C, D, E, F)
+        for scenario_key in SCENARIOS_TO_PROCESS:
+            folder_name = SCENARIO_FOLDERS.get(scenario_key)
+            if not folder_name: continue
+
+            # Define caminhos
+            original_dir = self.modeling_dir / folder_name
+            input_parquet = original_dir / f"inmet_bdq_{year}_cerrado.parquet"
+
+            # Novo diretório: ex: data/modeling/base_F_calculated_features/
+            new_folder_name = f"{folder_name}_calculated"
+            target_dir = self.modeling_dir / new_folder_name
+            utils.ensure_dir(target_dir)
+
+            output_parquet = target_dir / f"inmet_bdq_{year}_cerrado.parquet"
+
+            if not input_parquet.exists():
+                continue
+
+            # MERGE (Left Join na Base Alvo), streaming por record batch.
+            # A base alvo pode ter linhas a menos (Drop Rows), então left join preserva isso.
+            # A base alvo pode ter NaNs. As novas features virão preenchidas (pois vieram da E).
+            try:
+                enrich_parquet_streaming(
+                    feature_index, input_parquet, output_parquet, self.batch_rows
+                )
+            except Exception as e:
+                self.log.error(f"Erro ao enriquecer {scenario_key} ({year}): {e}")
+
+        # Limpa RAM das features do ano
+        del feature_index
+        gc.collect()
+        return True
+
+    def _precompute_carries(self, years: list) -> dict:
+        """Carry de entrada de cada ano, via resumo barato por ano + composicao em ordem."""
+        base_e_path = self._base_e_path()
+        carries = {}
+        state = {}
+        for year in tqdm(years, desc="Carry dias_sem_chuva"):
+            carries[year] = state
             try:
-                df_base_e = pd.read_parquet(src_file)
+                summary = year_carry_summary(base_e_path / f"inmet_bdq_{year}_cerrado.parquet")
             except Exception as e:
-                self.log.error(f"Erro lendo Base E ({year}): {e}")
+                # Mesmo efeito do modo serial: ano ilegivel nao altera o carry.
+                self.log.error(f"Erro lendo Base E ({year}) na passada de carry: {e}")
                 continue
+            state = compose_carry(state, summary)
+        return carries
 
-            # 2. Calcula Features Físicas (Cria df_features com chaves e novas cols)
-            df_features = self._calculate_features_for_chunk(df_base_e, year)
-            
-            # Limpa RAM da base E completa
-            del df_base_e
-            gc.collect()
-
-            # 3. Distribui para TODAS as bases (A, B, C, D, E, F)
-            for scenario_key in SCENARIOS_TO_PROCESS:
-                folder_name = SCENARIO_FOLDERS.get(scenario_key)
-                if not folder_name: continue
-                
-                # Define caminhos
-                original_dir = self.modeling_dir / folder_name
-                input_parquet = original_dir / f"inmet_bdq_{year}_cerrado.parquet"
-                
-                # Novo diretório: ex: data/modeling/base_F_calculated_features/
-                new_folder_name = f"{folder_name}_calculated"
-                target_dir = self.modeling_dir / new_folder_name
-                utils.ensure_dir(target_dir)
-                
-                output_parquet = target_dir / f"inmet_bdq_{year}_cerrado.parquet"
-                
-                if not input_parquet.exists():
-                    continue
-
-                # Carrega Base Alvo
-                try:
-                    df_target = pd.read_parquet(input_parquet)
-                    
-                    # MERGE (Left Join na Base Alvo)
-                    # A base alvo pode ter linhas a menos (Drop Rows), então left join preserva isso.
-                    # A base alvo pode ter NaNs. As novas features virão preenchidas (pois vieram da E).
-                    
-                    # Garante chaves string/datetime compatíveis
-                    if 'ts_hour' not in df_target.columns and 'DATA' in df_target.columns:
-                         # Caso precise converter (geralmente parquets já estao ok)
-                         pass
-                    
-                    # Dedup df_features em (cidade_norm, ts_hour): features fisicas
-                    # sao per-hora-per-cidade, nao per-foco. Sem essa dedup, linhas
-                    # multi-foco em df_target x df_features viram produto cartesiano
-                    # (ex: 2x em target * 2x em features = 4x no merge).
-                    df_features_keyed = df_features.drop_duplicates(
-                        subset=['cidade_norm', 'ts_hour'], keep='first'
-                    )
-                    df_enriched = df_target.merge(
-                        df_features_keyed,
-                        on=['cidade_norm', 'ts_hour'],
-                        how='left'
+    def _run_parallel(self, years: list, workers: int) -> None:
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        carries = self._precompute_carries(years)
+
+        mem_pct = _get_mem_used_pct()
+        if mem_pct > _MEM_SERIAL_FALLBACK_PCT:
+            self.log.warning(
+                f"[physics] memoria={mem_pct:.0f}% >= {_MEM_SERIAL_FALLBACK_PCT}%; "
+                "forcando modo serial."
+            )
+            for year in tqdm(years, desc="Processando Anos"):
+                self.memory_state = carries[year]
+                self._process_year(year)
+            return
+
+        self.log.info(f"[physics] modo PARALELO ({workers} workers, {len(years)} anos)")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            queue = list(years)
+            pbar = tqdm(total=len(years), desc="Processando Anos")
+            inflight_limit = workers
+            while queue or pending:
+                mem_pct = _get_mem_used_pct()
+                new_limit = 1 if mem_pct > _MEM_PRESSURE_PCT else inflight_limit
+                if mem_pct <= _MEM_RECOVER_PCT:
+                    new_limit = workers
+                if new_limit != inflight_limit:
+                    self.log.warning(
+                        f"[physics GUARDRAIL] mem={mem_pct:.0f}% "
+                        f"limite_concorrencia {inflight_limit}->{new_limit}"
                     )
-                    
-                    # Salva
-                    df_enriched.to_parquet(output_parquet, index=False)
-                    # self.log.info(f"Salvo: {output_parquet.name} em {new_folder_name}")
-                    
-                except Exception as e:
-                    self.log.error(f"Erro ao enriquecer {scenario_key} ({year}): {e}")
-
-            # Limpa RAM das features do ano
-            del df_features
-            gc.collect()
+                    inflight_limit = new_limit
+
+                # Submeter ate preencher workers livres
+                while queue and len(pending) < inflight_limit:
+                    year = queue.pop(0)
+                    fut = pool.submit(_physics_year_worker, year, carries[year], self.batch_rows)
+                    pending[fut] = year
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=300, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    year = pending.pop(fut)
+                    try:
+                        fut.result()
+                    except Exception as exc:
+                        self.log.error(
+                            f"[physics] worker crash year={year}: "
+                            f"{exc.__class__.__name__}: {exc}"
+                        )
+                    pbar.update(1)
+            pbar.close()
+
+        # Estado final equivalente ao do modo serial.
+        self.memory_state = carries[years[-1]]
+        try:
+            last = year_carry_summary(self._base_e_path() / f"inmet_bdq_{years[-1]}_cerrado.parquet")
+            self.memory_state = compose_carry(self.memory_state, last)
+        except Exception:
+            pass
+
+    def run(self, workers: int = 1):
+        if not list(self._base_e_path().glob("inmet_bdq_*_cerrado.parquet")):
+            self.log.error("Nenhum arquivo encontrado na Base E para gerar features!")
+            return
+
+        years = self._discover_years()
+        self.log.info(f"Anos detectados para processamento: {years}")
+
+        if workers > 1 and len(years) > 1:
+            # Anos independentes: o unico estado compartilhado (carry do contador
+            # de seca) e pre-computado numa passada barata antes do fan-out.
+            self._run_parallel(years, workers)
+        else:
+            # Loop Ano a Ano (Respeitando Memória RAM e Continuidade)
+            for year in tqdm(years, desc="Processando Anos"):
+                self._process_year(year)
 
         self.log.info("Processamento de Engenharia de Features Concluído.")
 
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Engenharia de features fisicas (base_*_calculated).")
+    p.add_argument(
+        "--workers", type=int, default=1,
+        help="Processos paralelos (um ano por processo). Default 1 = serial.",
+    )
+    p.add_argument(
+        "--batch-rows", type=int, default=DEFAULT_BATCH_ROWS,
+        help=f"Linhas por record batch ao gravar as bases alvo (default {DEFAULT_BATCH_ROWS}).",
+    )
+    args = p.parse_args()
+    PhysicsFeatureEngineer(batch_rows=args.batch_rows).run(workers=max(1, args.workers))
+
+
 if __name__ == "__main__":
-    PhysicsFeatureEngineer().run()
\ No newline at end of file
+    main()
\ No newline at end of file
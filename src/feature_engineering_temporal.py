@@ -86,6 +86,12 @@ from src.tsf_constants import (  # noqa: E402
     COL_PRESSAO,
     TSF_FAIL_DETAIL_LOG_CAP,
 )
+from src.tsf_ewma_state import (  # noqa: E402
+    carry_fingerprint,
+    ewma_lags_with_carry,
+    resolve_incoming_carry,
+    state_path,
+)
 
 # ---------------------------------------------------------------------------
 # Variáveis meteorológicas (slugs) para SARIMAX_exog: endógena + exógenas
@@ -332,20 +338,32 @@ class TemporalFusionEngineer:
         except Exception:
             pass
 
-    def _discover_years(self, folder: str) -> List[Tuple[int, Path]]:
+    def _all_year_files(self, folder: str) -> Dict[int, Path]:
+        """All years of a scenario folder, ignoring --years (EWMA state chain)."""
         d = self.modeling_dir / folder
-        files = sorted(d.glob("inmet_bdq_*_cerrado.parquet"))
-        out = []
-        for f in files:
+        out: Dict[int, Path] = {}
+        for f in sorted(d.glob("inmet_bdq_*_cerrado.parquet")):
             try:
-                y = int(f.stem.split("_")[2])
-                if self.filter_years and y not in self.filter_years:
-                    continue
-                out.append((y, f))
+                out[int(f.stem.split("_")[2])] = f
             except Exception:
                 pass
         return out
 
+    def _discover_years(self, folder: str) -> List[Tuple[int, Path]]:
+        return [
+            (y, f) for y, f in self._all_year_files(folder).items()
+            if not self.filter_years or y in self.filter_years
+        ]
+
+    def _build_agg(self, src_path: Path) -> pd.DataFrame:
+        """Read one year parquet and aggregate to one row per (cidade_norm, _ts)."""
+        df = self._parse_ts(pd.read_parquet(src_path))
+        numeric_cols = [
+            c for c in [COL_PRECIP, COL_TEMP, COL_UMID, COL_RAD, COL_VENTO, COL_PRESSAO]
+            if c in df.columns
+        ]
+        return self._aggregate_series(df, numeric_cols)
+
     @staticmethod
     def _parse_ts(df: pd.DataFrame) -> pd.DataFrame:
         """Ensure ts_hour is datetime and sort."""
@@ -443,31 +461,41 @@ class TemporalFusionEngineer:
     # ==================================================================
     # METHOD 1: EWMA multiple + lags  (fast, vectorized)
     # ==================================================================
-    def _generate_ewma_lags(self, df_agg: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
-        result = df_agg[["cidade_norm", "_ts"]].copy()
-
+    def _generate_ewma_lags(
+        self,
+        df_agg: pd.DataFrame,
+        year: int,
+        folder_name: Optional[str] = None,
+        state_dir: Optional[Path] = None,
+    ) -> Tuple[pd.DataFrame, Dict]:
         alphas = {"a01": 0.1, "a03": 0.3, "a08": 0.8}
-        targets = {
-            "precip": COL_PRECIP,
-            "temp":   COL_TEMP,
-            "umid":   COL_UMID,
-            "rad":    COL_RAD,
-        }
-
-        for tname, col in targets.items():
-            if col not in df_agg.columns:
-                continue
-            series = df_agg.groupby("cidade_norm")[col]
+        targets = [
+            ("precip", COL_PRECIP, [1, 24, 168]),
+            ("temp",   COL_TEMP,   [1, 24, 168]),
+            ("umid",   COL_UMID,   [1, 24, 168]),
+            ("rad",    COL_RAD,    [1, 24, 168]),
+        ]
 
-            for aname, alpha in alphas.items():
-                colname = f"tsf_ewma_{tname}_{aname}"
-                result[colname] = series.transform(
-                    lambda x, a=alpha: x.ewm(alpha=a, adjust=False).mean()
-                )
+        def active_targets(df: pd.DataFrame):
+            return [t for t in targets if t[1] in df.columns]
+
+        # Resume EWMA recursion and lag tail from the previous year's sidecar.
+        fingerprint = carry_fingerprint(targets, alphas)
+        carry = None
+        source = None
+        if folder_name is not None and state_dir is not None:
+            year_files = self._all_year_files(folder_name)
+            source = year_files.get(year)
+            carry = resolve_incoming_carry(
+                year, year_files, state_dir, fingerprint,
+                self._build_agg, active_targets, alphas, log=self.log,
+            )
 
-            for lag_h in [1, 24, 168]:
-                colname = f"tsf_lag_{tname}_{lag_h}h"
-                result[colname] = series.transform(lambda x, lh=lag_h: x.shift(lh))
+        result, new_carry = ewma_lags_with_carry(
+            df_agg, active_targets(df_agg), alphas, carry, year, fingerprint, source=source
+        )
+        if state_dir is not None:
+            new_carry.save(state_path(state_dir, year))
 
         return result, {}
 
@@ -602,10 +630,12 @@ class TemporalFusionEngineer:
         year: int,
         is_train: bool,
         model_key: str,
+        folder_name: Optional[str] = None,
+        state_dir: Optional[Path] = None,
     ) -> Tuple[pd.DataFrame, Dict]:
         _ = model_key
         if method == "ewma_lags":
-            return self._generate_ewma_lags(df_agg)
+            return self._generate_ewma_lags(df_agg, year, folder_name, state_dir)
         if method == "sarimax_exog":
             return self._generate_sarimax_exog(df_agg, year, is_train)
         self.log.warning(f"[UNKNOWN METHOD] {method}")
@@ -682,7 +712,8 @@ class TemporalFusionEngineer:
             t1 = time.time()
             model_key = self._model_key(scenario_key, method)
             feat, stats = self._generate_method_features(
-                method, df_agg, year, is_train, model_key
+                method, df_agg, year, is_train, model_key,
+                folder_name=folder_name, state_dir=out_dir,
             )
             elapsed_method = time.time() - t1
 
@@ -761,7 +792,8 @@ class TemporalFusionEngineer:
             t1 = time.time()
             mk          = self._model_key(scenario_key, method)
             feat, stats = self._generate_method_features(
-                method, df_agg, year, is_train, mk
+                method, df_agg, year, is_train, mk,
+                folder_name=folder_name, state_dir=out_dir,
             )
             self._append_run_metrics(scenario_key, folder_name, year, method, is_train, stats)
             if len(feat):
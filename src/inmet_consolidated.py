@@ -2,16 +2,21 @@
 # =============================================================================
 # INMET - CONSOLIDACAO incremental (processed/INMET/inmet_{ano}.csv -> consolidated/INMET)
 # Modos de saida:
-#   - split  (default): gera um CSV por ano
-#   - combine: gera um unico CSV com todos os anos selecionados
+#   - split  (default): gera um arquivo por ano
+#   - combine: gera um unico arquivo com todos os anos selecionados
 #   - both: gera split e combine
 #
+# Formato (--format): parquet (default) = Parquet tipado do consolidated_store
+# (medidas float64, CIDADE dictionary); csv = CSV de texto (legado); both.
+# O filtro/limpeza continua linha a linha em texto; a conversao para Parquet
+# e feita uma vez no fim e o CSV intermediario e removido se nao pedido.
+#
 # Opcoes:
 #   - filtro opcional por BIOMA via municipio normalizado usando dicionario BDQueimadas
 #   - normalizacao da primeira coluna de DATA para YYYY-MM-DD
 #   - remocao de linhas com sentinelas (-9999, -999) nas colunas de medidas
 #
-# Dep.: utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key)
+# Dep.: utils.py (loadConfig, get_logger, get_path, ensure_dir, normalize_key), consolidated_store.py
 # =============================================================================
 from __future__ import annotations
 
@@ -28,6 +33,7 @@ from utils import (
     ensure_dir,
     normalize_key,
 )
+from consolidated_store import OUTPUT_FORMATS, csv_to_parquet, wants_csv, wants_parquet
 
 # Permite campos muito longos para o parser csv do Python
 try:
@@ -228,6 +234,24 @@ def _drop_rows_with_sentinels_inplace(
 
     tmp.replace(csv_path)
 
+def _final_output_path(csv_path: Path, output_format: str) -> Path:
+    """Caminho que indica que a saida ja existe (.parquet, ou o .csv no formato csv)."""
+    return csv_path.with_suffix(".parquet") if wants_parquet(output_format) else csv_path
+
+def _finalize_outputs(csv_path: Path, output_format: str, encoding: str, log) -> List[Path]:
+    """Converte o CSV de trabalho para o store conforme output_format; remove o CSV se nao pedido."""
+    outs: List[Path] = []
+    if wants_parquet(output_format):
+        pq_path = csv_path.with_suffix(".parquet")
+        n = csv_to_parquet(csv_path, pq_path, encoding=encoding)
+        log.info(f"[PARQUET] {pq_path.name} ({n:,} linhas)")
+        outs.append(pq_path)
+    if wants_csv(output_format):
+        outs.append(csv_path)
+    else:
+        csv_path.unlink(missing_ok=True)
+    return outs
+
 # -----------------------------------------------------------------------------
 # [SECAO 4] CONSOLIDACAO - MODOS
 # -----------------------------------------------------------------------------
@@ -242,15 +266,18 @@ def consolidate_inmet(
     biome: Optional[str] = None,
     municipio_col: str = "CIDADE",
     drop_policy: str = "all",            # "all" ou "any"
+    output_format: str = "parquet",      # "parquet", "csv", "both"
 ) -> List[Path]:
     """
     Consolida INMET para arquivos no diretorio consolidated/INMET conforme o modo.
 
     mode:
-      - "split": gera um CSV por ano
-      - "combine": gera um unico CSV com todos os anos selecionados
+      - "split": gera um arquivo por ano
+      - "combine": gera um unico arquivo com todos os anos selecionados
       - "both": gera split e combine
 
+    output_format: "parquet" (store tipado), "csv" (texto, legado) ou "both".
+
     Retorna lista de caminhos dos arquivos gerados.
     """
     log = get_logger("inmet.consolidate", kind="load", per_run_file=True)
@@ -258,6 +285,8 @@ def consolidate_inmet(
 
     if mode not in {"split", "combine", "both"}:
         raise ValueError("mode deve ser 'split', 'combine' ou 'both'.")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format deve ser um de {OUTPUT_FORMATS}.")
 
     processed_dir = get_inmet_processed_dir()
     out_dir = get_inmet_consolidated_dir()
@@ -299,10 +328,11 @@ def consolidate_inmet(
 
             out_name = _resolve_year_output_filename(y, biome)
             out_path = out_dir / out_name
+            final_path = _final_output_path(out_path, output_format)
 
-            if out_path.exists() and not overwrite:
-                log.info(f"[SKIP] {out_path.name} ja existe. Use --overwrite para refazer.")
-                outputs.append(out_path)
+            if final_path.exists() and not overwrite:
+                log.info(f"[SKIP] {final_path.name} ja existe. Use --overwrite para refazer.")
+                outputs.append(final_path)
                 continue
 
             log.info(f"[WRITE] {out_path.name} a partir de {path.name} {'(filtrado)' if allowed_municipios else '(sem filtro)'}")
@@ -325,18 +355,19 @@ def consolidate_inmet(
                 _normalize_dates_text_inplace(out_path, encoding=encoding)
 
             _drop_rows_with_sentinels_inplace(out_path, encoding=encoding, drop_policy=drop_policy)
-            outputs.append(out_path)
+            outputs.extend(_finalize_outputs(out_path, output_format, encoding, log))
 
     # ---------- MODO COMBINE ----------
     if mode in {"combine", "both"}:
         log.info("[MODE] combine: gerando um arquivo unico")
         auto_name = _resolve_combined_output_filename([y for y, _ in year_files] if years else None, biome)
         out_name = output_filename or auto_name
-        out_path = out_dir / out_name
+        out_path = (out_dir / out_name).with_suffix(".csv")
+        final_path = _final_output_path(out_path, output_format)
 
-        if out_path.exists() and not overwrite:
-            log.info(f"[SKIP] {out_path.name} ja existe. Use --overwrite para refazer.")
-            outputs.append(out_path)
+        if final_path.exists() and not overwrite:
+            log.info(f"[SKIP] {final_path.name} ja existe. Use --overwrite para refazer.")
+            outputs.append(final_path)
         else:
             # header base do primeiro arquivo
             _, first_path = year_files[0]
@@ -388,7 +419,7 @@ def consolidate_inmet(
                 _normalize_dates_text_inplace(out_path, encoding=encoding)
 
             _drop_rows_with_sentinels_inplace(out_path, encoding=encoding, drop_policy=drop_policy)
-            outputs.append(out_path)
+            outputs.extend(_finalize_outputs(out_path, output_format, encoding, log))
 
     return outputs
 
@@ -411,6 +442,8 @@ if __name__ == "__main__":
     p.add_argument("--biome", type=str, default=None, help="Bioma para filtrar (ex.: Cerrado). Case-insensitive.")
     p.add_argument("--municipio-col", type=str, default="CIDADE", help="Nome da coluna de municipio. Default: 'CIDADE'.")
     p.add_argument("--output-filename", type=str, default=None, help="Nome do arquivo combinado. Se omitido, e inferido.")
+    p.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default="parquet",
+                   help="Formato de saida: parquet (tipado, default), csv (legado) ou both.")
     p.add_argument("--overwrite", action="store_true", help="Sobrescreve arquivos de saida se existirem.")
     p.add_argument("--batch-size", type=int, default=3, help="Tamanho do lote no combine. Default: 3.")
     p.add_argument("--no-normalize-dates", action="store_true", help="Nao normalizar a 1a coluna de DATA.")
@@ -436,6 +469,7 @@ if __name__ == "__main__":
             biome=args.biome,
             municipio_col=args.municipio_col,
             drop_policy=args.drop_policy,
+            output_format=args.output_format,
         )
         for pth in outs:
             log.info(f"[DONE] {pth}")
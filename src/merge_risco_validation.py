@@ -2,14 +2,28 @@
 # =============================================================================
 # MERGE E VALIDAÇÃO DE RISCO DE FOGO (INPE NETCDF + PARQUET)
 # =============================================================================
+# Extração em lote:
+# - Índice estação -> célula da grade (searchsorted nos arrays de lat/lon do
+#   NetCDF), calculado uma vez por grade (assinatura das coordenadas) e
+#   reaproveitado em todos os dias do ano.
+# - Cada NetCDF é aberto uma vez e lido só nas células das estações, para
+#   todos os passos de tempo do arquivo, numa matriz (dia x célula).
+# - A coluna RISCO_FOGO_NOVO sai de um gather único (código do dia, código
+#   da célula) por linha, sem máscara booleana por dia.
+# - Roda em todos os anos de data/modeling/<cenário> (ou --years).
+# - Download em etapa separada, antes do join: os dias de todos os anos são
+#   baixados em paralelo para o cache local (src/risco_fogo_cache.py); o
+#   join só lê do cache. --cube usa o recorte Cerrado por ano (NPZ) em vez
+#   de abrir os NetCDFs globais.
 
+import argparse
 import sys
-import os
-import requests
 import xarray as xr
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from tqdm import tqdm
 
 # Boilerplate de Path
@@ -20,155 +34,262 @@ if str(project_root) not in sys.path:
 
 try:
     import src.utils as utils
+    from src.risco_fogo_cache import (
+        INPE_URL_TEMPLATE, RiskGridCache, RiskGridFetcher, _lat_lon_names, build_year_cube, default_root,
+        load_year_cube,
+    )
 except ImportError:
-    print("[ERRO] Falha ao importar src.utils")
+    print("[ERRO] Falha ao importar src.utils / src.risco_fogo_cache")
     sys.exit(1)
 
+# Distância máxima (graus) entre estação e centro da célula; a mesma
+# tolerância do antigo sel(method="nearest", tolerance=0.1).
+DEFAULT_TOLERANCE = 0.1
+
+
+def nearest_index(coord: np.ndarray, targets: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Posição do valor mais próximo de cada alvo em coord (qualquer ordem) + máscara de tolerância."""
+    coord = np.asarray(coord, dtype=np.float64)
+    t = np.asarray(targets, dtype=np.float64)
+    order = np.argsort(coord, kind="stable")
+    c = coord[order]
+    pos = np.searchsorted(c, t)
+    lo = np.clip(pos - 1, 0, len(c) - 1)
+    hi = np.clip(pos, 0, len(c) - 1)
+    # empate -> maior coordenada, como sel(method="nearest") (get_indexer do pandas)
+    j = np.where(np.abs(c[hi] - t) <= np.abs(c[lo] - t), hi, lo)
+    ok = np.isfinite(t) & (np.abs(c[j] - t) <= float(tolerance))
+    return order[j], ok
+
+
+@dataclass
+class GridIndex:
+    """Célula (iy, ix) de cada estação numa grade; valid=False fora da tolerância."""
+    signature: Tuple
+    iy: np.ndarray
+    ix: np.ndarray
+    valid: np.ndarray
+
+    @classmethod
+    def build(cls, grid_lat: np.ndarray, grid_lon: np.ndarray,
+              lats: np.ndarray, lons: np.ndarray, tolerance: float) -> "GridIndex":
+        iy, ok_y = nearest_index(grid_lat, lats, tolerance)
+        ix, ok_x = nearest_index(grid_lon, lons, tolerance)
+        return cls(grid_signature(grid_lat, grid_lon), iy, ix, ok_y & ok_x)
+
+
+def grid_signature(grid_lat: np.ndarray, grid_lon: np.ndarray) -> Tuple:
+    la = np.asarray(grid_lat, dtype=np.float64)
+    lo = np.asarray(grid_lon, dtype=np.float64)
+    return (la.size, float(la[0]), float(la[-1]), lo.size, float(lo[0]), float(lo[-1]))
+
+
 class RiskMerger:
-    def __init__(self):
+    def __init__(self, years: Optional[List[int]] = None, base_scenario: str = "base_F",
+                 tolerance: float = DEFAULT_TOLERANCE, nc_raw_path: Optional[Path] = None,
+                 fetch: bool = True, workers: int = 8, use_cube: bool = False,
+                 url_template: str = INPE_URL_TEMPLATE):
         self.cfg = utils.loadConfig()
         self.log = utils.get_logger("merger.risk")
         
         # Configurações
-        self.base_scenario = "base_F" # Usando Full Original
-        self.target_year = 2024
+        self.base_scenario = base_scenario # base_F = Full Original
+        self.years = sorted(set(years)) if years else None
+        self.tolerance = float(tolerance)
+        self.fetch_enabled = bool(fetch)
+        self.use_cube = bool(use_cube)
         self.folder_name = self.cfg['modeling_scenarios'][self.base_scenario]
+        self.modeling_dir = Path(self.cfg['paths']['data']['modeling']) / self.folder_name
         
-        self.parquet_path = (Path(self.cfg['paths']['data']['modeling']) / 
-                             self.folder_name / 
-                             f"inmet_bdq_{self.target_year}_cerrado.parquet")
-        
-        self.nc_raw_path = Path(self.cfg['paths']['providers']['risco_fogo']['raw'])
+        # NetCDFs diários: paths.providers.risco_fogo.raw ou data/raw/RISCO_FOGO.
+        # Arquivos soltos nessa pasta (downloads antigos) são importados no cache sem rede.
+        self.nc_raw_path = Path(nc_raw_path or default_root(self.cfg))
         utils.ensure_dir(self.nc_raw_path)
+        self.cache = RiskGridCache(self.nc_raw_path / "_cache")
+        self.fetcher = RiskGridFetcher(self.cache, url_template=url_template, workers=workers,
+                                       legacy_dir=self.nc_raw_path, log=self.log)
+
+    def parquet_path(self, year: int) -> Path:
+        return self.modeling_dir / f"inmet_bdq_{year}_cerrado.parquet"
 
-        # URL do INPE
-        self.url_template = "https://dataserver-coids.inpe.br/queimadas/queimadas/riscofogo_meteorologia/observado/risco_fogo/{year}/INPE_FireRiskModel_2.2_FireRisk_{date_str}.nc"
+    def discover_years(self) -> List[int]:
+        if self.years:
+            return self.years
+        years = []
+        for fp in sorted(self.modeling_dir.glob("inmet_bdq_*_cerrado.parquet")):
+            tok = fp.stem.split("_")[2]
+            if tok.isdigit():
+                years.append(int(tok))
+        return years
 
-    def download_day(self, date_obj, force=False) -> Path:
+    def download_day(self, date_obj, force=False) -> Optional[Path]:
         """
-        Baixa o arquivo do dia.
-        Se force=False e o arquivo já existir, NÃO baixa de novo (economiza tempo/banda).
+        Caminho do NetCDF do dia no cache; baixa (ou importa da pasta raw) se faltar.
+        Se force=False e o dia já estiver no cache, NÃO baixa de novo.
         """
-        date_str = date_obj.strftime("%Y%m%d")
-        year = date_obj.year
-        filename = f"INPE_FireRiskModel_2.2_FireRisk_{date_str}.nc"
-        local_file = self.nc_raw_path / filename
-        
-        # Se já existe e não estamos forçando, usa o local
-        if local_file.exists() and not force:
-            return local_file
-            
-        url = self.url_template.format(year=year, date_str=date_str)
-        try:
-            response = requests.get(url, stream=True, timeout=60)
-            if response.status_code == 200:
-                with open(local_file, "wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                return local_file
-            return None
-        except Exception:
-            return None
+        if force or not self.cache.has(date_obj):
+            self.fetcher.fetch([date_obj], force=force, download=self.fetch_enabled or force)
+        return self.cache.path_for(date_obj)
 
-    def run(self):
-        self.log.info(f"Carregando base: {self.parquet_path}")
-        if not self.parquet_path.exists():
-            self.log.error("Arquivo Parquet não encontrado.")
-            return
+    def fetch_days(self, dates: List[pd.Timestamp]):
+        """Etapa de download: todos os dias faltantes em paralelo (fetch=False: só importa a pasta raw)."""
+        return self.fetcher.fetch(dates, download=self.fetch_enabled)
 
-        df = pd.read_parquet(self.parquet_path)
-        
-        # Normalização de Datas
-        if 'Data' in df.columns:
-            df['dt_ref'] = pd.to_datetime(df['Data'], format='%Y-%m-%d', errors='coerce')
-        elif 'ts_hour' in df.columns:
-            df['dt_ref'] = pd.to_datetime(df['ts_hour']).dt.normalize()
-        
-        df['RISCO_FOGO_NOVO'] = np.nan
-        
-        unique_dates = sorted(df['dt_ref'].dropna().unique())
-        self.log.info(f"Processando {len(unique_dates)} dias únicos...")
+    def _open_day(self, ts: pd.Timestamp):
+        """Abre o NetCDF do dia a partir do cache; arquivo corrompido é baixado de novo uma vez."""
+        nc_file = self.download_day(ts, force=False)
+        if not nc_file:
+            return None
+        try:
+            return xr.open_dataset(nc_file)
+        except Exception as e:
+            # --- TRATAMENTO DE ARQUIVO CORROMPIDO ---
+            # Se der erro de HDF/NetCDF, assume corrupção: tira do cache e baixa de novo
+            err_msg = str(e)
+            if not ("HDF" in err_msg or "NetCDF" in err_msg or "truncate" in err_msg):
+                self.log.error(f"Erro genérico dia {ts}: {e}")
+                return None
+            self.log.warning(f"Arquivo corrompido detectado ({nc_file.name}). Tentando recuperar...")
+            try:
+                self.cache.invalidate(ts)
+                nc_file = self.download_day(ts, force=True)
+                return xr.open_dataset(nc_file) if nc_file else None
+            except Exception as e2:
+                self.log.error(f"Falha na recuperação do dia {ts}: {e2}")
+                return None
 
-        for date_val in tqdm(unique_dates):
-            ts = pd.Timestamp(date_val)
-            
-            # 1. Filtra os pontos do dia (Estações)
-            mask_day = df['dt_ref'] == ts
-            day_points = df.loc[mask_day, ['LATITUDE', 'LONGITUDE']]
-            
-            if day_points.empty:
-                continue
+    def _grid_index(self, da, lats: np.ndarray, lons: np.ndarray, cache: Dict[Tuple, GridIndex]) -> GridIndex:
+        lat_name, lon_name = _lat_lon_names(da)
+        grid_lat = np.asarray(da[lat_name].values)
+        grid_lon = np.asarray(da[lon_name].values)
+        sig = grid_signature(grid_lat, grid_lon)
+        if sig not in cache:
+            cache[sig] = GridIndex.build(grid_lat, grid_lon, lats, lons, self.tolerance)
+        return cache[sig]
 
-            # 2. Obtém arquivo NC (Sem baixar se já existir)
-            nc_file = self.download_day(ts, force=False)
-            if not nc_file:
+    def extract(self, dates: List[pd.Timestamp], lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Matriz (len(dates), len(lats)) com o risco da célula de cada estação em
+        cada dia; NaN sem arquivo ou fora da tolerância. Um open por arquivo,
+        todos os passos de tempo do arquivo lidos de uma vez (ou, com use_cube,
+        um gather no cubo Cerrado de cada ano).
+        """
+        if self.use_cube:
+            return self.extract_cube(dates, lats, lons)
+        out = np.full((len(dates), len(lats)), np.nan, dtype=np.float32)
+        day_pos = {pd.Timestamp(d): i for i, d in enumerate(dates)}
+        pending = set(day_pos)
+        indices: Dict[Tuple, GridIndex] = {}
+        for ts in tqdm(list(dates)):
+            if ts not in pending:
+                continue # já coberto por outro arquivo com vários dias
+            ds = self._open_day(ts)
+            if ds is None:
                 continue
-            
-            ds = None
-            try:
-                # Tenta abrir o dataset
-                ds = xr.open_dataset(nc_file)
-            
-            except Exception as e:
-                # --- TRATAMENTO DE ARQUIVO CORROMPIDO ---
-                # Se der erro de HDF/NetCDF, assume corrupção: Deleta e Baixa de Novo
-                err_msg = str(e)
-                if "HDF" in err_msg or "NetCDF" in err_msg or "truncate" in err_msg:
-                    self.log.warning(f"Arquivo corrompido detectado ({nc_file.name}). Tentando recuperar...")
-                    try:
-                        ds.close() if ds else None
-                        os.remove(nc_file) # Deleta o podre
-                        
-                        # Baixa forçado
-                        nc_file = self.download_day(ts, force=True)
-                        if nc_file:
-                            ds = xr.open_dataset(nc_file) # Tenta abrir de novo
-                        else:
-                            continue # Se não conseguiu baixar de novo, pula
-                    except Exception as e2:
-                        self.log.error(f"Falha na recuperação do dia {ts}: {e2}")
-                        continue
-                else:
-                    self.log.error(f"Erro genérico dia {ts}: {e}")
-                    continue
-
-            # Se chegamos aqui, o ds está aberto e válido
             try:
                 # Pega a primeira variável de dados
-                var_name = list(ds.data_vars)[0]
-                
-                # Correção de Dimensão de Tempo
-                if 'time' in ds.dims:
-                    ds_slice = ds[var_name].isel(time=0)
+                da = ds[list(ds.data_vars)[0]]
+                lat_name, lon_name = _lat_lon_names(da)
+                # Índice calculado uma vez por grade (novo só se as coordenadas mudarem)
+                gi = self._grid_index(da, lats, lons, indices)
+                cols = np.flatnonzero(gi.valid)
+                if cols.size == 0:
+                    pending.discard(ts)
+                    continue
+                # Leitura pontual só nas células das estações (dims: [time,] p)
+                vals = da.isel({
+                    lat_name: xr.DataArray(gi.iy[cols], dims="points"),
+                    lon_name: xr.DataArray(gi.ix[cols], dims="points"),
+                })
+                if "time" in vals.dims and vals.sizes["time"] > 1:
+                    vals = vals.transpose("time", "points")
+                    steps = pd.to_datetime(vals["time"].values).normalize()
+                    arr = np.asarray(vals.values, dtype=np.float32)
+                    for k, step in enumerate(steps):
+                        i = day_pos.get(pd.Timestamp(step))
+                        if i is not None and pd.Timestamp(step) in pending:
+                            out[i, cols] = arr[k]
+                            pending.discard(pd.Timestamp(step))
                 else:
-                    ds_slice = ds[var_name]
-
-                # Prepara coordenadas
-                target_lats = xr.DataArray(day_points['LATITUDE'].values, dims="points")
-                target_lons = xr.DataArray(day_points['LONGITUDE'].values, dims="points")
-                
-                # Extração espacial
-                raw_values = ds_slice.sel(
-                    lat=target_lats, 
-                    lon=target_lons, 
-                    method='nearest',
-                    tolerance=0.1
-                )
-                
-                risk_values_flat = raw_values.values.flatten()
-
-                # Atribuição Segura
-                if len(risk_values_flat) == len(day_points):
-                    df.loc[mask_day, 'RISCO_FOGO_NOVO'] = risk_values_flat
-                
-                ds.close()
-
+                    # Correção de Dimensão de Tempo (arquivo diário: time=0 é o dia)
+                    if "time" in vals.dims:
+                        vals = vals.isel(time=0)
+                    out[day_pos[ts], cols] = np.asarray(vals.values, dtype=np.float32).ravel()
+                    pending.discard(ts)
             except Exception as e:
                 self.log.error(f"Erro processamento lógico dia {ts}: {e}")
-                if ds: ds.close()
+            finally:
+                ds.close()
+        return out
 
-        # --- FASE DE VALIDAÇÃO E RELATÓRIO ---
-        self.log.info("Calculando métricas de validação...")
+    def extract_cube(self, dates: List[pd.Timestamp], lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Mesma matriz de extract, lida dos cubos Cerrado (NPZ) por ano; cubo (re)feito se o cache mudou."""
+        out = np.full((len(dates), len(lats)), np.nan, dtype=np.float32)
+        rows = pd.Series(np.arange(len(dates)), index=pd.DatetimeIndex(dates))
+        for year, pos in rows.groupby(rows.index.year):
+            path = build_year_cube(self.cache, int(year), log=self.log)
+            if path is None:
+                continue
+            cube = load_year_cube(path)
+            gi = GridIndex.build(cube['lat'], cube['lon'], lats, lons, self.tolerance)
+            cols = np.flatnonzero(gi.valid)
+            k = pd.DatetimeIndex(cube['dates']).get_indexer(pos.index)
+            hit = k >= 0
+            if cols.size == 0 or not hit.any():
+                continue
+            vals = cube['risk'][k[hit][:, None], gi.iy[cols][None, :], gi.ix[cols][None, :]]
+            out[np.ix_(pos.to_numpy()[hit], cols)] = vals
+        return out
+
+    @staticmethod
+    def _date_ref(df: pd.DataFrame) -> pd.Series:
+        if 'Data' in df.columns:
+            return pd.to_datetime(df['Data'], format='%Y-%m-%d', errors='coerce')
+        return pd.to_datetime(df['ts_hour']).dt.normalize()
+
+    def year_dates(self, year: int) -> List[pd.Timestamp]:
+        """Dias únicos do parquet do ano (lê só a coluna de data)."""
+        import pyarrow.parquet as pq
+
+        path = self.parquet_path(year)
+        if not path.exists():
+            return []
+        names = pq.read_schema(path).names
+        col = 'Data' if 'Data' in names else 'ts_hour'
+        if col not in names:
+            return []
+        days = self._date_ref(pd.read_parquet(path, columns=[col])).dropna().unique()
+        return [pd.Timestamp(d) for d in sorted(days)]
+
+    def run_year(self, year: int) -> Optional[pd.DataFrame]:
+        parquet_path = self.parquet_path(year)
+        self.log.info(f"Carregando base: {parquet_path}")
+        if not parquet_path.exists():
+            self.log.error("Arquivo Parquet não encontrado.")
+            return None
+
+        df = pd.read_parquet(parquet_path)
+        
+        # Normalização de Datas
+        if 'Data' in df.columns or 'ts_hour' in df.columns:
+            df['dt_ref'] = self._date_ref(df)
+        
+        # Códigos por linha: dia (ordenado) e estação (lat, lon únicos)
+        day_code, unique_dates = pd.factorize(df['dt_ref'], sort=True)
+        st_code, stations = pd.factorize(
+            pd.MultiIndex.from_arrays([df['LATITUDE'].to_numpy(), df['LONGITUDE'].to_numpy()])
+        )
+        st_lat = np.asarray(stations.get_level_values(0), dtype=np.float64)
+        st_lon = np.asarray(stations.get_level_values(1), dtype=np.float64)
+        self.log.info(f"Processando {len(unique_dates)} dias únicos x {len(stations)} estações...")
+
+        grid = self.extract([pd.Timestamp(d) for d in unique_dates], st_lat, st_lon)
+
+        # Gather único: linha -> (dia, estação); código -1 (NaT/NaN) fica NaN
+        ok = (day_code >= 0) & (st_code >= 0)
+        risk = np.full(len(df), np.nan, dtype=np.float32)
+        risk[ok] = grid[day_code[ok], st_code[ok]]
+        df['RISCO_FOGO_NOVO'] = risk
 
         # Correção de Tipos (String -> Float) para evitar TypeError
         # Remove vírgulas se existirem e converte para numérico
@@ -177,11 +298,34 @@ class RiskMerger:
         
         df['RISCO_FOGO'] = pd.to_numeric(df['RISCO_FOGO'], errors='coerce')
 
-        # Cria subset apenas onde temos os dois dados para comparar
-        validation_set = df.dropna(subset=['RISCO_FOGO', 'RISCO_FOGO_NOVO'])
+        # Salva o arquivo final
+        output_filename = f"inmet_bdq_{year}_cerrado_risco_fogo.parquet"
+        output_path = parquet_path.parent / output_filename
         
+        df.to_parquet(output_path)
+        self.log.info(f"Arquivo enriquecido salvo em: {output_path}")
+
+        # Cria subset apenas onde temos os dois dados para comparar
+        return df.loc[df['RISCO_FOGO'].notna() & df['RISCO_FOGO_NOVO'].notna(),
+                      ['LATITUDE', 'LONGITUDE', 'RISCO_FOGO', 'RISCO_FOGO_NOVO']].assign(ANO=year)
+
+    def run(self):
+        years = self.discover_years()
+        if not years:
+            self.log.error(f"Nenhum parquet inmet_bdq_*_cerrado em {self.modeling_dir}")
+            return
+        self.log.info(f"Anos: {years}")
+
+        # --- FASE DE DOWNLOAD (todos os anos, em paralelo) ---
+        self.fetch_days([d for y in years for d in self.year_dates(y)])
+
+        parts = [v for v in (self.run_year(y) for y in years) if v is not None]
+        validation_set = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+        # --- FASE DE VALIDAÇÃO E RELATÓRIO ---
+        self.log.info("Calculando métricas de validação...")
         print("\n" + "="*60)
-        print(f"RELATÓRIO DE VALIDAÇÃO DE RISCO DE FOGO ({self.target_year})")
+        print(f"RELATÓRIO DE VALIDAÇÃO DE RISCO DE FOGO ({years[0]}-{years[-1]})")
         print("="*60)
         
         if not validation_set.empty:
@@ -192,23 +336,40 @@ class RiskMerger:
             print(f"Correlação de Pearson:          {corr:.4f}")
             print(f"Erro Médio Absoluto (MAE):      {mae:.4f}")
             print("-" * 60)
+            print("POR ANO:")
+            for year, g in validation_set.groupby('ANO'):
+                print(f"  {year}: n={len(g):>8} | corr={g['RISCO_FOGO'].corr(g['RISCO_FOGO_NOVO']):.4f} | "
+                      f"mae={(g['RISCO_FOGO'] - g['RISCO_FOGO_NOVO']).abs().mean():.4f}")
+            print("-" * 60)
             print("AMOSTRA COMPARATIVA (TOP 10):")
+            cols = ['ANO', 'LATITUDE', 'LONGITUDE', 'RISCO_FOGO', 'RISCO_FOGO_NOVO']
             try:
-                print(validation_set[['LATITUDE', 'LONGITUDE', 'RISCO_FOGO', 'RISCO_FOGO_NOVO']].head(10).to_markdown(index=False))
+                print(validation_set[cols].head(10).to_markdown(index=False))
             except:
-                print(validation_set[['LATITUDE', 'LONGITUDE', 'RISCO_FOGO', 'RISCO_FOGO_NOVO']].head(10))
+                print(validation_set[cols].head(10))
         else:
             self.log.warning("AVISO: Nenhuma interseção encontrada entre o Risco Original (Focos) e o Risco Novo (Grade).")
             self.log.warning("Verifique se a coluna 'RISCO_FOGO' original não está totalmente vazia.")
 
         print("="*60 + "\n")
 
-        # Salva o arquivo final
-        output_filename = f"inmet_bdq_{self.target_year}_cerrado_risco_fogo.parquet"
-        output_path = self.parquet_path.parent / output_filename
-        
-        df.to_parquet(output_path)
-        self.log.info(f"Arquivo enriquecido salvo em: {output_path}")
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Merge do risco de fogo INPE (NetCDF) nos parquets de modelagem + validação.")
+    p.add_argument("--years", nargs="+", type=int, default=None,
+                   help="Anos a processar (default: todos os parquets do cenário).")
+    p.add_argument("--scenario", default="base_F", help="Chave em modeling_scenarios (default: base_F).")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                   help="Distância máx. (graus) estação -> célula (default: 0.1).")
+    p.add_argument("--workers", type=int, default=8, help="Downloads simultâneos na etapa de fetch (default: 8).")
+    p.add_argument("--no-fetch", action="store_true",
+                   help="Não acessa a rede: usa só o que já está no cache/pasta raw.")
+    p.add_argument("--cube", action="store_true",
+                   help="Lê do recorte Cerrado por ano (NPZ no cache) em vez dos NetCDFs globais.")
+    args = p.parse_args()
+    RiskMerger(years=args.years, base_scenario=args.scenario, tolerance=args.tolerance,
+               fetch=not args.no_fetch, workers=args.workers, use_cube=args.cube).run()
+
 
 if __name__ == "__main__":
-    RiskMerger().run()
\ No newline at end of file
+    main()
@@ -13,6 +13,8 @@ from .core import (
 from .scaling import ChunkedStandardScaler
 from . import _resource as resource
 from . import _gs_cache as gs_cache
+from . import _split_cache as split_cache
+from . import _fold_cache as fold_cache
 
 __all__ = [
     "BaseModelTrainer",
@@ -23,4 +25,6 @@ __all__ = [
     "ChunkedStandardScaler",
     "resource",
     "gs_cache",
+    "split_cache",
+    "fold_cache",
 ]
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""Inferencia em lote dos modelos salvos (model_eval_viz).
+
+Motivacao: evaluate_run fazia joblib.load do modelo e predict_proba sobre o
+X_test inteiro numa chamada so, um run depois do outro. Com RF/XGB e milhoes
+de linhas: predict_proba devolve (n, 2) float64 + temporarios internos do
+tamanho do teste, RF do sklearn sobe um pool de threads por chamada e o
+restante dos cores fica parado enquanto o proximo run nem foi carregado.
+
+Aqui:
+    - X_test e percorrido em blocos de linhas (DEFAULT_BLOCK_ROWS) e so a
+      coluna positiva de cada bloco vai para um buffer float64 pre-alocado;
+      o pico extra por run fica em ~um bloco, nao no teste inteiro;
+    - varios runs do mesmo cenario (mesmo X_test) sao carregados e pontuados
+      em paralelo num ThreadPoolExecutor: predict de arvores sklearn e do
+      XGBoost liberam o GIL. O orcamento de threads (cpu_thread_budget) e
+      dividido entre os runs e aplicado no n_jobs de cada modelo;
+    - cada worker segura um modelo inteiro na RAM: os artefatos do
+      save_artifacts sao comprimidos (compress=1), entao o mmap_mode="r" do
+      joblib.load nao se aplica a eles. O numero de workers e limitado pela
+      RAM disponivel (_resource) contra o tamanho estimado do maior modelo
+      descomprimido (MODEL_RAM_FACTOR x arquivo) + os temporarios de um bloco.
+
+Os scores sao os mesmos do caminho antigo (predict_proba[:, 1], ou sigmoid
+de decision_function, clipados em [0, 1]).
+"""
+from __future__ import annotations
+
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.ml import _resource as resource  # noqa: E402
+
+DEFAULT_BLOCK_ROWS = 262_144
+# RAM de um modelo carregado / tamanho do .joblib (compress=1 de arvores
+# RF/XGB fica tipicamente em 3-4x). Artefatos sem compressao ficam abaixo.
+MODEL_RAM_FACTOR = 4.0
+
+
+def load_model(path: Path) -> Any:
+    """joblib.load; memory-mapping so vale para artefatos sem compressao."""
+    import joblib
+
+    with warnings.catch_warnings():
+        # Arquivo comprimido: joblib ignora mmap_mode e avisa; o load e o mesmo.
+        warnings.filterwarnings("ignore", message=".*mmap_mode.*", category=UserWarning)
+        return joblib.load(path, mmap_mode="r")
+
+
+def set_thread_budget(model: Any, n_threads: int) -> None:
+    """Aplica n_jobs no modelo (ou nos steps de um Pipeline) quando existir."""
+    steps = [s for _, s in getattr(model, "steps", [])] or [model]
+    for est in steps:
+        try:
+            if "n_jobs" in est.get_params(deep=False):
+                est.set_params(n_jobs=int(n_threads))
+        except Exception:
+            continue
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    x = np.clip(np.nan_to_num(x, nan=0.0, posinf=50.0, neginf=-50.0), -50.0, 50.0)
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def score_block(model: Any, X) -> np.ndarray:
+    if hasattr(model, "predict_proba"):
+        p = model.predict_proba(X)[:, 1]
+    elif hasattr(model, "decision_function"):
+        p = _sigmoid(model.decision_function(X))
+    else:
+        raise AttributeError("Modelo sem predict_proba/decision_function.")
+    p = np.asarray(p, dtype=float)
+    return np.clip(np.nan_to_num(p, nan=0.5, posinf=1.0, neginf=0.0), 0.0, 1.0)
+
+
+def predict_scores(
+    model: Any,
+    X,
+    *,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Scores de X em blocos de linhas, escritos em `out` (alocado se None)."""
+    n = int(len(X))
+    if out is None:
+        out = np.empty(n, dtype=np.float64)
+    step = max(1, int(block_rows))
+    for a in range(0, n, step):
+        b = min(n, a + step)
+        out[a:b] = score_block(model, X.iloc[a:b] if hasattr(X, "iloc") else X[a:b])
+    return out
+
+
+@dataclass
+class ScoredRun:
+    scores: np.ndarray
+    load_seconds: float
+    score_seconds: float
+    extra: Any = None
+
+
+def _score_one(
+    path: Path,
+    X,
+    n_threads: int,
+    block_rows: int,
+    inspect: Optional[Callable[[Any], Any]],
+) -> ScoredRun:
+    t0 = time.perf_counter()
+    model = load_model(path)
+    t1 = time.perf_counter()
+    set_thread_budget(model, n_threads)
+    scores = predict_scores(model, X, block_rows=block_rows)
+    t2 = time.perf_counter()
+    extra = inspect(model) if inspect is not None else None
+    # O modelo nao sai daqui: so um por worker fica vivo na RAM.
+    return ScoredRun(scores, t1 - t0, t2 - t1, extra)
+
+
+def model_ram_gb(path: Path) -> float:
+    """RAM estimada do modelo carregado, a partir do tamanho do artefato."""
+    try:
+        size = Path(path).stat().st_size
+    except OSError:
+        return 0.0
+    return size * MODEL_RAM_FACTOR / (1024 ** 3)
+
+
+def block_ram_gb(block_rows: int, n_features: int) -> float:
+    """Temporarios de um bloco: fatia de X (float64) + predict_proba (n, 2)."""
+    return float(block_rows) * (float(n_features) + 2.0) * 8.0 / (1024 ** 3)
+
+
+def recommend_workers(
+    n_runs: int,
+    workers: Optional[int] = None,
+    *,
+    per_worker_gb: float = 0.0,
+    target_usage: float = 0.85,
+    log=None,
+) -> int:
+    """Workers pelo orcamento de CPU (ou `workers`), limitados pela RAM disponivel."""
+    budget = resource.cpu_thread_budget()
+    n = max(1, min(int(workers) if workers else budget, n_runs))
+    avail_gb = resource.available_ram_gb()
+    if avail_gb > 0 and per_worker_gb > 0:
+        n_fit = max(1, int(avail_gb * float(target_usage) // per_worker_gb))
+        if n_fit < n and log is not None:
+            log.info(
+                f"[SCORE] workers {n} -> {n_fit}: avail_ram={avail_gb:.1f}GB "
+                f"per_worker~{per_worker_gb:.2f}GB"
+            )
+        n = min(n, n_fit)
+    return n
+
+
+def score_models(
+    model_paths: Dict[str, Path],
+    X,
+    *,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    workers: Optional[int] = None,
+    inspect: Optional[Callable[[Any], Any]] = None,
+    log=None,
+) -> Dict[str, ScoredRun]:
+    """Carrega e pontua varios modelos sobre o mesmo X em paralelo.
+
+    inspect(model) roda no worker logo apos o predict (ex.: importancias),
+    para o modelo nao precisar sobreviver ao worker. A primeira excecao sobe.
+    """
+    if not model_paths:
+        return {}
+    n_features = int(X.shape[1]) if getattr(X, "ndim", 2) == 2 else 1
+    per_worker_gb = max(model_ram_gb(Path(p)) for p in model_paths.values()) \
+        + block_ram_gb(min(int(block_rows), int(len(X))), n_features)
+    n_workers = recommend_workers(len(model_paths), workers, per_worker_gb=per_worker_gb, log=log)
+    threads = max(1, resource.cpu_thread_budget() // n_workers)
+    if log is not None:
+        log.info(
+            f"[SCORE] {len(model_paths)} runs | linhas={len(X):,} | workers={n_workers} "
+            f"threads/run={threads} | bloco={int(block_rows):,}"
+        )
+    out: Dict[str, ScoredRun] = {}
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="eval-score") as pool:
+        futs = {
+            key: pool.submit(_score_one, Path(path), X, threads, block_rows, inspect)
+            for key, path in model_paths.items()
+        }
+        for key, fut in futs.items():
+            out[key] = fut.result()
+            if log is not None:
+                r = out[key]
+                log.info(f"[SCORE] {key} | load={r.load_seconds:.1f}s predict={r.score_seconds:.1f}s")
+    return out
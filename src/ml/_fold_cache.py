@@ -0,0 +1,313 @@
+"""Cache por fold do GridSearch (SQLite, append-only).
+
+Motivacao: _gs_cache.py guarda so o best_params final por (model, scenario,
+grid_mode, grid_hash). GridSearch interrompido, ou grid que muda um unico
+valor, refazia todos os fits. Aqui cada fit de (candidato, fold) vira uma
+linha com score + tempo de fit, e o ModelOptimizer consulta o cache antes de
+cada fit: rerun so paga os candidatos novos e busca interrompida retoma de
+onde parou (resultados sao gravados a medida que os fits terminam).
+
+Chave de cada fit (hash blake2b de):
+    - configuracao completa do pipeline ja com os params do candidato
+      (get_params(deep=True): model__*, smote__*, scaler__*; dict/list por
+      valor, demais objetos pelo repr), sem knobs que nao mudam o resultado
+      (n_jobs, verbosity). Param sem repr estavel (lambda, RandomState: repr
+      com endereco) deixa o fit fora do cache;
+    - classes dos steps do pipeline;
+    - intervalos train/test/val do fold;
+    - fingerprint dos dados (shape, colunas, y inteiro, soma por coluna e
+      amostra de linhas com stride de X);
+    - scoring.
+Cenario e variacao nao entram na chave: mesmos dados + mesma config em
+outra variacao/cenario reaproveitam o fit.
+
+Arquivo: data/_article/_caches/gridsearch/folds.sqlite
+Desligar: TRAIN_RUNNER_FOLD_CACHE=0.
+
+Relatorio (hit rate e fit-seconds economizados):
+    python src/train_runner.py fold-cache-report
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+# Params que nao alteram o modelo ajustado (so paralelismo/log).
+_VOLATILE_SUFFIXES = ("n_jobs", "nthread", "verbosity", "verbose", "memory")
+_SAMPLE_ROWS = 4096
+_SQL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fold_results (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fold INTEGER NOT NULL,
+    train_rows INTEGER NOT NULL,
+    data_fp TEXT NOT NULL,
+    scoring TEXT NOT NULL,
+    score REAL NOT NULL,
+    fit_seconds REAL NOT NULL,
+    best_iteration INTEGER,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lookups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    model TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    saved_seconds REAL NOT NULL,
+    spent_seconds REAL NOT NULL
+);
+"""
+
+
+def enabled() -> bool:
+    return os.environ.get("TRAIN_RUNNER_FOLD_CACHE", "1").strip().lower() not in (
+        "0", "false", "no", "off",
+    )
+
+
+def _cache_root() -> Path:
+    try:
+        from src.utils import loadConfig
+        cfg = loadConfig()
+        article_root = Path(cfg["paths"]["data"].get("article")
+                            or (_project_root / "data" / "_article"))
+    except Exception:
+        article_root = _project_root / "data" / "_article"
+    p = article_root / "_caches" / "gridsearch"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def default_path() -> Path:
+    return _cache_root() / "folds.sqlite"
+
+
+def _json(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, default=str)
+
+
+def data_fingerprint(X, y) -> str:
+    """Fingerprint barato de (X, y): y inteiro + soma por coluna + linhas amostradas."""
+    h = hashlib.blake2b(digest_size=16)
+    n = int(len(y))
+    n_feat = int(X.shape[1])
+    cols = [str(c) for c in X.columns] if hasattr(X, "columns") else None
+    h.update(_json({"n": n, "f": n_feat, "cols": cols}).encode())
+    h.update(np.ascontiguousarray(np.asarray(y, dtype=np.int8)).tobytes())
+    sums = np.empty(n_feat, dtype=np.float64)
+    for j in range(n_feat):
+        col = X[X.columns[j]].to_numpy() if cols is not None else np.asarray(X)[:, j]
+        sums[j] = np.nansum(col, dtype=np.float64)
+    h.update(sums.tobytes())
+    if n:
+        idx = np.unique(np.linspace(0, n - 1, min(n, _SAMPLE_ROWS)).astype(np.int64))
+        rows = X.iloc[idx].to_numpy(dtype=np.float32) if hasattr(X, "iloc") else np.asarray(X[idx], dtype=np.float32)
+        h.update(np.ascontiguousarray(rows).tobytes())
+    return h.hexdigest()
+
+
+class _Unkeyable(Exception):
+    """Param sem representacao estavel entre execucoes (lambda, RandomState...)."""
+
+
+def _param_value(v: Any) -> Any:
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return v
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, np.ndarray):
+        return {"ndarray": str(v.dtype), "values": v.tolist()}
+    if isinstance(v, dict):
+        return {"dict": sorted((_json(_param_value(k)), _param_value(x)) for k, x in v.items())}
+    if isinstance(v, (list, tuple, set, frozenset)):
+        items = [_param_value(x) for x in v]
+        if isinstance(v, (set, frozenset)):
+            items = sorted(items, key=_json)
+        return {type(v).__name__: items}
+    text = repr(v)
+    if " at 0x" in text:
+        raise _Unkeyable(text)
+    return {"repr": f"{type(v).__module__}.{type(v).__qualname__}", "value": text}
+
+
+def _config_signature(pipe, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Params do pipeline com o candidato; levanta _Unkeyable se algum nao serializa."""
+    from sklearn.base import clone
+
+    est = clone(pipe).set_params(**params)
+    # Estimadores aninhados (e a lista de steps) ja entram expandidos em
+    # <step>__<param> e pelas classes em "steps".
+    cfg = {
+        k: _param_value(v) for k, v in est.get_params(deep=True).items()
+        if k != "steps" and not hasattr(v, "get_params")
+        and not k.endswith(_VOLATILE_SUFFIXES)
+    }
+    steps = [type(s).__name__ for _, s in getattr(est, "steps", [("model", est)])]
+    return {"params": cfg, "steps": steps}
+
+
+def task_key(pipe, task, data_fp: str, scoring: str) -> Optional[str]:
+    """Chave do fit, ou None se algum param nao tem forma estavel (fit fora do cache)."""
+    try:
+        config = _config_signature(pipe, task.params)
+    except _Unkeyable:
+        return None
+    payload = {
+        "config": config,
+        "train": list(task.train),
+        "test": list(task.test),
+        "val": None if task.val is None else list(task.val),
+        "data": data_fp,
+        "scoring": scoring,
+    }
+    return hashlib.blake2b(_json(payload).encode(), digest_size=20).hexdigest()
+
+
+def model_label(pipe) -> str:
+    est = pipe.named_steps["model"] if hasattr(pipe, "named_steps") else pipe
+    return type(est).__name__
+
+
+@dataclass
+class CachedFold:
+    score: float
+    fit_seconds: float
+    best_iteration: Optional[int]
+
+
+class FoldCache:
+    """Store SQLite; INSERT OR IGNORE (append-only), commit por fit."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, CachedFold]:
+        keys = list(dict.fromkeys(keys))
+        out: Dict[str, CachedFold] = {}
+        for i in range(0, len(keys), _SQL_BATCH):
+            part = keys[i:i + _SQL_BATCH]
+            q = ",".join("?" * len(part))
+            for key, score, fit_s, best_it in self.conn.execute(
+                f"SELECT key, score, fit_seconds, best_iteration FROM fold_results WHERE key IN ({q})",
+                part,
+            ):
+                out[key] = CachedFold(float(score), float(fit_s), None if best_it is None else int(best_it))
+        return out
+
+    def put(self, key: str, result, *, model: str, params: Dict[str, Any],
+            train_rows: int, data_fp: str, scoring: str) -> None:
+        if not np.isfinite(result.score):
+            return  # score nan/inf nao e reaproveitavel
+        self.conn.execute(
+            "INSERT OR IGNORE INTO fold_results VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+            (
+                key, model, _json(params), int(result.fold), int(train_rows), data_fp, scoring,
+                float(result.score), float(result.fit_seconds),
+                None if result.best_iteration is None else int(result.best_iteration),
+                datetime.now().isoformat(timespec="seconds"),
+            ),
+        )
+        self.conn.commit()
+
+    def log_lookup(self, *, model: str, hits: int, misses: int,
+                   saved_seconds: float, spent_seconds: float) -> None:
+        self.conn.execute(
+            "INSERT INTO lookups (ts, model, hits, misses, saved_seconds, spent_seconds) "
+            "VALUES (?,?,?,?,?,?)",
+            (datetime.now().isoformat(timespec="seconds"), model, int(hits), int(misses),
+             float(saved_seconds), float(spent_seconds)),
+        )
+        self.conn.commit()
+
+    def report(self) -> Dict[str, Any]:
+        entries = self.conn.execute(
+            "SELECT model, COUNT(*), SUM(fit_seconds) FROM fold_results GROUP BY model ORDER BY model"
+        ).fetchall()
+        looks = self.conn.execute(
+            "SELECT model, COUNT(*), SUM(hits), SUM(misses), SUM(saved_seconds), SUM(spent_seconds) "
+            "FROM lookups GROUP BY model ORDER BY model"
+        ).fetchall()
+        per_model: Dict[str, Dict[str, Any]] = {}
+        for model, n, fit_s in entries:
+            per_model.setdefault(model, {}).update(entries=int(n), stored_fit_seconds=float(fit_s or 0.0))
+        for model, searches, hits, misses, saved, spent in looks:
+            hits, misses = int(hits or 0), int(misses or 0)
+            per_model.setdefault(model, {}).update(
+                searches=int(searches),
+                hits=hits,
+                misses=misses,
+                hit_rate=(hits / (hits + misses)) if (hits + misses) else None,
+                saved_seconds=float(saved or 0.0),
+                spent_seconds=float(spent or 0.0),
+            )
+        hits = sum(m.get("hits", 0) for m in per_model.values())
+        misses = sum(m.get("misses", 0) for m in per_model.values())
+        return {
+            "path": str(self.path),
+            "entries": sum(m.get("entries", 0) for m in per_model.values()),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / (hits + misses)) if (hits + misses) else None,
+            "saved_seconds": sum(m.get("saved_seconds", 0.0) for m in per_model.values()),
+            "spent_seconds": sum(m.get("spent_seconds", 0.0) for m in per_model.values()),
+            "models": per_model,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def open_default(log=None) -> Optional[FoldCache]:
+    """FoldCache padrao, ou None se desligado/indisponivel (nunca derruba o treino)."""
+    if not enabled():
+        return None
+    try:
+        return FoldCache()
+    except Exception as e:
+        if log is not None:
+            log.warning(f"[FOLD-CACHE] indisponivel ({e}); GridSearch sem cache por fold")
+        return None
+
+
+def format_report(rep: Dict[str, Any]) -> str:
+    def pct(v):
+        return "-" if v is None else f"{100.0 * v:.1f}%"
+
+    lines: List[str] = [
+        f"fold cache: {rep['path']}",
+        f"  fits armazenados: {rep['entries']:,}",
+        f"  lookups: hits={rep['hits']:,} misses={rep['misses']:,} hit_rate={pct(rep['hit_rate'])}",
+        f"  fit-seconds economizados: {rep['saved_seconds']:.1f}s "
+        f"(gastos em fits novos: {rep['spent_seconds']:.1f}s)",
+    ]
+    if rep["models"]:
+        lines.append("")
+        lines.append(f"  {'modelo':<28}{'fits':>8}{'buscas':>8}{'hits':>8}{'misses':>8}{'hit%':>8}{'salvo(s)':>12}")
+        for model, m in rep["models"].items():
+            lines.append(
+                f"  {model:<28}{m.get('entries', 0):>8}{m.get('searches', 0):>8}{m.get('hits', 0):>8}"
+                f"{m.get('misses', 0):>8}{pct(m.get('hit_rate')):>8}{m.get('saved_seconds', 0.0):>12.1f}"
+            )
+    return "\n".join(lines)
@@ -23,6 +23,7 @@ JSON contem:
       "scoring": "...",
       "saved_at": "ISO-8601",
       "source_run": "...",   # opcional, para debug
+      "search": {...},       # opcional: resumo do executor (rungs do halving)
     }
 """
 from __future__ import annotations
@@ -108,6 +109,7 @@ def save_best_params(
     best_score: Optional[float] = None,
     scoring: Optional[str] = None,
     source_run: Optional[str] = None,
+    search: Optional[Dict[str, Any]] = None,
     log=None,
 ) -> Path:
     p = cache_path(model, scenario, grid_mode, grid)
@@ -123,6 +125,9 @@ def save_best_params(
         "saved_at": datetime.now().isoformat(timespec="seconds"),
         "source_run": source_run,
     }
+    if search:
+        # Resumo do executor (ex.: rungs do halving) so para auditoria.
+        payload["search"] = search
     p.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
     if log is not None:
         log.info(f"[GS-CACHE] SAVE disco: {p.name}")
@@ -0,0 +1,286 @@
+"""Imputacao KNN por arvore (KD/Ball tree), doadores por coluna como no KNNImputer.
+
+Motivacao: modeling_build_datasets._impute_block usava KNNImputer, que no
+transform calcula nan_euclidean de cada bloco contra TODO o fit set (forca
+bruta, O(n_query x n_fit x n_cols)). Por isso o fit era limitado a 80k
+linhas (--knn-fit-max-rows) e havia --knn-group-by-month so para terminar.
+
+Aqui o fit set sao todas as linhas do bloco, e a busca de vizinhos e exata
+por arvore:
+    - as linhas a imputar sao agrupadas pelo padrao de missing (obs, miss);
+      como no KNNImputer, o doador de uma coluna faltante j precisa ter j
+      observada, e aqui tambem todas as colunas de obs. Colunas de miss com
+      o mesmo conjunto de doadores dividem a busca;
+    - contra esses doadores a distancia nan_euclidean e a euclidiana nas
+      colunas observadas vezes uma constante (sqrt(n_cols / n_obs)), entao
+      os k vizinhos e os pesos normalizados de weights="distance" sao os
+      mesmos do KNNImputer restrito a esses doadores;
+    - grupo com muitas linhas: uma arvore (sklearn KDTree/BallTree) nas
+      colunas observadas, consultada em blocos; grupo raro: forca bruta
+      (NearestNeighbors brute) so para aquelas linhas;
+    - blocos e grupos rodam num ThreadPoolExecutor (a consulta das arvores
+      do sklearn libera o GIL).
+
+Diferenca para o KNNImputer: o doador precisa ter todas as colunas de obs
+(o KNNImputer aceita doador com NaN em parte delas, medindo a distancia so
+no que as duas linhas tem em comum). Uma coluna faltando em trechos
+inteiros (radiacao na Base E) nao restringe os doadores das outras.
+validate_masked mede o efeito: mascara valores conhecidos de linhas
+separadas do fit, completas ou nao (com padroes de missing reais do bloco),
+e compara o RMSE dos backends.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.ml import _resource as resource  # noqa: E402
+
+BACKENDS = ("tree", "sklearn")
+
+
+class TreeKNNImputer:
+    """Mesma interface fit/transform do KNNImputer (arrays float, NaN = missing)."""
+
+    def __init__(
+        self,
+        n_neighbors: int = 5,
+        weights: str = "uniform",
+        algorithm: str = "kd_tree",
+        leaf_size: int = 40,
+        chunk_rows: int = 50_000,
+        min_tree_rows: int = 256,
+        n_jobs: Optional[int] = None,
+    ):
+        if weights not in ("uniform", "distance"):
+            raise ValueError(f"weights invalido: {weights!r}")
+        if algorithm not in ("kd_tree", "ball_tree"):
+            raise ValueError(f"algorithm invalido: {algorithm!r}")
+        self.n_neighbors = int(n_neighbors)
+        self.weights = weights
+        self.algorithm = algorithm
+        self.leaf_size = int(leaf_size)
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.min_tree_rows = int(min_tree_rows)
+        self.n_jobs = n_jobs
+
+    def fit(self, X: np.ndarray) -> "TreeKNNImputer":
+        X = np.asarray(X)
+        # Coluna toda NaN nao tem doador: fica de fora.
+        self.valid_cols_ = ~np.isnan(X).all(axis=0)
+        Xv = X[:, self.valid_cols_]
+        observed = ~np.isnan(Xv)
+        keep = observed.any(axis=1)
+        self.fit_X_ = np.ascontiguousarray(Xv[keep], dtype=np.float64)
+        self.fit_observed_ = np.ascontiguousarray(observed[keep])
+        with np.errstate(invalid="ignore"):
+            self.col_means_ = np.nanmean(Xv, axis=0)
+        return self
+
+    @property
+    def n_fit_rows_(self) -> int:
+        """Linhas do fit com ao menos um valor observado (doadores possiveis)."""
+        return int(self.fit_X_.shape[0])
+
+    # ------------------------------------------------------------------
+    def _donor_groups(self, obs: np.ndarray, miss: np.ndarray):
+        """[(colunas de miss, linhas doadoras)]: doador observado em obs e na coluna."""
+        cand = np.flatnonzero(self.fit_observed_[:, obs].all(axis=1))
+        avail = self.fit_observed_[np.ix_(cand, miss)]
+        if avail.all():
+            return [(miss, cand)]
+        _, first, inverse = np.unique(np.packbits(avail, axis=0).T, axis=0,
+                                      return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        return [(miss[inverse == g], cand[avail[:, j]]) for g, j in enumerate(first)]
+
+    def _neighbors_tree(self, obs: np.ndarray, donors: np.ndarray):
+        from sklearn.neighbors import BallTree, KDTree
+
+        cls = KDTree if self.algorithm == "kd_tree" else BallTree
+        return cls(self.fit_X_[np.ix_(donors, obs)], leaf_size=self.leaf_size)
+
+    def _fill(self, Q: np.ndarray, out: np.ndarray, rows: np.ndarray, obs: np.ndarray,
+              cols: np.ndarray, donors: np.ndarray, index, k: int) -> None:
+        dist, ind = index.query(Q[:, obs], k=k) if hasattr(index, "query") else \
+            index.kneighbors(Q[:, obs], n_neighbors=k)
+        # Indexa so (vizinho, coluna faltante): fit_X_[donors][:, cols]
+        # copiaria todos os doadores a cada chunk.
+        vals_k = self.fit_X_[donors[ind][..., None], cols]  # (q, k, n_cols)
+        if self.weights == "uniform":
+            vals = vals_k.mean(axis=1)
+        else:
+            zero = dist == 0
+            with np.errstate(divide="ignore"):
+                w = np.where(zero.any(axis=1, keepdims=True), zero.astype(np.float64), 1.0 / dist)
+            vals = np.einsum("qk,qkm->qm", w, vals_k) / w.sum(axis=1, keepdims=True)
+        out[np.ix_(rows, cols)] = vals
+
+    def _pattern_task(self, X: np.ndarray, out: np.ndarray, rows: np.ndarray, obs: np.ndarray,
+                      cols: np.ndarray, donors: np.ndarray, k: int, index=None) -> None:
+        if index is None:
+            from sklearn.neighbors import NearestNeighbors
+
+            index = NearestNeighbors(algorithm="brute").fit(self.fit_X_[np.ix_(donors, obs)])
+        self._fill(X[rows], out, rows, obs, cols, donors, index, k)
+
+    def transform(self, X: np.ndarray, log=None, heartbeat_sec: float = 20.0) -> np.ndarray:
+        X_in = np.asarray(X)
+        Xv = X_in[:, self.valid_cols_].astype(np.float64)
+        out = Xv.copy()
+        mask = np.isnan(Xv)
+        todo = np.flatnonzero(mask.any(axis=1))
+        if todo.size == 0:
+            return self._restore(X_in, out)
+
+        if self.n_fit_rows_ == 0:
+            # Sem doador: cai na media da coluna (mesmo fallback do KNNImputer).
+            out[mask] = np.take(self.col_means_, np.nonzero(mask)[1])
+            return self._restore(X_in, out)
+
+        packed = np.packbits(mask[todo], axis=1)
+        _, first, inverse = np.unique(packed, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(inverse, minlength=len(first)))]
+
+        patterns = []
+        for p in range(len(first)):
+            rows = todo[order[bounds[p]:bounds[p + 1]]]
+            m = mask[rows[0]]
+            patterns.append((rows, np.flatnonzero(~m), np.flatnonzero(m)))
+        patterns.sort(key=lambda t: -len(t[0]))
+
+        n_workers = int(self.n_jobs or resource.cpu_thread_budget())
+        t0 = time.perf_counter()
+        last = t0
+        done = 0
+        n_tree = 0
+        with ThreadPoolExecutor(max_workers=max(1, n_workers), thread_name_prefix="knn-impute") as pool:
+            futs = []
+            for rows, obs, miss in patterns:
+                if obs.size == 0:
+                    out[np.ix_(rows, miss)] = self.col_means_[miss]
+                    continue
+                for cols, donors in self._donor_groups(obs, miss):
+                    share = len(cols) / len(miss)  # progresso em linhas do padrao
+                    k = min(self.n_neighbors, donors.size)
+                    if k == 0:
+                        # Coluna sem doador neste padrao: media (como o KNNImputer).
+                        out[np.ix_(rows, cols)] = self.col_means_[cols]
+                        continue
+                    if len(rows) < self.min_tree_rows:
+                        futs.append((len(rows) * share, pool.submit(
+                            self._pattern_task, Xv, out, rows, obs, cols, donors, k)))
+                        continue
+                    n_tree += 1
+                    tree = self._neighbors_tree(obs, donors)
+                    for a in range(0, len(rows), self.chunk_rows):
+                        part = rows[a:a + self.chunk_rows]
+                        futs.append((len(part) * share, pool.submit(
+                            self._pattern_task, Xv, out, part, obs, cols, donors, k, tree)))
+            for n, fut in futs:
+                fut.result()
+                done += n
+                now = time.perf_counter()
+                if log is not None and (now - last) >= heartbeat_sec:
+                    log.info(f"[KNN] Progresso: {done:,.0f}/{todo.size} linhas imputadas "
+                             f"({done / todo.size:.1%}) | {done / max(1e-9, now - t0):,.0f} lin/s")
+                    last = now
+        if log is not None:
+            log.info(
+                f"[KNN] tree: {todo.size} linhas com NaN em {len(patterns)} padroes de missing "
+                f"({n_tree} com arvore) | workers={n_workers} | {time.perf_counter() - t0:.1f}s"
+            )
+        return self._restore(X_in, out)
+
+    def _restore(self, X_in: np.ndarray, out_valid: np.ndarray) -> np.ndarray:
+        out = np.array(X_in, dtype=np.float64, copy=True)
+        out[:, self.valid_cols_] = out_valid
+        return out
+
+
+def make_imputer(backend: str, *, n_neighbors: int, weights: str, **kw: Any):
+    """backend 'tree' -> TreeKNNImputer; 'sklearn' -> KNNImputer."""
+    if backend == "tree":
+        return TreeKNNImputer(n_neighbors=n_neighbors, weights=weights, **kw)
+    if backend == "sklearn":
+        from sklearn.impute import KNNImputer
+
+        return KNNImputer(n_neighbors=n_neighbors, weights=weights)
+    raise ValueError(f"backend KNN desconhecido: {backend!r} (opcoes: {BACKENDS})")
+
+
+def validate_masked(
+    X: np.ndarray,
+    imputers: Dict[str, Callable[[np.ndarray], Any]],
+    *,
+    n_rows: int = 5_000,
+    seed: int = 42,
+) -> Dict[str, Dict[str, float]]:
+    """RMSE de cada imputer em valores conhecidos mascarados.
+
+    Separa ate n_rows linhas (fora do fit), completas ou nao, com ao menos
+    duas colunas observadas; aplica nelas padroes de missing sorteados das
+    linhas incompletas de X, so sobre o que a linha tem observado, e imputa.
+    Linha que ficaria sem nenhum valor observado nao entra. imputers:
+    nome -> callable(X_fit) que devolve o imputer ja ajustado.
+    Saida por nome: rmse, nrmse (RMSE / desvio da coluna, medio), fit_s,
+    transform_s, n_masked.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    nan = np.isnan(X)
+    valid = ~nan.all(axis=0)
+    observed = ~nan & valid
+    n_obs = observed.sum(axis=1)
+    cand = np.flatnonzero(n_obs >= 2)
+    incomplete = np.flatnonzero(nan[:, valid].any(axis=1))
+    if cand.size < 2 or incomplete.size == 0:
+        return {}
+    hold = np.sort(rng.choice(cand, size=min(int(n_rows), cand.size // 2), replace=False))
+    keep = np.ones(len(X), dtype=bool)
+    keep[hold] = False
+    X_fit = X[keep]
+    truth = X[hold]
+    pat = nan[rng.choice(incomplete, size=hold.size, replace=True)] & observed[hold]
+    pat[pat.sum(axis=1) == n_obs[hold]] = False
+    X_q = truth.copy()
+    X_q[pat] = np.nan
+    std = np.nanstd(X_fit, axis=0)
+    std[~(std > 0)] = 1.0
+
+    out: Dict[str, Dict[str, float]] = {}
+    for name, factory in imputers.items():
+        t0 = time.perf_counter()
+        imp = factory(X_fit)
+        t1 = time.perf_counter()
+        got = np.asarray(imp.transform(X_q), dtype=np.float64)
+        t2 = time.perf_counter()
+        err = (got - truth)[pat]
+        cols = np.nonzero(pat)[1]
+        out[name] = {
+            "rmse": float(np.sqrt(np.nanmean(err ** 2))),
+            "nrmse": float(np.sqrt(np.nanmean((err / std[cols]) ** 2))),
+            "fit_s": t1 - t0,
+            "transform_s": t2 - t1,
+            "n_masked": int(pat.sum()),
+        }
+    return out
+
+
+def format_validation(rep: Dict[str, Dict[str, float]]) -> List[str]:
+    return [
+        f"{name}: rmse={r['rmse']:.4f} nrmse={r['nrmse']:.4f} "
+        f"fit={r['fit_s']:.1f}s transform={r['transform_s']:.1f}s (n={r['n_masked']})"
+        for name, r in rep.items()
+    ]
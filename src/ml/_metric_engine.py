@@ -0,0 +1,208 @@
+"""Motor de metricas binarias: ordena os scores uma vez, deriva tudo dali.
+
+Motivacao: TCCMetrics.calculate chamava confusion_matrix, precision, recall,
+f1, roc_auc_score, average_precision_score e brier_score_loss em separado, e
+model_eval_viz ainda roc_curve + precision_recall_curve. Cada chamada revalida
+e reordena os mesmos arrays de milhoes de linhas; avaliar N thresholds
+custava N passadas.
+
+Aqui SortedScores faz um unico argsort (mergesort, mesmo do
+sklearn._binary_clf_curve) e guarda tp/fp acumulados por threshold distinto.
+A partir disso, em O(n log n) no total:
+    - roc_curve / precision_recall_curve / roc_auc / average_precision
+      (mesmos pontos e valores do sklearn);
+    - matriz de confusao em qualquer quantidade de thresholds (searchsorted);
+    - varredura de thresholds (best-F1, recall@precision, alertas/dia).
+
+Alertas/dia: (tp + fp * neg_weight) / n_days. neg_weight compensa o
+downsampling de negativos do split de teste (negativos na fonte / negativos
+avaliados); sem essa informacao use 1.0 (alertas na amostra avaliada).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION_TARGETS = (0.3, 0.5, 0.7, 0.9)
+DEFAULT_ALERT_BUDGETS = (1.0, 5.0, 10.0, 50.0)
+DEFAULT_GRID_POINTS = 1001
+
+
+class SortedScores:
+    """y_true binario + scores, ordenados uma vez (desc) com contagens acumuladas."""
+
+    def __init__(self, y_true, y_score):
+        y = np.asarray(y_true).astype(np.int8, copy=False).ravel()
+        s = np.asarray(y_score, dtype=np.float64).ravel()
+        if y.shape != s.shape:
+            raise ValueError(f"y_true e y_score com tamanhos diferentes: {y.shape} vs {s.shape}")
+        order = np.argsort(s, kind="mergesort")[::-1]
+        s_sorted = s[order]
+        y_sorted = y[order]
+        # Ultimo indice de cada bloco de scores iguais (thresholds distintos, desc).
+        idx = np.r_[np.flatnonzero(np.diff(s_sorted)), s.size - 1] if s.size else np.empty(0, dtype=np.int64)
+        cum_pos = np.cumsum(y_sorted, dtype=np.int64)
+        self.thresholds = s_sorted[idx]
+        self.tps = cum_pos[idx] if s.size else np.empty(0, dtype=np.int64)
+        self.fps = (idx + 1) - self.tps
+        self.n = int(s.size)
+        self.n_pos = int(cum_pos[-1]) if s.size else 0
+        self.n_neg = self.n - self.n_pos
+
+    # ------------------------------------------------------------------
+    # Contagens em thresholds arbitrarios (predicao = score >= thr)
+    # ------------------------------------------------------------------
+    def counts_at(self, thr) -> Dict[str, np.ndarray]:
+        t = np.atleast_1d(np.asarray(thr, dtype=np.float64))
+        # k = quantos thresholds distintos sao >= t
+        k = np.searchsorted(-self.thresholds, -t, side="right")
+        tp = np.r_[0, self.tps][k]
+        fp = np.r_[0, self.fps][k]
+        return {"tp": tp, "fp": fp, "fn": self.n_pos - tp, "tn": self.n_neg - fp}
+
+    def confusion(self, thr: float) -> Dict[str, int]:
+        c = self.counts_at(thr)
+        return {"tn": int(c["tn"][0]), "fp": int(c["fp"][0]), "fn": int(c["fn"][0]), "tp": int(c["tp"][0])}
+
+    # ------------------------------------------------------------------
+    # Curvas e areas (mesmos pontos do sklearn)
+    # ------------------------------------------------------------------
+    def roc_curve(self, drop_intermediate: bool = True):
+        fps, tps, thr = self.fps, self.tps, self.thresholds
+        if drop_intermediate and len(fps) > 2:
+            keep = np.flatnonzero(np.r_[True, np.logical_or(np.diff(fps, 2), np.diff(tps, 2)), True])
+            fps, tps, thr = fps[keep], tps[keep], thr[keep]
+        fps = np.r_[0, fps]
+        tps = np.r_[0, tps]
+        thr = np.r_[np.inf, thr]
+        fpr = fps / fps[-1] if fps[-1] > 0 else np.full(fps.shape, np.nan)
+        tpr = tps / tps[-1] if tps[-1] > 0 else np.full(tps.shape, np.nan)
+        return fpr, tpr, thr
+
+    def roc_auc(self) -> Optional[float]:
+        if self.n_pos == 0 or self.n_neg == 0:
+            return None  # sklearn levanta ValueError com uma classe so
+        fpr, tpr, _ = self.roc_curve(drop_intermediate=True)
+        return float(np.trapezoid(tpr, fpr) if hasattr(np, "trapezoid") else np.trapz(tpr, fpr))
+
+    def _precision_recall(self):
+        ps = self.tps + self.fps
+        precision = np.zeros(len(self.tps), dtype=np.float64)
+        np.divide(self.tps, ps, out=precision, where=(ps != 0))
+        if self.n_pos == 0:
+            recall = np.ones(len(self.tps), dtype=np.float64)
+        else:
+            recall = self.tps / self.n_pos
+        return precision, recall
+
+    def precision_recall_curve(self):
+        precision, recall = self._precision_recall()
+        return np.r_[precision[::-1], 1.0], np.r_[recall[::-1], 0.0], self.thresholds[::-1]
+
+    def average_precision(self) -> Optional[float]:
+        if self.n == 0:
+            return None
+        precision, recall, _ = self.precision_recall_curve()
+        return float(-np.sum(np.diff(recall) * precision[:-1]))
+
+    # ------------------------------------------------------------------
+    # Varredura de thresholds
+    # ------------------------------------------------------------------
+    def sweep(
+        self,
+        thresholds: Optional[Iterable[float]] = None,
+        *,
+        n_days: Optional[float] = None,
+        neg_weight: float = 1.0,
+    ) -> pd.DataFrame:
+        """Tabela por threshold (default: grade de 0 a 1 com DEFAULT_GRID_POINTS)."""
+        t = (np.linspace(0.0, 1.0, DEFAULT_GRID_POINTS) if thresholds is None
+             else np.asarray(list(thresholds), dtype=np.float64))
+        c = self.counts_at(t)
+        tp, fp, fn, tn = (c[k].astype(np.float64) for k in ("tp", "fp", "fn", "tn"))
+        df = pd.DataFrame({
+            "threshold": t,
+            "tp": c["tp"], "fp": c["fp"], "fn": c["fn"], "tn": c["tn"],
+            "precision": _ratio(tp, tp + fp),
+            "recall": _ratio(tp, tp + fn),
+            "f1": _ratio(2 * tp, 2 * tp + fp + fn),
+            "specificity": _ratio(tn, tn + fp),
+        })
+        if n_days:
+            df["alerts_per_day"] = (tp + fp * float(neg_weight)) / float(n_days)
+        return df
+
+    def _point(self, k: int, precision: np.ndarray, recall: np.ndarray,
+               n_days: Optional[float], neg_weight: float) -> Dict[str, Any]:
+        tp, fp = int(self.tps[k]), int(self.fps[k])
+        f1_den = tp + fp + self.n_pos
+        out = {
+            "threshold": float(self.thresholds[k]),
+            "precision": float(precision[k]),
+            "recall": float(recall[k]) if self.n_pos else 0.0,
+            "f1": float(2 * tp / f1_den) if f1_den else 0.0,
+            "tp": tp,
+            "fp": fp,
+        }
+        if n_days:
+            out["alerts_per_day"] = float((tp + fp * neg_weight) / n_days)
+        return out
+
+    def sweep_summary(
+        self,
+        *,
+        precision_targets: Sequence[float] = DEFAULT_PRECISION_TARGETS,
+        alert_budgets: Sequence[float] = DEFAULT_ALERT_BUDGETS,
+        n_days: Optional[float] = None,
+        neg_weight: float = 1.0,
+    ) -> Dict[str, Any]:
+        """Thresholds operacionais, exatos sobre todos os thresholds distintos.
+
+        - best_f1: maior F1;
+        - recall_at_precision[p]: menor threshold com precision >= p (maior recall);
+        - alerts_per_day[b]: menor threshold com alertas/dia <= b.
+        """
+        out: Dict[str, Any] = {
+            "n": self.n,
+            "n_pos": self.n_pos,
+            "n_days": None if not n_days else float(n_days),
+            "neg_weight": float(neg_weight),
+            "best_f1": None,
+            "recall_at_precision": {},
+            "alerts_per_day": {},
+        }
+        if self.n == 0:
+            return out
+        precision, recall = self._precision_recall()
+        f1_den = self.tps + self.fps + self.n_pos
+        f1 = _ratio(2.0 * self.tps, f1_den.astype(np.float64))
+        out["best_f1"] = self._point(int(np.argmax(f1)), precision, recall, n_days, neg_weight)
+
+        for p in precision_targets:
+            ok = np.flatnonzero(precision >= float(p))
+            out["recall_at_precision"][f"{float(p):g}"] = (
+                None if ok.size == 0 else self._point(int(ok[-1]), precision, recall, n_days, neg_weight)
+            )
+
+        if n_days:
+            alerts = (self.tps + self.fps * float(neg_weight)) / float(n_days)  # crescente em k
+            for b in alert_budgets:
+                k = int(np.searchsorted(alerts, float(b), side="right")) - 1
+                out["alerts_per_day"][f"{float(b):g}"] = (
+                    None if k < 0 else self._point(k, precision, recall, n_days, neg_weight)
+                )
+        return out
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    out = np.zeros(np.shape(num), dtype=np.float64)
+    np.divide(num, den, out=out, where=(den != 0))
+    return out
+
+
+def brier(y_true, y_proba) -> float:
+    y = np.asarray(y_true, dtype=np.float64)
+    p = np.asarray(y_proba, dtype=np.float64)
+    return float(np.mean((y - p) ** 2))
@@ -0,0 +1,287 @@
+"""GridSearch paralelo por (candidato, fold) com X compartilhado via memmap.
+
+Motivacao: ModelOptimizer rodava GridSearchCV com n_jobs=1 porque, com
+n_jobs>1, cada worker recebia sua propria copia de X (multi-GiB nos cenarios
+minirocket/calculated). RF e XGB forcavam GridSearch serial: K folds x N
+candidatos em sequencia, com a maior parte dos cores ociosa.
+
+Aqui X e gravado UMA vez como float32 column-major (.npy) e aberto por cada
+worker com np.load(mmap_mode="c"): as paginas vem do page cache e sao
+compartilhadas entre processos, entao a RAM nao cresce com o numero de
+workers. Cada tarefa leva so (params do candidato, fold, intervalos de
+linhas); como os folds do TimeSeriesSplit sao intervalos contiguos, X[a:b]
+e uma view do memmap, sem copia.
+
+O numero de workers vem de _resource.recommend_n_jobs (RAM disponivel +
+cores fisicos) e as threads BLAS/OMP/XGB de cada fit sao divididas entre
+eles. A selecao do melhor candidato e a mesma do GridSearchCV (maior media
+do score nos folds; empate -> primeiro na ordem de ParameterGrid).
+
+Desligar: TRAIN_RUNNER_GS_PARALLEL=0. Forcar numero de workers:
+TRAIN_RUNNER_GS_WORKERS=N.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.ml import _resource as resource  # noqa: E402
+
+Range = Tuple[int, int]
+
+
+def enabled() -> bool:
+    return os.environ.get("TRAIN_RUNNER_GS_PARALLEL", "1").strip().lower() not in (
+        "0", "false", "no", "off",
+    )
+
+
+def _cache_root() -> Path:
+    """Diretorio dos memmaps temporarios (disco, nao /tmp que pode ser tmpfs)."""
+    try:
+        from src.utils import loadConfig
+        cfg = loadConfig()
+        article_root = Path(cfg["paths"]["data"].get("article")
+                            or (_project_root / "data" / "_article"))
+    except Exception:
+        article_root = _project_root / "data" / "_article"
+    p = article_root / "_caches" / "gs_memmap"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def fold_ranges(folds: List[Tuple[np.ndarray, np.ndarray]]) -> List[Tuple[Range, Range]]:
+    """(train, test) de cada fold como intervalos [a, b); exige indices contiguos."""
+    out: List[Tuple[Range, Range]] = []
+    for tr, te in folds:
+        rr = []
+        for idx in (tr, te):
+            a, b = int(idx[0]), int(idx[-1]) + 1
+            if b - a != len(idx):
+                raise ValueError("fold com indices nao contiguos; memmap exige intervalos")
+            rr.append((a, b))
+        out.append((rr[0], rr[1]))
+    return out
+
+
+def recommend_workers(n_rows: int, n_features: int, n_tasks: int, *, use_smote: bool, log=None) -> int:
+    forced = os.environ.get("TRAIN_RUNNER_GS_WORKERS", "").strip()
+    if forced:
+        return max(1, min(int(forced), n_tasks))
+    n = resource.recommend_n_jobs(
+        n_rows=n_rows,
+        n_features=n_features,
+        # SMOTE materializa X_fold + sinteticos por worker; o resto le do memmap.
+        bootstrap_overhead_factor=(1.0 if use_smote else 0.15),
+        log=log,
+    )
+    return max(1, min(n, n_tasks))
+
+
+class SharedXy:
+    """X float32 (F-order) + y int8 gravados uma vez em .npy; removidos no close()."""
+
+    def __init__(self, X, y: np.ndarray, root: Optional[Path] = None):
+        self.dir = Path(tempfile.mkdtemp(prefix=f"gs_{os.getpid()}_", dir=str(root or _cache_root())))
+        self.x_path = self.dir / "X.npy"
+        self.y_path = self.dir / "y.npy"
+        n = int(len(y))
+        cols = list(X.columns) if hasattr(X, "columns") else None
+        n_feat = int(X.shape[1])
+        mm = np.lib.format.open_memmap(
+            self.x_path, mode="w+", dtype=np.float32, shape=(n, n_feat), fortran_order=True,
+        )
+        for j in range(n_feat):
+            col = X[cols[j]].to_numpy() if cols is not None else np.asarray(X)[:, j]
+            mm[:, j] = col
+        mm.flush()
+        del mm
+        np.save(self.y_path, np.asarray(y, dtype=np.int8))
+        self.shape = (n, n_feat)
+
+    def close(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+# ----------------------------------------------------------------------------
+# Lado do worker
+# ----------------------------------------------------------------------------
+_W: Dict[str, Any] = {}
+
+
+def _init_worker(x_path: str, y_path: str, pipe, scoring: str, threads: int) -> None:
+    resource.apply_thread_limits(threads)
+    from sklearn.metrics import get_scorer
+
+    _W["X"] = np.load(x_path, mmap_mode="c")
+    _W["y"] = np.load(y_path, mmap_mode="c")
+    _W["pipe"] = pipe
+    _W["scorer"] = get_scorer(scoring)
+    _W["threads"] = int(threads)
+
+
+def _rows(a, start: int, stop: int, copy: bool):
+    part = a.iloc[start:stop] if hasattr(a, "iloc") else a[start:stop]
+    return part.copy() if copy else part
+
+
+def _fit_one(X, y, pipe, scorer, threads: Optional[int], task: "FoldTask", copy: bool = False) -> "FoldResult":
+    """clone + set_params + fit no intervalo de treino + score no de teste.
+
+    Com task.val, o fim do treino do fold vira eval_set (early stopping nativo
+    do XGBoost via model__early_stopping_rounds nos params). copy=True copia
+    os intervalos (como o _safe_indexing do GridSearchCV): o scaler com
+    copy=False transforma in-place. Sem copia (worker) os passos do clone
+    recebem copy=True: o memmap "c" so protege o arquivo, a escrita in-place
+    ficaria no X do processo e contaminaria as proximas tarefas do worker.
+    """
+    from sklearn.base import clone
+
+    est = clone(pipe).set_params(**task.params)
+    if not copy:
+        in_place = {k: True for k, v in est.get_params().items() if k.endswith("__copy") and v is False}
+        if in_place:
+            est.set_params(**in_place)
+    if threads is not None and "model__n_jobs" in est.get_params():
+        est.set_params(model__n_jobs=threads)
+    (a, b), (c, d) = task.train, task.test
+    fit_kw: Dict[str, Any] = {}
+    if task.val is not None:
+        v0, v1 = task.val
+        b = v0
+        fit_kw = {
+            "model__eval_set": [(_rows(X, v0, v1, copy), _rows(y, v0, v1, copy))],
+            "model__verbose": False,
+        }
+    with warnings.catch_warnings(record=True) as wlist:
+        warnings.simplefilter("always")
+        t0 = time.perf_counter()
+        est.fit(_rows(X, a, b, copy), _rows(y, a, b, copy), **fit_kw)
+        fit_s = time.perf_counter() - t0
+        score = float(scorer(est, _rows(X, c, d, copy), _rows(y, c, d, copy)))
+    model = est.named_steps["model"] if hasattr(est, "named_steps") else est
+    best_it = getattr(model, "best_iteration", None) if task.val is not None else None
+    msgs = [(getattr(w.category, "__name__", "Warning"), str(w.message)) for w in wlist]
+    return FoldResult(
+        task.cand, task.fold, score, fit_s, msgs,
+        best_iteration=None if best_it is None else int(best_it),
+    )
+
+
+def _fit_score(task: "FoldTask") -> "FoldResult":
+    return _fit_one(_W["X"], _W["y"], _W["pipe"], _W["scorer"], _W["threads"], task)
+
+
+@dataclass
+class FoldTask:
+    cand: int
+    fold: int
+    params: Dict[str, Any]
+    train: Range
+    test: Range
+    val: Optional[Range] = None  # sub-intervalo final de train usado como eval_set
+
+
+@dataclass
+class FoldResult:
+    cand: int
+    fold: int
+    score: float
+    fit_seconds: float
+    warnings: List[Tuple[str, str]] = field(default_factory=list)
+    best_iteration: Optional[int] = None
+
+
+def run_fold_tasks_serial(
+    pipe,
+    tasks: List[FoldTask],
+    X,
+    y,
+    scoring: str,
+    log=None,
+    on_result: Optional[Callable[[FoldResult], None]] = None,
+) -> List[FoldResult]:
+    """Mesmas tarefas no processo atual (X DataFrame/ndarray, sem memmap)."""
+    from sklearn.metrics import get_scorer
+
+    scorer = get_scorer(scoring)
+    results: List[FoldResult] = []
+    for t in tasks:
+        r = _fit_one(X, y, pipe, scorer, None, t, copy=True)
+        results.append(r)
+        if on_result is not None:
+            on_result(r)
+        if log is not None:
+            log.debug(
+                f"[GridSearch][SER] cand={r.cand} fold={r.fold} "
+                f"score={r.score:.6f} fit={r.fit_seconds:.1f}s"
+            )
+    return results
+
+
+def _mp_context():
+    # forkserver: filhos partem de um processo limpo (fork depois de o pai
+    # ja ter inicializado OpenMP/XGBoost pode travar no libgomp).
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def run_fold_tasks(
+    pipe,
+    tasks: List[FoldTask],
+    shared: SharedXy,
+    scoring: str,
+    n_workers: int,
+    log=None,
+    on_result: Optional[Callable[[FoldResult], None]] = None,
+) -> List[FoldResult]:
+    """Executa as tarefas no pool; a primeira excecao cancela o resto e sobe.
+
+    on_result e chamado no processo pai a cada fit concluido (fold cache).
+    """
+    threads = max(1, resource.physical_cores() // max(1, n_workers))
+    # Maiores primeiro (fold final do TimeSeriesSplit tem o maior treino).
+    order = sorted(tasks, key=lambda t: t.train[1] - t.train[0], reverse=True)
+    results: List[FoldResult] = []
+    with ProcessPoolExecutor(
+        max_workers=int(n_workers),
+        mp_context=_mp_context(),
+        initializer=_init_worker,
+        initargs=(str(shared.x_path), str(shared.y_path), pipe, scoring, threads),
+    ) as pool:
+        pending = {pool.submit(_fit_score, t) for t in order}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_EXCEPTION)
+            for fut in done:
+                exc = fut.exception()
+                if exc is not None:
+                    for p in pending:
+                        p.cancel()
+                    raise exc
+                r = fut.result()
+                results.append(r)
+                if on_result is not None:
+                    on_result(r)
+                if log is not None:
+                    log.debug(
+                        f"[GridSearch][PAR] cand={r.cand} fold={r.fold} "
+                        f"score={r.score:.6f} fit={r.fit_seconds:.1f}s"
+                    )
+            if log is not None and results and len(results) % max(1, len(tasks) // 10) == 0:
+                log.info(f"[GridSearch][PAR] {len(results)}/{len(tasks)} fits concluidos")
+    return results
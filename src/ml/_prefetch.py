@@ -0,0 +1,193 @@
+"""Leitura com prefetch (threads) e orcamento de memoria para load_split_batched.
+
+Motivacao: o load lia os parquets estritamente em sequencia: decodifica um
+record batch, converte para pandas, filtra e amostra na thread principal;
+a CPU ficava ociosa durante o I/O e o disco ocioso durante a decodificacao.
+
+Aqui um ThreadPoolExecutor pequeno roda o gerador de chunks de cada arquivo
+(pyarrow libera o GIL na decodificacao/cast) e enfileira os chunks prontos,
+enquanto a thread principal consome os arquivos NA ORDEM ORIGINAL. Como cada
+arquivo continua sendo lido pelo mesmo gerador (mesmos limites de batch) e o
+consumo e ordenado, o resultado e os seeds do downsampling sao identicos ao
+caminho sequencial.
+
+Orcamento: a soma dos bytes de chunks decodificados e ainda nao consumidos
+fica limitada a `budget_bytes` (mais um chunk). Todos os produtores esperam
+quando o orcamento esta cheio, inclusive o do arquivo que a thread principal
+esta consumindo; este so passa direto quando nao tem nenhum chunk proprio na
+fila (senao o orcamento cheio de arquivos futuros travaria o pipeline).
+
+Uso:
+    timings = StageTimings()
+    for src, chunks in prefetch_ordered(files, open_iter, workers=4,
+                                        budget_bytes=1 << 30, nbytes=size_fn):
+        for chunk in chunks:
+            ...
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple, TypeVar
+
+S = TypeVar("S")
+C = TypeVar("C")
+
+_END = object()
+
+
+class _Failure:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class StageTimings:
+    """Acumulador thread-safe de segundos por etapa (read/cast/filter/...)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+
+    def add(self, key: str, sec: float) -> None:
+        with self._lock:
+            self.seconds[key] = self.seconds.get(key, 0.0) + float(sec)
+
+    @contextmanager
+    def timed(self, key: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(key, time.perf_counter() - t0)
+
+    def format(self, keys: List[str]) -> str:
+        return " ".join(f"{k}={self.seconds.get(k, 0.0):.2f}s" for k in keys)
+
+
+class _BudgetGate:
+    def __init__(self, budget_bytes: int) -> None:
+        self.budget = max(1, int(budget_bytes))
+        self.used = 0
+        self.head = 0
+        self.queued: Dict[int, int] = {}
+        self.stopped = False
+        self.peak = 0
+        self._cv = threading.Condition()
+
+    def acquire(self, nbytes: int, source_idx: int) -> bool:
+        with self._cv:
+            while not self.stopped and self._must_wait(nbytes, source_idx):
+                self._cv.wait(timeout=1.0)
+            if self.stopped:
+                return False
+            self.used += nbytes
+            self.queued[source_idx] = self.queued.get(source_idx, 0) + nbytes
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def _must_wait(self, nbytes: int, source_idx: int) -> bool:
+        if self.used == 0 or self.used + nbytes <= self.budget:
+            return False
+        # Arquivo da vez sem nada na fila: o consumidor espera por ele, entao
+        # passa mesmo com o orcamento tomado por arquivos futuros.
+        return not (source_idx == self.head and self.queued.get(source_idx, 0) == 0)
+
+    def release(self, nbytes: int, source_idx: int) -> None:
+        with self._cv:
+            self.used -= nbytes
+            self.queued[source_idx] -= nbytes
+            self._cv.notify_all()
+
+    def advance(self, head: int) -> None:
+        with self._cv:
+            self.head = head
+            self._cv.notify_all()
+
+    def stop(self) -> None:
+        with self._cv:
+            self.stopped = True
+            self._cv.notify_all()
+
+
+def prefetch_ordered(
+    sources: List[S],
+    open_iter: Callable[[S], Iterator[C]],
+    *,
+    workers: int,
+    budget_bytes: int,
+    nbytes: Callable[[C], int],
+    stats: Dict[str, int] | None = None,
+) -> Iterator[Tuple[S, Iterator[C]]]:
+    """(fonte, iterador de chunks) na ordem de `sources`, com leitura antecipada.
+
+    Excecoes do produtor reaparecem no iterador de chunks da fonte, no mesmo
+    ponto em que o gerador sequencial as levantaria. Com workers <= 1 nao ha
+    threads (equivale ao loop sequencial).
+    """
+    if workers <= 1 or len(sources) <= 1:
+        for src in sources:
+            yield src, open_iter(src)
+        return
+
+    gate = _BudgetGate(budget_bytes)
+    queues: List["queue.Queue"] = [queue.Queue() for _ in sources]
+
+    def _produce(i: int, src: S) -> None:
+        q = queues[i]
+        try:
+            for chunk in open_iter(src):
+                nb = int(nbytes(chunk))
+                if not gate.acquire(nb, i):
+                    return
+                q.put((chunk, nb))
+        except BaseException as exc:  # noqa: BLE001 - repassado ao consumidor
+            q.put(_Failure(exc))
+            return
+        q.put(_END)
+
+    drained = [False] * len(sources)
+
+    def _consume(i: int) -> Iterator[C]:
+        q = queues[i]
+        while True:
+            item = q.get()
+            if item is _END:
+                drained[i] = True
+                return
+            if isinstance(item, _Failure):
+                drained[i] = True
+                raise item.exc
+            chunk, nb = item
+            gate.release(nb, i)
+            yield chunk
+
+    def _drain(i: int) -> None:
+        # Consumidor parou antes do fim: descarta o resto e devolve o orcamento.
+        q = queues[i]
+        while True:
+            item = q.get()
+            if item is _END or isinstance(item, _Failure):
+                return
+            gate.release(item[1], i)
+
+    pool = ThreadPoolExecutor(max_workers=int(workers), thread_name_prefix="pq-prefetch")
+    try:
+        # FIFO: a tarefa i sempre comeca antes de i+1, entao o arquivo da
+        # vez nunca fica esperando worker ocupado por um arquivo futuro.
+        for i, src in enumerate(sources):
+            pool.submit(_produce, i, src)
+        for i, src in enumerate(sources):
+            gate.advance(i)
+            yield src, _consume(i)
+            if not drained[i]:
+                _drain(i)
+    finally:
+        gate.stop()
+        pool.shutdown(wait=True, cancel_futures=True)
+        if stats is not None:
+            stats["peak_inflight_bytes"] = int(gate.peak)
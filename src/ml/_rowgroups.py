@@ -0,0 +1,126 @@
+"""Pushdown por estatisticas de row group para load_split_batched.
+
+Motivacao: o split train/test era decidido so pelo ano no nome do arquivo.
+Parquet sem ano no nome (base consolidada, multi-ano) caia no fallback
+_load_concat: carregava tudo em pandas e so depois separava por ANO. E row
+groups inteiros que o dropna descartaria (feature/alvo 100% nulos) eram
+decodificados e convertidos para nada.
+
+Aqui so o footer de cada parquet e lido (sem decodificar paginas):
+    - min/max de ANO por row group -> anos do arquivo e roteamento
+      (train / test / gap / misto);
+    - null_count das colunas obrigatorias (features + alvo + ANO) -> row
+      group 100% nulo em alguma delas e podado, pois o dropna removeria
+      todas as linhas de qualquer forma.
+
+Quando o min/max nao basta (row group com mais de um ano, ou sem
+estatisticas) so a coluna ANO daquele row group e lida para descobrir os
+anos. Os writers de modelagem gravam ordenado por ANO/ts_hour com row
+groups de utils.PARQUET_ROW_GROUP_ROWS linhas, o que deixa quase todo row
+group com um unico ano.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+ROUTE_TRAIN = "train"
+ROUTE_TEST = "test"
+ROUTE_GAP = "gap"
+ROUTE_MIXED = "mixed"
+
+
+@dataclass
+class RowGroupInfo:
+    index: int
+    num_rows: int
+    year_min: Optional[int]
+    year_max: Optional[int]
+    all_null: bool  # alguma coluna obrigatoria 100% nula
+
+
+def _stat_year(value, physical_type: str) -> Optional[int]:
+    # Estatisticas de texto tem ordem lexicografica: nao servem para ano.
+    if physical_type not in ("INT32", "INT64", "FLOAT", "DOUBLE"):
+        return None
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not np.isfinite(v):
+        return None
+    return int(v)  # mesmo truncamento do astype("int32") do loader
+
+
+def scan_row_groups(
+    path: Path,
+    year_col: str,
+    required_cols: Sequence[str],
+) -> List[RowGroupInfo]:
+    """RowGroupInfo por row group, so com o footer. Levanta se o arquivo nao abrir."""
+    import pyarrow.parquet as pq  # type: ignore
+
+    md = pq.ParquetFile(str(path)).metadata
+    names = [md.schema.column(i).path for i in range(md.num_columns)]
+    pos = {n: i for i, n in enumerate(names)}
+    req = [pos[c] for c in dict.fromkeys(required_cols) if c in pos]
+    year_idx = pos.get(year_col)
+
+    out: List[RowGroupInfo] = []
+    for rg in range(md.num_row_groups):
+        g = md.row_group(rg)
+        n = int(g.num_rows)
+        all_null = False
+        for ci in req:
+            st = g.column(ci).statistics
+            if st is not None and st.null_count is not None and int(st.null_count) >= n:
+                all_null = True
+                break
+        y_min = y_max = None
+        if year_idx is not None:
+            col = g.column(year_idx)
+            st = col.statistics
+            if st is not None and st.has_min_max:
+                y_min = _stat_year(st.min, col.physical_type)
+                y_max = _stat_year(st.max, col.physical_type)
+                if y_min is None or y_max is None:
+                    y_min = y_max = None
+        out.append(RowGroupInfo(rg, n, y_min, y_max, all_null or n == 0))
+    return out
+
+
+def distinct_years(path: Path, infos: List[RowGroupInfo], year_col: str) -> Set[int]:
+    """Anos presentes no arquivo; le a coluna ANO so dos row groups ambiguos."""
+    years: Set[int] = set()
+    ambiguous: List[int] = []
+    for info in infos:
+        if info.all_null:
+            continue
+        if info.year_min is not None and info.year_min == info.year_max:
+            years.add(info.year_min)
+        else:
+            ambiguous.append(info.index)
+    if ambiguous:
+        import pyarrow.parquet as pq  # type: ignore
+
+        tbl = pq.ParquetFile(str(path)).read_row_groups(ambiguous, columns=[year_col])
+        vals = pd.to_numeric(tbl.column(0).to_pandas(), errors="coerce").dropna()
+        years.update(int(v) for v in vals.astype("int32").unique())
+    return years
+
+
+def route(info: RowGroupInfo, train_max_year: int, cut: int) -> str:
+    """Destino do row group inteiro pelo min/max de ANO (ROUTE_MIXED se incerto)."""
+    if info.year_min is None or info.year_max is None:
+        return ROUTE_MIXED
+    if info.year_max <= train_max_year:
+        return ROUTE_TRAIN
+    if info.year_min >= cut:
+        return ROUTE_TEST
+    if info.year_min > train_max_year and info.year_max < cut:
+        return ROUTE_GAP
+    return ROUTE_MIXED
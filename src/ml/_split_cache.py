@@ -0,0 +1,263 @@
+"""Cache persistente (memory-mapped) do split train/test de load_split_batched.
+
+Motivacao: cada `train_runner.py run` e cada reavaliacao do model_eval_viz
+refaziam o streaming de todos os parquets, o _audit_source_parquets, o
+downsampling e o concat em buffers pandas novos, mesmo com cenario,
+features, anos de split e orcamentos identicos. Nos cenarios minirocket so o
+load levava minutos.
+
+Aqui o resultado final (X float32 column-major + y int8 + ANO int32) e
+gravado uma vez em .npy e, nas execucoes seguintes, aberto com
+np.load(mmap_mode="c"): abre em milissegundos, as paginas sao compartilhadas
+entre processos concorrentes (page cache) e escritas eventuais ficam
+privadas ao processo (copy-on-write), sem tocar no arquivo. y e ANO voltam
+com o dtype original (guardado no meta.json), igual ao caminho sem cache.
+
+A chave e content-addressed: hash de (fingerprint de cada parquet fonte
+[nome, tamanho, mtime, num_rows], features pedidas, target/ano,
+test_size_years, gap_years, orcamentos, neg_pos_ratio, min_neg_keep,
+batch_rows efetivo e seed). Qualquer mudanca gera outra entrada.
+
+Estrutura em disco:
+    data/_article/_caches/split/{scenario}__{key}/
+        meta.json
+        train_X.npy  train_y.npy  train_year.npy
+        test_X.npy   test_y.npy   test_year.npy
+
+Desligar: TRAIN_RUNNER_SPLIT_CACHE=0.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_project_root = Path(__file__).resolve().parents[2]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+SPLIT_CACHE_VERSION = 3
+
+# Entradas mantidas por cenario (as mais recentes); as demais sao removidas no save.
+_KEEP_PER_SCENARIO = int(os.environ.get("TRAIN_RUNNER_SPLIT_CACHE_KEEP", "2"))
+
+
+def enabled() -> bool:
+    return os.environ.get("TRAIN_RUNNER_SPLIT_CACHE", "1").strip().lower() not in (
+        "0", "false", "no", "off",
+    )
+
+
+def _safe_token(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(s or "default"))
+
+
+def _cache_root() -> Path:
+    """Resolve raiz do cache. Preferencia para config.yaml; fallback fixo."""
+    try:
+        from src.utils import loadConfig
+        cfg = loadConfig()
+        article_root = Path(cfg["paths"]["data"].get("article")
+                            or (_project_root / "data" / "_article"))
+    except Exception:
+        article_root = _project_root / "data" / "_article"
+    p = article_root / "_caches" / "split"
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def parquet_fingerprints(files: List[Path]) -> List[Dict[str, Any]]:
+    """(nome, tamanho, mtime_ns, num_rows do footer) por parquet; nao decodifica dados."""
+    import pyarrow.parquet as pq  # type: ignore
+
+    out: List[Dict[str, Any]] = []
+    for f in files:
+        st = f.stat()
+        try:
+            num_rows = int(pq.ParquetFile(str(f)).metadata.num_rows)
+        except Exception:
+            num_rows = -1
+        out.append({
+            "file": f.name,
+            "size": int(st.st_size),
+            "mtime_ns": int(st.st_mtime_ns),
+            "rows": num_rows,
+        })
+    return out
+
+
+def split_key(params: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"version": SPLIT_CACHE_VERSION, **params}, sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def entry_dir(scenario: str, key: str) -> Path:
+    return _cache_root() / f"{_safe_token(scenario)}__{key}"
+
+
+def _frame_from_arrays(
+    X: np.ndarray, y: np.ndarray, yr: np.ndarray,
+    features: List[str], target_col: str, year_col: str,
+    dtypes: Dict[str, str],
+) -> pd.DataFrame:
+    # DataFrame sobre o memmap F-order: um bloco float32 sem copia.
+    df = pd.DataFrame(X, columns=list(features), copy=False)
+    # y/ANO sao 1-D: o cast de volta ao dtype original custa pouco.
+    df[target_col] = pd.Series(y, copy=False).astype(dtypes[target_col])
+    df[year_col] = pd.Series(yr, copy=False).astype(dtypes[year_col])
+    return df
+
+
+def _packed(s: pd.Series, dtype) -> np.ndarray:
+    """Coluna como `dtype` compacto; ValueError se o valor original nao volta igual."""
+    arr = s.to_numpy(dtype=dtype)
+    if not np.array_equal(pd.Series(arr).astype(s.dtype).to_numpy(), s.to_numpy()):
+        raise ValueError(f"{s.name}: {s.dtype} nao cabe em {np.dtype(dtype)}")
+    return arr
+
+
+def load(
+    scenario: str,
+    key: str,
+    target_col: str,
+    year_col: str,
+    log=None,
+) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, List[str], Dict[str, Any]]]:
+    """(train_df, test_df, valid_features, meta) via memmap; None se ausente/quebrado."""
+    d = entry_dir(scenario, key)
+    meta_path = d / "meta.json"
+    if not meta_path.is_file():
+        return None
+    t0 = time.perf_counter()
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        features = list(meta["valid_features"])
+        frames = []
+        for split in ("train", "test"):
+            X = np.load(d / f"{split}_X.npy", mmap_mode="c")
+            y = np.load(d / f"{split}_y.npy", mmap_mode="c")
+            yr = np.load(d / f"{split}_year.npy", mmap_mode="c")
+            if X.shape != (int(meta[split]["rows"]), len(features)):
+                raise ValueError(f"shape inesperado em {split}_X.npy: {X.shape}")
+            frames.append(_frame_from_arrays(
+                X, y, yr, features, target_col, year_col, meta["dtypes"],
+            ))
+        # Marca uso (para o prune manter as entradas mais recentes).
+        os.utime(meta_path, None)
+    except Exception as e:
+        if log is not None:
+            log.warning(f"[SPLIT-CACHE] entrada corrompida em {d.name}: {e}; ignorando")
+        return None
+    if log is not None:
+        log.info(
+            f"[SPLIT-CACHE] HIT {d.name} | train={meta['train']['rows']:,} "
+            f"test={meta['test']['rows']:,} feats={len(features)} | "
+            f"mmap em {time.perf_counter() - t0:.3f}s"
+        )
+    return frames[0], frames[1], features, meta
+
+
+def save(
+    scenario: str,
+    key: str,
+    params: Dict[str, Any],
+    train_df: pd.DataFrame,
+    test_df: pd.DataFrame,
+    valid_features: List[str],
+    target_col: str,
+    year_col: str,
+    *,
+    source_audit: Optional[Dict[str, Any]] = None,
+    data_audit: Optional[Dict[str, Any]] = None,
+    log=None,
+) -> Optional[Path]:
+    """Grava o split (tmp + rename atomico). Nao falha o treino se o disco falhar."""
+    for df in (train_df, test_df):
+        bad = [c for c in valid_features if df[c].dtype != np.float32]
+        if bad:
+            if log is not None:
+                log.info(f"[SPLIT-CACHE] nao cacheado: features fora de float32 ({bad[:3]}...)")
+            return None
+
+    final = entry_dir(scenario, key)
+    if (final / "meta.json").is_file():
+        return final
+    tmp = final.with_name(f".{final.name}.tmp{os.getpid()}")
+    t0 = time.perf_counter()
+    try:
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        meta: Dict[str, Any] = {
+            "version": SPLIT_CACHE_VERSION,
+            "scenario": scenario,
+            "key": key,
+            "params": params,
+            "valid_features": list(valid_features),
+            "target": target_col,
+            "year_col": year_col,
+            "dtypes": {c: str(train_df[c].dtype) for c in (target_col, year_col)},
+            "source_audit": source_audit,
+            "data_audit": data_audit,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        for split, df in (("train", train_df), ("test", test_df)):
+            n = int(len(df))
+            X = np.lib.format.open_memmap(
+                tmp / f"{split}_X.npy", mode="w+", dtype=np.float32,
+                shape=(n, len(valid_features)), fortran_order=True,
+            )
+            for j, c in enumerate(valid_features):
+                X[:, j] = df[c].to_numpy(dtype=np.float32, copy=False)
+            X.flush()
+            del X
+            for c, dt in ((target_col, meta["dtypes"][target_col]), (year_col, meta["dtypes"][year_col])):
+                if str(df[c].dtype) != dt:
+                    raise ValueError(f"{c}: dtype {df[c].dtype} no {split} != {dt} no train")
+            np.save(tmp / f"{split}_y.npy", _packed(df[target_col], np.int8))
+            np.save(tmp / f"{split}_year.npy", _packed(df[year_col], np.int32))
+            meta[split] = {"rows": n}
+        (tmp / "meta.json").write_text(
+            json.dumps(meta, indent=2, default=str), encoding="utf-8"
+        )
+        try:
+            tmp.rename(final)
+        except OSError:
+            # Outro processo gravou a mesma chave primeiro.
+            shutil.rmtree(tmp, ignore_errors=True)
+            return final if (final / "meta.json").is_file() else None
+    except Exception as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if log is not None:
+            log.warning(f"[SPLIT-CACHE] falha ao gravar {final.name}: {e}")
+        return None
+
+    if log is not None:
+        log.info(f"[SPLIT-CACHE] SAVE {final.name} em {time.perf_counter() - t0:.1f}s")
+    prune(scenario, keep=_KEEP_PER_SCENARIO, log=log)
+    return final
+
+
+def prune(scenario: str, keep: int = _KEEP_PER_SCENARIO, log=None) -> None:
+    """Mantem as `keep` entradas usadas mais recentemente do cenario."""
+    entries = []
+    for d in _cache_root().glob(f"{_safe_token(scenario)}__*"):
+        meta = d / "meta.json"
+        if d.is_dir() and meta.is_file():
+            entries.append((meta.stat().st_mtime, d))
+    entries.sort(reverse=True)
+    for _mtime, d in entries[max(1, int(keep)):]:
+        shutil.rmtree(d, ignore_errors=True)
+        if log is not None:
+            log.info(f"[SPLIT-CACHE] prune {d.name}")
@@ -35,20 +35,16 @@ except Exception:
     sns = None
 
 # Scikit-Learn
-from sklearn.base import BaseEstimator
-from sklearn.metrics import (
-    average_precision_score,
-    brier_score_loss,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
-from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+from sklearn.base import BaseEstimator, clone
+from sklearn.model_selection import GridSearchCV, ParameterGrid, TimeSeriesSplit
 from sklearn.pipeline import Pipeline as SkPipeline
 
 from src.ml.scaling import ChunkedStandardScaler
+from src.ml import _fold_cache
+from src.ml import _metric_engine as metric_engine
+from src.ml._metric_engine import SortedScores
+from src.ml import _parallel_search
+from src.ml import _resource as resource
 
 # Imbalanced-learn (opcional)
 try:
@@ -143,30 +139,36 @@ class TCCMetrics:
         return np.clip(a, 0.0, 1.0)
 
     @staticmethod
-    def calculate(y_true, y_pred, y_proba) -> Dict[str, Any]:
+    def calculate(y_true, y_pred, y_proba, engine: Optional[SortedScores] = None) -> Dict[str, Any]:
+        """Metricas no threshold de y_pred + AUCs/Brier de y_proba.
+
+        engine: SortedScores ja montado sobre (y_true, y_proba clipado), para
+        reaproveitar a ordenacao na varredura de thresholds do evaluate().
+        """
         if y_true is None or len(y_true) == 0:
             return {}
 
-        y_true = np.asarray(y_true).astype(int)
-        y_pred = np.asarray(y_pred).astype(int)
+        y_true = np.asarray(y_true).astype(np.int8)
+        y_pred = np.asarray(y_pred).astype(np.int8)
         y_proba = TCCMetrics._clip_proba(np.asarray(y_proba, dtype=float))
 
-        cm = confusion_matrix(y_true, y_pred, labels=[0, 1])
-        tn, fp, fn, tp = cm.ravel()
+        # Confusao direto da predicao (O(n), sem a revalidacao do sklearn).
+        tn, fp, fn, tp = (int(v) for v in np.bincount(y_true * 2 + y_pred, minlength=4)[:4])
 
         denom = (tp + tn + fp + fn)
         acc = (tp + tn) / denom if denom > 0 else 0.0
         spec = tn / (tn + fp) if (tn + fp) > 0 else 0.0
 
-        roc_auc = TCCMetrics._safe_metric(roc_auc_score, default=None, y_true=y_true, y_score=y_proba)
-        pr_auc = TCCMetrics._safe_metric(average_precision_score, default=None, y_true=y_true, y_score=y_proba)
-        brier = TCCMetrics._safe_metric(brier_score_loss, default=None, y_true=y_true, y_prob=y_proba)
+        eng = engine if engine is not None else SortedScores(y_true, y_proba)
+        roc_auc = TCCMetrics._safe_metric(eng.roc_auc, default=None)
+        pr_auc = TCCMetrics._safe_metric(eng.average_precision, default=None)
+        brier = TCCMetrics._safe_metric(metric_engine.brier, default=None, y_true=y_true, y_proba=y_proba)
 
         return {
             "accuracy": float(acc),
-            "precision": float(precision_score(y_true, y_pred, zero_division=0)),
-            "recall": float(recall_score(y_true, y_pred, zero_division=0)),
-            "f1": float(f1_score(y_true, y_pred, zero_division=0)),
+            "precision": float(tp / (tp + fp)) if (tp + fp) > 0 else 0.0,
+            "recall": float(tp / (tp + fn)) if (tp + fn) > 0 else 0.0,
+            "f1": float(2 * tp / (2 * tp + fp + fn)) if tp > 0 else 0.0,
             "specificity": float(spec),
             "roc_auc": None if roc_auc is None else float(roc_auc),
             "pr_auc": None if pr_auc is None else float(pr_auc),
@@ -226,6 +228,8 @@ class ModelOptimizer:
         self.log = log
         self.seed = int(seed)
         self.last_search_meta: Dict[str, Any] = {}
+        # None com TRAIN_RUNNER_FOLD_CACHE=0 (ou SQLite indisponivel).
+        self.fold_cache = _fold_cache.open_default(log)
 
     @staticmethod
     def _grid_candidates(grid: Dict[str, Any]) -> int:
@@ -261,27 +265,13 @@ class ModelOptimizer:
             details.append({"fold": i, "test_size": int(len(te_idx)), "pos": pos, "neg": neg})
         return zero_pos, details
 
-    def optimize(
+    def _build_pipeline(
         self,
-        X,
-        y,
-        cv_splits: int = 3,
-        use_smote: bool = False,
-        use_scaler: bool = True,
-        scoring: str = "average_precision",
-        n_jobs: Optional[int] = None,
-        verbose: int = 1,
-        smote_sampling_strategy: float = 0.1,
-        smote_k_neighbors: int = 5,
-        pre_dispatch: str = "1*n_jobs",
-        refit: bool = True,
-        fit_params: Optional[Dict[str, Any]] = None,
-        **_kwargs,
+        use_smote: bool,
+        use_scaler: bool,
+        smote_sampling_strategy: float,
+        smote_k_neighbors: int,
     ):
-        # Compat: permitir "smote=True" legado
-        if "smote" in _kwargs and "use_smote" not in _kwargs:
-            use_smote = bool(_kwargs["smote"])
-
         steps = []
 
         if use_smote:
@@ -306,16 +296,9 @@ class ModelOptimizer:
             steps.append(("scaler", ChunkedStandardScaler(chunk_rows=200_000, copy=False)))
 
         steps.append(("model", self.est))
-        pipe = (ImbPipeline if use_smote else SkPipeline)(steps)
-
-        # Param grid no formato do Pipeline (prefixo model__)
-        params = {f"model__{k}": v for k, v in self.grid.items()}
-
-        if n_jobs is None:
-            n_jobs = 1
-
-        y_norm = self._normalize_y(y)
+        return (ImbPipeline if use_smote else SkPipeline)(steps)
 
+    def _effective_cv(self, cv_splits: int, y_norm: np.ndarray, scoring: str) -> int:
         # Checagem de folds (TimeSeriesSplit)
         effective_cv = int(cv_splits)
         while True:
@@ -336,7 +319,51 @@ class ModelOptimizer:
                 f"[GridSearch][ERRO] Nao foi possivel montar CV temporal com folds contendo positivos. "
                 f"cv_splits original={cv_splits}. Sugestao: usar menos splits, ajustar janela temporal, ou usar SMOTE/estrategia por ano."
             )
+        return effective_cv
 
+    def optimize(
+        self,
+        X,
+        y,
+        cv_splits: int = 3,
+        use_smote: bool = False,
+        use_scaler: bool = True,
+        scoring: str = "average_precision",
+        n_jobs: Optional[int] = None,
+        verbose: int = 1,
+        smote_sampling_strategy: float = 0.1,
+        smote_k_neighbors: int = 5,
+        pre_dispatch: str = "1*n_jobs",
+        refit: bool = True,
+        fit_params: Optional[Dict[str, Any]] = None,
+        parallel_folds: bool = False,
+        **_kwargs,
+    ):
+        """
+        parallel_folds=True: (candidato, fold) em pool de processos lendo X de
+        um memmap float32 compartilhado (src/ml/_parallel_search.py), com
+        workers admitidos por resource.recommend_n_jobs.
+
+        Com o fold cache ativo (src/ml/_fold_cache.py), cada (candidato, fold)
+        ja ajustado com os mesmos dados/config e lido do cache em vez de
+        refeito; com 1 worker as tarefas rodam em serie no proprio processo.
+        Com fit_params, ou sem cache e sem ganho de paralelismo, segue o
+        GridSearchCV serial.
+        """
+        # Compat: permitir "smote=True" legado
+        if "smote" in _kwargs and "use_smote" not in _kwargs:
+            use_smote = bool(_kwargs["smote"])
+
+        pipe = self._build_pipeline(use_smote, use_scaler, smote_sampling_strategy, smote_k_neighbors)
+
+        # Param grid no formato do Pipeline (prefixo model__)
+        params = {f"model__{k}": v for k, v in self.grid.items()}
+
+        if n_jobs is None:
+            n_jobs = 1
+
+        y_norm = self._normalize_y(y)
+        effective_cv = self._effective_cv(cv_splits, y_norm, scoring)
         tscv = TimeSeriesSplit(n_splits=effective_cv)
 
         cand = self._grid_candidates(self.grid)
@@ -352,6 +379,30 @@ class ModelOptimizer:
 
         MemoryMonitor.log_usage(self.log, "antes do GridSearch")
 
+        n_workers = 1
+        if parallel_folds and not fit_params and _parallel_search.enabled():
+            n_workers = _parallel_search.recommend_workers(
+                n_rows=int(len(y_norm)),
+                n_features=int(X.shape[1]),
+                n_tasks=total_fits,
+                use_smote=bool(use_smote),
+                log=self.log,
+            )
+        if not fit_params and (n_workers > 1 or (self.fold_cache is not None and int(n_jobs) == 1)):
+            return self._optimize_tasks(
+                pipe, params, X, y_norm, tscv, scoring, n_workers, refit,
+                meta_base={
+                    "scoring": scoring,
+                    "cv_splits_requested": int(cv_splits),
+                    "cv_splits_effective": int(effective_cv),
+                    "candidates_approx": int(cand),
+                    "use_smote": bool(use_smote),
+                    "use_scaler": bool(use_scaler),
+                    "refit": bool(refit),
+                    "fit_params_keys": [],
+                },
+            )
+
         search = GridSearchCV(
             estimator=pipe,
             param_grid=params,
@@ -376,19 +427,8 @@ class ModelOptimizer:
                 search.fit(X, y_norm)
 
             for w in wlist:
-                msg = str(w.message)
                 cat = getattr(w, "category", None)
-                cname = cat.__name__ if cat is not None else "Warning"
-
-                if "No positive class found in y_true" in msg:
-                    warn_counts["no_positive_class"] += 1
-                    self.log.warning(f"[GridSearch][WARN] {cname}: {msg}")
-                elif "did not converge" in msg or "max_iter was reached" in msg:
-                    warn_counts["convergence"] += 1
-                    self.log.warning(f"[GridSearch][WARN] {cname}: {msg}")
-                else:
-                    warn_counts["other"] += 1
-                    self.log.info(f"[GridSearch][WARN-OTHER] {cname}: {msg}")
+                self._tally_warning(cat.__name__ if cat is not None else "Warning", str(w.message), warn_counts)
 
         dt = time.time() - t0
 
@@ -401,6 +441,7 @@ class ModelOptimizer:
             "use_scaler": bool(use_scaler),
             "n_jobs": int(n_jobs),
             "pre_dispatch": str(pre_dispatch),
+            "executor": "gridsearchcv",
             "refit": bool(refit),
             "elapsed_s": float(dt),
             "best_score": None if getattr(search, "best_score_", None) is None else float(search.best_score_),
@@ -414,7 +455,389 @@ class ModelOptimizer:
         )
         MemoryMonitor.log_usage(self.log, "apos GridSearch")
 
-        return search.best_estimator_
+        # refit=False: GridSearchCV nao cria best_estimator_ (mesmo contrato do executor memmap).
+        return getattr(search, "best_estimator_", None)
+
+    def _tally_warning(self, cname: str, msg: str, warn_counts: Dict[str, int]) -> None:
+        if "No positive class found in y_true" in msg:
+            warn_counts["no_positive_class"] += 1
+            self.log.warning(f"[GridSearch][WARN] {cname}: {msg}")
+        elif "did not converge" in msg or "max_iter was reached" in msg:
+            warn_counts["convergence"] += 1
+            self.log.warning(f"[GridSearch][WARN] {cname}: {msg}")
+        else:
+            warn_counts["other"] += 1
+            self.log.info(f"[GridSearch][WARN-OTHER] {cname}: {msg}")
+
+    def _run_tasks(
+        self,
+        pipe,
+        tasks: list,
+        X,
+        y_norm: np.ndarray,
+        scoring: str,
+        n_workers: int,
+    ) -> Tuple[list, Dict[str, Any]]:
+        """Roda as tarefas (pool memmap se n_workers > 1) consultando o fold cache.
+
+        Retorna (resultados, stats do cache). Fits novos sao gravados no cache
+        a medida que terminam, entao uma busca interrompida retoma dali.
+        """
+        store = self.fold_cache
+        cached: list = []
+        pending = list(tasks)
+        keys: Dict[Tuple[int, int], Optional[str]] = {}
+        on_result = None
+        if store is not None:
+            data_fp = _fold_cache.data_fingerprint(X, y_norm)
+            model = _fold_cache.model_label(pipe)
+            keys = {(t.cand, t.fold): _fold_cache.task_key(pipe, t, data_fp, scoring) for t in tasks}
+            hits = store.get_many(k for k in keys.values() if k is not None)
+            uncached = sum(k is None for k in keys.values())
+            if uncached:
+                self.log.info(f"[FOLD-CACHE] {uncached} fits com params sem forma estavel; fora do cache")
+            pending = []
+            for t in tasks:
+                hit = hits.get(keys[(t.cand, t.fold)])
+                if hit is None:
+                    pending.append(t)
+                else:
+                    cached.append(_parallel_search.FoldResult(
+                        t.cand, t.fold, hit.score, hit.fit_seconds, best_iteration=hit.best_iteration,
+                    ))
+            params_by_task = {(t.cand, t.fold): t.params for t in tasks}
+            train_rows = {(t.cand, t.fold): t.train[1] - t.train[0] for t in tasks}
+
+            def on_result(r) -> None:
+                k = (r.cand, r.fold)
+                if keys[k] is None:
+                    return
+                try:
+                    store.put(keys[k], r, model=model, params=params_by_task[k],
+                              train_rows=train_rows[k], data_fp=data_fp, scoring=scoring)
+                except Exception as e:
+                    self.log.warning(f"[FOLD-CACHE] falha ao gravar fit: {e}")
+
+            self.log.info(
+                f"[FOLD-CACHE] {len(cached)}/{len(tasks)} fits no cache "
+                f"({sum(r.fit_seconds for r in cached):.1f}s de fit economizados) | novos={len(pending)}"
+            )
+
+        results: list = []
+        if pending:
+            n_workers = max(1, min(int(n_workers), len(pending)))
+            if n_workers > 1:
+                shared = _parallel_search.SharedXy(X, y_norm)
+                try:
+                    MemoryMonitor.log_usage(self.log, "apos dump memmap do GridSearch")
+                    results = _parallel_search.run_fold_tasks(
+                        pipe, pending, shared, scoring, n_workers, log=self.log, on_result=on_result
+                    )
+                finally:
+                    shared.close()
+            else:
+                results = _parallel_search.run_fold_tasks_serial(
+                    pipe, pending, X, y_norm, scoring, log=self.log, on_result=on_result
+                )
+
+        stats = {
+            "hits": len(cached),
+            "misses": len(pending),
+            "saved_seconds": float(sum(r.fit_seconds for r in cached)),
+        }
+        if store is not None:
+            try:
+                store.log_lookup(
+                    model=_fold_cache.model_label(pipe),
+                    hits=stats["hits"],
+                    misses=stats["misses"],
+                    saved_seconds=stats["saved_seconds"],
+                    spent_seconds=float(sum(r.fit_seconds for r in results)),
+                )
+            except Exception as e:
+                self.log.warning(f"[FOLD-CACHE] falha ao registrar lookup: {e}")
+        return cached + results, stats
+
+    def _optimize_tasks(
+        self,
+        pipe,
+        params: Dict[str, Any],
+        X,
+        y_norm: np.ndarray,
+        tscv: TimeSeriesSplit,
+        scoring: str,
+        n_workers: int,
+        refit: bool,
+        meta_base: Dict[str, Any],
+    ):
+        """GridSearch por (candidato, fold): pool sobre X em memmap ou serie, com fold cache."""
+        candidates = list(ParameterGrid(params))
+        folds = _parallel_search.fold_ranges(list(tscv.split(np.zeros(len(y_norm)))))
+        tasks = [
+            _parallel_search.FoldTask(ci, fi, cp, tr, te)
+            for ci, cp in enumerate(candidates)
+            for fi, (tr, te) in enumerate(folds)
+        ]
+        executor = "memmap" if n_workers > 1 else "serial"
+        self.log.info(
+            f"[GridSearch] executor={executor} | workers={n_workers} | "
+            f"tarefas={len(tasks)} (candidatos={len(candidates)} x folds={len(folds)})"
+        )
+
+        warn_counts: Dict[str, int] = {"no_positive_class": 0, "convergence": 0, "other": 0}
+        t0 = time.time()
+        results, cache_stats = self._run_tasks(pipe, tasks, X, y_norm, scoring, n_workers)
+
+        scores = np.full((len(candidates), len(folds)), np.nan)
+        fit_seconds = -cache_stats["saved_seconds"]  # so fits desta execucao
+        for r in results:
+            scores[r.cand, r.fold] = r.score
+            fit_seconds += r.fit_seconds
+            for cname, msg in r.warnings:
+                self._tally_warning(cname, msg, warn_counts)
+        means = scores.mean(axis=1)
+        if np.isnan(means).all():
+            raise RuntimeError(
+                "[GridSearch][ERRO] Todos os candidatos com score medio NaN "
+                "(cada um tem ao menos um fold sem score valido)."
+            )
+        # NaN por ultimo e empate -> primeiro, como o rank do GridSearchCV.
+        best = int(np.argmax(np.nan_to_num(means, nan=-np.inf)))
+        best_params = candidates[best]
+        best_score = float(means[best])
+
+        best_estimator = None
+        if refit:
+            best_estimator = clone(pipe).set_params(**best_params)
+            best_estimator.fit(X, y_norm)
+
+        dt = time.time() - t0
+        self.last_search_meta = {
+            **meta_base,
+            "n_jobs": int(n_workers),
+            "pre_dispatch": "all",
+            "executor": executor,
+            "elapsed_s": float(dt),
+            "fit_seconds_total": float(fit_seconds),
+            "fold_cache": cache_stats,
+            "best_score": best_score,
+            "best_params": best_params,
+            "mean_test_scores": [float(v) for v in means],
+            "warnings": warn_counts,
+        }
+        self.log.info(
+            f"[GridSearch] concluido em {dt:.1f}s (soma dos fits {fit_seconds:.1f}s, "
+            f"workers={n_workers}) | best_score={best_score:.6f} | best_params={best_params} | "
+            f"warnings={warn_counts}"
+        )
+        MemoryMonitor.log_usage(self.log, "apos GridSearch")
+        return best_estimator
+
+    def optimize_halving(
+        self,
+        X,
+        y,
+        cv_splits: int = 3,
+        use_smote: bool = False,
+        use_scaler: bool = True,
+        scoring: str = "average_precision",
+        factor: int = 3,
+        min_resources: int = 50_000,
+        early_stopping_rounds: Optional[int] = None,
+        val_fraction: float = 0.2,
+        smote_sampling_strategy: float = 0.1,
+        smote_k_neighbors: int = 5,
+        refit: bool = True,
+        **_kwargs,
+    ):
+        """
+        Successive halving sobre subamostras temporais crescentes.
+
+        Rung r avalia os candidatos vivos com TimeSeriesSplit sobre
+        n_total / factor**(rungs-1-r) linhas (stride uniforme de
+        resource.systematic_subsample_indices, ordem temporal preservada;
+        minimo min_resources) e mantem o top 1/factor pela media do score. O
+        ultimo rung usa todas as linhas. Os fits de cada rung seguem o mesmo
+        executor do optimize (memmap em processos se houver mais de 1 worker).
+
+        early_stopping_rounds (estimadores com early stopping nativo, ex.
+        XGBoost): o eixo n_estimators do grid vira so o teto (max do grid), o
+        fim do treino de cada fold (val_fraction) vira eval_set, e o
+        n_estimators de best_params sai da mediana de best_iteration + 1 do
+        vencedor no ultimo rung.
+        """
+        if "smote" in _kwargs and "use_smote" not in _kwargs:
+            use_smote = bool(_kwargs["smote"])
+
+        pipe = self._build_pipeline(use_smote, use_scaler, smote_sampling_strategy, smote_k_neighbors)
+        factor = max(2, int(factor))
+
+        grid = dict(self.grid)
+        use_es = early_stopping_rounds is not None and "early_stopping_rounds" in self.est.get_params()
+        if use_es and use_scaler:
+            # eval_set vai direto ao modelo, sem passar pelo scaler do pipeline.
+            self.log.warning("[Halving] early stopping desligado: use_scaler=True")
+            use_es = False
+        if use_es and "n_estimators" in grid:
+            grid["n_estimators"] = [max(grid["n_estimators"])]
+        es_params = {"model__early_stopping_rounds": int(early_stopping_rounds)} if use_es else {}
+
+        candidates = list(ParameterGrid({f"model__{k}": v for k, v in grid.items()}))
+        y_norm = self._normalize_y(y)
+        n_total = int(len(y_norm))
+
+        n_rungs = 0
+        while factor ** n_rungs < len(candidates):
+            n_rungs += 1
+        n_rungs = max(1, n_rungs)
+
+        self.log.info(
+            f"[Halving] candidatos={len(candidates)} (grid original={self._grid_candidates(self.grid)}) | "
+            f"rungs={n_rungs} | factor={factor} | min_resources={min_resources:,} | n_total={n_total:,} | "
+            f"early_stopping_rounds={early_stopping_rounds if use_es else None} | scoring={scoring}"
+        )
+        MemoryMonitor.log_usage(self.log, "antes do Halving")
+
+        warn_counts: Dict[str, int] = {"no_positive_class": 0, "convergence": 0, "other": 0}
+        alive = list(range(len(candidates)))
+        rungs_meta = []
+        fit_seconds = 0.0
+        fits_total = 0
+        max_workers = 1
+        cache_stats: Dict[str, Any] = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+        means: Dict[int, float] = {}
+        results = []
+        t0 = time.time()
+
+        for r in range(n_rungs):
+            n_res = n_total // (factor ** (n_rungs - 1 - r))
+            n_res = min(n_total, max(int(min_resources), n_res))
+            if n_res >= n_total:
+                X_r, y_r = X, y_norm
+            else:
+                idx = resource.systematic_subsample_indices(n_total, n_res)
+                X_r = X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+                y_r = y_norm[idx]
+
+            cv_r = self._effective_cv(cv_splits, y_r, scoring)
+            folds = _parallel_search.fold_ranges(
+                list(TimeSeriesSplit(n_splits=cv_r).split(np.zeros(len(y_r))))
+            )
+            tasks = []
+            for ci in alive:
+                for fi, (tr, te) in enumerate(folds):
+                    val = None
+                    if use_es:
+                        n_val = max(1, int((tr[1] - tr[0]) * float(val_fraction)))
+                        val = (tr[1] - n_val, tr[1])
+                    tasks.append(
+                        _parallel_search.FoldTask(ci, fi, {**candidates[ci], **es_params}, tr, te, val)
+                    )
+
+            n_workers = 1
+            if _parallel_search.enabled():
+                n_workers = _parallel_search.recommend_workers(
+                    n_rows=int(len(y_r)),
+                    n_features=int(X_r.shape[1]),
+                    n_tasks=len(tasks),
+                    use_smote=bool(use_smote),
+                    log=self.log,
+                )
+            max_workers = max(max_workers, n_workers)
+
+            tr0 = time.time()
+            results, rung_cache = self._run_tasks(pipe, tasks, X_r, y_r, scoring, n_workers)
+            del X_r, y_r
+            for k in cache_stats:
+                cache_stats[k] += rung_cache[k]
+
+            scores: Dict[int, list] = {ci: [] for ci in alive}
+            rung_fit_s = -rung_cache["saved_seconds"]
+            for res in results:
+                scores[res.cand].append(res.score)
+                rung_fit_s += res.fit_seconds
+                for cname, msg in res.warnings:
+                    self._tally_warning(cname, msg, warn_counts)
+            means = {ci: float(np.mean(scores[ci])) for ci in alive}
+            if all(np.isnan(v) for v in means.values()):
+                raise RuntimeError(
+                    f"[Halving][ERRO] Rung {r + 1}: todos os candidatos com score medio NaN "
+                    "(cada um tem ao menos um fold sem score valido)."
+                )
+            fit_seconds += rung_fit_s
+            fits_total += len(tasks)
+
+            # Ordem estavel: empate -> primeiro na ordem de ParameterGrid.
+            ranked = [alive[i] for i in np.argsort([-means[ci] for ci in alive], kind="stable")]
+            n_keep = 1 if r == n_rungs - 1 else max(1, -(-len(alive) // factor))
+            rungs_meta.append({
+                "rung": r,
+                "n_rows": int(n_res),
+                "cv_splits": int(cv_r),
+                "candidates": len(alive),
+                "fits": len(tasks),
+                "fits_cached": int(rung_cache["hits"]),
+                "workers": int(n_workers),
+                "elapsed_s": float(time.time() - tr0),
+                "fit_seconds": float(rung_fit_s),
+                "best_score": float(means[ranked[0]]),
+            })
+            self.log.info(
+                f"[Halving] rung {r + 1}/{n_rungs} | linhas={n_res:,} | cv={cv_r} | candidatos={len(alive)} | "
+                f"fits={len(tasks)} | workers={n_workers} | {time.time() - tr0:.1f}s | "
+                f"melhor={means[ranked[0]]:.6f} {candidates[ranked[0]]} | mantidos={n_keep}"
+            )
+            alive = sorted(ranked[:n_keep])
+            if len(alive) == 1:
+                break
+
+        best = alive[0]
+        best_params = dict(candidates[best])
+        best_score = float(means[best])
+        if use_es:
+            its = [res.best_iteration for res in results
+                   if res.cand == best and res.best_iteration is not None]
+            if its:
+                best_params["model__n_estimators"] = int(np.median(its)) + 1
+
+        best_estimator = None
+        if refit:
+            best_estimator = clone(pipe).set_params(**best_params)
+            best_estimator.fit(X, y_norm)
+
+        dt = time.time() - t0
+        exhaustive_fits = int(cv_splits) * self._grid_candidates(self.grid)
+        self.last_search_meta = {
+            "scoring": scoring,
+            "cv_splits_requested": int(cv_splits),
+            "candidates_approx": int(self._grid_candidates(self.grid)),
+            "candidates_searched": len(candidates),
+            "use_smote": bool(use_smote),
+            "use_scaler": bool(use_scaler),
+            "n_jobs": int(max_workers),
+            "executor": "halving",
+            "factor": int(factor),
+            "min_resources": int(min_resources),
+            "early_stopping_rounds": int(early_stopping_rounds) if use_es else None,
+            "refit": bool(refit),
+            "elapsed_s": float(dt),
+            "fit_seconds_total": float(fit_seconds),
+            "fits_total": int(fits_total),
+            "fits_exhaustive": exhaustive_fits,
+            "fold_cache": cache_stats,
+            "rungs": rungs_meta,
+            "best_score": best_score,
+            "best_params": best_params,
+            "warnings": warn_counts,
+            "fit_params_keys": [],
+        }
+        self.log.info(
+            f"[Halving] concluido em {dt:.1f}s (soma dos fits {fit_seconds:.1f}s, fits={fits_total} "
+            f"vs {exhaustive_fits} no grid exaustivo) | best_score={best_score:.6f} | "
+            f"best_params={best_params} | warnings={warn_counts}"
+        )
+        MemoryMonitor.log_usage(self.log, "apos Halving")
+        return best_estimator
 
 
 # -----------------------------------------------------------------------------
@@ -690,15 +1113,46 @@ class BaseModelTrainer(ABC):
 
         raise AttributeError("O modelo nao expoe predict_proba nem decision_function (necessario para este pipeline).")
 
-    def evaluate(self, X_test, y_test, thr: float = 0.5) -> Dict[str, Any]:
+    def evaluate(
+        self,
+        X_test,
+        y_test,
+        thr: float = 0.5,
+        *,
+        n_days: Optional[float] = None,
+        neg_weight: float = 1.0,
+    ) -> Dict[str, Any]:
+        """Metricas em thr + varredura de thresholds (mesma ordenacao dos scores).
+
+        n_days/neg_weight: dias cobertos pelo teste e peso dos negativos
+        (downsampling) para os thresholds por alertas/dia; sem n_days essa
+        parte da varredura fica vazia.
+        """
         probs, source = self._predict_proba_like(X_test)
 
-        preds = (probs >= float(thr)).astype(int)
-        metrics = TCCMetrics.calculate(y_test, preds, probs)
+        preds = (probs >= float(thr)).astype(np.int8)
+        engine = None
+        if len(probs):
+            engine = SortedScores(np.asarray(y_test), TCCMetrics._clip_proba(probs))
+        metrics = TCCMetrics.calculate(y_test, preds, probs, engine=engine)
 
         metrics["proba_source"] = source
         metrics["threshold"] = float(thr)
 
+        if engine is not None:
+            sweep = engine.sweep_summary(n_days=n_days, neg_weight=neg_weight)
+            metrics["threshold_sweep"] = sweep
+            best = sweep.get("best_f1") or {}
+            self.log.info(
+                f"[EVAL] sweep | best_f1={best.get('f1')} @thr={best.get('threshold')} | "
+                f"recall@precision={ {k: (v or {}).get('recall') for k, v in sweep['recall_at_precision'].items()} }"
+            )
+            try:
+                sweep_path = self.output_dir / f"threshold_sweep_{datetime.now():%Y%m%d_%H%M%S}.csv"
+                engine.sweep(n_days=n_days, neg_weight=neg_weight).to_csv(sweep_path, index=False, encoding="utf-8")
+            except Exception as e:
+                self.log.warning(f"[EVAL] falha ao gravar threshold_sweep.csv: {e}")
+
         pr_auc = metrics.get("pr_auc", None)
         roc_auc = metrics.get("roc_auc", None)
         brier = metrics.get("brier_score", None)
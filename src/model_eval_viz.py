@@ -9,22 +9,18 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from sklearn.metrics import (
-    average_precision_score,
-    precision_recall_curve,
-    roc_auc_score,
-    roc_curve,
-)
 
 _project_root = Path(__file__).resolve().parents[1]
 if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
+from src.ml import _batch_scoring as batch_scoring
+from src.ml._metric_engine import SortedScores
 from src.ml.eval_data import ScenarioEvalData, load_scenario_eval_data
+from src.train_runner import alert_rate_context
 from src.utils import get_logger, loadConfig
 
 
@@ -60,23 +56,8 @@ class EvalResult:
     recall: np.ndarray
     pr_thr: np.ndarray
     importance_df: Optional[pd.DataFrame]
-
-
-def _sigmoid(x: np.ndarray) -> np.ndarray:
-    x = np.asarray(x, dtype=float)
-    x = np.clip(np.nan_to_num(x, nan=0.0, posinf=50.0, neginf=-50.0), -50.0, 50.0)
-    return 1.0 / (1.0 + np.exp(-x))
-
-
-def _predict_scores(model: Any, X: pd.DataFrame) -> np.ndarray:
-    if hasattr(model, "predict_proba"):
-        p = model.predict_proba(X)[:, 1]
-    elif hasattr(model, "decision_function"):
-        p = _sigmoid(model.decision_function(X))
-    else:
-        raise AttributeError("Modelo sem predict_proba/decision_function.")
-    p = np.asarray(p, dtype=float)
-    return np.clip(np.nan_to_num(p, nan=0.5, posinf=1.0, neginf=0.0), 0.0, 1.0)
+    sweep: Optional[pd.DataFrame] = None
+    sweep_summary: Optional[Dict[str, Any]] = None
 
 
 def _extract_importance(model: Any, feature_names: List[str]) -> Optional[pd.DataFrame]:
@@ -213,23 +194,34 @@ def evaluate_run(
     run: RunArtifact,
     eval_data: ScenarioEvalData,
     threshold: Optional[float] = None,
+    scored: Optional[batch_scoring.ScoredRun] = None,
+    block_rows: int = batch_scoring.DEFAULT_BLOCK_ROWS,
 ) -> EvalResult:
+    """Metricas de um run; scored = scores ja calculados por score_models."""
     if run.model_path is None:
         raise FileNotFoundError(f"model_*.joblib ausente para {run.label}")
-    model = joblib.load(run.model_path)
+    if scored is None:
+        model = batch_scoring.load_model(run.model_path)
+        y_score = batch_scoring.predict_scores(model, eval_data.X_test, block_rows=block_rows)
+        imp = _extract_importance(model, eval_data.valid_features)
+        del model
+    else:
+        y_score, imp = scored.scores, scored.extra
     thr = float(
         threshold
         if threshold is not None
         else ((run.payload.get("metrics") or {}).get("threshold", 0.5))
     )
     y_true = eval_data.y_test.to_numpy(dtype=np.int8, copy=False)
-    y_score = _predict_scores(model, eval_data.X_test)
     y_pred = (y_score >= thr).astype(np.int8)
-    fpr, tpr, roc_thr = roc_curve(y_true, y_score)
-    precision, recall, pr_thr = precision_recall_curve(y_true, y_score)
-    roc_auc = float(roc_auc_score(y_true, y_score)) if len(np.unique(y_true)) > 1 else None
-    pr_auc = float(average_precision_score(y_true, y_score)) if len(np.unique(y_true)) > 1 else None
-    imp = _extract_importance(model, eval_data.valid_features)
+    # Uma ordenacao dos scores para curvas, AUCs e varredura de thresholds.
+    eng = SortedScores(y_true, y_score)
+    fpr, tpr, roc_thr = eng.roc_curve()
+    precision, recall, pr_thr = eng.precision_recall_curve()
+    both_classes = eng.n_pos > 0 and eng.n_neg > 0
+    roc_auc = eng.roc_auc() if both_classes else None
+    pr_auc = eng.average_precision() if both_classes else None
+    n_days, neg_weight = alert_rate_context(eval_data.data_audit, y_true)
     return EvalResult(
         run=run,
         y_true=y_true,
@@ -245,6 +237,8 @@ def evaluate_run(
         recall=recall,
         pr_thr=pr_thr,
         importance_df=imp,
+        sweep=eng.sweep(n_days=n_days, neg_weight=neg_weight),
+        sweep_summary=eng.sweep_summary(n_days=n_days, neg_weight=neg_weight),
     )
 
 
@@ -335,7 +329,7 @@ def _plot_shap_summary(
         import shap  # type: ignore
     except Exception:
         return None
-    model = joblib.load(res.run.model_path)
+    model = batch_scoring.load_model(res.run.model_path)
     n = len(eval_data.X_test)
     use_n = min(n, max_samples) if max_samples > 0 else n
     Xs = eval_data.X_test.iloc[:use_n]
@@ -381,6 +375,14 @@ def _write_csv_artifacts(res: EvalResult, out_dir: Path) -> Dict[str, Path]:
     return paths
 
 
+def _write_sweep_csv(res: EvalResult, out_dir: Path) -> Optional[Path]:
+    if res.sweep is None:
+        return None
+    p = out_dir / f"threshold_sweep_{_safe_slug(res.run.label)}.csv"
+    res.sweep.to_csv(p, index=False, encoding="utf-8")
+    return p
+
+
 def _metrics_rows(
     runs: List[RunArtifact],
     eval_by_label: Dict[str, EvalResult],
@@ -402,11 +404,22 @@ def _metrics_rows(
                 "roc_auc_saved": m.get("roc_auc"),
                 "pr_auc_saved": m.get("pr_auc"),
                 "threshold": None if ev is None else ev.threshold,
+                "best_f1": _sweep_get(ev, "best_f1", "f1"),
+                "best_f1_threshold": _sweep_get(ev, "best_f1", "threshold"),
             }
         )
     return rows
 
 
+def _sweep_get(ev: Optional[EvalResult], *path: str) -> Optional[float]:
+    cur: Any = None if ev is None else ev.sweep_summary
+    for k in path:
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(k)
+    return cur
+
+
 def _plot_model_performance_comparison(rows: pd.DataFrame, out_dir: Path) -> Path:
     # Nao e 5-fold CV: comparacao de metricas do teste temporal por run.
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -464,6 +477,25 @@ def _render_markdown(
             f"{'yes' if r['model_available'] else 'no'} | {pr_eval} | {roc_eval} | {pr_saved} | {roc_saved} |"
         )
     lines.append("")
+    sweep_rows = [(run, eval_by_label[run.label]) for run in runs
+                  if run.label in eval_by_label and eval_by_label[run.label].sweep_summary]
+    if sweep_rows:
+        def _thr(d: Optional[Dict[str, Any]]) -> str:
+            return "" if not d else f"{d['threshold']:.4f} (P={d['precision']:.3f} R={d['recall']:.3f})"
+
+        lines.append("## Threshold sweep")
+        lines.append("")
+        lines.append("| run | best F1 | thr best F1 | recall@P>=0.5 | recall@P>=0.7 | <=10 alertas/dia |")
+        lines.append("|---|---:|---|---|---|---|")
+        for run, ev in sweep_rows:
+            sm = ev.sweep_summary or {}
+            best = sm.get("best_f1") or {}
+            lines.append(
+                f"| {run.label} | {best.get('f1', 0.0):.4f} | {_thr(best)} | "
+                f"{_thr(sm['recall_at_precision'].get('0.5'))} | {_thr(sm['recall_at_precision'].get('0.7'))} | "
+                f"{_thr(sm['alerts_per_day'].get('10'))} |"
+            )
+        lines.append("")
     if comparison_png:
         lines.append(f"- Performance comparison: `{comparison_png.name}`")
     if image_paths:
@@ -545,39 +577,63 @@ def run(args: argparse.Namespace) -> Path:
     image_paths: List[Path] = []
     csv_map: Dict[str, Path] = {}
 
+    # Por cenario: runs que compartilham X_test sao carregados e pontuados em
+    # paralelo, em blocos de linhas, e avaliados logo em seguida (so os
+    # scores de um grupo ficam vivos antes de virar EvalResult).
+    by_data: Dict[Tuple[str, str], List[RunArtifact]] = {}
     for run_art in runs:
-        log.info(f"avaliando {run_art.label}")
         if run_art.model_path is None:
             log.warning(f"skip eval sem model_*.joblib: {run_art.label}")
             continue
+        by_data.setdefault((run_art.source, run_art.scenario), []).append(run_art)
+    for group in by_data.values():
         sd = _resolve_eval_data(
             cache,
-            run_art,
+            group[0],
             batch_rows=args.batch_rows,
             max_train_rows=args.max_train_rows,
             max_test_rows=args.max_test_rows,
         )
-        res = evaluate_run(run_art, sd, threshold=args.threshold)
-        results.append(res)
-        eval_by_label[run_art.label] = res
-
-        if args.roc or args.both:
-            image_paths.append(_plot_roc_single(res, out_dir))
-        if args.pr or args.both:
-            image_paths.append(_plot_pr_single(res, out_dir))
-        if args.feature_importance:
-            p = _plot_importance(res, out_dir)
-            if p:
-                image_paths.append(p)
-        if args.shap:
-            p = _plot_shap_summary(res, sd, out_dir, max_samples=args.shap_max_samples)
-            if p:
-                image_paths.append(p)
-
-        if args.export_csv:
-            artifacts = _write_csv_artifacts(res, out_dir)
-            for k, p in artifacts.items():
-                csv_map[f"{run_art.label}:{k}"] = p
+        scored = batch_scoring.score_models(
+            {r.label: r.model_path for r in group},
+            sd.X_test,
+            block_rows=args.score_block_rows,
+            workers=args.score_workers,
+            inspect=lambda m, feats=sd.valid_features: _extract_importance(m, feats),
+            log=log,
+        )
+        for run_art in group:
+            log.info(f"avaliando {run_art.label}")
+            res = evaluate_run(run_art, sd, threshold=args.threshold, scored=scored.pop(run_art.label))
+            results.append(res)
+            eval_by_label[run_art.label] = res
+
+            if args.roc or args.both:
+                image_paths.append(_plot_roc_single(res, out_dir))
+            if args.pr or args.both:
+                image_paths.append(_plot_pr_single(res, out_dir))
+            if args.feature_importance:
+                p = _plot_importance(res, out_dir)
+                if p:
+                    image_paths.append(p)
+            if args.shap:
+                p = _plot_shap_summary(res, sd, out_dir, max_samples=args.shap_max_samples)
+                if p:
+                    image_paths.append(p)
+
+            p_sweep = _write_sweep_csv(res, out_dir)
+            if p_sweep:
+                csv_map[f"{run_art.label}:threshold_sweep"] = p_sweep
+
+            if args.export_csv:
+                artifacts = _write_csv_artifacts(res, out_dir)
+                for k, p in artifacts.items():
+                    csv_map[f"{run_art.label}:{k}"] = p
+        del scored
+
+    # Overlays e relatorio na ordem original dos runs.
+    order = {r.label: i for i, r in enumerate(runs)}
+    results.sort(key=lambda res: order[res.run.label])
 
     if args.overlay and results:
         if args.roc or args.both:
@@ -633,6 +689,10 @@ def build_arg_parser() -> argparse.ArgumentParser:
     p.add_argument("--batch-rows", type=int, default=None)
     p.add_argument("--max-train-rows", type=int, default=None)
     p.add_argument("--max-test-rows", type=int, default=None)
+    p.add_argument("--score-block-rows", type=int, default=batch_scoring.DEFAULT_BLOCK_ROWS,
+                   help="Linhas por bloco de predict_proba.")
+    p.add_argument("--score-workers", type=int, default=None,
+                   help="Runs pontuados em paralelo (default: orcamento de threads da maquina).")
     return p
 
 
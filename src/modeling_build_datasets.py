@@ -3,7 +3,8 @@
 # CONSTRUCAO DE BASES PARA MODELAGEM (INMET + BDQueimadas, CERRADO)
 # =============================================================================
 # Objetivo:
-# - Carregar os CSVs anuais consolidados inmet_bdq_{ANO}_cerrado.csv.
+# - Carregar as bases anuais consolidadas inmet_bdq_{ANO}_cerrado (Parquet tipado
+#   do consolidated_store; CSV legado so quando nao houver o .parquet do ano).
 # - Harmonizar colunas (especialmente radiacao global).
 # - Aplicar regra de missing (NaN + -999/-9999) ano a ano.
 # - Gerar 6 bases em data/modeling, em formato parquet, PARTICIONADAS POR ANO:
@@ -29,7 +30,7 @@
 #
 #   3) base_B_no_rad_knn
 #      - Remove radiacao global
-#      - Imputa features numericas com KNNImputer (ano a ano)
+#      - Imputa features numericas com KNN (ano a ano)
 #
 #   4) base_C_no_rad_drop_rows
 #      - Remove radiacao global
@@ -41,7 +42,13 @@
 #
 #   6) base_E_with_rad_knn
 #      - Mantem radiacao global
-#      - Imputa features numericas com KNNImputer (ano a ano)
+#      - Imputa features numericas com KNN (ano a ano)
+#
+# - KNN: backend "tree" (padrao, src/ml/_knn_impute.py) usa como doadores
+#   TODAS as linhas do bloco (doador observado nas colunas da linha e na
+#   coluna faltante), com busca exata por KD-tree por padrao de missing e
+#   blocos em paralelo; backend "sklearn" e o
+#   KNNImputer antigo (fit subamostrado em --knn-fit-max-rows).
 #
 # - "Features" aqui = colunas numericas de contexto, exceto:
 #   * colunas em EXCLUDE_NON_NUMERIC (datas, cidade, etc.)
@@ -53,16 +60,24 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+import sys
 
 import pandas as pd
 from sklearn.impute import KNNImputer
 
-from utils import loadConfig, get_logger, get_path, ensure_dir
+from utils import loadConfig, get_logger, get_path, ensure_dir, PARQUET_ROW_GROUP_ROWS
+from consolidated_store import read_parquet as read_store_parquet
 
 import time
 import numpy as np
 
+_project_root = Path(__file__).resolve().parents[1]
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from src.ml._knn_impute import BACKENDS as KNN_BACKENDS, TreeKNNImputer, format_validation, validate_masked  # noqa: E402
+
 try:
     import psutil
 except Exception:
@@ -96,8 +111,9 @@ except Exception:
 # Logger dedicado
 log = get_logger("modeling.build_datasets", kind="modeling", per_run_file=True)
 
-# Padrão dos arquivos ano a ano
-FILENAME_PATTERN = "inmet_bdq_*_cerrado.csv"
+# Padrão dos arquivos ano a ano (.parquet do store ou .csv legado)
+FILENAME_PATTERN = "inmet_bdq_*_cerrado.*"
+DATASET_SUFFIXES = (".parquet", ".csv")  # ordem = prioridade
 
 # Códigos especiais tratados como faltantes
 MISSING_CODES = {-999, -9999}
@@ -182,7 +198,13 @@ class ModelingDatasetBuilder:
     imputer_chunk_rows: int = 50_000          # tamanho do bloco no transform
     log_heartbeat_sec: int = 20               # frequência dos heartbeats
 
-    # ---- KNN: otimizações simples mas efetivas ----
+    # ---- KNN: backend ----
+    imputer_backend: str = "tree"                 # 'tree' (KD-tree no bloco inteiro) ou 'sklearn' (KNNImputer)
+    imputer_tree_algorithm: str = "kd_tree"       # 'kd_tree' ou 'ball_tree'
+    imputer_n_jobs: Optional[int] = None          # threads do transform (tree); None = cpu_thread_budget
+    imputer_validate_rows: int = 0                # >0: RMSE tree vs sklearn em N linhas mascaradas por bloco
+
+    # ---- KNN: otimizações simples mas efetivas (backend sklearn) ----
     imputer_fit_max_rows: Optional[int] = 80_000  # treine o imputer em no máx. M linhas; None/0 = usa tudo
     imputer_prefer_complete_fit: bool = True      # prioriza linhas com menos NaNs no FIT
     imputer_fit_max_missing_frac: float = 0.40    # ao priorizar "completas": máximo % de NaN por linha (0.40 = 40%)
@@ -212,13 +234,17 @@ class ModelingDatasetBuilder:
                     if 1900 <= y <= 2100:
                         year = y
                         break
-            if year is not None:
+            if year is None or fp.suffix.lower() not in DATASET_SUFFIXES:
+                continue
+            # Parquet do store tem prioridade sobre o CSV legado do mesmo ano.
+            prev = mapping.get(year)
+            if prev is None or DATASET_SUFFIXES.index(fp.suffix.lower()) < DATASET_SUFFIXES.index(prev.suffix.lower()):
                 mapping[year] = fp
 
         mapping = dict(sorted(mapping.items()))
         if not mapping:
             raise FileNotFoundError(
-                f"Nenhum CSV encontrado em {self.dataset_dir} com padrao {self.file_pattern}"
+                f"Nenhuma base anual (.parquet/.csv) em {self.dataset_dir} com padrao {self.file_pattern}"
             )
         log.info(f"[DISCOVER] {len(mapping)} arquivos anuais detectados.")
         return mapping
@@ -267,8 +293,12 @@ class ModelingDatasetBuilder:
 
         return df
 
-    def read_year_csv(self, fp: Path, year: int) -> pd.DataFrame:
-        df = pd.read_csv(fp, sep=",", decimal=",", encoding="utf-8", low_memory=False)
+    def read_year_file(self, fp: Path, year: int) -> pd.DataFrame:
+        if fp.suffix.lower() == ".parquet":
+            # Já tipado; ts_hour volta em texto 'YYYY-MM-DD HH:00:00', como no CSV.
+            df = read_store_parquet(fp)
+        else:
+            df = pd.read_csv(fp, sep=",", decimal=",", encoding="utf-8", low_memory=False)
         df = self.harmonize_columns(df)
         if "ANO" not in df.columns:
             df["ANO"] = year
@@ -399,8 +429,11 @@ class ModelingDatasetBuilder:
         n_neighbors: int,
     ) -> pd.DataFrame:
         """
-        Imputa um bloco (tabela inteira ou subgrupo) usando KNNImputer,
-        com FIT possivelmente em subamostra e TRANSFORM em blocos.
+        Imputa um bloco (tabela inteira ou subgrupo).
+
+        Backend tree: fit em todas as linhas do bloco, transform por padrao
+        de missing em paralelo. Backend sklearn: KNNImputer com FIT
+        possivelmente em subamostra e TRANSFORM em blocos.
         """
         df_block = df_block.copy()
         X = df_block[num_cols].to_numpy(dtype=np.float32, copy=True)
@@ -419,6 +452,16 @@ class ModelingDatasetBuilder:
             top_str = "; ".join([f"{c}: {cnt} ({pct:.1f}%)" for c, cnt, pct in worst_cols])
             log.info(f"[KNN] TOP missing (antes): {top_str}")
 
+        if self.imputer_validate_rows > 0:
+            self._log_knn_validation(X, n_neighbors)
+
+        if self.imputer_backend == "tree":
+            out = self._impute_tree(X, n_neighbors)
+            if out is not None:
+                self._log_missing_reduction(out, num_cols, miss_pct)
+                df_block[num_cols] = out
+                return df_block
+
         # ---- FIT em subamostra (se configurado) ----
         fit_idx = self._choose_fit_indices(
             X,
@@ -465,7 +508,65 @@ class ModelingDatasetBuilder:
         speed_final = n_rows / max(1e-9, t_total)
         log.info(f"[KNN] TRANSFORM terminou em {t_total:.1f}s | {speed_final:,.0f} lin/s | {_mem_info()}")
 
-        # pós-estatística
+        self._log_missing_reduction(out, num_cols, miss_pct)
+        df_block[num_cols] = out
+        return df_block
+
+    def _impute_tree(self, X: np.ndarray, n_neighbors: int) -> Optional[np.ndarray]:
+        """Backend tree; None se nao houver linhas com valor suficientes (cai no sklearn)."""
+        t0 = time.perf_counter()
+        imputer = TreeKNNImputer(
+            n_neighbors=n_neighbors,
+            weights=self.imputer_weights,
+            algorithm=self.imputer_tree_algorithm,
+            chunk_rows=self.imputer_chunk_rows,
+            n_jobs=self.imputer_n_jobs,
+        ).fit(X)
+        if imputer.n_fit_rows_ < n_neighbors:
+            log.warning(
+                f"[KNN] tree: so {imputer.n_fit_rows_} linhas com valor (< n_neighbors={n_neighbors}); "
+                "usando KNNImputer neste bloco."
+            )
+            return None
+        log.info(
+            f"[KNN] tree: fit em {imputer.n_fit_rows_} linhas com valor (de {X.shape[0]}). "
+            f"n_neighbors={n_neighbors}, weights={self.imputer_weights}, algorithm={self.imputer_tree_algorithm}"
+        )
+        out = imputer.transform(X, log=log, heartbeat_sec=self.log_heartbeat_sec).astype(np.float32)
+        t_total = time.perf_counter() - t0
+        log.info(f"[KNN] tree: terminou em {t_total:.1f}s | {X.shape[0] / max(1e-9, t_total):,.0f} lin/s | {_mem_info()}")
+        return out
+
+    def _log_knn_validation(self, X: np.ndarray, n_neighbors: int) -> None:
+        """RMSE tree vs KNNImputer (fit subamostrado como no backend sklearn) em valores mascarados."""
+        max_fit = int(self.imputer_fit_max_rows or 0)
+
+        def _sklearn(X_fit: np.ndarray):
+            if 0 < max_fit < X_fit.shape[0]:
+                idx = np.random.default_rng(42).choice(X_fit.shape[0], size=max_fit, replace=False)
+                X_fit = X_fit[np.sort(idx)]
+            return KNNImputer(n_neighbors=n_neighbors, weights=self.imputer_weights).fit(X_fit)
+
+        rep = validate_masked(
+            X,
+            {
+                "tree": lambda X_fit: TreeKNNImputer(
+                    n_neighbors=n_neighbors,
+                    weights=self.imputer_weights,
+                    algorithm=self.imputer_tree_algorithm,
+                    n_jobs=self.imputer_n_jobs,
+                ).fit(X_fit),
+                "sklearn": _sklearn,
+            },
+            n_rows=self.imputer_validate_rows,
+        )
+        if not rep:
+            log.info("[KNN] validacao: sem linhas observadas/incompletas suficientes.")
+        for line in format_validation(rep):
+            log.info(f"[KNN] validacao mascarada | {line}")
+
+    def _log_missing_reduction(self, out: np.ndarray, num_cols: List[str], miss_pct: np.ndarray) -> None:
+        n_rows, n_cols = out.shape
         miss_after = np.isnan(out).sum(axis=0)
         miss_after_pct = (miss_after / max(1, n_rows)) * 100.0
         improved = []
@@ -478,9 +579,6 @@ class ModelingDatasetBuilder:
             ch_str = "; ".join([f"{c}: {bef:.1f}% -> {aft:.1f}%" for c, bef, aft in improved])
             log.info(f"[KNN] Redução de missing (top): {ch_str}")
 
-        df_block[num_cols] = out
-        return df_block
-
     def apply_knn_imputation(
         self,
         df: pd.DataFrame,
@@ -568,7 +666,7 @@ class ModelingDatasetBuilder:
             return
         if path.exists() and self.overwrite_existing:
             log.info(f"[OVERWRITE] {scenario} ({year}) será sobrescrito.")
-        df.to_parquet(path, index=False)
+        df.to_parquet(path, index=False, row_group_size=PARQUET_ROW_GROUP_ROWS)
         log.info(f"[SAVE] {scenario} ({year}): {df.shape[0]} x {df.shape[1]} -> {path}")
 
     # ------------------------------
@@ -588,9 +686,16 @@ class ModelingDatasetBuilder:
         df_year = self.apply_missing_semantics(df_year)
         df_year = self.coerce_feature_columns_to_numeric(df_year)
 
-        sort_cols = [c for c in ["ANO", "DATA (YYYY-MM-DD)", "HORA (UTC)"] if c in df_year.columns]
+        # Ordem ANO + hora: deixa o min/max de ANO/ts_hour por row group seletivo
+        # para a poda do train_runner. Aliases 2019+ ("Data", "Hora UTC") inclusos.
+        sort_cols = [c for c in ["ANO", "ts_hour"] if c in df_year.columns]
+        if "ts_hour" not in sort_cols:
+            sort_cols += [
+                c for c in ["DATA (YYYY-MM-DD)", "HORA (UTC)", "Data", "Hora UTC"]
+                if c in df_year.columns
+            ]
         if sort_cols:
-            df_year = df_year.sort_values(sort_cols).reset_index(drop=True)
+            df_year = df_year.sort_values(sort_cols, kind="mergesort").reset_index(drop=True)
         log.info(f"[YEAR {year}] Base após missing/coerce: {df_year.shape[0]} x {df_year.shape[1]}.")
 
         df_A = None
@@ -680,7 +785,7 @@ class ModelingDatasetBuilder:
         log.info(f"[RUN] Construindo {len(year_files)} ano(s).")
         for year, fp in year_files.items():
             log.info(f"[YEAR {year}] Lendo {fp.name}")
-            df_year = self.read_year_csv(fp, year=year)
+            df_year = self.read_year_file(fp, year=year)
             self.build_and_save_scenarios_for_year(df_year=df_year, year=year, n_neighbors=n_neighbors)
 
 
@@ -693,7 +798,7 @@ def main() -> None:
     parser = argparse.ArgumentParser(
         description=(
             "Construcao das bases de modelagem (6 cenarios) a partir dos "
-            "CSVs inmet_bdq_{ANO}_cerrado.\n"
+            "arquivos inmet_bdq_{ANO}_cerrado (.parquet ou .csv).\n"
             "Salva parquet em data/modeling/<cenario>/inmet_bdq_{ANO}_cerrado.parquet."
         )
     )
@@ -763,8 +868,17 @@ def main() -> None:
         help="Intervalo (s) para heartbeat de log durante KNN (default: 20s)."
     )
 
+    parser.add_argument("--knn-backend", choices=list(KNN_BACKENDS), default="tree",
+        help="tree: KD-tree exata sobre todas as linhas do bloco, transform paralelo (default); "
+             "sklearn: KNNImputer com fit subamostrado.")
+    parser.add_argument("--knn-tree-algorithm", choices=["kd_tree", "ball_tree"], default="kd_tree",
+        help="Indice do backend tree (default: kd_tree).")
+    parser.add_argument("--knn-n-jobs", type=int, default=None,
+        help="Threads do transform no backend tree (default: orcamento de CPU da maquina).")
+    parser.add_argument("--knn-validate-rows", type=int, default=0,
+        help="Se >0, compara RMSE tree vs sklearn em N linhas mascaradas por bloco (default: 0).")
     parser.add_argument("--knn-fit-max-rows", type=int, default=80_000,
-        help="Máx. de linhas para FIT do KNNImputer; 0 usa todas (default: 80k).")
+        help="Máx. de linhas para FIT do KNNImputer (backend sklearn); 0 usa todas (default: 80k).")
     parser.add_argument("--no-knn-prefer-complete-fit", dest="knn_prefer_complete_fit",
         action="store_false",
         help="Não prioriza linhas com menos NaN no conjunto de FIT (por padrão prioriza).")
@@ -803,6 +917,10 @@ def main() -> None:
         enabled_scenarios=enabled,
         imputer_chunk_rows=args.knn_chunk_rows,
         log_heartbeat_sec=args.log_heartbeat_sec,
+        imputer_backend=args.knn_backend,
+        imputer_tree_algorithm=args.knn_tree_algorithm,
+        imputer_n_jobs=args.knn_n_jobs,
+        imputer_validate_rows=args.knn_validate_rows,
         imputer_fit_max_rows=args.knn_fit_max_rows,
         imputer_prefer_complete_fit=args.knn_prefer_complete_fit,
         imputer_fit_max_missing_frac=args.knn_fit_max_missing_frac,
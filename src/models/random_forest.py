@@ -90,6 +90,11 @@ class RandomForestTrainer(BaseModelTrainer):
         # custo combinatorio de fits sobre dataset full.
         self.max_gs_samples = 2_000_000
 
+        # grid_mode="halving": grid full em subamostras temporais crescentes do
+        # subset do GS (top 1/factor por rung; ultimo rung = subset inteiro).
+        self.halving_factor = 3
+        self.halving_min_resources = 50_000
+
     # -------------------------------------------------------------------------
     # SMOTE pre-cap: subsamplear ANTES do fit_resample para nao estourar RAM
     # -------------------------------------------------------------------------
@@ -265,18 +270,38 @@ class RandomForestTrainer(BaseModelTrainer):
             X_gs, y_gs, _ = self._maybe_cap_for_smote(X_gs, y_gs, n_features=int(X_gs.shape[1]))
 
         optimizer = ModelOptimizer(base_model, param_grid, self.log, seed=self.random_state)
-        _ = optimizer.optimize(
-            X_gs,
-            y_gs,
-            cv_splits=int(cv_splits),
-            use_smote=use_smote_in_grid,
-            use_scaler=False,
-            scoring=scoring,
-            smote_sampling_strategy=smote_sampling_strategy,
-            smote_k_neighbors=smote_k_neighbors,
-            n_jobs=1,           # CV serial: n_jobs paralelo no fit final
-            verbose=1,
-        )
+        if grid_mode == "halving":
+            # Successive halving em subamostras temporais crescentes (mesmo
+            # executor memmap por rung); refit fica a cargo do train().
+            _ = optimizer.optimize_halving(
+                X_gs,
+                y_gs,
+                cv_splits=int(cv_splits),
+                use_smote=use_smote_in_grid,
+                use_scaler=False,
+                scoring=scoring,
+                factor=self.halving_factor,
+                min_resources=self.halving_min_resources,
+                smote_sampling_strategy=smote_sampling_strategy,
+                smote_k_neighbors=smote_k_neighbors,
+                refit=False,
+            )
+        else:
+            _ = optimizer.optimize(
+                X_gs,
+                y_gs,
+                cv_splits=int(cv_splits),
+                use_smote=use_smote_in_grid,
+                use_scaler=False,
+                scoring=scoring,
+                smote_sampling_strategy=smote_sampling_strategy,
+                smote_k_neighbors=smote_k_neighbors,
+                n_jobs=1,           # fallback serial; n_jobs paralelo no fit final
+                verbose=1,
+                # (candidato, fold) em processos sobre X em memmap, workers
+                # admitidos por resource.recommend_n_jobs.
+                parallel_folds=True,
+            )
 
         meta = optimizer.last_search_meta or {}
         bp = meta.get("best_params") or None
@@ -292,6 +317,8 @@ class RandomForestTrainer(BaseModelTrainer):
                     best_params=bp,
                     best_score=meta.get("best_score"),
                     scoring=meta.get("scoring"),
+                    search=({k: meta.get(k) for k in ("executor", "fits_total", "fits_exhaustive", "rungs")}
+                            if meta.get("executor") == "halving" else None),
                     log=self.log,
                 )
             except Exception as e:
@@ -35,8 +35,10 @@ class XGBoostTrainer(BaseModelTrainer):
       - gridsearch_smote_weight
 
     Novos controles:
-      - grid_mode: "full" ou "fast" (reduz candidatos e fits)
-      - model_n_jobs: threads no fit do XGBoost (GridSearch segue serial em n_jobs=1 para poupar RAM)
+      - grid_mode: "full", "fast" (reduz candidatos e fits) ou "halving"
+        (successive halving sobre o grid full com early stopping nativo)
+      - model_n_jobs: threads no fit do XGBoost (no GridSearch, divididas entre os workers
+        que leem X de um memmap compartilhado; ver ModelOptimizer parallel_folds)
     """
 
     # Cache em memoria por (cenario, grid_mode) — espelha o do RF e evita
@@ -64,6 +66,13 @@ class XGBoostTrainer(BaseModelTrainer):
             "colsample_bytree": [0.9, 1.0],
         }
 
+        # grid_mode="halving": candidatos do grid full em subamostras temporais
+        # crescentes (top 1/factor por rung). Com early stopping, n_estimators
+        # do grid vira so o teto e o valor final sai do best_iteration.
+        self.halving_factor = 3
+        self.halving_min_resources = 50_000
+        self.halving_early_stopping_rounds = 30
+
     # -------------------------------------------------------------------------
     # SMOTE pre-cap: limita o input do fit_resample para evitar OOM no vstack
     # -------------------------------------------------------------------------
@@ -131,18 +140,39 @@ class XGBoostTrainer(BaseModelTrainer):
             X_gs, y_gs, _ = self._maybe_cap_for_smote(X_gs, y_gs)
 
         optimizer = ModelOptimizer(base_model, param_grid, self.log, seed=self.random_state)
-        _ = optimizer.optimize(
-            X_gs,
-            y_gs,
-            cv_splits=int(cv_splits),
-            use_smote=use_smote_in_grid,
-            use_scaler=False,
-            scoring=scoring,
-            smote_sampling_strategy=smote_sampling_strategy,
-            smote_k_neighbors=smote_k_neighbors,
-            n_jobs=1,
-            verbose=1,
-        )
+        if grid_mode == "halving":
+            # Successive halving em subamostras temporais crescentes (mesmo
+            # executor memmap por rung); refit fica a cargo do train().
+            _ = optimizer.optimize_halving(
+                X_gs,
+                y_gs,
+                cv_splits=int(cv_splits),
+                use_smote=use_smote_in_grid,
+                use_scaler=False,
+                scoring=scoring,
+                factor=self.halving_factor,
+                min_resources=self.halving_min_resources,
+                early_stopping_rounds=self.halving_early_stopping_rounds,
+                smote_sampling_strategy=smote_sampling_strategy,
+                smote_k_neighbors=smote_k_neighbors,
+                refit=False,
+            )
+        else:
+            _ = optimizer.optimize(
+                X_gs,
+                y_gs,
+                cv_splits=int(cv_splits),
+                use_smote=use_smote_in_grid,
+                use_scaler=False,
+                scoring=scoring,
+                smote_sampling_strategy=smote_sampling_strategy,
+                smote_k_neighbors=smote_k_neighbors,
+                n_jobs=1,
+                verbose=1,
+                # (candidato, fold) em processos sobre X em memmap; threads do XGB
+                # divididas entre os workers. Com 1 worker cai no serial.
+                parallel_folds=True,
+            )
 
         meta = optimizer.last_search_meta or {}
         bp = meta.get("best_params") or None
@@ -157,6 +187,8 @@ class XGBoostTrainer(BaseModelTrainer):
                     best_params=bp,
                     best_score=meta.get("best_score"),
                     scoring=meta.get("scoring"),
+                    search=({k: meta.get(k) for k in ("executor", "fits_total", "fits_exhaustive", "rungs")}
+                            if meta.get("executor") == "halving" else None),
                     log=self.log,
                 )
             except Exception as e:
@@ -185,7 +217,7 @@ class XGBoostTrainer(BaseModelTrainer):
             optimize: ativa GridSearchCV com TimeSeriesSplit.
             use_smote: ativa SMOTE dentro do pipeline (fast ou grid).
             use_scale: aqui significa balanceamento por peso (scale_pos_weight).
-            grid_mode: "full" ou "fast".
+            grid_mode: "full", "fast" ou "halving".
             model_n_jobs: threads no fit do XGBoost.
         """
         self._auto_set_variation(optimize=optimize, use_smote=use_smote, use_scale=use_scale)
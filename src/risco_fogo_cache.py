@@ -0,0 +1,443 @@
+# src/risco_fogo_cache.py
+# =============================================================================
+# CACHE LOCAL + DOWNLOAD CONCORRENTE DAS GRADES DE RISCO DE FOGO (INPE)
+# =============================================================================
+# Motivacao: o RiskMerger baixava/abria o NetCDF de cada dia dentro do loop
+# do join, um dia por vez: a latencia de rede entrava inteira no tempo da
+# validacao e um download interrompido deixava arquivo truncado.
+#
+# Aqui o download vira uma etapa separada:
+#   - RiskGridCache: store content-addressed (objects/<sha[:2]>/<sha>.nc) +
+#     manifesto SQLite dia -> sha; dia ja presente nao e baixado de novo;
+#   - RiskGridFetcher: baixa os dias faltantes em paralelo (threads, uma
+#     sessao requests por thread); cada download vai para partial/*.part e
+#     e retomado com HTTP Range apos interrupcao; so entra no cache depois
+#     de completo (Content-Length) e com assinatura NetCDF/HDF5 valida.
+#     Arquivos antigos em data/raw/RISCO_FOGO sao importados sem rede;
+#   - cubo Cerrado por ano (opcional): cubes/cerrado_{ANO}.npz com a grade
+#     recortada em CERRADO_BBOX (dias x lat x lon, float32), refeito so
+#     quando o conjunto de arquivos do ano muda. Validacoes repetidas leem
+#     o cubo e nao abrem os NetCDFs globais.
+#
+# Layout (padrao: <risco_fogo raw>/_cache):
+#   manifest.sqlite | objects/ | partial/ | cubes/
+#
+# CLI:
+#   python src/risco_fogo_cache.py --years 2023 2024 [--workers 8] [--cubes]
+# =============================================================================
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Boilerplate de Path
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+import src.utils as utils  # noqa: E402
+
+INPE_URL_TEMPLATE = (
+    "https://dataserver-coids.inpe.br/queimadas/queimadas/riscofogo_meteorologia/"
+    "observado/risco_fogo/{year}/INPE_FireRiskModel_2.2_FireRisk_{date_str}.nc"
+)
+FILENAME_TEMPLATE = "INPE_FireRiskModel_2.2_FireRisk_{date_str}.nc"
+
+# (lat_min, lat_max, lon_min, lon_max) do Cerrado com ~0.5 grau de folga.
+CERRADO_BBOX = (-25.0, -2.0, -61.0, -41.0)
+
+# NetCDF classico (CDF\x01/\x02) ou NetCDF4/HDF5.
+_NC_MAGIC = (b"CDF\x01", b"CDF\x02", b"\x89HDF")
+_CHUNK = 1024 * 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS grids (
+    day TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+
+def day_filename(ts) -> str:
+    return FILENAME_TEMPLATE.format(date_str=pd.Timestamp(ts).strftime("%Y%m%d"))
+
+
+def default_root(cfg: Optional[dict] = None) -> Path:
+    """Pasta dos NetCDFs diarios: paths.providers.risco_fogo.raw ou data/raw/RISCO_FOGO."""
+    cfg = cfg or utils.loadConfig()
+    provider = cfg["paths"]["providers"].get("risco_fogo") or {}
+    return Path(provider.get("raw") or Path(cfg["paths"]["data"]["raw"]) / "RISCO_FOGO")
+
+
+def is_netcdf(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            head = f.read(4)
+    except OSError:
+        return False
+    return any(head.startswith(m) for m in _NC_MAGIC)
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _day_key(ts) -> str:
+    return pd.Timestamp(ts).strftime("%Y-%m-%d")
+
+
+class RiskGridCache:
+    """Store content-addressed dos NetCDFs diarios; manifesto SQLite (thread principal)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = utils.ensure_dir(self.root / "objects")
+        self.partial = utils.ensure_dir(self.root / "partial")
+        self.cubes = utils.ensure_dir(self.root / "cubes")
+        self.conn = sqlite3.connect(str(self.root / "manifest.sqlite"), timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def _object_path(self, sha: str) -> Path:
+        return self.objects / sha[:2] / f"{sha}.nc"
+
+    def path_for(self, ts) -> Optional[Path]:
+        row = self.conn.execute("SELECT sha256 FROM grids WHERE day = ?", (_day_key(ts),)).fetchone()
+        if row is None:
+            return None
+        p = self._object_path(row[0])
+        return p if p.exists() else None
+
+    def has(self, ts) -> bool:
+        return self.path_for(ts) is not None
+
+    def entries(self, year: Optional[int] = None) -> List[Tuple[pd.Timestamp, str]]:
+        """(dia, sha) presentes, ordenados por dia."""
+        q = "SELECT day, sha256 FROM grids"
+        args: Tuple = ()
+        if year is not None:
+            q += " WHERE day LIKE ?"
+            args = (f"{int(year)}-%",)
+        rows = self.conn.execute(q + " ORDER BY day", args).fetchall()
+        return [(pd.Timestamp(d), sha) for d, sha in rows if self._object_path(sha).exists()]
+
+    def partial_path(self, ts) -> Path:
+        return self.partial / (day_filename(ts) + ".part")
+
+    def add_file(self, ts, src: Path, url: str, move: bool = True) -> Path:
+        """Guarda src sob o sha256 e registra o dia; move=False copia (arquivo legado)."""
+        src = Path(src)
+        sha = _sha256(src)
+        dest = self._object_path(sha)
+        utils.ensure_dir(dest.parent)
+        if dest.exists():
+            if move:
+                src.unlink()
+        elif move:
+            os.replace(src, dest)
+        else:
+            tmp = dest.with_suffix(".tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO grids VALUES (?,?,?,?,?)",
+            (_day_key(ts), sha, int(dest.stat().st_size), url, datetime.now().isoformat(timespec="seconds")),
+        )
+        self.conn.commit()
+        return dest
+
+    def invalidate(self, ts) -> None:
+        """Remove o dia do manifesto (e o objeto, se nenhum outro dia o referencia)."""
+        key = _day_key(ts)
+        row = self.conn.execute("SELECT sha256 FROM grids WHERE day = ?", (key,)).fetchone()
+        self.conn.execute("DELETE FROM grids WHERE day = ?", (key,))
+        self.conn.commit()
+        if row is not None:
+            still = self.conn.execute("SELECT 1 FROM grids WHERE sha256 = ? LIMIT 1", (row[0],)).fetchone()
+            if still is None:
+                self._object_path(row[0]).unlink(missing_ok=True)
+
+    def cube_path(self, year: int) -> Path:
+        return self.cubes / f"cerrado_{int(year)}.npz"
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+@dataclass
+class FetchReport:
+    cached: int = 0
+    ingested: int = 0
+    downloaded: int = 0
+    resumed: int = 0
+    missing: int = 0
+    failed: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return (
+            f"cache={self.cached} importados={self.ingested} baixados={self.downloaded} "
+            f"(retomados={self.resumed}) ausentes={self.missing} falhas={self.failed} | "
+            f"{self.bytes / 1e6:.1f} MB em {self.seconds:.1f}s"
+        )
+
+
+class RiskGridFetcher:
+    """Baixa os dias faltantes para o RiskGridCache em paralelo, com retomada."""
+
+    def __init__(
+        self,
+        cache: RiskGridCache,
+        *,
+        url_template: str = INPE_URL_TEMPLATE,
+        workers: int = 8,
+        legacy_dir: Optional[Path] = None,
+        timeout: float = 60.0,
+        log=None,
+    ):
+        self.cache = cache
+        self.url_template = url_template
+        self.workers = max(1, int(workers))
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else None
+        self.timeout = float(timeout)
+        self.log = log
+        self._local = threading.local()
+
+    def url_for(self, ts) -> str:
+        ts = pd.Timestamp(ts)
+        return self.url_template.format(year=ts.year, date_str=ts.strftime("%Y%m%d"))
+
+    def _session(self):
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = self._local.session = utils.get_requests_session()
+        return s
+
+    def _download(self, ts) -> Tuple[str, Optional[Path], int, bool]:
+        """Worker: (status, .part completo, bytes recebidos, retomado). Nao toca no SQLite."""
+        url = self.url_for(ts)
+        part = self.cache.partial_path(ts)
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        r = self._session().get(url, stream=True, timeout=self.timeout, headers=headers)
+        if r.status_code == 416:
+            # .part ja tem o arquivo inteiro (ou esta invalido): recomeca do zero
+            r.close()
+            part.unlink(missing_ok=True)
+            offset = 0
+            r = self._session().get(url, stream=True, timeout=self.timeout)
+        if r.status_code == 404:
+            r.close()
+            return "missing", None, 0, False
+        r.raise_for_status()
+        resumed = r.status_code == 206 and offset > 0
+        if not resumed:
+            offset = 0
+        expected = int(r.headers.get("Content-Length", 0) or 0)
+        written = 0
+        with open(part, "ab" if resumed else "wb") as f:
+            for chunk in r.iter_content(chunk_size=_CHUNK):
+                if chunk:
+                    f.write(chunk)
+                    written += len(chunk)
+        if expected and written != expected:
+            # interrompido: .part fica para a proxima tentativa retomar
+            return "failed", None, written, resumed
+        if not is_netcdf(part):
+            part.unlink(missing_ok=True)
+            return "failed", None, written, resumed
+        return "ok", part, written, resumed
+
+    def fetch(self, dates: Iterable, force: bool = False, download: bool = True) -> FetchReport:
+        """Garante os dias no cache. download=False: so importa arquivos legados (sem rede)."""
+        t0 = time.perf_counter()
+        rep = FetchReport()
+        todo: List[pd.Timestamp] = []
+        for ts in sorted({pd.Timestamp(d).normalize() for d in dates}):
+            if not force and self.cache.has(ts):
+                rep.cached += 1
+                continue
+            legacy = self.legacy_dir / day_filename(ts) if self.legacy_dir else None
+            if not force and legacy is not None and legacy.exists() and is_netcdf(legacy):
+                self.cache.add_file(ts, legacy, url=legacy.as_uri(), move=False)
+                rep.ingested += 1
+                continue
+            if force:
+                self.cache.partial_path(ts).unlink(missing_ok=True)
+            todo.append(ts)
+
+        if todo and not download:
+            rep.missing += len(todo)
+            todo = []
+        if todo:
+            if self.log is not None:
+                self.log.info(f"[RISCO] baixando {len(todo)} dias com {min(self.workers, len(todo))} workers...")
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(todo)), thread_name_prefix="risco-fetch") as pool:
+                futs = {pool.submit(self._download, ts): ts for ts in todo}
+                for fut in as_completed(futs):
+                    ts = futs[fut]
+                    try:
+                        status, part, nbytes, resumed = fut.result()
+                    except Exception as e:
+                        rep.failed += 1
+                        rep.errors[_day_key(ts)] = str(e)
+                        continue
+                    rep.bytes += nbytes
+                    if status == "ok":
+                        # SQLite so na thread principal
+                        self.cache.add_file(ts, part, url=self.url_for(ts), move=True)
+                        rep.downloaded += 1
+                        rep.resumed += int(resumed)
+                    elif status == "missing":
+                        rep.missing += 1
+                    else:
+                        rep.failed += 1
+                        rep.errors[_day_key(ts)] = "download incompleto ou arquivo invalido"
+        rep.seconds = time.perf_counter() - t0
+        if self.log is not None:
+            self.log.info(f"[RISCO] fetch: {rep.summary()}")
+        return rep
+
+
+# -----------------------------------------------------------------------------
+# Cubo Cerrado por ano (NPZ)
+# -----------------------------------------------------------------------------
+def _lat_lon_names(da) -> Tuple[str, str]:
+    lat = "lat" if "lat" in da.dims else "latitude"
+    lon = "lon" if "lon" in da.dims else "longitude"
+    return lat, lon
+
+
+def read_grid(path: Path) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(lat, lon, risco[lat, lon]) da primeira variavel de um NetCDF diario (time=0)."""
+    import xarray as xr
+
+    with xr.open_dataset(path) as ds:
+        da = ds[list(ds.data_vars)[0]]
+        if "time" in da.dims:
+            da = da.isel(time=0)
+        lat_name, lon_name = _lat_lon_names(da)
+        da = da.transpose(lat_name, lon_name)
+        return (np.asarray(da[lat_name].values, dtype=np.float64),
+                np.asarray(da[lon_name].values, dtype=np.float64),
+                np.asarray(da.values, dtype=np.float32))
+
+
+def build_year_cube(cache: RiskGridCache, year: int, bbox: Tuple[float, float, float, float] = CERRADO_BBOX,
+                    log=None) -> Optional[Path]:
+    """Grava (ou reaproveita) cubes/cerrado_{ANO}.npz com os dias do cache recortados em bbox."""
+    entries = cache.entries(year)
+    out = cache.cube_path(year)
+    if not entries:
+        return None
+    shas = np.array([sha for _, sha in entries])
+    if out.exists():
+        try:
+            with np.load(out) as z:
+                if np.array_equal(z["shas"], shas):
+                    return out
+        except Exception:
+            pass
+
+    lat_min, lat_max, lon_min, lon_max = bbox
+    cube: List[np.ndarray] = []
+    days: List[np.datetime64] = []
+    kept: List[str] = []
+    ref: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    sel: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    for ts, sha in entries:
+        try:
+            lat, lon, grid = read_grid(cache.path_for(ts))
+        except Exception as e:
+            if log is not None:
+                log.warning(f"[RISCO] cubo {year}: falha ao ler {ts.date()} ({e}); dia fora do cubo")
+            continue
+        if ref is None:
+            ref = (lat, lon)
+            sel = (np.flatnonzero((lat >= lat_min) & (lat <= lat_max)),
+                   np.flatnonzero((lon >= lon_min) & (lon <= lon_max)))
+        elif not (np.array_equal(lat, ref[0]) and np.array_equal(lon, ref[1])):
+            if log is not None:
+                log.warning(f"[RISCO] cubo {year}: grade de {ts.date()} difere do primeiro dia; dia fora do cubo")
+            continue
+        cube.append(grid[np.ix_(sel[0], sel[1])])
+        days.append(np.datetime64(ts.date(), "D"))
+        kept.append(sha)
+    if not cube:
+        return None
+
+    tmp = out.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(
+            f,
+            dates=np.array(days, dtype="datetime64[D]"),
+            lat=ref[0][sel[0]],
+            lon=ref[1][sel[1]],
+            risk=np.stack(cube).astype(np.float32),
+            shas=np.array(kept) if len(kept) == len(shas) else shas,
+        )
+    os.replace(tmp, out)
+    if log is not None:
+        log.info(f"[RISCO] cubo {year}: {len(cube)} dias x {len(sel[0])}x{len(sel[1])} -> {out}")
+    return out
+
+
+def load_year_cube(path: Path) -> Dict[str, np.ndarray]:
+    with np.load(path) as z:
+        return {k: z[k] for k in ("dates", "lat", "lon", "risk")}
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+def main() -> None:
+    p = argparse.ArgumentParser(description="Baixa as grades diarias de risco de fogo do INPE para o cache local.")
+    p.add_argument("--years", nargs="+", type=int, required=True)
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--force", action="store_true", help="Rebaixa mesmo os dias ja presentes.")
+    p.add_argument("--cubes", action="store_true", help="Gera tambem o cubo Cerrado (NPZ) de cada ano.")
+    p.add_argument("--url-template", default=INPE_URL_TEMPLATE)
+    args = p.parse_args()
+
+    log = utils.get_logger("risco_fogo.cache")
+    raw = default_root()
+    cache = RiskGridCache(raw / "_cache")
+    fetcher = RiskGridFetcher(cache, url_template=args.url_template, workers=args.workers, legacy_dir=raw, log=log)
+    dates = [d for y in args.years for d in pd.date_range(f"{y}-01-01", f"{y}-12-31", freq="D")
+             if d <= pd.Timestamp.today().normalize()]
+    rep = fetcher.fetch(dates, force=args.force)
+    for day, err in sorted(rep.errors.items()):
+        log.warning(f"[RISCO] {day}: {err}")
+    if args.cubes:
+        for y in args.years:
+            build_year_cube(cache, y, log=log)
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@
 
 import argparse
 import gc
+import json
 import os
 import re
 import shutil
@@ -28,6 +29,15 @@ import pandas as pd
 # peak-RAM bounded even on wide minirocket schemas (~200 cols).
 _DEFAULT_BATCH_ROWS = int(os.environ.get("TRAIN_RUNNER_BATCH_ROWS", "500000"))
 
+# Prefetch de parquets em threads (1 = sequencial) e teto de bytes de chunks
+# decodificados aguardando a thread principal.
+_READ_WORKERS = int(os.environ.get("TRAIN_RUNNER_READ_WORKERS", str(min(4, os.cpu_count() or 1))))
+_PREFETCH_BUDGET_MB = int(os.environ.get("TRAIN_RUNNER_PREFETCH_MB", "1024"))
+
+# grid_mode do XGBoost/RandomForest nas variacoes com GridSearch
+# ("full" | "fast" | "halving"); vazio = default por modelo.
+_GRID_MODE = os.environ.get("TRAIN_RUNNER_GRID_MODE", "").strip().lower()
+
 try:
     from tqdm.auto import tqdm
 except ImportError:  # pragma: no cover
@@ -53,6 +63,9 @@ try:
     )
     from src.article.config import biomass_modeling_columns_for_schema
     from src.ml.core import MemoryMonitor, TemporalSplitter
+    from src.ml import _rowgroups as rowgroups
+    from src.ml import _split_cache as split_cache
+    from src.ml._prefetch import StageTimings, prefetch_ordered
 except ImportError as e:
     sys.exit(f"[CRITICAL] Dependencias obrigatorias: {e}")
 
@@ -171,6 +184,30 @@ def _source_rows_by_split(
     return (tr_total if tr_total else None), (te_total if te_total else None)
 
 
+def alert_rate_context(audit: Dict[str, Any], y_test) -> Tuple[Optional[float], float]:
+    """
+    (n_days, neg_weight) do split de teste para os thresholds por alertas/dia.
+
+    n_days = anos de teste x 365.25. neg_weight = negativos na fonte /
+    negativos avaliados (o downsampling mantem todos os positivos); estimativa,
+    pois as linhas da fonte incluem as descartadas pelo dropna. 1.0 sem
+    downsampling ou sem per-file audit.
+    """
+    audit = audit or {}
+    test_years: List[int] = (audit.get("test") or {}).get("years") or []
+    train_years: List[int] = (audit.get("train") or {}).get("years") or []
+    n_days = len(test_years) * 365.25 if test_years else None
+    y = np.asarray(y_test)
+    n_pos = int(np.sum(y == 1))
+    n_neg = int(len(y) - n_pos)
+    neg_weight = 1.0
+    if audit.get("downsample") and n_neg > 0:
+        _, te_src = _source_rows_by_split(audit.get("source") or {}, train_years, test_years)
+        if te_src:
+            neg_weight = max(1.0, (te_src - n_pos) / n_neg)
+    return n_days, neg_weight
+
+
 def _downcast_floats(df: pd.DataFrame) -> None:
     # float64 -> float32 (impacto grande em RAM)
     cols = df.select_dtypes(include=["float64"]).columns
@@ -398,6 +435,7 @@ def _variation_menu_legacy(model_key: str) -> List[VariationOption]:
       - use_scale == Weight (class_weight / scale_pos_weight / sample_weight)
       - Ajustes por modelo para custo computacional
       - RandomForest: default cv_splits=2 e grid_mode="full" para limitar fits
+      - TRAIN_RUNNER_GRID_MODE=halving: successive halving no XGBoost/RF
     """
     base_common: Dict[str, Any] = {
         "cv_splits": 3,
@@ -429,6 +467,9 @@ def _variation_menu_legacy(model_key: str) -> List[VariationOption]:
         grid_common["cv_splits"] = 2
         grid_common["grid_mode"] = "full"
 
+    if _GRID_MODE in ("full", "fast", "halving") and model_key in ("xgboost", "random_forest"):
+        grid_common["grid_mode"] = _GRID_MODE
+
     return [
         VariationOption(
             1,
@@ -493,6 +534,43 @@ def _year_from_filename(p: Path) -> Optional[int]:
         return None
 
 
+def _downsample_positions(
+    y: np.ndarray,
+    max_rows_remaining: Optional[int],
+    neg_pos_ratio: int,
+    min_neg_keep: int,
+    seed: int,
+) -> np.ndarray:
+    """
+    Posicoes (em y) mantidas por _downsample_keep_all_pos, na mesma ordem:
+    positivos primeiro, depois negativos. Usa as mesmas chamadas de RNG que
+    DataFrame.sample(n, random_state=seed) (RandomState(seed).choice sem
+    reposicao), entao o resultado e identico ao caminho pandas.
+    """
+    pos = np.flatnonzero(y == 1)
+    neg = np.flatnonzero(y == 0)
+
+    n_pos = int(len(pos))
+    neg_cap_by_ratio = max(int(min_neg_keep), int(n_pos) * int(neg_pos_ratio))
+
+    if max_rows_remaining is None:
+        neg_cap_by_budget = len(neg)
+    else:
+        budget_for_neg = max(0, int(max_rows_remaining) - n_pos)
+        neg_cap_by_budget = int(budget_for_neg)
+
+    n_neg_keep = int(min(len(neg), neg_cap_by_ratio, neg_cap_by_budget))
+    if n_neg_keep < len(neg):
+        rs = np.random.RandomState(int(seed))
+        neg = neg[rs.choice(len(neg), size=n_neg_keep, replace=False)]
+
+    if max_rows_remaining is not None and n_pos > int(max_rows_remaining):
+        rs = np.random.RandomState(int(seed))
+        pos = pos[rs.choice(n_pos, size=int(max_rows_remaining), replace=False)]
+
+    return np.concatenate([pos, neg])
+
+
 def _downsample_keep_all_pos(
     df: pd.DataFrame,
     target: str,
@@ -511,27 +589,100 @@ def _downsample_keep_all_pos(
     if df is None or df.empty:
         return df
 
-    pos = df[df[target] == 1]
-    neg = df[df[target] == 0]
+    keep = _downsample_positions(
+        df[target].to_numpy(),
+        max_rows_remaining,
+        neg_pos_ratio,
+        min_neg_keep,
+        seed,
+    )
+    return df.iloc[keep].reset_index(drop=True)
 
-    n_pos = int(len(pos))
-    neg_cap_by_ratio = max(int(min_neg_keep), int(n_pos) * int(neg_pos_ratio))
 
-    if max_rows_remaining is None:
-        neg_cap_by_budget = len(neg)
-    else:
-        budget_for_neg = max(0, int(max_rows_remaining) - n_pos)
-        neg_cap_by_budget = int(budget_for_neg)
+def _chunk_nbytes(chunk: Any) -> int:
+    """Bytes de um chunk em espera no prefetch (RecordBatch ou DataFrame)."""
+    if isinstance(chunk, pd.DataFrame):
+        return int(chunk.memory_usage(index=False, deep=False).sum())
+    return int(chunk.nbytes)
 
-    n_neg_keep = int(min(len(neg), neg_cap_by_ratio, neg_cap_by_budget))
-    if n_neg_keep < len(neg):
-        neg = neg.sample(n=n_neg_keep, random_state=int(seed))
 
-    if max_rows_remaining is not None and n_pos > int(max_rows_remaining):
-        pos = pos.sample(n=int(max_rows_remaining), random_state=int(seed))
+def _numeric_values(col: Any, rows: np.ndarray) -> np.ndarray:
+    """pd.to_numeric(errors="coerce") das linhas `rows` de uma coluna Arrow ou pandas."""
+    if isinstance(col, pd.Series):
+        return pd.to_numeric(col.iloc[rows], errors="coerce").to_numpy()
+    import pyarrow as pa  # type: ignore
 
-    out = pd.concat([pos, neg], ignore_index=True)
-    return out
+    taken = col.take(pa.array(rows, type=pa.int64()))
+    if pa.types.is_integer(taken.type) or pa.types.is_floating(taken.type) or pa.types.is_boolean(taken.type):
+        return taken.to_numpy(zero_copy_only=False)
+    return pd.to_numeric(taken.to_pandas(), errors="coerce").to_numpy()
+
+
+def _chunk_keep_rows(
+    chunk: Any,
+    features: List[str],
+    target: str,
+    year_col: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Linhas de um chunk (RecordBatch Arrow ou DataFrame) que sobrevivem ao
+    dropna(features + alvo + ano), a coercao numerica do ano e ao filtro de
+    alvo binario de _coerce_binary_target. Retorna (posicoes, y int8, ano int32).
+
+    No caminho Arrow a mascara de nulos sai dos kernels de compute (NaN de
+    float conta como nulo, como no dropna) e so alvo/ano das linhas validas
+    sao convertidos; as features nao sao materializadas aqui.
+    """
+    subset = list(features) + [target, year_col]
+    if isinstance(chunk, pd.DataFrame):
+        valid = chunk[subset].notna().all(axis=1).to_numpy()
+        get = chunk.__getitem__
+    else:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.compute as pc  # type: ignore
+
+        mask = None
+        for c in subset:
+            arr = chunk.column(c)
+            ok = pc.is_valid(arr)
+            if pa.types.is_floating(arr.type):
+                ok = pc.and_(ok, pc.invert(pc.fill_null(pc.is_nan(arr), True)))
+            mask = ok if mask is None else pc.and_(mask, ok)
+        valid = np.asarray(mask.to_numpy(zero_copy_only=False), dtype=bool)
+        get = chunk.column
+
+    rows = np.flatnonzero(valid)
+    year = _numeric_values(get(year_col), rows)
+    tgt = _numeric_values(get(target), rows)
+
+    ok = pd.notna(year) & pd.notna(tgt)
+    ok &= (tgt == 0) | (tgt == 1)
+    ok = np.asarray(ok, dtype=bool)
+    return rows[ok], tgt[ok].astype(np.int8), year[ok].astype(np.int32)
+
+
+def _materialize_rows(
+    chunk: Any,
+    rows: np.ndarray,
+    features: List[str],
+    y: np.ndarray,
+    year: np.ndarray,
+    target: str,
+    year_col: str,
+) -> pd.DataFrame:
+    """DataFrame (features float32 + alvo + ano) apenas com as linhas `rows`."""
+    if isinstance(chunk, pd.DataFrame):
+        df = chunk.iloc[rows][list(features)].reset_index(drop=True)
+    else:
+        import pyarrow as pa  # type: ignore
+
+        taken = chunk.select(list(features)).take(pa.array(rows, type=pa.int64()))
+        df = taken.to_pandas(split_blocks=True, self_destruct=True)
+        del taken
+    _downcast_floats(df)
+    df[target] = y
+    df[year_col] = year
+    return df
 
 
 def _article_temporal_test_size_years(cfg: Dict[str, Any]) -> int:
@@ -810,6 +961,21 @@ class TrainingOrchestrator:
             self.log.warning(f"[LOAD] sem pyarrow/schema otimizado (vai ler colunas padrao): {e}")
             return None
 
+    def _scan_row_groups(
+        self, files: List[Path], cols: Optional[List[str]]
+    ) -> Dict[Path, Optional[List["rowgroups.RowGroupInfo"]]]:
+        """Estatisticas de row group (so footer) por arquivo; None se ilegivel."""
+        required = [c for c in self.features if cols is None or c in cols]
+        required += [self.target, self.year_col]
+        out: Dict[Path, Optional[List[rowgroups.RowGroupInfo]]] = {}
+        for f in files:
+            try:
+                out[f] = rowgroups.scan_row_groups(f, self.year_col, required)
+            except Exception as e:
+                self.log.debug(f"[ROWGROUPS] sem estatisticas para {f.name}: {e}")
+                out[f] = None
+        return out
+
     def _load_concat(self, files: List[Path], cols: Optional[List[str]]) -> pd.DataFrame:
         # Concat legado para o fallback sem filename-year: ainda usa o streaming
         # para que nenhum arquivo unico estoure a RAM. Cada chunk ja vem em f32.
@@ -829,10 +995,17 @@ class TrainingOrchestrator:
         path: Path,
         columns: Optional[List[str]],
         batch_rows: Optional[int] = None,
-    ) -> Iterator[pd.DataFrame]:
+        timings: Optional[StageTimings] = None,
+        as_arrow: bool = False,
+        row_groups: Optional[List[int]] = None,
+    ) -> Iterator[Any]:
         """
         Le um parquet em batches pequenos usando PyArrow e materializa cada
         batch como DataFrame com floats ja em float32 (via cast Arrow-side).
+        Com as_arrow=True entrega o RecordBatch ja castado (sem to_pandas),
+        para filtrar/amostrar antes da conversao (ver _chunk_keep_rows); sem
+        pyarrow continua entregando DataFrame. row_groups restringe a leitura
+        aos row groups listados (None = todos).
 
         Evita o pico de ~4-5 GiB observado em load_split_batched: o binding
         pandas padrao aloca blocos float64 gigantes ao converter a tabela
@@ -880,19 +1053,36 @@ class TrainingOrchestrator:
         iter_kwargs: Dict[str, Any] = {"batch_size": bs}
         if columns is not None:
             iter_kwargs["columns"] = columns
+        if row_groups is not None:
+            if not row_groups:
+                return
+            iter_kwargs["row_groups"] = list(row_groups)
 
-        for batch in pf.iter_batches(**iter_kwargs):
+        stage = timings if timings is not None else StageTimings()
+        batches = pf.iter_batches(**iter_kwargs)
+        while True:
+            with stage.timed("read"):
+                batch = next(batches, None)
+            if batch is None:
+                break
             if target_schema is not None:
-                try:
-                    batch = batch.cast(target_schema)
-                except Exception:
-                    pass  # segue sem cast; downcast pandas-side cobre o resto
+                with stage.timed("cast"):
+                    try:
+                        batch = batch.cast(target_schema)
+                    except Exception:
+                        pass  # segue sem cast; downcast pandas-side cobre o resto
+
+            if as_arrow:
+                yield batch
+                continue
 
-            # self_destruct libera os buffers Arrow apos a conversao.
-            df = batch.to_pandas(split_blocks=True, self_destruct=True)
+            with stage.timed("to_pandas"):
+                # self_destruct libera os buffers Arrow apos a conversao.
+                df = batch.to_pandas(split_blocks=True, self_destruct=True)
+                del batch
 
-            # Garantia defensiva (ex.: caso cast tenha falhado).
-            _downcast_floats(df)
+                # Garantia defensiva (ex.: caso cast tenha falhado).
+                _downcast_floats(df)
             yield df
 
     def load_split_batched(
@@ -908,12 +1098,90 @@ class TrainingOrchestrator:
         """
         Carrega em batches por parquet (idealmente 1 por ano).
         Faz split temporal por ano do filename, evitando df full gigante.
+        Parquets sem ano no nome sao roteados por linha pelo ANO, com row
+        groups podados pelas estatisticas do footer (src/ml/_rowgroups.py).
 
         Se max_train_rows/max_test_rows:
           - mantem 100% dos positivos
           - amostra negativos respeitando orcamento e neg_pos_ratio
+
+        O resultado fica no cache de split (src/ml/_split_cache.py): com os
+        mesmos parquets/features/anos/orcamentos/seed, as proximas chamadas
+        abrem X/y via memmap em vez de reler os parquets.
         """
+        kwargs = dict(
+            test_size_years=test_size_years,
+            gap_years=gap_years,
+            max_train_rows=max_train_rows,
+            max_test_rows=max_test_rows,
+            neg_pos_ratio=neg_pos_ratio,
+            min_neg_keep_per_chunk=min_neg_keep_per_chunk,
+            batch_rows=batch_rows,
+        )
+        if not split_cache.enabled():
+            return self._load_split_batched_uncached(**kwargs)
+
         files = self._discover_files()
+        try:
+            key_params = {
+                "scenario_folder": self.scenario_folder,
+                "parquet_source": self._parquet_source,
+                "sources": split_cache.parquet_fingerprints(files),
+                "features": list(self.features),
+                "target": self.target,
+                "year_col": self.year_col,
+                "seed": self.random_seed,
+                **kwargs,
+                "batch_rows": int(batch_rows if batch_rows is not None else _DEFAULT_BATCH_ROWS),
+            }
+            key = split_cache.split_key(key_params)
+        except Exception as e:
+            self.log.warning(f"[SPLIT-CACHE] sem chave ({e}); carregando sem cache.")
+            return self._load_split_batched_uncached(**kwargs)
+
+        hit = split_cache.load(
+            self.scenario_folder, key, self.target, self.year_col, log=self.log
+        )
+        if hit is not None:
+            train_df, test_df, valid, meta = hit
+            self._last_source_audit = meta.get("source_audit") or {}
+            audit = dict(meta.get("data_audit") or {})
+            audit["split_cache"] = {"status": "hit", "key": key}
+            self._last_data_audit = audit
+            return train_df, test_df, valid
+
+        train_df, test_df, valid = self._load_split_batched_uncached(files=files, **kwargs)
+        split_cache.save(
+            self.scenario_folder,
+            key,
+            key_params,
+            train_df,
+            test_df,
+            valid,
+            self.target,
+            self.year_col,
+            source_audit=getattr(self, "_last_source_audit", None),
+            data_audit=getattr(self, "_last_data_audit", None),
+            log=self.log,
+        )
+        if isinstance(getattr(self, "_last_data_audit", None), dict):
+            self._last_data_audit["split_cache"] = {"status": "miss", "key": key}
+        return train_df, test_df, valid
+
+    def _load_split_batched_uncached(
+        self,
+        test_size_years: int = 2,
+        gap_years: int = 0,
+        max_train_rows: Optional[int] = None,
+        max_test_rows: Optional[int] = None,
+        neg_pos_ratio: int = 200,
+        min_neg_keep_per_chunk: int = 50_000,
+        batch_rows: Optional[int] = None,
+        files: Optional[List[Path]] = None,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+        """Streaming dos parquets + split + downsampling (caminho sem cache)."""
+        if files is None:
+            files = self._discover_files()
         names = [f.name for f in files]
         preview = names[:40]
         tail = " ..." if len(names) > 40 else ""
@@ -940,24 +1208,32 @@ class TrainingOrchestrator:
 
         cols = self._select_columns(files[0])
 
+        # Anos: pelo nome do arquivo; sem ano no nome, pelo min/max de ANO
+        # das estatisticas de row group (src/ml/_rowgroups.py).
+        rg_infos = self._scan_row_groups(files, cols)
         years: List[int] = []
-        file_years: List[Tuple[Path, Optional[int]]] = []
+        name_years: Dict[Path, Optional[int]] = {}
         for f in files:
             y = _year_from_filename(f)
-            file_years.append((f, y))
+            name_years[f] = y
             if y is not None:
                 years.append(y)
+            elif rg_infos.get(f) is not None:
+                try:
+                    years.extend(rowgroups.distinct_years(f, rg_infos[f], self.year_col))
+                except Exception as e:
+                    self.log.debug(f"[ROWGROUPS] falha ao ler {self.year_col} de {f.name}: {e}")
 
         if years:
             years = sorted(set(years))
             if len(years) < test_size_years + 1:
-                raise ValueError("Anos insuficientes para split temporal (por filename).")
+                raise ValueError("Anos insuficientes para split temporal (por filename/row groups).")
             cut = years[-test_size_years]
             train_max_year = int(cut - gap_years - 1)
             self.log.info(f"[SPLIT-PRE] years={years[0]}..{years[-1]} | cut={cut} | train_max_year={train_max_year}")
         else:
             # Fallback: carrega tudo e usa split por coluna ANO
-            self.log.warning("[SPLIT-PRE] nao inferiu ano por filename. Fallback: load full + split por ANO.")
+            self.log.warning("[SPLIT-PRE] nao inferiu ano por filename nem por row groups. Fallback: load full + split por ANO.")
             df_full = self._load_concat(files, cols)
             valid = [f for f in self.features if f in df_full.columns]
             df_full.dropna(subset=valid + [self.target, self.year_col], inplace=True)
@@ -977,6 +1253,44 @@ class TrainingOrchestrator:
             gc.collect()
             return train_df, test_df, valid
 
+        # Plano por arquivo: row groups a ler (None = todos). Poda sem
+        # decodificar: row groups 100% nulos em feature/alvo/ano (o dropna
+        # removeria tudo) e, em arquivos sem ano no nome, row groups inteiros
+        # na janela de gap. Arquivos com ano no nome seguem inteiros para
+        # train OU test; os que caem no gap sao pulados (como no
+        # TemporalSplitter, que descarta cut-gap <= ANO < cut).
+        file_years: List[Tuple[Path, Optional[int], Optional[List[int]]]] = []
+        rg_audit = {"files_gap": 0, "row_groups": 0, "pruned_null": 0, "pruned_gap": 0, "mixed": 0}
+        for f in files:
+            y = name_years[f]
+            if y is not None and train_max_year < y < cut:
+                rg_audit["files_gap"] += 1
+                continue
+            infos = rg_infos.get(f)
+            if infos is None:
+                file_years.append((f, y, None))
+                continue
+            keep: List[int] = []
+            for info in infos:
+                rg_audit["row_groups"] += 1
+                if info.all_null:
+                    rg_audit["pruned_null"] += 1
+                    continue
+                if y is None:
+                    r = rowgroups.route(info, train_max_year, cut)
+                    if r == rowgroups.ROUTE_GAP:
+                        rg_audit["pruned_gap"] += 1
+                        continue
+                    if r == rowgroups.ROUTE_MIXED:
+                        rg_audit["mixed"] += 1
+                keep.append(info.index)
+            file_years.append((f, y, None if len(keep) == len(infos) else keep))
+        self.log.info(
+            f"[ROWGROUPS] row_groups={rg_audit['row_groups']} | podados: "
+            f"nulos={rg_audit['pruned_null']} gap={rg_audit['pruned_gap']} | "
+            f"mistos={rg_audit['mixed']} | arquivos no gap={rg_audit['files_gap']}"
+        )
+
         train_parts: List[pd.DataFrame] = []
         test_parts: List[pd.DataFrame] = []
 
@@ -989,27 +1303,46 @@ class TrainingOrchestrator:
 
         valid_features: Optional[List[str]] = None
 
+        eff_batch_rows = int(batch_rows if batch_rows is not None else _DEFAULT_BATCH_ROWS)
+        read_workers = max(1, min(_READ_WORKERS, len(file_years)))
+        self.log.info(
+            f"[LOAD] streaming chunks batch_rows={eff_batch_rows:,} "
+            f"(pyarrow iter_batches + float32 cast) | read_workers={read_workers} "
+            f"prefetch_budget={_PREFETCH_BUDGET_MB} MiB"
+        )
+
+        # Leitura/cast rodam nas threads de prefetch; filtro, amostragem e a
+        # conversao para pandas (so das linhas mantidas) seguem na thread
+        # principal, na ordem dos arquivos (mesmos chunks e mesmos seeds do
+        # caminho sequencial).
+        stage = StageTimings()
+        prefetch_stats: Dict[str, int] = {}
+        t_load0 = time.perf_counter()
         pbar = tqdm(
-            file_years,
+            prefetch_ordered(
+                file_years,
+                lambda fy: self._iter_parquet_chunks_f32(
+                    fy[0], cols, batch_rows=eff_batch_rows, timings=stage,
+                    as_arrow=True, row_groups=fy[2],
+                ),
+                workers=read_workers,
+                budget_bytes=_PREFETCH_BUDGET_MB * 1024 * 1024,
+                nbytes=_chunk_nbytes,
+                stats=prefetch_stats,
+            ),
             desc="[LOAD] parquets",
             unit="arq",
             total=len(file_years),
             leave=True,
         )
 
-        eff_batch_rows = int(batch_rows if batch_rows is not None else _DEFAULT_BATCH_ROWS)
-        self.log.info(
-            f"[LOAD] streaming chunks batch_rows={eff_batch_rows:,} "
-            f"(pyarrow iter_batches + float32 cast)"
-        )
-
-        for f, y_from_name in pbar:
+        for (f, y_from_name, _rgs), chunks in pbar:
             try:
                 pbar.set_postfix_str(f.name[:28], refresh=False)
 
-                # Partition e decidida pelo ano do nome do arquivo; todo o
-                # arquivo vai inteiro para train ou test. Se nao tiver ano
-                # no nome, cairia no fallback de _load_concat acima.
+                # Com ano no nome, o arquivo vai inteiro para train ou test.
+                # Sem ano no nome (multi-ano), cada linha e roteada pelo ANO:
+                # train <= train_max_year, test >= cut, gap descartado.
                 is_train = (
                     bool(y_from_name <= train_max_year)
                     if y_from_name is not None
@@ -1018,74 +1351,82 @@ class TrainingOrchestrator:
 
                 chunk_idx = 0
                 budget_hit = False
-                for df in self._iter_parquet_chunks_f32(f, cols, batch_rows=eff_batch_rows):
+                while True:
+                    with stage.timed("wait"):
+                        chunk = next(chunks, None)
+                    if chunk is None:
+                        break
                     chunk_idx += 1
 
                     if valid_features is None:
-                        valid_features = [ft for ft in self.features if ft in df.columns]
+                        names = (
+                            chunk.columns if isinstance(chunk, pd.DataFrame)
+                            else chunk.schema.names
+                        )
+                        valid_features = [ft for ft in self.features if ft in names]
 
                     if not valid_features:
                         raise RuntimeError("Nenhuma feature valida encontrada no parquet.")
 
-                    # Limpeza / coerção (sempre in-place para evitar copias).
-                    df.dropna(subset=valid_features + [self.target, self.year_col], inplace=True)
-
-                    df[self.year_col] = pd.to_numeric(df[self.year_col], errors="coerce")
-                    df.dropna(subset=[self.year_col], inplace=True)
-                    df[self.year_col] = df[self.year_col].astype("int32")
-
-                    _coerce_binary_target(df, self.target)
-
-                    total_rows_seen += int(len(df))
-
-                    # Para filenames sem ano, decide por chunk usando y_max.
-                    if is_train is None:
-                        y_max = int(df[self.year_col].max()) if len(df) else -999999
-                        chunk_is_train = bool(y_max <= train_max_year)
-                    else:
-                        chunk_is_train = is_train
-
-                    # Downsampling por chunk: mantem 100% dos positivos e
-                    # limita negativos de acordo com budget global restante.
-                    if chunk_is_train and max_train_rows is not None:
-                        remaining = max(0, int(max_train_rows) - int(kept_train))
-                        if remaining <= 0:
-                            budget_hit = True
-                            del df
-                            continue
-                        df = _downsample_keep_all_pos(
-                            df=df,
-                            target=self.target,
-                            max_rows_remaining=remaining,
-                            neg_pos_ratio=neg_pos_ratio,
-                            min_neg_keep=min_neg_keep_per_chunk,
-                            seed=self.random_seed + int(y_from_name or 0) + chunk_idx,
+                    # Limpeza / coercao sobre o batch Arrow: so posicoes + alvo
+                    # e ano das linhas validas; features ainda nao convertidas.
+                    with stage.timed("filter"):
+                        rows, y_arr, yr_arr = _chunk_keep_rows(
+                            chunk, valid_features, self.target, self.year_col
                         )
 
-                    if (not chunk_is_train) and max_test_rows is not None:
-                        remaining = max(0, int(max_test_rows) - int(kept_test))
-                        if remaining <= 0:
-                            budget_hit = True
-                            del df
-                            continue
-                        df = _downsample_keep_all_pos(
-                            df=df,
-                            target=self.target,
-                            max_rows_remaining=remaining,
-                            neg_pos_ratio=neg_pos_ratio,
-                            min_neg_keep=min_neg_keep_per_chunk,
-                            seed=self.random_seed + 10_000 + int(y_from_name or 0) + chunk_idx,
-                        )
+                    total_rows_seen += int(len(rows))
 
-                    if chunk_is_train:
-                        train_parts.append(df)
-                        kept_train += int(len(df))
+                    if is_train is None:
+                        in_train = yr_arr <= train_max_year
+                        in_test = yr_arr >= cut
+                        routed = [
+                            (True, rows[in_train], y_arr[in_train], yr_arr[in_train]),
+                            (False, rows[in_test], y_arr[in_test], yr_arr[in_test]),
+                        ]
+                        routed = [r for r in routed if len(r[1])]
                     else:
-                        test_parts.append(df)
-                        kept_test += int(len(df))
-
-                    # Libera referencia local antes do proximo batch.
-                    del df
+                        routed = [(is_train, rows, y_arr, yr_arr)]
+
+                    for chunk_is_train, rows_s, y_s, yr_s in routed:
+                        # Downsampling por chunk: mantem 100% dos positivos e
+                        # limita negativos de acordo com budget global restante.
+                        # Mesmas posicoes/ordem que _downsample_keep_all_pos.
+                        budget = max_train_rows if chunk_is_train else max_test_rows
+                        if budget is not None:
+                            kept = kept_train if chunk_is_train else kept_test
+                            remaining = max(0, int(budget) - int(kept))
+                            if remaining <= 0:
+                                budget_hit = True
+                                continue
+                            seed_base = self.random_seed if chunk_is_train else self.random_seed + 10_000
+                            with stage.timed("sample"):
+                                keep = _downsample_positions(
+                                    y_s,
+                                    max_rows_remaining=remaining,
+                                    neg_pos_ratio=neg_pos_ratio,
+                                    min_neg_keep=min_neg_keep_per_chunk,
+                                    seed=seed_base + int(y_from_name or 0) + chunk_idx,
+                                )
+                            rows_s, y_s, yr_s = rows_s[keep], y_s[keep], yr_s[keep]
+
+                        with stage.timed("to_pandas"):
+                            df = _materialize_rows(
+                                chunk, rows_s, valid_features, y_s, yr_s,
+                                self.target, self.year_col,
+                            )
+
+                        if chunk_is_train:
+                            train_parts.append(df)
+                            kept_train += int(len(df))
+                        else:
+                            test_parts.append(df)
+                            kept_test += int(len(df))
+
+                        # Libera referencia local antes do proximo batch.
+                        del df
+
+                    del chunk
 
                 if budget_hit:
                     # Stream pode ter parado cedo por causa do orcamento;
@@ -1112,17 +1453,29 @@ class TrainingOrchestrator:
         if valid_features is None:
             raise RuntimeError("[LOAD] nenhum parquet foi carregado com sucesso.")
 
-        train_df = _concat_parts_low_mem(
-            train_parts, valid_features, self.target, self.year_col, self.log
-        )
-        train_parts.clear()
-        gc.collect()
+        t_stream = time.perf_counter() - t_load0
+        with stage.timed("concat"):
+            train_df = _concat_parts_low_mem(
+                train_parts, valid_features, self.target, self.year_col, self.log
+            )
+            train_parts.clear()
+            gc.collect()
 
-        test_df = _concat_parts_low_mem(
-            test_parts, valid_features, self.target, self.year_col, self.log
+            test_df = _concat_parts_low_mem(
+                test_parts, valid_features, self.target, self.year_col, self.log
+            )
+            test_parts.clear()
+            gc.collect()
+
+        # read/cast somam tempo de CPU das threads de prefetch; wait e o tempo
+        # que a thread principal ficou bloqueada esperando chunk; to_pandas so
+        # converte as linhas que sobreviveram ao filtro/amostragem.
+        self.log.info(
+            f"[LOAD-TIMING] {stage.format(['read', 'cast'])} (threads) | "
+            f"{stage.format(['wait', 'filter', 'sample', 'to_pandas', 'concat'])} (principal) | "
+            f"stream_wall={t_stream:.2f}s | "
+            f"pico_prefetch={prefetch_stats.get('peak_inflight_bytes', 0) / 1024**2:.0f} MiB"
         )
-        test_parts.clear()
-        gc.collect()
 
         # Os parquets sao descobertos por ordem alfabetica do filename
         # (inmet_bdq_YYYY_*.parquet) -> ja chegam em ordem cronologica e
@@ -1201,6 +1554,8 @@ class TrainingOrchestrator:
             "train_max_year": train_max_year if years else None,
             "test_size_years": test_size_years,
             "gap_years": gap_years,
+            "row_groups": rg_audit,
+            "load_timing_s": {k: round(v, 3) for k, v in stage.seconds.items()},
             "source": self._last_source_audit,
             "train": train_stats,
             "test": test_stats,
@@ -1438,7 +1793,10 @@ class TrainingOrchestrator:
                 MemoryMonitor.log_usage(self.log, "pos-fit")
 
                 thr = float(st.get("thr", 0.5))
-                metrics = trainer.evaluate(X_te, y_te, thr=thr)
+                n_days, neg_weight = alert_rate_context(
+                    getattr(self, "_last_data_audit", None) or {}, y_te
+                )
+                metrics = trainer.evaluate(X_te, y_te, thr=thr, n_days=n_days, neg_weight=neg_weight)
                 MemoryMonitor.log_usage(self.log, "pos-eval")
 
                 _da = getattr(self, "_last_data_audit", None) or {}
@@ -1771,6 +2129,15 @@ def build_arg_parser() -> argparse.ArgumentParser:
         help="Ex.: logistic, xgboost, random_forest",
     )
 
+    # --- fold-cache-report ---
+    pfc = sub.add_parser(
+        "fold-cache-report",
+        help="Hit rate e fit-seconds economizados pelo cache por fold do GridSearch.",
+    )
+    pfc.add_argument("--db", type=Path, default=None, metavar="PATH",
+                     help="folds.sqlite (default: data/_article/_caches/gridsearch/folds.sqlite)")
+    pfc.add_argument("--json", action="store_true", help="Saida em JSON.")
+
     # --- interactive ---
     sub.add_parser(
         "interactive",
@@ -1924,6 +2291,21 @@ def cmd_describe_variations(args: argparse.Namespace) -> None:
         print(f"  [{o.key}] {o.label}")
 
 
+def cmd_fold_cache_report(args: argparse.Namespace) -> None:
+    from src.ml import fold_cache
+
+    path = args.db or fold_cache.default_path()
+    if not Path(path).is_file():
+        print(f"[ERROR] fold cache nao encontrado: {path}")
+        sys.exit(2)
+    store = fold_cache.FoldCache(path)
+    try:
+        rep = store.report()
+    finally:
+        store.close()
+    print(json.dumps(rep, indent=2) if args.json else fold_cache.format_report(rep))
+
+
 def cmd_interactive(_args: argparse.Namespace) -> None:
     cfg = utils.loadConfig()
     scens = cfg.get("modeling_scenarios") or {}
@@ -2045,6 +2427,8 @@ def main(argv: Optional[List[str]] = None) -> None:
         cmd_list_models(args)
     elif cmd == "describe-variations":
         cmd_describe_variations(args)
+    elif cmd == "fold-cache-report":
+        cmd_fold_cache_report(args)
     elif cmd == "interactive":
         cmd_interactive(args)
     else:
@@ -0,0 +1,452 @@
+# src/tsf_ewma_state.py
+# =============================================================================
+# ESTADO ENTRE ANOS PARA EWMA + LAGS (tsf_ewma_* / tsf_lag_*)
+#
+# Os parquets sao processados ano a ano; sem estado, todo 1o de janeiro
+# reinicia a recursao EWMA e deixa tsf_lag_*_{k}h NaN nas k primeiras horas
+# de cada cidade. Aqui a recursao continua de onde o ano anterior parou:
+#
+#   - EWMA: por (cidade, coluna, alpha) guarda (weighted, old_wt), o estado
+#     exato de pandas ewm(adjust=False, ignore_na=False). Retomar com ele e
+#     bit-a-bit igual a rodar a serie concatenada.
+#   - Lags: por (cidade, coluna) guarda as ultimas K linhas (K = maior lag),
+#     um ring buffer que alimenta shift(k) no inicio do ano seguinte.
+#
+# O estado de fim de ano vira um sidecar pequeno (.npz) por cenario/ano,
+# validado por fingerprint (alphas + lags configurados) e pelas assinaturas
+# (nome/tamanho/mtime) de todos os parquets de origem que alimentaram a
+# cadeia ate aquele ano: regenerar qualquer ano anterior invalida o sidecar.
+# Compartilhado por src/feature_engineering_temporal.py (legado D/E/F) e
+# src/article/temporal_fusion_article.py.
+# =============================================================================
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+STATE_VERSION = 2
+STATE_SUBDIR = "_state"
+
+# (slug, coluna, lags em horas)
+Target = Tuple[str, str, List[int]]
+
+
+def ewma_alpha(alpha: float) -> float:
+    """Alpha efetivo de pandas (alpha -> com -> 1/(1+com)), para paridade bit-a-bit."""
+    com = 1.0 / alpha - 1.0
+    return 1.0 / (1.0 + com)
+
+
+def carry_fingerprint(targets: List[Target], alphas: Dict[str, float]) -> str:
+    payload = {
+        "version": STATE_VERSION,
+        "alphas": {k: float(v) for k, v in sorted(alphas.items())},
+        "targets": {slug: [col, sorted(int(l) for l in lags)] for slug, col, lags in targets},
+    }
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False)
+
+
+def state_path(state_dir: Path, year: int) -> Path:
+    return Path(state_dir) / STATE_SUBDIR / f"ewma_lags_{year}.npz"
+
+
+def source_signature(path: Optional[Path]) -> Dict[str, Any]:
+    """Nome/tamanho/mtime do parquet de origem de um ano ({} se ausente)."""
+    if path is None or not Path(path).exists():
+        return {}
+    st = Path(path).stat()
+    return {"name": Path(path).name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class EwmaLagCarry:
+    """Estado de fim de ano por cidade: EWMA (weighted, old_wt) e cauda para lags."""
+
+    def __init__(
+        self,
+        cities: np.ndarray,
+        ewma: Dict[str, np.ndarray],
+        tails: Dict[str, np.ndarray],
+        year: int,
+        fingerprint: str,
+        sources: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> None:
+        # ewma[f"{col}|{aname}"] -> (n_cities, 2) float64 [weighted, old_wt]
+        # tails[col]             -> (n_cities, K) float64, mais antigo primeiro
+        # sources[ano]           -> source_signature do parquet daquele ano
+        self.cities = np.asarray(cities, dtype=str)
+        self.ewma = ewma
+        self.tails = tails
+        self.year = int(year)
+        self.fingerprint = fingerprint
+        self.sources = {int(y): dict(sig) for y, sig in (sources or {}).items()}
+        self._pos = {c: i for i, c in enumerate(self.cities)}
+
+    # ------------------------------------------------------------------
+    # Alinhamento com as cidades de um ano
+    # ------------------------------------------------------------------
+    def _rows_for(self, cities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        idx = np.array([self._pos.get(c, -1) for c in cities], dtype=np.int64)
+        return idx, idx >= 0
+
+    def ewma_init(self, key: str, cities: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(weighted, old_wt) iniciais por cidade; cidades novas comecam vazias."""
+        w = np.full(len(cities), np.nan)
+        ow = np.ones(len(cities))
+        block = self.ewma.get(key)
+        if block is not None:
+            idx, hit = self._rows_for(cities)
+            w[hit] = block[idx[hit], 0]
+            ow[hit] = block[idx[hit], 1]
+        return w, ow
+
+    def tail_init(self, col: str, cities: np.ndarray, k: int) -> np.ndarray:
+        """Ultimas k linhas por cidade (NaN a esquerda quando faltar historico)."""
+        out = np.full((len(cities), k), np.nan)
+        block = self.tails.get(col)
+        if block is not None and k > 0:
+            idx, hit = self._rows_for(cities)
+            m = min(k, block.shape[1])
+            out[hit, k - m:] = block[idx[hit], block.shape[1] - m:]
+        return out
+
+    # ------------------------------------------------------------------
+    # Persistencia (.npz sem pickle)
+    # ------------------------------------------------------------------
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays: Dict[str, np.ndarray] = {"cities": self.cities}
+        for i, (key, block) in enumerate(self.ewma.items()):
+            arrays[f"ewma_{i}"] = block
+        for i, (col, block) in enumerate(self.tails.items()):
+            arrays[f"tail_{i}"] = block
+        meta = {
+            "year": self.year,
+            "fingerprint": self.fingerprint,
+            "ewma_keys": list(self.ewma.keys()),
+            "tail_cols": list(self.tails.keys()),
+            "sources": {str(y): sig for y, sig in sorted(self.sources.items())},
+        }
+        arrays["meta"] = np.array(json.dumps(meta, ensure_ascii=False))
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        fingerprint: str,
+        year: int,
+        year_files: Optional[Dict[int, Path]] = None,
+    ) -> Optional["EwmaLagCarry"]:
+        """Carrega e valida; None se ausente, corrompido, de outra config/ano
+        ou (com year_files) se algum parquet de origem da cadeia mudou."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                if meta.get("fingerprint") != fingerprint or int(meta.get("year")) != int(year):
+                    return None
+                sources = {int(y): sig for y, sig in meta.get("sources", {}).items()}
+                if year_files is not None:
+                    if int(year) not in sources:
+                        return None
+                    for y, sig in sources.items():
+                        if sig != source_signature(year_files.get(y)):
+                            return None
+                ewma = {k: z[f"ewma_{i}"] for i, k in enumerate(meta["ewma_keys"])}
+                tails = {c: z[f"tail_{i}"] for i, c in enumerate(meta["tail_cols"])}
+                return cls(z["cities"], ewma, tails, meta["year"], fingerprint, sources)
+        except Exception:
+            return None
+
+
+# ============================================================================
+# Kernels com estado
+# ============================================================================
+def _group_layout(cities: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Inicio, tamanho e nome de cada bloco contiguo de cidade."""
+    n = len(cities)
+    if n == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), cities[:0]
+    boundary = np.empty(n, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = cities[1:] != cities[:-1]
+    starts = np.flatnonzero(boundary)
+    lens = np.diff(np.append(starts, n))
+    return starts, lens, cities[starts]
+
+
+def ewma_multi_with_carry(
+    vals: np.ndarray,
+    starts: np.ndarray,
+    lens: np.ndarray,
+    alphas: np.ndarray,
+    w0: np.ndarray,
+    ow0: np.ndarray,
+    out: np.ndarray,
+    out_cols: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Kernel fundido: ewm(alpha, adjust=False).mean() para V variaveis x A alphas.
+
+    vals: (n, V) float64, linhas ordenadas por cidade/tempo; w0/ow0: (G, V, A)
+    com o estado (weighted, old_wt) de entrada por cidade. Escreve em
+    out[:, out_cols] (default: as V*A primeiras colunas), na ordem
+    variavel-major (v*A + a), no dtype de `out`.
+
+    Uma unica passada no tempo: a cada passo t, todas as cidades ainda ativas
+    avancam a recursao de todas as variaveis e alphas de uma vez, sobre um
+    layout (tempo, cidade, variavel) preenchido uma unica vez. A conta e
+    feita em float64 exatamente como em pandas (inclusive NaN com
+    ignore_na=False), e so o resultado e convertido. Retorna (w, ow) finais.
+    """
+    n, V = vals.shape
+    a = np.array([ewma_alpha(float(x)) for x in alphas], dtype=np.float64)
+    factor = 1.0 - a
+    A = len(a)
+    cols = np.arange(V * A) if out_cols is None else np.asarray(out_cols, dtype=np.int64)
+    w_final = w0.astype(np.float64, copy=True)
+    ow_final = ow0.astype(np.float64, copy=True)
+    if n == 0 or V * A == 0:
+        return w_final, ow_final
+
+    # Cidades por tamanho decrescente: no passo t as ativas sao um prefixo
+    # contiguo, e o estado/entrada viram fatias (views) sem gather por passo.
+    order = np.argsort(-lens, kind="stable")
+    sorted_lens = lens[order]
+    max_len = int(sorted_lens[0])
+    n_active = np.searchsorted(-sorted_lens, -np.arange(max_len), side="left")
+    G = len(order)
+    t_idx = np.arange(n) - np.repeat(starts, lens)
+    rank = np.empty(G, dtype=np.int64)
+    rank[order] = np.arange(G)
+    g_idx = np.repeat(rank, lens)
+
+    padded = np.full((max_len, G, V), np.nan)
+    padded[t_idx, g_idx] = vals
+    res = np.empty((max_len, G, V * A), dtype=out.dtype)
+
+    w = w_final[order]
+    ow = ow_final[order]
+    for t in range(max_len):
+        k = n_active[t]
+        wv = w[:k]
+        owv = ow[:k]
+        cur = padded[t, :k, :, None]
+        obs = cur == cur
+        seen = wv == wv
+        np.multiply(owv, factor, out=owv, where=seen)
+        upd = seen & obs
+        neq = upd & (wv != cur)
+        with np.errstate(invalid="ignore"):
+            new = (owv * wv + a * cur) / (owv + a)
+        np.copyto(wv, new, where=neq)
+        np.copyto(owv, 1.0, where=upd)
+        np.copyto(wv, np.broadcast_to(cur, wv.shape), where=~seen & obs)
+        res[t, :k] = wv.reshape(k, V * A)
+    del padded
+
+    out[:, cols] = res[t_idx, g_idx]
+    w_final[order] = w
+    ow_final[order] = ow
+    return w_final, ow_final
+
+
+def lags_with_carry(
+    vals: np.ndarray,
+    starts: np.ndarray,
+    lens: np.ndarray,
+    lags: List[int],
+    tail0: np.ndarray,
+    out: np.ndarray,
+    out_cols: List[int],
+) -> np.ndarray:
+    """shift(lag) por grupo, com as primeiras linhas vindas da cauda do ano anterior.
+
+    tail0: (n_grupos, K) com K >= max(lags). Escreve cada lag em
+    out[:, out_cols[i]] e retorna a nova cauda.
+    """
+    n = len(vals)
+    G, K = tail0.shape
+    # Layout estendido: [cauda_g (K), valores_g] para cada cidade.
+    ext = np.empty(n + G * K, dtype=np.float64)
+    group_id = np.repeat(np.arange(G), lens)
+    row_ext = np.arange(n) + (group_id + 1) * K
+    tail_ext = (starts + np.arange(G) * K)[:, None] + np.arange(K)[None, :]
+    ext[tail_ext.ravel()] = tail0.ravel()
+    ext[row_ext] = vals
+    for lag, j in zip(lags, out_cols):
+        out[:, j] = ext[row_ext - int(lag)]
+    end_ext = starts + lens + (np.arange(G) + 1) * K
+    return ext[end_ext[:, None] - K + np.arange(K)[None, :]] if K else tail0.copy()
+
+
+def ewma_lags_with_carry(
+    df_agg: pd.DataFrame,
+    targets: List[Target],
+    alphas: Dict[str, float],
+    carry: Optional[EwmaLagCarry],
+    year: int,
+    fingerprint: str,
+    dtype=np.float32,
+    source: Optional[Path] = None,
+) -> Tuple[pd.DataFrame, EwmaLagCarry]:
+    """Gera tsf_ewma_*/tsf_lag_* de um ano (df_agg ordenado por cidade/_ts) e o novo estado.
+
+    Todas as features saem de um unico bloco pre-alocado (n, n_features) em
+    `dtype` (float32 por padrao), preenchido pelo kernel fundido de EWMA e
+    pelos gathers de lag. `source` (parquet do ano) entra nas assinaturas de
+    origem do novo estado, junto com as herdadas do carry.
+    """
+    cities_rows = df_agg["cidade_norm"].to_numpy()
+    starts, lens, cities = _group_layout(cities_rows)
+    cities = np.asarray(cities, dtype=str)
+    G = len(cities)
+    anames = list(alphas.keys())
+    alpha_vals = np.array([float(alphas[k]) for k in anames], dtype=np.float64)
+    A = len(anames)
+
+    # Layout das colunas: por variavel, A colunas EWMA seguidas dos lags.
+    col_names: List[str] = []
+    ewma_cols: List[int] = []
+    lag_cols: List[List[int]] = []
+    for slug, _col, lags in targets:
+        for aname in anames:
+            ewma_cols.append(len(col_names))
+            col_names.append(f"tsf_ewma_{slug}_{aname}")
+        lag_cols.append([])
+        for lag_h in lags:
+            lag_cols[-1].append(len(col_names))
+            col_names.append(f"tsf_lag_{slug}_{int(lag_h)}h")
+
+    n = len(df_agg)
+    block = np.empty((n, len(col_names)), dtype=dtype, order="F")
+    vals = df_agg[[col for _, col, _ in targets]].to_numpy(dtype=np.float64) \
+        if targets else np.empty((n, 0))
+
+    # --- EWMA: todas as variaveis x alphas numa unica passada ---
+    V = len(targets)
+    w0 = np.full((G, V, A), np.nan)
+    ow0 = np.ones((G, V, A))
+    if carry is not None:
+        for v, (_slug, col, _lags) in enumerate(targets):
+            for ai, aname in enumerate(anames):
+                w0[:, v, ai], ow0[:, v, ai] = carry.ewma_init(f"{col}|{aname}", cities)
+    w, ow = ewma_multi_with_carry(
+        vals, starts, lens, alpha_vals, w0, ow0, block, np.asarray(ewma_cols, dtype=np.int64)
+    )
+
+    ewma_state: Dict[str, np.ndarray] = {}
+    for v, (_slug, col, _lags) in enumerate(targets):
+        for ai, aname in enumerate(anames):
+            ewma_state[f"{col}|{aname}"] = np.column_stack([w[:, v, ai], ow[:, v, ai]])
+
+    # --- Lags: gather sobre o layout [cauda, ano] por variavel ---
+    tail_state: Dict[str, np.ndarray] = {}
+    for v, (_slug, col, lags) in enumerate(targets):
+        K = max((int(l) for l in lags), default=0)
+        if carry is not None:
+            tail0 = carry.tail_init(col, cities, K)
+        else:
+            tail0 = np.full((G, K), np.nan)
+        tail_state[col] = lags_with_carry(
+            vals[:, v], starts, lens, lags, tail0, block, lag_cols[v]
+        )
+
+    result = pd.concat(
+        [
+            df_agg[["cidade_norm", "_ts"]].reset_index(drop=True),
+            pd.DataFrame(block, columns=col_names, copy=False),
+        ],
+        axis=1,
+    )
+    result.index = df_agg.index
+    new_carry = _merge_carry(carry, cities, ewma_state, tail_state, year, fingerprint)
+    new_carry.sources = {**(carry.sources if carry is not None else {}), int(year): source_signature(source)}
+    return result, new_carry
+
+
+def _merge_carry(
+    prev: Optional[EwmaLagCarry],
+    cities: np.ndarray,
+    ewma_state: Dict[str, np.ndarray],
+    tail_state: Dict[str, np.ndarray],
+    year: int,
+    fingerprint: str,
+) -> EwmaLagCarry:
+    """Cidades ausentes no ano mantem o estado anterior (como um dict.update)."""
+    if prev is None:
+        return EwmaLagCarry(cities, ewma_state, tail_state, year, fingerprint)
+    current = set(cities)
+    keep = np.array([c not in current for c in prev.cities], dtype=bool)
+    old_cities = prev.cities[keep]
+    all_cities = np.concatenate([cities, old_cities])
+    ewma: Dict[str, np.ndarray] = {}
+    for key, block in ewma_state.items():
+        old = prev.ewma.get(key)
+        if old is None:
+            old = np.column_stack([np.full(len(old_cities), np.nan), np.ones(len(old_cities))])
+        else:
+            old = old[keep]
+        ewma[key] = np.vstack([block, old])
+    tails: Dict[str, np.ndarray] = {}
+    for col, block in tail_state.items():
+        K = block.shape[1]
+        old = prev.tail_init(col, old_cities, K)
+        tails[col] = np.vstack([block, old])
+    return EwmaLagCarry(all_cities, ewma, tails, year, fingerprint)
+
+
+# ============================================================================
+# Resolucao do estado de entrada de um ano (com recomputo da cadeia)
+# ============================================================================
+def resolve_incoming_carry(
+    year: int,
+    year_files: Dict[int, Path],
+    state_dir: Path,
+    fingerprint: str,
+    build_agg: Callable[[Path], pd.DataFrame],
+    targets_for: Callable[[pd.DataFrame], List[Target]],
+    alphas: Dict[str, float],
+    log=None,
+) -> Optional[EwmaLagCarry]:
+    """Estado de fim do ano anterior (year-1) para retomar `year`.
+
+    Usa o sidecar valido quando existe (mesma config e mesmos parquets de
+    origem na cadeia). Se faltar ou estiver obsoleto (ex.: rodada parcial com
+    --years, ano anterior regenerado), recomputa so o estado, a partir do
+    ultimo sidecar valido da cadeia de anos consecutivos, sem regravar
+    parquets. Sem ano anterior contiguo, retorna None (recursao comeca do zero).
+    """
+    prev = year - 1
+    if prev not in year_files:
+        return None
+
+    # Volta ate achar um sidecar valido ou o inicio da cadeia contigua.
+    chain: List[int] = []
+    carry: Optional[EwmaLagCarry] = None
+    y = prev
+    while y in year_files:
+        carry = EwmaLagCarry.load(state_path(state_dir, y), fingerprint, y, year_files)
+        if carry is not None:
+            break
+        chain.append(y)
+        y -= 1
+
+    for y in reversed(chain):
+        if log is not None:
+            log.info(f"[ewma_lags carry] sidecar ausente/invalido para {y}; recomputando estado.")
+        df_agg = build_agg(year_files[y])
+        _, carry = ewma_lags_with_carry(
+            df_agg, targets_for(df_agg), alphas, carry, y, fingerprint, source=year_files[y]
+        )
+        carry.save(state_path(state_dir, y))
+        del df_agg
+    return carry
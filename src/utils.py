@@ -352,6 +352,24 @@ def list_files(root: Path | str, patterns: Iterable[str]) -> List[Path]:
         out.extend(root.rglob(pat))
     return sorted(set(out))
 
+# Parquets de modelagem: ordenados por ANO/ts_hour e com row groups deste
+# tamanho, o min/max de ANO e os null_count do footer ficam seletivos o
+# bastante para o train_runner podar/rotear row groups sem decodifica-los.
+PARQUET_ROW_GROUP_ROWS = 250_000
+PARQUET_SORT_COLS = ("ANO", "ts_hour")
+
+
+def sort_for_parquet_stats(df: pd.DataFrame, cols: Iterable[str] = PARQUET_SORT_COLS) -> pd.DataFrame:
+    """Ordena (estavel) pelas colunas de `cols` presentes; ja ordenado ou sem elas, devolve df."""
+    keys = [c for c in cols if c in df.columns]
+    if not keys:
+        return df
+    order = df[keys[0]] if len(keys) == 1 else pd.MultiIndex.from_frame(df[keys])
+    if order.is_monotonic_increasing:
+        return df
+    return df.sort_values(keys, kind="mergesort").reset_index(drop=True)
+
+
 def normalize_key(s: str | None) -> str:
     """
     Normaliza strings para matching robusto:
@@ -375,6 +393,17 @@ def normalize_key(s: str | None) -> str:
     s = re.sub(r"\s+", " ", s)
     return s
 
+
+def normalize_key_series(values: pd.Series) -> pd.Series:
+    """
+    Equivalente a `values.map(normalize_key)`, mas normaliza cada valor distinto
+    uma única vez (cidades/municípios se repetem milhares de vezes por arquivo).
+    NaN/None seguem o mesmo caminho de `normalize_key` (str(nan) -> "nan"; None -> "").
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    table = pd.Index(uniques, dtype=object).map(normalize_key).to_numpy(dtype=object)
+    return pd.Series(table[codes], index=values.index, name=values.name)
+
 # -----------------------------------------------------------------------------
 # [SEÇÃO 4] HTTP / SCRAPING
 # -----------------------------------------------------------------------------